@@ -0,0 +1,104 @@
+"""
+Comparaison des estimations d'accuracy out-of-bag et validation croisée
+Pour chaque dataset fourni : une forêt avec oob_score, puis la validation
+croisée 5 plis sur la même matrice TF-IDF, et l'accuracy sur le split de test
+comme référence
+Auteur: Assistant IA
+Date: 2025-07-26
+"""
+
+import os
+import json
+import time
+import argparse
+from typing import Dict, Any, List
+
+from sklearn.metrics import accuracy_score
+
+from preprocessing import TextPreprocessor
+from train_model import PCAPredictionModel
+from parallel_cv import SharedMemoryCV
+
+
+DEFAULT_DATASETS = [
+    'data/gim_diagnostic_dataset.csv',
+    'data/gim_diagnostic_dataset_augmented.csv'
+]
+
+
+def compare_on_dataset(data_path: str, cv: int = 5) -> Dict[str, Any]:
+    """
+    Compare OOB et validation croisée sur un dataset
+
+    Args:
+        data_path (str): Chemin du CSV
+        cv (int): Nombre de plis de la validation croisée
+
+    Returns:
+        Dict[str, Any]: Estimations, écart et temps de calcul
+    """
+    preprocessor = TextPreprocessor()
+    model = PCAPredictionModel()
+
+    _, X, y = preprocessor.load_and_preprocess_data(data_path)
+    X_train, X_test, y_train, y_test = model.prepare_data(X, y)
+
+    # Forêt unique avec estimation out-of-bag
+    start = time.perf_counter()
+    train_metrics = model.train(X_train, y_train, validation='oob')
+    oob_time = time.perf_counter() - start
+
+    # Validation croisée sur la même matrice (k forêts supplémentaires)
+    X_train_tfidf = model.vectorizer.transform(X_train)
+    start = time.perf_counter()
+    cv_scores = SharedMemoryCV(n_splits=cv).run(model.rf_params, X_train_tfidf, y_train)['scores']
+    cv_time = time.perf_counter() - start
+
+    test_accuracy = accuracy_score(y_test, model.model.predict(model.vectorizer.transform(X_test)))
+
+    return {
+        'dataset': data_path,
+        'n_train': len(X_train),
+        'n_classes': len(model.label_encoder.classes_),
+        'oob_accuracy': train_metrics['oob_accuracy'],
+        'cv_mean_accuracy': float(cv_scores.mean()),
+        'cv_std_accuracy': float(cv_scores.std()),
+        'test_accuracy': test_accuracy,
+        'oob_cv_gap': train_metrics['oob_accuracy'] - float(cv_scores.mean()),
+        'oob_total_time_s': oob_time,
+        'cv_extra_time_s': cv_time
+    }
+
+
+def print_comparison(rows: List[Dict[str, Any]]) -> None:
+    """Affiche le tableau comparatif"""
+    print("\n📊 OUT-OF-BAG vs VALIDATION CROISÉE")
+    print("-" * 96)
+    print(f"{'Dataset':<45}{'OOB':>8}{'CV':>8}{'±':>7}{'Test':>8}{'Écart':>8}{'t OOB':>6}{'t CV':>6}")
+    for row in rows:
+        print(f"{os.path.basename(row['dataset']):<45}"
+              f"{row['oob_accuracy']:>8.4f}{row['cv_mean_accuracy']:>8.4f}{row['cv_std_accuracy']:>7.4f}"
+              f"{row['test_accuracy']:>8.4f}{row['oob_cv_gap']:>+8.4f}"
+              f"{row['oob_total_time_s']:>5.0f}s{row['cv_extra_time_s']:>5.0f}s")
+    print("t OOB: entraînement complet avec OOB ; t CV: coût supplémentaire de la validation croisée")
+
+
+def main():
+    """Fonction principale"""
+    parser = argparse.ArgumentParser(description='Comparaison OOB / validation croisée')
+    parser.add_argument('--data', nargs='+', default=DEFAULT_DATASETS, help='Datasets à comparer')
+    parser.add_argument('--output', default='models/validation_comparison.json',
+                        help='Fichier JSON du rapport')
+    args = parser.parse_args()
+
+    rows = [compare_on_dataset(path) for path in args.data]
+    print_comparison(rows)
+
+    os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(rows, f, indent=2, ensure_ascii=False)
+    print(f"📄 Rapport sauvegardé dans: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
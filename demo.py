@@ -187,7 +187,10 @@ def show_model_performance():
         # Métriques d'entraînement
         if 'training' in results:
             train_metrics = results['training']['metrics']
-            print(f"   - Accuracy validation croisée: {train_metrics['cv_mean_accuracy']:.1%} ± {train_metrics['cv_std_accuracy']:.1%}")
+            if 'cv_mean_accuracy' in train_metrics:
+                print(f"   - Accuracy validation croisée: {train_metrics['cv_mean_accuracy']:.1%} ± {train_metrics['cv_std_accuracy']:.1%}")
+            elif train_metrics.get('oob_accuracy') is not None:
+                print(f"   - Accuracy out-of-bag: {train_metrics['oob_accuracy']:.1%}")
         
         # Métriques d'évaluation
         if 'evaluation' in results:
@@ -0,0 +1,630 @@
+"""
+Module d'inférence DistilBERT optimisée pour le projet PCA
+Quantification dynamique INT8 des couches linéaires (poids int8, activations
+quantifiées à la volée) pour l'inférence CPU : le modèle quantifié est
+sérialisé dans un cache disque, invalidé quand le checkpoint source ou la
+version de torch change, pour que les chargements suivants ne requantifient
+pas. Le rapport compare accuracy et latence pleine précision / INT8 sur le
+holdout.
+Inférence par lots : les textes sont triés par longueur en tokens, chaque
+lot n'est paddé qu'à sa plus longue séquence et la longueur est plafonnée
+par un percentile des données (inference_config.json du checkpoint) ; les
+sorties sont remises dans l'ordre d'entrée.
+Tokenisation : tokenizer rapide (Rust) en encodage par lots, et cache LRU
+borné des identifiants de tokens par texte préprocessé, lié au tokenizer et
+à la longueur maximale du modèle chargé (vidé à chaque rechargement).
+Auteur: Assistant IA
+Date: 2025-07-26
+"""
+
+import os
+import io
+import json
+import time
+import argparse
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sklearn.model_selection import train_test_split
+
+from preprocessing import TextPreprocessor
+from onnx_backend import onnx_logits
+
+# Import conditionnel pour torch
+try:
+    import torch
+    TORCH_AVAILABLE = True
+except ImportError:
+    TORCH_AVAILABLE = False
+
+
+QUANTIZED_MODEL_FILE = 'model_int8.pt'
+QUANTIZED_META_FILE = 'quantization.json'
+INFERENCE_CONFIG_FILE = 'inference_config.json'
+DEFAULT_MAX_LENGTH = 512
+DEFAULT_LENGTH_PERCENTILE = 99.0
+DEFAULT_TOKEN_CACHE_SIZE = 4096
+
+
+def default_quantized_dir(checkpoint_dir: str) -> str:
+    """Répertoire de cache INT8, à côté du checkpoint (le bundle source reste inchangé)"""
+    return checkpoint_dir.rstrip('/\\') + '_int8'
+
+
+def _select_quantized_engine() -> str:
+    """Backend des noyaux int8 : fbgemm (x86) par défaut, qnnpack sur ARM"""
+    engines = torch.backends.quantized.supported_engines
+    if 'fbgemm' not in engines and 'qnnpack' in engines:
+        torch.backends.quantized.engine = 'qnnpack'
+    return torch.backends.quantized.engine
+
+
+def quantize_dynamic_int8(model):
+    """
+    Quantifie dynamiquement les couches nn.Linear d'un modèle en int8
+
+    Args:
+        model: Modèle torch en pleine précision (mode eval)
+
+    Returns:
+        Modèle quantifié (nouvel objet)
+    """
+    _select_quantized_engine()
+    return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def load_quantized_model(load_float: Callable[[], Any], cache_dir: str,
+                         source_signature: str) -> Tuple[Any, bool]:
+    """
+    Charge le modèle INT8 depuis le cache, ou le quantifie et l'y écrit
+
+    Args:
+        load_float (Callable): Charge le modèle pleine précision (appelé seulement si le cache est invalide)
+        cache_dir (str): Répertoire du cache
+        source_signature (str): Identifiant du checkpoint source (version du bundle, repo HF...)
+
+    Returns:
+        Tuple[Any, bool]: (modèle quantifié en mode eval, True si lu depuis le cache)
+    """
+    if not TORCH_AVAILABLE:
+        raise ImportError("torch non disponible. Installez avec: pip install torch")
+
+    model_path = os.path.join(cache_dir, QUANTIZED_MODEL_FILE)
+    meta_path = os.path.join(cache_dir, QUANTIZED_META_FILE)
+    expected = {'source_signature': source_signature, 'torch_version': torch.__version__,
+                'dtype': 'qint8', 'engine': _select_quantized_engine()}
+
+    if os.path.exists(model_path) and os.path.exists(meta_path):
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        if all(meta.get(key) == value for key, value in expected.items()):
+            # Module complet (couches quantifiées incluses) : pas de reconstruction pleine précision
+            model = torch.load(model_path, weights_only=False)
+            model.eval()
+            return model, True
+
+    print("Quantification dynamique INT8 des couches linéaires...")
+    model = quantize_dynamic_int8(load_float().eval())
+
+    os.makedirs(cache_dir, exist_ok=True)
+    torch.save(model, model_path + '.tmp')
+    os.replace(model_path + '.tmp', model_path)
+    with open(meta_path, 'w', encoding='utf-8') as f:
+        json.dump(dict(expected, created_at=time.strftime('%Y-%m-%dT%H:%M:%S')), f, indent=2)
+    print(f"Modèle INT8 mis en cache dans {cache_dir}")
+    return model, False
+
+
+def load_holdout(data_path: str, test_size: float = 0.2,
+                 random_state: int = 42) -> Tuple[List[str], List[str]]:
+    """
+    Holdout du CSV, même découpage stratifié que PCAPredictionModel.prepare_data
+
+    Args:
+        data_path (str): CSV de tickets GIM
+        test_size (float): Part du holdout
+        random_state (int): Graine du découpage
+
+    Returns:
+        Tuple[List[str], List[str]]: Textes préprocessés, PCA attendues
+    """
+    _, X, y = TextPreprocessor().load_and_preprocess_data(data_path)
+    _, X_test, _, y_test = train_test_split(X, y, test_size=test_size,
+                                            random_state=random_state, stratify=y)
+    return list(X_test), list(y_test)
+
+
+def classify_text(components: Dict[str, Any], text: str) -> str:
+    """
+    Classe un texte préprocessé avec les composants DistilBERT d'un PCAPredictor
+
+    Args:
+        components (Dict[str, Any]): Composants actifs (tokenizer, distilbert_model, label_mapping)
+        text (str): Texte préprocessé
+
+    Returns:
+        str: PCA prédite
+    """
+    inputs = components['tokenizer'](text, return_tensors='pt', truncation=True,
+                                     padding=True, max_length=512)
+    with torch.no_grad():
+        class_id = int(torch.argmax(components['distilbert_model'](**inputs).logits, dim=-1).item())
+    return components['label_mapping'].get(str(class_id), f"Classe_{class_id}")
+
+
+def derive_length_cap(tokenizer, texts: Sequence[str], percentile: float = DEFAULT_LENGTH_PERCENTILE,
+                      multiple: int = 8, max_length: int = DEFAULT_MAX_LENGTH) -> int:
+    """
+    Longueur maximale en tokens tirée des données (percentile, arrondi au multiple supérieur)
+
+    Args:
+        tokenizer: Tokenizer DistilBERT
+        texts (Sequence[str]): Textes préprocessés représentatifs
+        percentile (float): Percentile des longueurs conservé sans troncature
+        multiple (int): Arrondi (multiple de 8 : formes de tenseurs régulières)
+        max_length (int): Limite du modèle (positions apprises)
+
+    Returns:
+        int: Plafond de longueur
+    """
+    lengths = [len(ids) for ids in tokenizer(list(texts), truncation=True, max_length=max_length)['input_ids']]
+    cap = int(np.ceil(np.percentile(lengths, percentile) / multiple) * multiple)
+    return int(min(max(cap, multiple), max_length))
+
+
+def read_length_cap(model_dir: str) -> Optional[int]:
+    """Plafond de longueur calibré d'un checkpoint ou export (None s'il n'a pas été calibré)"""
+    path = os.path.join(model_dir, INFERENCE_CONFIG_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return int(json.load(f)['max_length'])
+
+
+def calibrate_length_cap(checkpoint_dir: str, data_path: str,
+                         percentile: float = DEFAULT_LENGTH_PERCENTILE) -> Dict[str, Any]:
+    """
+    Calcule le plafond de longueur sur un CSV et l'écrit dans inference_config.json
+
+    Args:
+        checkpoint_dir (str): Checkpoint DistilBERT (ou export ONNX)
+        data_path (str): CSV de tickets GIM
+        percentile (float): Percentile des longueurs
+
+    Returns:
+        Dict[str, Any]: Configuration écrite
+    """
+    from transformers import DistilBertTokenizerFast
+
+    tokenizer = DistilBertTokenizerFast.from_pretrained(checkpoint_dir)
+    _, X, _ = TextPreprocessor().load_and_preprocess_data(data_path)
+    config = {'max_length': derive_length_cap(tokenizer, X, percentile), 'percentile': percentile,
+              'n_texts': int(len(X)), 'data_path': data_path}
+    with open(os.path.join(checkpoint_dir, INFERENCE_CONFIG_FILE), 'w', encoding='utf-8') as f:
+        json.dump(config, f, indent=2)
+    print(f"📏 Longueur maximale: {config['max_length']} tokens (percentile {percentile})")
+    return config
+
+
+def logits_runner(components: Dict[str, Any]) -> Callable[[np.ndarray, np.ndarray], np.ndarray]:
+    """
+    Fonction (input_ids, attention_mask) -> logits pour des composants PyTorch ou ONNX
+
+    Args:
+        components (Dict[str, Any]): Composants d'un PCAPredictor 'distilbert' ou 'onnx'
+
+    Returns:
+        Callable: Exécution d'un lot (tableaux int64) renvoyant des logits numpy
+    """
+    if components.get('onnx_session') is not None:
+        session = components['onnx_session']
+        return lambda input_ids, attention_mask: onnx_logits(
+            session, {'input_ids': input_ids, 'attention_mask': attention_mask})
+
+    model = components['distilbert_model']
+
+    def run(input_ids, attention_mask):
+        with torch.no_grad():
+            return model(input_ids=torch.from_numpy(input_ids),
+                         attention_mask=torch.from_numpy(attention_mask)).logits.numpy()
+    return run
+
+
+class TokenCache:
+    """
+    Cache LRU borné des identifiants de tokens, indexé par texte préprocessé
+
+    Lié à un tokenizer et à une longueur maximale : les identifiants rendus
+    sont ceux de tokenizer(text, truncation=True, max_length=max_length).
+    Les textes absents sont encodés en un seul appel par lot.
+    """
+
+    def __init__(self, tokenizer, max_length: int = DEFAULT_MAX_LENGTH,
+                 max_size: int = DEFAULT_TOKEN_CACHE_SIZE):
+        """
+        Initialise le cache
+
+        Args:
+            tokenizer: Tokenizer DistilBERT (rapide de préférence)
+            max_length (int): Plafond de longueur (troncature)
+            max_size (int): Nombre maximal de textes conservés (0 désactive le cache)
+        """
+        self.tokenizer = tokenizer
+        self.max_length = max_length
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def encode(self, texts: Sequence[str]) -> List[List[int]]:
+        """
+        Identifiants de tokens de chaque texte (sans padding), dans l'ordre d'entrée
+
+        Args:
+            texts (Sequence[str]): Textes préprocessés
+
+        Returns:
+            List[List[int]]: Identifiants par texte
+        """
+        encoded = [None] * len(texts)
+        with self._lock:
+            for i, text in enumerate(texts):
+                ids = self._entries.get(text)
+                if ids is not None:
+                    self._entries.move_to_end(text)
+                    encoded[i] = ids
+        missing = [i for i, ids in enumerate(encoded) if ids is None]
+        if missing:
+            unique = list(dict.fromkeys(texts[i] for i in missing))
+            fresh = dict(zip(unique, self.tokenizer(unique, truncation=True,
+                                                    max_length=self.max_length)['input_ids']))
+            for i in missing:
+                encoded[i] = fresh[texts[i]]
+            with self._lock:
+                for text, ids in fresh.items():
+                    if self.max_size > 0:
+                        self._entries[text] = ids
+                        self._entries.move_to_end(text)
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+        with self._lock:
+            self.hits += len(texts) - len(missing)
+            self.misses += len(missing)
+        return encoded
+
+    def clear(self) -> None:
+        """Vide le cache et remet les compteurs à zéro"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Taille et taux de succès du cache"""
+        total = self.hits + self.misses
+        return {'size': len(self._entries), 'max_size': self.max_size, 'hits': self.hits,
+                'misses': self.misses, 'hit_rate': self.hits / total if total else 0.0}
+
+
+def length_buckets(lengths: np.ndarray, batch_size: int, sort_by_length: bool = True) -> List[np.ndarray]:
+    """
+    Découpe les index en lots, triés par longueur (lots de longueurs homogènes)
+
+    Args:
+        lengths (np.ndarray): Longueur en tokens de chaque texte
+        batch_size (int): Taille des lots
+        sort_by_length (bool): Si False, lots dans l'ordre d'entrée
+
+    Returns:
+        List[np.ndarray]: Index des textes de chaque lot
+    """
+    order = np.argsort(lengths, kind='stable') if sort_by_length else np.arange(len(lengths))
+    return [order[i:i + batch_size] for i in range(0, len(order), batch_size)]
+
+
+def batch_logits(tokenizer, run: Callable[[np.ndarray, np.ndarray], np.ndarray], texts: Sequence[str],
+                 batch_size: int = 32, max_length: int = DEFAULT_MAX_LENGTH,
+                 sort_by_length: bool = True, pad_to_max_length: bool = False,
+                 token_cache: Optional[TokenCache] = None) -> np.ndarray:
+    """
+    Logits d'une liste de textes par lots à padding dynamique, dans l'ordre d'entrée
+
+    Args:
+        tokenizer: Tokenizer DistilBERT
+        run (Callable): Exécution d'un lot (voir logits_runner)
+        texts (Sequence[str]): Textes préprocessés
+        batch_size (int): Taille des lots
+        max_length (int): Plafond de longueur (troncature)
+        sort_by_length (bool): Regroupe les textes de longueurs proches
+        pad_to_max_length (bool): Padding fixe à max_length (référence de comparaison)
+        token_cache (TokenCache): Cache des identifiants (doit porter le même max_length)
+
+    Returns:
+        np.ndarray: Logits (len(texts) x n_classes)
+    """
+    # Tokenisation sans padding : le padding est propre à chaque lot
+    if token_cache is not None:
+        encoded = token_cache.encode(texts)
+    else:
+        encoded = tokenizer(list(texts), truncation=True, max_length=max_length)['input_ids']
+    lengths = np.array([len(ids) for ids in encoded])
+
+    logits = None
+    for indices in length_buckets(lengths, batch_size, sort_by_length):
+        width = max_length if pad_to_max_length else int(lengths[indices].max())
+        input_ids = np.full((len(indices), width), tokenizer.pad_token_id, dtype=np.int64)
+        attention_mask = np.zeros((len(indices), width), dtype=np.int64)
+        for row, i in enumerate(indices):
+            input_ids[row, :lengths[i]] = encoded[i]
+            attention_mask[row, :lengths[i]] = 1
+
+        batch = run(input_ids, attention_mask)
+        if logits is None:
+            logits = np.empty((len(encoded), batch.shape[1]), dtype=batch.dtype)
+        logits[indices] = batch
+
+    return logits if logits is not None else np.empty((0, 0), dtype=np.float32)
+
+
+def benchmark_batch_inference(components: Dict[str, Any], texts: Sequence[str],
+                              batch_sizes: Sequence[int] = (1, 8, 32, 64),
+                              max_length: int = DEFAULT_MAX_LENGTH) -> List[Dict[str, Any]]:
+    """
+    Débit (tickets/s) par taille de lot : padding fixe, dynamique, dynamique trié par longueur
+
+    Args:
+        components (Dict[str, Any]): Composants d'un PCAPredictor 'distilbert' ou 'onnx'
+        texts (Sequence[str]): Textes préprocessés
+        batch_sizes (Sequence[int]): Tailles de lot comparées
+        max_length (int): Plafond de longueur
+
+    Returns:
+        List[Dict[str, Any]]: Une ligne par (mode, taille de lot)
+    """
+    tokenizer, run = components['tokenizer'], logits_runner(components)
+    modes = {
+        'fixe': {'sort_by_length': False, 'pad_to_max_length': True},
+        'dynamique': {'sort_by_length': False, 'pad_to_max_length': False},
+        'trié': {'sort_by_length': True, 'pad_to_max_length': False}
+    }
+    rows = []
+    for mode, options in modes.items():
+        for batch_size in batch_sizes:
+            start = time.perf_counter()
+            batch_logits(tokenizer, run, texts, batch_size, max_length, **options)
+            elapsed = time.perf_counter() - start
+            rows.append({'mode': mode, 'batch_size': batch_size, 'max_length': max_length,
+                         'throughput': len(texts) / elapsed, 'ms_per_ticket': elapsed * 1000 / len(texts)})
+    return rows
+
+
+def print_batch_benchmark(rows: List[Dict[str, Any]]) -> None:
+    """Affiche le débit par mode de padding et taille de lot"""
+    print(f"\n📦 INFÉRENCE PAR LOTS (longueur max {rows[0]['max_length']} tokens)")
+    print("-" * 50)
+    print(f"{'Padding':<12}{'Lot':>6}{'Tickets/s':>12}{'ms/ticket':>12}")
+    for row in rows:
+        print(f"{row['mode']:<12}{row['batch_size']:>6}{row['throughput']:>12.1f}{row['ms_per_ticket']:>12.2f}")
+
+
+def benchmark_tokenization(tokenizer, texts: Sequence[str], max_length: int = DEFAULT_MAX_LENGTH,
+                           batch_size: int = 32,
+                           cache_size: int = DEFAULT_TOKEN_CACHE_SIZE) -> List[Dict[str, Any]]:
+    """
+    Temps de tokenisation par ticket : appel par requête, lots, avec et sans cache
+
+    Le flux de textes est rejoué dans l'ordre (les répétitions du flux font les
+    succès du cache) ; chaque mode part d'un cache vide, sauf 'cache chaud' qui
+    rejoue le flux une seconde fois (coût d'un succès).
+
+    Args:
+        tokenizer: Tokenizer DistilBERT
+        texts (Sequence[str]): Flux de textes préprocessés
+        max_length (int): Plafond de longueur
+        batch_size (int): Taille des lots
+        cache_size (int): Taille du cache LRU
+
+    Returns:
+        List[Dict[str, Any]]: Une ligne par mode (µs/ticket, taux de succès du cache)
+    """
+    def per_request(cache):
+        for text in texts:
+            if cache is None:
+                tokenizer(text, truncation=True, max_length=max_length, return_tensors='np')
+            else:
+                cache.encode([text])
+
+    def batched(cache):
+        for i in range(0, len(texts), batch_size):
+            cache.encode(texts[i:i + batch_size])
+
+    modes = [
+        ('par requête', per_request, None, False),
+        ('par requête + cache', per_request, cache_size, False),
+        ('lot', batched, 0, False),
+        ('lot + cache', batched, cache_size, False),
+        ('cache chaud', per_request, cache_size, True)
+    ]
+    rows = []
+    for mode, replay, size, warm in modes:
+        cache = None if size is None else TokenCache(tokenizer, max_length, size)
+        if warm:
+            batched(cache)
+            cache.hits = cache.misses = 0
+        start = time.perf_counter()
+        replay(cache)
+        elapsed = time.perf_counter() - start
+        rows.append({'mode': mode, 'us_per_ticket': elapsed * 1e6 / len(texts),
+                     'hit_rate': cache.stats()['hit_rate'] if size else None})
+    return rows
+
+
+def print_tokenization_benchmark(rows: List[Dict[str, Any]]) -> None:
+    """Affiche le temps de tokenisation par ticket selon le mode"""
+    print("\n🔤 TOKENISATION")
+    print("-" * 50)
+    print(f"{'Mode':<22}{'µs/ticket':>12}{'Succès cache':>15}")
+    baseline = rows[0]['us_per_ticket']
+    for row in rows:
+        hit_rate = f"{row['hit_rate']:.1%}" if row['hit_rate'] is not None else '-'
+        print(f"{row['mode']:<22}{row['us_per_ticket']:>12.1f}{hit_rate:>15}"
+              f"   (x{baseline / row['us_per_ticket']:.1f})")
+
+
+def _state_dict_size(model) -> int:
+    """Taille (octets) des poids sérialisés d'un modèle torch"""
+    buffer = io.BytesIO()
+    torch.save(model.state_dict(), buffer)
+    return buffer.getbuffer().nbytes
+
+
+def compare_quantization(texts: List[str], labels: List[str], checkpoint_dir: str = 'distilbert_pca_model',
+                         quantized_dir: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Compare DistilBERT pleine précision et INT8 sur le holdout (une requête à la fois)
+
+    Args:
+        texts (List[str]): Textes préprocessés du holdout
+        labels (List[str]): PCA attendues
+        checkpoint_dir (str): Checkpoint DistilBERT
+        quantized_dir (str): Cache INT8 (défaut: <checkpoint_dir>_int8)
+
+    Returns:
+        Dict[str, Any]: Accuracy, latences, taille et temps de chargement par précision
+    """
+    from predict import PCAPredictor
+
+    rows = {}
+    predictions = {}
+    for precision, quantize in (('fp32', False), ('int8', True)):
+        predictor = PCAPredictor(backend='distilbert', checkpoint_dir=checkpoint_dir,
+                                 quantize=quantize, quantized_dir=quantized_dir)
+        start = time.perf_counter()
+        predictor.load_model()
+        load_time = time.perf_counter() - start
+        components = predictor._components()
+
+        timings, predicted = [], []
+        for text in texts:
+            start = time.perf_counter()
+            predicted.append(classify_text(components, text))
+            timings.append((time.perf_counter() - start) * 1000)
+
+        predictions[precision] = predicted
+        rows[precision] = {
+            'accuracy': float(np.mean([p == t for p, t in zip(predicted, labels)])),
+            'p50_ms': float(np.percentile(timings, 50)),
+            'p95_ms': float(np.percentile(timings, 95)),
+            'weights_mb': _state_dict_size(components['distilbert_model']) / 1e6,
+            'load_time_s': load_time
+        }
+
+    # Second chargement INT8 : lu depuis le cache disque
+    predictor = PCAPredictor(backend='distilbert', checkpoint_dir=checkpoint_dir,
+                             quantize=True, quantized_dir=quantized_dir)
+    start = time.perf_counter()
+    predictor.load_model()
+    rows['int8']['cached_load_time_s'] = time.perf_counter() - start
+
+    agreement = float(np.mean([a == b for a, b in zip(predictions['fp32'], predictions['int8'])]))
+    return {'n_samples': len(texts), 'precisions': rows, 'agreement': agreement,
+            'torch_threads': torch.get_num_threads()}
+
+
+def print_quantization_comparison(comparison: Dict[str, Any]) -> None:
+    """Affiche le tableau de comparaison pleine précision / INT8"""
+    print(f"\n🧮 DISTILBERT FP32 vs INT8 ({comparison['n_samples']} tickets, "
+          f"{comparison['torch_threads']} threads)")
+    print("-" * 66)
+    print(f"{'Précision':<11}{'Accuracy':>10}{'p50 (ms)':>10}{'p95 (ms)':>10}{'Poids (Mo)':>12}{'Chargement (s)':>15}")
+    for precision, row in comparison['precisions'].items():
+        print(f"{precision:<11}{row['accuracy']:>10.4f}{row['p50_ms']:>10.2f}{row['p95_ms']:>10.2f}"
+              f"{row['weights_mb']:>12.1f}{row['load_time_s']:>15.2f}")
+    int8 = comparison['precisions']['int8']
+    print(f"Chargement INT8 depuis le cache: {int8['cached_load_time_s']:.2f}s")
+    print(f"Accord des prédictions FP32/INT8: {comparison['agreement']:.4f}")
+
+
+def run_quantization_comparison(data_path: str, checkpoint_dir: str = 'distilbert_pca_model',
+                                quantized_dir: Optional[str] = None, limit: Optional[int] = None,
+                                output_path: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Charge le holdout d'un CSV, compare les précisions et sauvegarde le rapport JSON
+
+    Args:
+        data_path (str): CSV de tickets GIM
+        checkpoint_dir (str): Checkpoint DistilBERT
+        quantized_dir (str): Cache INT8 (optionnel)
+        limit (int): Nombre maximal de tickets du holdout (optionnel)
+        output_path (str): Fichier JSON du rapport (optionnel)
+
+    Returns:
+        Dict[str, Any]: Rapport de comparaison
+    """
+    texts, labels = load_holdout(data_path)
+    if limit:
+        texts, labels = texts[:limit], labels[:limit]
+
+    comparison = compare_quantization(texts, labels, checkpoint_dir, quantized_dir)
+    print_quantization_comparison(comparison)
+
+    if output_path:
+        os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+        with open(output_path, 'w', encoding='utf-8') as f:
+            json.dump(dict(comparison, data_path=data_path), f, indent=2, ensure_ascii=False)
+        print(f"📄 Rapport sauvegardé dans: {output_path}")
+    return comparison
+
+
+def main():
+    """Quantification INT8, calibration de la longueur, débit par lots et tokenisation"""
+    parser = argparse.ArgumentParser(description='Inférence DistilBERT optimisée')
+    parser.add_argument('--action', choices=['compare-quantization', 'calibrate-length', 'benchmark-batch',
+                                             'benchmark-tokenization'],
+                        default='compare-quantization', help='Action à effectuer')
+    parser.add_argument('--data', default='data/gim_diagnostic_dataset.csv', help='CSV de tickets GIM')
+    parser.add_argument('--checkpoint-dir', default='distilbert_pca_model', help='Checkpoint DistilBERT')
+    parser.add_argument('--quantized-dir', help='Cache du modèle INT8 (default: <checkpoint>_int8)')
+    parser.add_argument('--percentile', type=float, default=DEFAULT_LENGTH_PERCENTILE,
+                        help='calibrate-length: percentile des longueurs conservé (default: 99)')
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 8, 32, 64],
+                        help='benchmark-batch: tailles de lot comparées')
+    parser.add_argument('--limit', type=int, help='Nombre maximal de tickets du holdout')
+    parser.add_argument('--output', help='Fichier JSON du rapport')
+    args = parser.parse_args()
+
+    if args.action == 'compare-quantization':
+        run_quantization_comparison(args.data, args.checkpoint_dir, args.quantized_dir,
+                                    args.limit, args.output)
+
+    elif args.action == 'calibrate-length':
+        calibrate_length_cap(args.checkpoint_dir, args.data, args.percentile)
+
+    elif args.action == 'benchmark-batch':
+        from predict import PCAPredictor
+
+        predictor = PCAPredictor(backend='distilbert', checkpoint_dir=args.checkpoint_dir)
+        predictor.load_model()
+        texts, _ = load_holdout(args.data)
+        rows = benchmark_batch_inference(predictor._components(), texts[:args.limit],
+                                         args.batch_sizes, predictor.max_length)
+        print_batch_benchmark(rows)
+
+    elif args.action == 'benchmark-tokenization':
+        from transformers import DistilBertTokenizerFast
+
+        tokenizer = DistilBertTokenizerFast.from_pretrained(args.checkpoint_dir)
+        _, X, _ = TextPreprocessor().load_and_preprocess_data(args.data)
+        texts = list(X[:args.limit])
+        print_tokenization_benchmark(benchmark_tokenization(tokenizer, texts,
+                                                            read_length_cap(args.checkpoint_dir) or DEFAULT_MAX_LENGTH))
+
+
+if __name__ == "__main__":
+    main()
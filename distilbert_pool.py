@@ -0,0 +1,591 @@
+"""
+Module de service DistilBERT par pool de processus pour le projet PCA
+Un seul modèle torch qui prend tous les cœurs pour une requête donne un
+mauvais débit sous charge concurrente et concurrence Streamlit et la forêt.
+Le pool lance N processus, chacun avec sa réplique du modèle et un nombre
+fixe de threads intra-op ; le processus appelant donne chaque requête au
+premier processus libre et ne fait qu'attendre les réponses. La calibration
+mesure le débit et la latence p95 de chaque découpage N x threads du budget
+de cœurs sous charge concurrente, et retient le plus rapide qui tient la
+cible de p95 (pool_config.json à côté du checkpoint).
+Auteur: Assistant IA
+Date: 2025-07-26
+"""
+
+import os
+import json
+import time
+import collections
+import argparse
+import threading
+import multiprocessing
+from multiprocessing.connection import wait as wait_connections
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Import conditionnel pour torch
+try:
+    import torch
+    TORCH_AVAILABLE = True
+except ImportError:
+    TORCH_AVAILABLE = False
+
+
+POOL_CONFIG_FILE = 'pool_config.json'
+DEFAULT_TARGET_P95_MS = 100.0
+STARTUP_TIMEOUT_S = 300.0
+
+
+def core_budget(budget: Optional[int] = None) -> int:
+    """Budget de cœurs du pool (défaut: nombre de CPU)"""
+    return budget if budget and budget > 0 else (os.cpu_count() or 1)
+
+
+def candidate_layouts(budget: Optional[int] = None) -> List[Tuple[int, int]]:
+    """
+    Découpages (processus, threads par processus) qui remplissent le budget de cœurs
+
+    Args:
+        budget (int): Nombre de cœurs (défaut: nombre de CPU)
+
+    Returns:
+        List[Tuple[int, int]]: Couples (N, threads) avec N x threads == budget
+    """
+    budget = core_budget(budget)
+    return [(n_workers, budget // n_workers) for n_workers in range(1, budget + 1) if budget % n_workers == 0]
+
+
+def read_pool_config(checkpoint_dir: str) -> Optional[Dict[str, Any]]:
+    """Découpage calibré d'un checkpoint (None s'il n'a pas été calibré)"""
+    path = os.path.join(checkpoint_dir, POOL_CONFIG_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _serve(worker_id: int, predictor_kwargs: Dict[str, Any], n_threads: int, conn) -> None:
+    """
+    Boucle d'un processus du pool : une réplique, n_threads threads intra-op
+
+    Args:
+        worker_id (int): Numéro du processus
+        predictor_kwargs (Dict[str, Any]): Paramètres du PCAPredictor répliqué
+        n_threads (int): Threads intra-op de torch (backend 'distilbert') ou
+            d'ONNX Runtime (backend 'onnx')
+        conn (Connection): Tube propre au processus : reçoit (request_id, examples,
+            return_probabilities) ou None pour s'arrêter ; envoie ('ready', erreur)
+            puis ('result', request_id, résultats)
+    """
+    try:
+        # ONNX Runtime a ses propres threads (onnx_threads) : torch n'est touché que s'il sert
+        if predictor_kwargs.get('backend') == 'distilbert':
+            torch.set_num_threads(n_threads)
+            torch.set_num_interop_threads(1)
+        from predict import PCAPredictor
+
+        predictor = PCAPredictor(**dict(predictor_kwargs, onnx_threads=n_threads, onnx_inter_threads=1))
+        predictor.load_model()
+    except Exception as e:
+        conn.send(('ready', f'{type(e).__name__}: {e}'))
+        return
+    conn.send(('ready', None))
+
+    while True:
+        try:
+            request = conn.recv()
+        except EOFError:
+            break
+        if request is None:
+            break
+        request_id, examples, return_probabilities = request
+        try:
+            results = predictor.predict_batch(examples, return_probabilities=return_probabilities)
+        except Exception as e:
+            results = [{'error': str(e), 'input': example} for example in examples]
+        conn.send(('result', request_id, results))
+
+
+class DistilBertPool:
+    """
+    Pool de processus DistilBERT : chaque requête va au premier processus libre
+
+    Chaque processus charge sa réplique (PCAPredictor 'distilbert' ou 'onnx')
+    avec un nombre fixe de threads et communique par son propre tube : un
+    processus qui meurt ne bloque pas les autres. La requête qu'il traitait
+    échoue (pas de nouvel essai : elle pourrait tuer les autres) ; quand plus
+    aucun processus ne vit, toutes les requêtes en attente échouent.
+    """
+
+    def __init__(self, n_workers: Optional[int] = None, threads_per_worker: Optional[int] = None,
+                 **predictor_kwargs):
+        """
+        Initialise le pool (les processus sont lancés par start)
+
+        Args:
+            n_workers (int): Nombre de processus (défaut: pool_config.json, sinon 1)
+            threads_per_worker (int): Threads intra-op par processus (défaut:
+                pool_config.json si n_workers en vient aussi, sinon le budget
+                de cœurs partagé entre les processus)
+            **predictor_kwargs: Paramètres du PCAPredictor répliqué (backend,
+                checkpoint_dir, quantize, onnx_dir, ...)
+        """
+        predictor_kwargs.setdefault('backend', 'distilbert')
+        config = read_pool_config(predictor_kwargs.get('checkpoint_dir', 'distilbert_pca_model')) or {}
+        if not n_workers and config:
+            n_workers = config['n_workers']
+            threads_per_worker = threads_per_worker or config['threads_per_worker']
+        self.n_workers = n_workers or 1
+        # N imposé par l'appelant : les threads calibrés pour un autre N dépasseraient le budget de cœurs
+        self.threads_per_worker = threads_per_worker or max(1, core_budget() // self.n_workers)
+        self.predictor_kwargs = predictor_kwargs
+
+        self._context = multiprocessing.get_context('spawn')
+        self._processes = []
+        self._conns = []
+        self._lock = threading.Lock()
+        self._pending = {}  # request_id -> Future
+        self._backlog = collections.deque()  # requêtes en attente d'un processus libre
+        self._idle = []  # processus libres
+        self._assigned = {}  # worker_id -> request_id en cours
+        self._dead = set()
+        self._next_id = 0
+        self._dispatcher = None
+        self._wakeup = None
+
+    def start(self, timeout: float = STARTUP_TIMEOUT_S) -> 'DistilBertPool':
+        """
+        Lance les processus et attend que chaque réplique soit chargée
+
+        Args:
+            timeout (float): Délai maximal de chargement (secondes)
+
+        Returns:
+            DistilBertPool: Le pool démarré
+        """
+        if self.predictor_kwargs['backend'] == 'distilbert' and not TORCH_AVAILABLE:
+            raise ImportError("Torch non disponible. Installez avec: pip install transformers torch")
+
+        for worker_id in range(self.n_workers):
+            parent_conn, child_conn = self._context.Pipe()
+            process = self._context.Process(
+                target=_serve, name=f'distilbert-pool-{worker_id}', daemon=True,
+                args=(worker_id, self.predictor_kwargs, self.threads_per_worker, child_conn))
+            process.start()
+            child_conn.close()
+            self._processes.append(process)
+            self._conns.append(parent_conn)
+
+        deadline = time.monotonic() + timeout
+        waiting = set(range(self.n_workers))
+        while waiting:
+            ready = wait_connections([self._conns[i] for i in waiting] +
+                                     [self._processes[i].sentinel for i in waiting],
+                                     timeout=max(0.0, deadline - time.monotonic()))
+            if not ready:
+                self.close()
+                raise RuntimeError(f"Pool DistilBERT non démarré après {timeout:.0f}s")
+            for worker_id in list(waiting):
+                conn = self._conns[worker_id]
+                if conn not in ready and self._processes[worker_id].sentinel not in ready:
+                    continue
+                try:
+                    _, error = conn.recv()
+                except EOFError:
+                    error = f"processus arrêté (code {self._processes[worker_id].exitcode})"
+                if error:
+                    self.close()
+                    raise RuntimeError(f"Erreur de chargement du processus {worker_id}: {error}")
+                waiting.discard(worker_id)
+
+        self._idle = list(range(self.n_workers))
+        self._wakeup = self._context.Pipe(duplex=False)
+        self._dispatcher = threading.Thread(target=self._dispatch, name='distilbert-pool-dispatcher',
+                                            daemon=True)
+        self._dispatcher.start()
+        print(f"🧵 Pool DistilBERT: {self.n_workers} processus x {self.threads_per_worker} threads")
+        return self
+
+    def _dispatch(self) -> None:
+        """Remet chaque réponse au Future de sa requête et détecte les processus morts"""
+        wakeup_reader = self._wakeup[0]
+        while True:
+            with self._lock:
+                live = [i for i in range(len(self._processes)) if i not in self._dead]
+            sources = {wakeup_reader: ('wakeup', None)}
+            for worker_id in live:
+                sources[self._conns[worker_id]] = ('conn', worker_id)
+                sources[self._processes[worker_id].sentinel] = ('sentinel', worker_id)
+
+            ready = wait_connections(list(sources))
+            if wakeup_reader in ready:
+                break
+
+            # Réponses d'abord : un processus peut répondre puis mourir
+            died = set()
+            for source in ready:
+                kind, worker_id = sources[source]
+                if kind != 'conn':
+                    continue
+                try:
+                    _, request_id, results = source.recv()
+                except (EOFError, OSError):
+                    died.add(worker_id)
+                    continue
+                self._complete(worker_id, request_id, results)
+            died.update(worker_id for source in ready
+                        for kind, worker_id in [sources[source]] if kind == 'sentinel')
+            for worker_id in died:
+                self._worker_died(worker_id)
+
+    def _complete(self, worker_id: int, request_id: int, results: List[Dict]) -> None:
+        """Résout la requête terminée et donne la suivante au processus libéré"""
+        with self._lock:
+            self._assigned.pop(worker_id, None)
+            future = self._pending.pop(request_id, None)
+            self._assign(worker_id)
+        if future is not None:
+            future.set_result(results)
+
+    def _assign(self, worker_id: int) -> None:
+        """Envoie la prochaine requête en attente au processus (appelé sous verrou)"""
+        while self._backlog:
+            request = self._backlog.popleft()
+            if request[0] not in self._pending:
+                continue  # abandonnée (délai dépassé)
+            try:
+                self._conns[worker_id].send(request)
+            except (BrokenPipeError, OSError):
+                # Processus mort pas encore vu par le répartiteur : la requête attend un autre processus
+                self._backlog.appendleft(request)
+                return
+            self._assigned[worker_id] = request[0]
+            return
+        self._idle.append(worker_id)
+
+    def _worker_died(self, worker_id: int) -> None:
+        """Fait échouer la requête du processus mort, et toutes si plus aucun ne vit"""
+        process = self._processes[worker_id]
+        process.join()
+        print(f"⚠️ Processus {worker_id} du pool DistilBERT arrêté (code {process.exitcode})")
+
+        failed = []
+        with self._lock:
+            self._dead.add(worker_id)
+            if worker_id in self._idle:
+                self._idle.remove(worker_id)
+            request_id = self._assigned.pop(worker_id, None)
+            if request_id in self._pending:
+                failed.append((self._pending.pop(request_id), RuntimeError(
+                    f"Processus {worker_id} du pool arrêté (code {process.exitcode}) pendant la requête")))
+            if len(self._dead) == len(self._processes):
+                error = RuntimeError("Tous les processus du pool DistilBERT sont arrêtés")
+                failed.extend((future, error) for future in self._pending.values())
+                self._pending.clear()
+                self._backlog.clear()
+        for future, error in failed:
+            future.set_exception(error)
+
+    @property
+    def alive_workers(self) -> int:
+        """Nombre de processus encore vivants"""
+        with self._lock:
+            return len(self._processes) - len(self._dead)
+
+    def submit(self, examples: List[Dict], return_probabilities: bool = False) -> Future:
+        """
+        Envoie des exemples au pool (traités ensemble par un processus)
+
+        Args:
+            examples (List[Dict]): Exemples ('code_dtc', 'description', 'root_cause')
+            return_probabilities (bool): Si True, retourne les probabilités
+
+        Returns:
+            Future: Résultats dans l'ordre des exemples
+        """
+        if self._dispatcher is None:
+            raise RuntimeError("Pool non démarré (appelez start())")
+        future = Future()
+        with self._lock:
+            if len(self._dead) == len(self._processes):
+                raise RuntimeError("Tous les processus du pool DistilBERT sont arrêtés")
+            request_id = self._next_id
+            self._next_id += 1
+            self._pending[request_id] = future
+            future.request_id = request_id
+            self._backlog.append((request_id, list(examples), return_probabilities))
+            while self._backlog and self._idle:
+                self._assign(self._idle.pop(0))
+        return future
+
+    def _result(self, future: Future, timeout: Optional[float]) -> List[Dict]:
+        """Attend un Future ; à l'expiration, la requête est abandonnée"""
+        try:
+            return future.result(timeout)
+        except FutureTimeoutError:
+            self._abandon([future])
+            raise
+
+    def _abandon(self, futures: Sequence[Future]) -> None:
+        """Retire des requêtes en attente (une requête déjà en cours se termine sans effet)"""
+        with self._lock:
+            for future in futures:
+                self._pending.pop(future.request_id, None)
+
+    def predict_single(self, code_dtc: str, description: str, root_cause: str = "",
+                       return_probabilities: bool = True, timeout: Optional[float] = None) -> Dict:
+        """
+        Prédiction d'un exemple par le premier processus libre (bloquant)
+
+        Args:
+            timeout (float): Attente maximale en secondes (None: sans limite) ;
+                concurrent.futures.TimeoutError au-delà
+
+        Returns:
+            Dict: Résultat de la prédiction
+        """
+        example = {'code_dtc': code_dtc, 'description': description, 'root_cause': root_cause}
+        return self._result(self.submit([example], return_probabilities), timeout)[0]
+
+    def predict_batch(self, examples: List[Dict], return_probabilities: bool = False,
+                      timeout: Optional[float] = None) -> List[Dict]:
+        """
+        Prédictions d'une liste d'exemples, réparties entre les processus (bloquant)
+
+        Args:
+            timeout (float): Attente maximale en secondes pour l'ensemble du lot
+                (None: sans limite) ; concurrent.futures.TimeoutError au-delà
+
+        Returns:
+            List[Dict]: Résultats dans l'ordre des exemples
+        """
+        chunk = max(1, -(-len(examples) // self.n_workers))
+        futures = [self.submit(examples[i:i + chunk], return_probabilities)
+                   for i in range(0, len(examples), chunk)]
+        deadline = None if timeout is None else time.monotonic() + timeout
+        results = []
+        for i, future in enumerate(futures):
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                results.extend(self._result(future, remaining))
+            except FutureTimeoutError:
+                self._abandon(futures[i + 1:])
+                raise
+        return results
+
+    def close(self, timeout: float = 30.0) -> None:
+        """Arrête les processus et le répartiteur de réponses"""
+        if self._dispatcher is not None:
+            self._wakeup[1].send(None)
+            self._dispatcher.join(timeout)
+            self._dispatcher = None
+        for worker_id, conn in enumerate(self._conns):
+            if worker_id not in self._dead:
+                try:
+                    conn.send(None)
+                except (BrokenPipeError, OSError):
+                    pass
+        for process in self._processes:
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+        for conn in self._conns:
+            conn.close()
+        with self._lock:
+            for future in self._pending.values():
+                future.set_exception(RuntimeError("Pool DistilBERT arrêté"))
+            self._pending.clear()
+            self._backlog.clear()
+        self._processes, self._conns, self._idle = [], [], []
+        self._assigned, self._dead = {}, set()
+
+    def __enter__(self) -> 'DistilBertPool':
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def load_examples(data_path: str, limit: Optional[int] = None) -> List[Dict]:
+    """
+    Exemples de requêtes (code_dtc, description, root_cause) lus depuis un CSV GIM
+
+    Args:
+        data_path (str): CSV de tickets GIM
+        limit (int): Nombre maximal d'exemples
+
+    Returns:
+        List[Dict]: Exemples au format de PCAPredictor.predict_batch
+    """
+    df = pd.read_csv(data_path).fillna('')
+    if limit:
+        df = df.head(limit)
+    return [{'code_dtc': str(row['Code DTC']), 'description': str(row['Description du problème']),
+             'root_cause': str(row['Root Cause Description'])} for _, row in df.iterrows()]
+
+
+def measure_pool(pool: DistilBertPool, examples: Sequence[Dict], n_requests: int = 200,
+                 concurrency: int = 8, warmup: int = 8) -> Dict[str, Any]:
+    """
+    Charge concurrente en boucle fermée : `concurrency` clients enchaînent des requêtes unitaires
+
+    Args:
+        pool (DistilBertPool): Pool démarré
+        examples (Sequence[Dict]): Exemples rejoués en boucle
+        n_requests (int): Nombre total de requêtes mesurées
+        concurrency (int): Clients simultanés
+        warmup (int): Requêtes de chauffe non mesurées
+
+    Returns:
+        Dict[str, Any]: Débit (requêtes/s) et latences p50/p95 (ms)
+    """
+    for example in examples[:warmup]:
+        pool.submit([example]).result()
+
+    latencies = []
+    counter = iter(range(n_requests))
+    lock = threading.Lock()
+
+    def client():
+        while True:
+            with lock:
+                i = next(counter, None)
+            if i is None:
+                return
+            start = time.perf_counter()
+            pool.submit([examples[i % len(examples)]]).result()
+            elapsed = (time.perf_counter() - start) * 1000
+            with lock:
+                latencies.append(elapsed)
+
+    start = time.perf_counter()
+    clients = [threading.Thread(target=client) for _ in range(concurrency)]
+    for thread in clients:
+        thread.start()
+    for thread in clients:
+        thread.join()
+    wall = time.perf_counter() - start
+
+    return {'throughput': n_requests / wall, 'p50_ms': float(np.percentile(latencies, 50)),
+            'p95_ms': float(np.percentile(latencies, 95))}
+
+
+def calibrate_pool(examples: Sequence[Dict], target_p95_ms: float = DEFAULT_TARGET_P95_MS,
+                   budget: Optional[int] = None, layouts: Optional[Sequence[Tuple[int, int]]] = None,
+                   n_requests: int = 200, concurrency: int = 8, save: bool = True,
+                   **predictor_kwargs) -> Dict[str, Any]:
+    """
+    Mesure chaque découpage N x threads et retient le plus haut débit sous la cible de p95
+
+    Args:
+        examples (Sequence[Dict]): Exemples de requêtes
+        target_p95_ms (float): Latence p95 maximale (ms)
+        budget (int): Budget de cœurs (défaut: nombre de CPU)
+        layouts (Sequence[Tuple[int, int]]): Découpages testés (défaut: candidate_layouts(budget))
+        n_requests (int): Requêtes mesurées par découpage
+        concurrency (int): Clients simultanés
+        save (bool): Écrit pool_config.json dans le checkpoint
+        **predictor_kwargs: Paramètres du PCAPredictor répliqué
+
+    Returns:
+        Dict[str, Any]: Découpage retenu et mesures de tous les découpages
+    """
+    layouts = list(layouts or candidate_layouts(budget))
+    rows = []
+    for n_workers, threads in layouts:
+        with DistilBertPool(n_workers, threads, **predictor_kwargs) as pool:
+            stats = measure_pool(pool, examples, n_requests, concurrency)
+        rows.append(dict(stats, n_workers=n_workers, threads_per_worker=threads,
+                         meets_target=stats['p95_ms'] <= target_p95_ms))
+
+    eligible = [row for row in rows if row['meets_target']]
+    # Aucun découpage sous la cible : le p95 le plus bas
+    best = max(eligible, key=lambda row: row['throughput']) if eligible else min(rows, key=lambda row: row['p95_ms'])
+    config = {'n_workers': best['n_workers'], 'threads_per_worker': best['threads_per_worker'],
+              'target_p95_ms': target_p95_ms, 'meets_target': best['meets_target'],
+              'throughput': best['throughput'], 'p95_ms': best['p95_ms'],
+              'core_budget': core_budget(budget), 'concurrency': concurrency,
+              'backend': predictor_kwargs.get('backend', 'distilbert'),
+              'quantize': predictor_kwargs.get('quantize', False)}
+
+    checkpoint_dir = predictor_kwargs.get('checkpoint_dir', 'distilbert_pca_model')
+    if save and os.path.isdir(checkpoint_dir):
+        with open(os.path.join(checkpoint_dir, POOL_CONFIG_FILE), 'w', encoding='utf-8') as f:
+            json.dump(config, f, indent=2)
+    return {'config': config, 'layouts': rows}
+
+
+def print_calibration(calibration: Dict[str, Any]) -> None:
+    """Affiche le débit et le p95 de chaque découpage"""
+    config = calibration['config']
+    print(f"\n🧵 CALIBRATION DU POOL (cible p95 {config['target_p95_ms']:.0f} ms, "
+          f"{config['core_budget']} cœurs, {config['concurrency']} clients)")
+    print("-" * 60)
+    print(f"{'Processus':>10}{'Threads':>9}{'Req/s':>10}{'p50 (ms)':>11}{'p95 (ms)':>11}")
+    for row in calibration['layouts']:
+        marker = ' ✅' if row['meets_target'] else ''
+        print(f"{row['n_workers']:>10}{row['threads_per_worker']:>9}{row['throughput']:>10.1f}"
+              f"{row['p50_ms']:>11.1f}{row['p95_ms']:>11.1f}{marker}")
+    status = '' if config['meets_target'] else ' (aucun découpage sous la cible : p95 le plus bas)'
+    print(f"➡️ Retenu: {config['n_workers']} x {config['threads_per_worker']}{status}")
+
+
+def run_pool_calibration(data_path: str, checkpoint_dir: str = 'distilbert_pca_model',
+                         target_p95_ms: float = DEFAULT_TARGET_P95_MS, budget: Optional[int] = None,
+                         n_requests: int = 200, concurrency: int = 8, **predictor_kwargs) -> Dict[str, Any]:
+    """
+    Calibre le pool sur les tickets d'un CSV et enregistre le découpage retenu
+
+    Args:
+        data_path (str): CSV de tickets GIM
+        checkpoint_dir (str): Checkpoint DistilBERT
+        target_p95_ms (float): Latence p95 maximale (ms)
+        budget (int): Budget de cœurs (défaut: nombre de CPU)
+        n_requests (int): Requêtes mesurées par découpage
+        concurrency (int): Clients simultanés
+        **predictor_kwargs: Autres paramètres du PCAPredictor (backend, quantize, ...)
+
+    Returns:
+        Dict[str, Any]: Découpage retenu et mesures
+    """
+    examples = load_examples(data_path, limit=max(n_requests, 100))
+    calibration = calibrate_pool(examples, target_p95_ms, budget, n_requests=n_requests,
+                                 concurrency=concurrency, checkpoint_dir=checkpoint_dir, **predictor_kwargs)
+    print_calibration(calibration)
+    print(f"📄 Découpage enregistré dans {os.path.join(checkpoint_dir, POOL_CONFIG_FILE)}")
+    return calibration
+
+
+def main():
+    """Calibration du pool DistilBERT, ou mesure d'un découpage donné"""
+    parser = argparse.ArgumentParser(description='Pool de processus DistilBERT')
+    parser.add_argument('--action', choices=['calibrate', 'measure'], default='calibrate',
+                        help='calibrate: choisit N x threads ; measure: mesure un découpage')
+    parser.add_argument('--data', default='data/gim_diagnostic_dataset.csv', help='CSV de tickets GIM')
+    parser.add_argument('--checkpoint-dir', default='distilbert_pca_model', help='Checkpoint DistilBERT')
+    parser.add_argument('--backend', choices=['distilbert', 'onnx'], default='distilbert', help='Backend répliqué')
+    parser.add_argument('--quantize', action='store_true', help='Répliques INT8 (distilbert_inference.py)')
+    parser.add_argument('--target-p95', type=float, default=DEFAULT_TARGET_P95_MS, help='Cible de latence p95 (ms)')
+    parser.add_argument('--cores', type=int, help='Budget de cœurs (default: nombre de CPU)')
+    parser.add_argument('--workers', type=int, help='measure: nombre de processus')
+    parser.add_argument('--threads', type=int, help='measure: threads par processus')
+    parser.add_argument('--requests', type=int, default=200, help='Requêtes mesurées par découpage')
+    parser.add_argument('--concurrency', type=int, default=8, help='Clients simultanés')
+    args = parser.parse_args()
+
+    predictor_kwargs = {'backend': args.backend, 'checkpoint_dir': args.checkpoint_dir, 'quantize': args.quantize}
+    if args.action == 'calibrate':
+        run_pool_calibration(args.data, target_p95_ms=args.target_p95, budget=args.cores,
+                             n_requests=args.requests, concurrency=args.concurrency, **predictor_kwargs)
+    else:
+        examples = load_examples(args.data, limit=max(args.requests, 100))
+        with DistilBertPool(args.workers, args.threads, **predictor_kwargs) as pool:
+            stats = measure_pool(pool, examples, args.requests, args.concurrency)
+        print(f"📈 {stats['throughput']:.1f} req/s, p50 {stats['p50_ms']:.1f} ms, p95 {stats['p95_ms']:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
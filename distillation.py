@@ -0,0 +1,334 @@
+"""
+Module de distillation de DistilBERT vers la forêt TF-IDF pour le projet PCA
+DistilBERT prédit mieux mais seule la forêt tient le budget de latence des
+serveurs CPU. Le corpus complet (augmenté + historique) est étiqueté en une
+passe par lots avec les probabilités de DistilBERT (cibles souples), puis la
+forêt apprend ces cibles : chaque ticket est répété pour ses top-k classes
+(mélange cible souple / label vrai) avec la probabilité comme sample_weight.
+Le modèle obtenu reste un bundle RandomForest standard (même vectorisation,
+mêmes paramètres de forêt) : la latence d'inférence ne change pas. Le
+rapport mesure la part de l'écart d'accuracy forêt / DistilBERT comblée, sur
+un holdout sans doublons ni tickets d'entraînement du professeur.
+Auteur: Assistant IA
+Date: 2025-07-26
+"""
+
+import os
+import json
+import time
+import argparse
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from sklearn.metrics import accuracy_score
+
+from preprocessing import TextPreprocessor
+from train_model import PCAPredictionModel
+from predict import PCAPredictor
+from distilbert_inference import batch_logits, logits_runner
+from onnx_backend import softmax
+from profiling import profile_stage
+
+
+DEFAULT_CORPUS = ('data/gim_diagnostic_dataset_augmented.csv', 'data/gim_diagnostic_dataset.csv')
+DEFAULT_ALPHA = 0.5
+DEFAULT_TOP_K = 3
+
+
+def load_corpus(data_paths: Sequence[str]) -> Tuple[pd.Series, pd.Series]:
+    """
+    Textes préprocessés et PCA de plusieurs CSV concaténés
+
+    Les tickets en double (même texte préprocessé, même PCA) sont retirés :
+    le dataset historique est entièrement contenu dans le dataset augmenté,
+    et un doublon réparti des deux côtés du split gonflerait l'accuracy de test.
+
+    Args:
+        data_paths (Sequence[str]): CSV de tickets GIM
+
+    Returns:
+        Tuple[pd.Series, pd.Series]: Textes, PCA attendues (index 0..n-1)
+    """
+    parts = [TextPreprocessor().load_and_preprocess_data(path)[1:] for path in data_paths]
+    X = pd.concat([X_part for X_part, _ in parts], ignore_index=True)
+    y = pd.concat([y_part for _, y_part in parts], ignore_index=True)
+
+    unique = ~pd.DataFrame({'text': X, 'pca': y}).duplicated()
+    if not unique.all():
+        print(f"🧹 {int((~unique).sum())} tickets en double retirés du corpus")
+    return X[unique].reset_index(drop=True), y[unique].reset_index(drop=True)
+
+
+def teacher_soft_targets(teacher: PCAPredictor, texts: Sequence[str], classes: Sequence[str],
+                         batch_size: int = 64) -> np.ndarray:
+    """
+    Probabilités de DistilBERT sur les classes de la forêt, par lots
+
+    Les classes du professeur absentes de `classes` sont ignorées et chaque
+    ligne est renormalisée ; une ligne sans probabilité sur ces classes
+    reste nulle (seul le label vrai compte alors pour ce ticket).
+
+    Args:
+        teacher (PCAPredictor): Prédicteur 'distilbert' ou 'onnx' chargé
+        texts (Sequence[str]): Textes préprocessés
+        classes (Sequence[str]): Classes de la forêt (label_encoder.classes_)
+        batch_size (int): Taille des lots
+
+    Returns:
+        np.ndarray: Cibles souples (len(texts) x len(classes))
+    """
+    components = teacher._components()
+    probabilities = softmax(batch_logits(components['tokenizer'], logits_runner(components), texts,
+                                         batch_size, components['max_length']))
+
+    class_index = {label: i for i, label in enumerate(classes)}
+    shared = [(int(teacher_id), class_index[label])
+              for teacher_id, label in components['label_mapping'].items() if label in class_index]
+    if not shared:
+        raise ValueError("Aucune classe du professeur ne correspond aux PCA du corpus")
+
+    targets = np.zeros((len(texts), len(classes)), dtype=np.float64)
+    for teacher_id, class_id in shared:
+        targets[:, class_id] += probabilities[:, teacher_id]
+
+    mass = targets.sum(axis=1, keepdims=True)
+    empty = int((mass == 0).sum())
+    if empty:
+        print(f"⚠️ {empty} tickets sans probabilité sur les classes de la forêt (cibles nulles)")
+    return np.divide(targets, mass, out=np.zeros_like(targets), where=mass > 0)
+
+
+def expand_soft_targets(targets: np.ndarray, y: Optional[np.ndarray] = None, alpha: float = DEFAULT_ALPHA,
+                        top_k: int = DEFAULT_TOP_K) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Lignes (ticket, classe, poids) pour apprendre des cibles souples avec une forêt
+
+    Args:
+        targets (np.ndarray): Cibles souples (n x n_classes)
+        y (np.ndarray): Labels vrais encodés, mélangés aux cibles (optionnel)
+        alpha (float): Poids des cibles souples face au label vrai
+        top_k (int): Classes conservées par ticket
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray]: Index du ticket, classe et
+            poids de chaque ligne (poids sommant à 1 par ticket ; un ticket sans
+            cible ni label n'a aucune ligne)
+    """
+    mix = targets * alpha if y is not None else targets.copy()
+    if y is not None:
+        mix[np.arange(len(y)), y] += 1.0 - alpha
+
+    top = np.argsort(-mix, axis=1, kind='stable')[:, :top_k]
+    weights = np.take_along_axis(mix, top, axis=1)
+    total = weights.sum(axis=1, keepdims=True)
+    weights = np.divide(weights, total, out=np.zeros_like(weights), where=total > 0)
+    keep = weights > 0
+    rows = np.repeat(np.arange(len(mix)), top.shape[1]).reshape(top.shape)
+    return rows[keep], top[keep], weights[keep]
+
+
+def train_distilled(model: PCAPredictionModel, X_train, y_train: np.ndarray, targets: np.ndarray,
+                    alpha: float = DEFAULT_ALPHA, top_k: int = DEFAULT_TOP_K) -> Dict[str, Any]:
+    """
+    Entraîne la forêt TF-IDF sur les cibles souples du professeur
+
+    Vectoriseur, réduction et store de fréquences sont ajustés sur les textes
+    uniques (comme un entraînement normal) ; seules les lignes de la forêt
+    sont répétées.
+
+    Args:
+        model (PCAPredictionModel): Modèle configuré (label_encoder déjà ajusté)
+        X_train: Textes d'entraînement
+        y_train (np.ndarray): Labels vrais encodés
+        targets (np.ndarray): Cibles souples alignées sur X_train
+        alpha (float): Poids des cibles souples face au label vrai
+        top_k (int): Classes conservées par ticket
+
+    Returns:
+        Dict[str, Any]: Métriques d'entraînement
+    """
+    print(f"=== ENTRAÎNEMENT DISTILLÉ (alpha={alpha}, top-{top_k}) ===")
+    _, X_features = model._fit_features(X_train, y_train)
+
+    rows, labels, weights = expand_soft_targets(targets, y_train, alpha, top_k)
+    model.model = model.create_classifier()
+    start = time.perf_counter()
+    with profile_stage(model.profiler, 'forest_fit'):
+        model.model.fit(X_features[rows], labels, sample_weight=weights)
+    model.is_trained = True
+
+    return {'n_texts': int(X_features.shape[0]), 'n_rows': int(len(rows)), 'alpha': alpha, 'top_k': top_k,
+            'fit_time_s': time.perf_counter() - start,
+            'vocabulary_size': len(model.vectorizer.vocabulary_)}
+
+
+def request_latency(predict_one, texts: Sequence[str], n_requests: int = 200) -> Dict[str, float]:
+    """Latences p50 / p95 (ms) d'une requête unitaire"""
+    timings = []
+    for text in list(texts)[:n_requests]:
+        start = time.perf_counter()
+        predict_one(text)
+        timings.append((time.perf_counter() - start) * 1000)
+    return {'p50_ms': float(np.percentile(timings, 50)), 'p95_ms': float(np.percentile(timings, 95))}
+
+
+def compare_distillation(teacher: PCAPredictor, data_paths: Sequence[str] = DEFAULT_CORPUS,
+                         alpha: float = DEFAULT_ALPHA, top_k: int = DEFAULT_TOP_K,
+                         model_dir: Optional[str] = None,
+                         teacher_train_texts: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+    """
+    Forêt sur labels vrais, DistilBERT et forêt distillée sur le même holdout
+
+    Un ticket vu par DistilBERT à l'entraînement gonfle son accuracy : les
+    textes d'entraînement du professeur sont retirés du holdout. Sans eux,
+    l'écart comblé n'est pas calculé (accuracy du professeur non fiable).
+
+    Args:
+        teacher (PCAPredictor): Prédicteur 'distilbert' ou 'onnx' chargé
+        data_paths (Sequence[str]): CSV du corpus
+        alpha (float): Poids des cibles souples face au label vrai
+        top_k (int): Classes conservées par ticket
+        model_dir (str): Si fourni, sauvegarde la forêt distillée (bundle standard)
+        teacher_train_texts (Sequence[str]): Textes préprocessés d'entraînement du
+            professeur (None si inconnus)
+
+    Returns:
+        Dict[str, Any]: Accuracy et latence par modèle, part de l'écart comblée
+    """
+    X, y = load_corpus(data_paths)
+    baseline = PCAPredictionModel()
+    X_train, X_test, y_train, y_test = baseline.prepare_data(X, y)
+    classes = baseline.label_encoder.classes_
+
+    # Holdout restreint aux tickets que le professeur n'a pas vus
+    teacher_holdout = None
+    if teacher_train_texts is not None:
+        unseen = ~X_test.isin(set(teacher_train_texts)).to_numpy()
+        teacher_holdout = {'n_test': int(unseen.sum()), 'excluded': int((~unseen).sum())}
+        print(f"🔒 {teacher_holdout['excluded']} tickets de test vus par le professeur exclus du holdout")
+        if not unseen.any():
+            raise ValueError("Holdout vide : tous les tickets de test ont servi à entraîner le professeur")
+        X_test, y_test = X_test[unseen], y_test[unseen]
+    else:
+        print("⚠️ Split d'entraînement du professeur inconnu : écart comblé non calculé")
+
+    # Corpus complet étiqueté en une passe (lots triés par longueur)
+    start = time.perf_counter()
+    targets = teacher_soft_targets(teacher, list(X), classes)
+    labelling_time = time.perf_counter() - start
+    print(f"🏷️ {len(X)} tickets étiquetés par DistilBERT en {labelling_time:.1f}s")
+
+    teacher_accuracy = accuracy_score(y_test, targets[X_test.index].argmax(axis=1))
+    components = teacher._components()
+    run = logits_runner(components)
+    teacher_latency = request_latency(
+        lambda text: batch_logits(components['tokenizer'], run, [text], 1, components['max_length']), X_test)
+
+    baseline.train(X_train, y_train, validation='none')
+    baseline_accuracy = accuracy_score(y_test, baseline.model.predict(baseline.transform(X_test)))
+
+    distilled = PCAPredictionModel()
+    distilled.label_encoder = baseline.label_encoder
+    training = train_distilled(distilled, X_train, y_train, targets[X_train.index], alpha, top_k)
+    distilled_accuracy = accuracy_score(y_test, distilled.model.predict(distilled.transform(X_test)))
+
+    gap = teacher_accuracy - baseline_accuracy
+    comparison = {
+        'n_texts': int(len(X)),
+        'n_test': int(len(X_test)),
+        'teacher_holdout': teacher_holdout,
+        'labelling_time_s': labelling_time,
+        'training': training,
+        'teacher': dict(teacher_latency, accuracy=float(teacher_accuracy), backend=teacher.backend),
+        'forest': dict(request_latency(lambda text: baseline.model.predict_proba(baseline.transform([text])),
+                                       X_test), accuracy=float(baseline_accuracy)),
+        'distilled': dict(request_latency(lambda text: distilled.model.predict_proba(distilled.transform([text])),
+                                          X_test), accuracy=float(distilled_accuracy)),
+        # Sans avance du professeur (ou sans holdout propre), pas d'écart mesurable
+        'gap_closed': float((distilled_accuracy - baseline_accuracy) / gap)
+        if gap > 0 and teacher_holdout is not None else None
+    }
+
+    if model_dir:
+        comparison['model_version'] = distilled.save_model(model_dir)
+    return comparison
+
+
+def print_distillation(comparison: Dict[str, Any]) -> None:
+    """Affiche accuracy et latence de la forêt, du professeur et de la forêt distillée"""
+    print("\n🎓 DISTILLATION DistilBERT -> FORÊT TF-IDF")
+    print("-" * 56)
+    print(f"{'Modèle':<18}{'Accuracy':>10}{'p50 (ms)':>12}{'p95 (ms)':>12}")
+    for name, label in (('forest', 'Forêt'), ('teacher', 'DistilBERT'), ('distilled', 'Forêt distillée')):
+        row = comparison[name]
+        print(f"{label:<18}{row['accuracy']:>10.4f}{row['p50_ms']:>12.2f}{row['p95_ms']:>12.2f}")
+    if comparison['teacher_holdout'] is None:
+        print("⚠️ Split d'entraînement du professeur inconnu : écart comblé non calculé "
+              "(fournir ses données avec --teacher-train-data)")
+    elif comparison['gap_closed'] is None:
+        print("⚠️ DistilBERT ne dépasse pas la forêt : aucun écart à combler")
+    else:
+        print(f"📈 Écart comblé: {comparison['gap_closed']:.1%}")
+
+
+def run_distillation(data_paths: Sequence[str] = DEFAULT_CORPUS, checkpoint_dir: str = 'distilbert_pca_model',
+                     model_dir: str = 'models_distilled', backend: str = 'distilbert',
+                     alpha: float = DEFAULT_ALPHA, top_k: int = DEFAULT_TOP_K,
+                     output_path: Optional[str] = None,
+                     teacher_train_paths: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+    """
+    Distille DistilBERT dans la forêt, compare et sauvegarde le bundle distillé
+
+    Args:
+        data_paths (Sequence[str]): CSV du corpus (augmenté + historique)
+        checkpoint_dir (str): Checkpoint DistilBERT (professeur)
+        model_dir (str): Répertoire du bundle distillé
+        backend (str): Backend du professeur ('distilbert' ou 'onnx')
+        alpha (float): Poids des cibles souples face au label vrai
+        top_k (int): Classes conservées par ticket
+        output_path (str): Rapport JSON (optionnel)
+        teacher_train_paths (Sequence[str]): CSV des tickets d'entraînement du
+            professeur, exclus du holdout (sans eux, pas d'écart comblé)
+
+    Returns:
+        Dict[str, Any]: Comparaison
+    """
+    teacher = PCAPredictor(backend=backend, checkpoint_dir=checkpoint_dir)
+    teacher.load_model()
+    teacher_train_texts = load_corpus(teacher_train_paths)[0] if teacher_train_paths else None
+    comparison = compare_distillation(teacher, data_paths, alpha, top_k, model_dir, teacher_train_texts)
+    print_distillation(comparison)
+
+    if output_path:
+        os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+        with open(output_path, 'w', encoding='utf-8') as f:
+            json.dump(dict(comparison, data_paths=list(data_paths), checkpoint_dir=checkpoint_dir,
+                           teacher_train_paths=list(teacher_train_paths or [])),
+                      f, indent=2, ensure_ascii=False)
+        print(f"📄 Rapport sauvegardé dans: {output_path}")
+    return comparison
+
+
+def main():
+    """Distillation de DistilBERT dans la forêt TF-IDF"""
+    parser = argparse.ArgumentParser(description='Distillation DistilBERT -> forêt TF-IDF')
+    parser.add_argument('--data', nargs='+', default=list(DEFAULT_CORPUS), help='CSV du corpus')
+    parser.add_argument('--checkpoint-dir', default='distilbert_pca_model', help='Checkpoint DistilBERT')
+    parser.add_argument('--backend', choices=['distilbert', 'onnx'], default='distilbert',
+                        help='Backend du professeur')
+    parser.add_argument('--model-dir', default='models_distilled', help='Répertoire du bundle distillé')
+    parser.add_argument('--alpha', type=float, default=DEFAULT_ALPHA,
+                        help='Poids des cibles souples face au label vrai (default: 0.5)')
+    parser.add_argument('--top-k', type=int, default=DEFAULT_TOP_K, help='Classes conservées par ticket')
+    parser.add_argument('--output', help='Fichier JSON du rapport')
+    parser.add_argument('--teacher-train-data', nargs='+',
+                        help="CSV d'entraînement du professeur, exclus du holdout")
+    args = parser.parse_args()
+
+    run_distillation(args.data, args.checkpoint_dir, args.model_dir, args.backend,
+                     args.alpha, args.top_k, args.output, args.teacher_train_data)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,381 @@
+"""
+Module d'entraînement distribué de la forêt pour le projet PCA
+Les arbres d'une forêt aléatoire sont indépendants : le coordinateur
+vectorise une seule fois le corpus (TF-IDF, réduction éventuelle), écrit la
+matrice dans un store projetable (parallel_cv.dump_feature_store) avec un
+fichier de job, puis chaque worker (processus local ou nœud partageant le
+répertoire du job) entraîne son sous-ensemble d'arbres avec sa propre
+graine. Les estimateurs sont ensuite fusionnés en une seule forêt et
+sauvegardés dans un bundle standard.
+Auteur: Assistant IA
+Date: 2025-07-26
+"""
+
+import os
+import json
+import time
+import shutil
+import socket
+import tempfile
+import argparse
+from typing import Any, Dict, List, Optional, Sequence
+
+import joblib
+import numpy as np
+from joblib import Parallel, delayed
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import accuracy_score
+
+from preprocessing import TextPreprocessor
+from train_model import PCAPredictionModel
+from parallel_cv import dump_feature_store, load_feature_store, plan_thread_budget
+from profiling import profile_stage
+
+
+JOB_FILE = 'job.json'
+FEATURES_DIR = 'features'
+PARTS_DIR = 'parts'
+COORDINATOR_FILE = 'coordinator.pkl'
+JOB_FORMAT_VERSION = 1
+
+
+def split_estimators(n_estimators: int, n_parts: int) -> List[int]:
+    """
+    Répartit les arbres entre les parts (les premières reçoivent le reste)
+
+    Args:
+        n_estimators (int): Nombre total d'arbres
+        n_parts (int): Nombre de parts
+
+    Returns:
+        List[int]: Nombre d'arbres par part
+    """
+    if n_parts < 1 or n_parts > n_estimators:
+        raise ValueError(f"Nombre de parts invalide: {n_parts} (1 à {n_estimators})")
+    base, extra = divmod(n_estimators, n_parts)
+    return [base + (1 if i < extra else 0) for i in range(n_parts)]
+
+
+def _part_path(job_dir: str, part: int) -> str:
+    """Chemin de la forêt partielle d'une part"""
+    return os.path.join(job_dir, PARTS_DIR, f'part_{part:03d}.pkl')
+
+
+def read_job(job_dir: str) -> Dict[str, Any]:
+    """Lit la description du job"""
+    with open(os.path.join(job_dir, JOB_FILE), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def prepare_job(model: PCAPredictionModel, X_train, y_train: np.ndarray, job_dir: str,
+                n_parts: int) -> Dict[str, Any]:
+    """
+    Vectorise le corpus et écrit le job partagé (exécuté par le coordinateur)
+
+    Args:
+        model (PCAPredictionModel): Modèle configuré (paramètres TF-IDF, forêt, réduction)
+        X_train: Textes d'entraînement
+        y_train (np.ndarray): Labels encodés
+        job_dir (str): Répertoire du job, partagé par les workers
+        n_parts (int): Nombre de sous-forêts
+
+    Returns:
+        Dict[str, Any]: Description du job
+    """
+    os.makedirs(os.path.join(job_dir, PARTS_DIR), exist_ok=True)
+
+    # Un seul vectoriseur pour toutes les parts : les arbres fusionnés partagent l'espace de features
+    _, X_features = model._fit_features(X_train, y_train)
+
+    with profile_stage(model.profiler, 'feature_store'):
+        dump_feature_store(X_features, y_train, os.path.join(job_dir, FEATURES_DIR))
+
+    # Graines indépendantes par part, déterministes pour (random_state, n_parts)
+    n_trees = split_estimators(model.rf_params['n_estimators'], n_parts)
+    seeds = np.random.SeedSequence(model.random_state).generate_state(n_parts).tolist()
+    rf_params = {key: value for key, value in model.rf_params.items()
+                 if key not in ('n_estimators', 'random_state', 'n_jobs', 'oob_score')}
+
+    job = {
+        'format_version': JOB_FORMAT_VERSION,
+        'n_parts': n_parts,
+        'n_trees': n_trees,
+        'seeds': seeds,
+        'rf_params': rf_params,
+        'n_samples': int(X_features.shape[0]),
+        'n_features': int(X_features.shape[1]),
+        'n_classes': int(len(np.unique(y_train))),
+        'training_data_hash': model.training_data_hash
+    }
+    with open(os.path.join(job_dir, JOB_FILE), 'w', encoding='utf-8') as f:
+        json.dump(job, f, indent=2)
+
+    # État du coordinateur sans forêt : permet la fusion depuis un autre processus
+    joblib.dump(model, os.path.join(job_dir, COORDINATOR_FILE))
+    return job
+
+
+def train_part(job_dir: str, part: int, n_threads: int = 1) -> Dict[str, Any]:
+    """
+    Entraîne la sous-forêt d'une part depuis le store projeté (exécuté par un worker)
+
+    Args:
+        job_dir (str): Répertoire du job
+        part (int): Numéro de la part
+        n_threads (int): Threads alloués à cette sous-forêt
+
+    Returns:
+        Dict[str, Any]: Statistiques de la part
+    """
+    job = read_job(job_dir)
+    X, y = load_feature_store(os.path.join(job_dir, FEATURES_DIR))
+
+    forest = RandomForestClassifier(**job['rf_params'], n_estimators=job['n_trees'][part],
+                                    random_state=job['seeds'][part], n_jobs=n_threads)
+    start = time.perf_counter()
+    forest.fit(X, y)
+    fit_time = time.perf_counter() - start
+
+    # Écriture atomique : une part visible est une part complète
+    path = _part_path(job_dir, part)
+    joblib.dump(forest, path + '.tmp')
+    os.replace(path + '.tmp', path)
+
+    return {
+        'part': part,
+        'n_trees': job['n_trees'][part],
+        'fit_time_s': fit_time,
+        'n_threads': n_threads,
+        'worker_pid': os.getpid(),
+        'host': socket.gethostname()
+    }
+
+
+def merge_parts(job_dir: str) -> RandomForestClassifier:
+    """
+    Fusionne les sous-forêts d'un job en une seule forêt
+
+    Args:
+        job_dir (str): Répertoire du job
+
+    Returns:
+        RandomForestClassifier: Forêt contenant tous les arbres
+    """
+    job = read_job(job_dir)
+    missing = [part for part in range(job['n_parts']) if not os.path.exists(_part_path(job_dir, part))]
+    if missing:
+        raise ValueError(f"Parts manquantes: {missing}")
+
+    forests = [joblib.load(_part_path(job_dir, part)) for part in range(job['n_parts'])]
+    merged = forests[0]
+    for forest in forests[1:]:
+        if not np.array_equal(forest.classes_, merged.classes_) or forest.n_features_in_ != merged.n_features_in_:
+            raise ValueError("Sous-forêts incompatibles (classes ou features différentes)")
+        merged.estimators_.extend(forest.estimators_)
+    merged.n_estimators = len(merged.estimators_)
+    return merged
+
+
+def attach_forest(model: PCAPredictionModel, forest: RandomForestClassifier) -> None:
+    """Installe la forêt fusionnée dans le modèle avec ses paramètres d'inférence habituels"""
+    forest.set_params(n_jobs=model.rf_params.get('n_jobs'), random_state=model.random_state)
+    model.model = forest
+    model.is_trained = True
+
+
+class LocalCluster:
+    """
+    Cluster local de processus : exécute train_part comme le ferait un nœud
+    """
+
+    def __init__(self, n_workers: int = 2, thread_budget: Optional[int] = None):
+        """
+        Initialise le cluster local
+
+        Args:
+            n_workers (int): Nombre de processus workers
+            thread_budget (int): Budget global de threads (défaut: n_workers)
+        """
+        self.n_workers = n_workers
+        self.thread_budget = thread_budget or n_workers
+
+    def run(self, job_dir: str) -> List[Dict[str, Any]]:
+        """
+        Entraîne toutes les parts du job
+
+        Args:
+            job_dir (str): Répertoire du job
+
+        Returns:
+            List[Dict[str, Any]]: Statistiques par part
+        """
+        n_parts = read_job(job_dir)['n_parts']
+        parallel_parts, threads_per_part = plan_thread_budget(n_parts, self.thread_budget)
+        parallel_parts = min(parallel_parts, self.n_workers)
+        return Parallel(n_jobs=parallel_parts, backend='loky')(
+            delayed(train_part)(job_dir, part, threads_per_part) for part in range(n_parts)
+        )
+
+
+def distributed_train(model: PCAPredictionModel, X_train, y_train: np.ndarray,
+                      n_workers: int = 2, job_dir: Optional[str] = None,
+                      cluster: Optional[LocalCluster] = None) -> Dict[str, Any]:
+    """
+    Entraîne le modèle en répartissant les arbres sur plusieurs workers
+
+    Args:
+        model (PCAPredictionModel): Modèle configuré (label_encoder déjà ajusté)
+        X_train: Textes d'entraînement
+        y_train (np.ndarray): Labels encodés
+        n_workers (int): Nombre de sous-forêts
+        job_dir (str): Répertoire du job (défaut: répertoire temporaire supprimé à la fin)
+        cluster (LocalCluster): Exécuteur des parts (défaut: LocalCluster(n_workers))
+
+    Returns:
+        Dict[str, Any]: Métriques d'entraînement et statistiques par part
+    """
+    cluster = cluster or LocalCluster(n_workers)
+    owned = job_dir is None
+    job_dir = job_dir or tempfile.mkdtemp(prefix='pca_distributed_')
+
+    print(f"=== ENTRAÎNEMENT DISTRIBUÉ ({n_workers} parts) ===")
+    try:
+        job = prepare_job(model, X_train, y_train, job_dir, n_workers)
+        start = time.perf_counter()
+        with profile_stage(model.profiler, 'forest_fit'):
+            parts = cluster.run(job_dir)
+        fit_wall = time.perf_counter() - start
+        attach_forest(model, merge_parts(job_dir))
+    finally:
+        if owned:
+            shutil.rmtree(job_dir, ignore_errors=True)
+
+    for part in parts:
+        print(f"  Part {part['part']}: {part['n_trees']} arbres en {part['fit_time_s']:.1f}s "
+              f"({part['host']}, pid {part['worker_pid']})")
+    print(f"Forêt fusionnée: {model.model.n_estimators} arbres, fit {fit_wall:.1f}s")
+
+    return {
+        'validation_method': 'none',
+        'validation_accuracy': None,
+        'vocabulary_size': len(model.vectorizer.vocabulary_),
+        'tfidf_shape': (job['n_samples'], job['n_features']),
+        'n_parts': job['n_parts'],
+        'fit_wall_time_s': fit_wall,
+        'parts': parts
+    }
+
+
+def measure_speedup(X_train, y_train: np.ndarray, X_test, y_test: np.ndarray,
+                    worker_counts: Sequence[int] = (1, 2, 4),
+                    rf_params: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    """
+    Mesure le temps de fit de la forêt et l'accuracy selon le nombre de workers
+
+    Args:
+        X_train, X_test: Textes préprocessés
+        y_train, y_test (np.ndarray): Labels encodés
+        worker_counts (Sequence[int]): Nombres de workers à comparer
+        rf_params (Dict): Paramètres RandomForest à substituer (optionnel)
+
+    Returns:
+        List[Dict[str, Any]]: Une ligne par nombre de workers
+    """
+    rows = []
+    for n_workers in worker_counts:
+        model = PCAPredictionModel()
+        model.update_params(rf_params=rf_params)
+        metrics = distributed_train(model, X_train, y_train, n_workers=n_workers)
+        accuracy = accuracy_score(y_test, model.model.predict(model.transform(X_test)))
+        rows.append({'n_workers': n_workers, 'fit_wall_time_s': metrics['fit_wall_time_s'],
+                     'accuracy': accuracy})
+
+    baseline = rows[0]['fit_wall_time_s']
+    for row in rows:
+        row['speedup'] = baseline / row['fit_wall_time_s']
+    return rows
+
+
+def print_speedup(rows: List[Dict[str, Any]]) -> None:
+    """Affiche le tableau d'accélération"""
+    print(f"\n⚡ ACCÉLÉRATION DU FIT DISTRIBUÉ ({os.cpu_count()} CPU visibles)")
+    print("-" * 48)
+    print(f"{'Workers':>8}{'Fit (s)':>10}{'Accélération':>15}{'Accuracy':>12}")
+    for row in rows:
+        print(f"{row['n_workers']:>8}{row['fit_wall_time_s']:>10.2f}{row['speedup']:>14.2f}x"
+              f"{row['accuracy']:>12.4f}")
+
+
+def run_distributed_training(data_path: str, model_dir: str = 'models', n_workers: int = 2,
+                             job_dir: Optional[str] = None,
+                             speedup_workers: Optional[Sequence[int]] = None) -> Dict[str, Any]:
+    """
+    Entraîne la forêt sur un cluster local, l'évalue et sauvegarde le bundle
+
+    Args:
+        data_path (str): CSV de tickets GIM
+        model_dir (str): Répertoire du bundle
+        n_workers (int): Nombre de workers
+        job_dir (str): Répertoire du job conservé (optionnel)
+        speedup_workers (Sequence[int]): Si fourni, mesure aussi l'accélération
+
+    Returns:
+        Dict[str, Any]: Métriques d'entraînement, d'évaluation (et accélération)
+    """
+    _, X, y = TextPreprocessor().load_and_preprocess_data(data_path)
+    model = PCAPredictionModel()
+    X_train, X_test, y_train, y_test = model.prepare_data(X, y)
+
+    training = distributed_train(model, X_train, y_train, n_workers=n_workers, job_dir=job_dir)
+    evaluation = model.evaluate(X_test, y_test)
+    version = model.save_model(model_dir)
+    print(f"✅ Modèle distribué sauvegardé (version {version})")
+
+    results = {'training': training, 'evaluation': evaluation, 'model_version': version}
+    if speedup_workers:
+        results['speedup'] = measure_speedup(X_train, y_train, X_test, y_test, speedup_workers)
+        print_speedup(results['speedup'])
+    return results
+
+
+def main():
+    """Entraînement distribué : cluster local, ou rôle coordinateur / worker / fusion sur nœuds"""
+    parser = argparse.ArgumentParser(description='Entraînement distribué de la forêt PCA')
+    parser.add_argument('--role', choices=['local', 'prepare', 'worker', 'merge'], default='local',
+                        help="local: cluster de processus ; prepare/worker/merge: étapes d'un job multi-nœuds")
+    parser.add_argument('--data', default='data/gim_diagnostic_dataset.csv', help='CSV de tickets GIM')
+    parser.add_argument('--model-dir', default='models', help='Répertoire du bundle')
+    parser.add_argument('--job-dir', help='Répertoire du job (partagé entre nœuds)')
+    parser.add_argument('--workers', type=int, default=2, help='Nombre de workers / parts')
+    parser.add_argument('--part', type=int, help='worker: numéro de la part à entraîner')
+    parser.add_argument('--threads', type=int, default=1, help='worker: threads de la sous-forêt')
+    parser.add_argument('--speedup', type=int, nargs='+', help='local: nombres de workers à comparer')
+    args = parser.parse_args()
+
+    if args.role == 'local':
+        run_distributed_training(args.data, args.model_dir, args.workers, args.job_dir, args.speedup)
+        return
+
+    if not args.job_dir:
+        parser.error('--job-dir est requis pour les rôles prepare, worker et merge')
+
+    if args.role == 'prepare':
+        _, X, y = TextPreprocessor().load_and_preprocess_data(args.data)
+        model = PCAPredictionModel()
+        X_train, _, y_train, _ = model.prepare_data(X, y)
+        job = prepare_job(model, X_train, y_train, args.job_dir, args.workers)
+        print(f"📦 Job prêt: {job['n_parts']} parts, {job['n_samples']} x {job['n_features']}")
+
+    elif args.role == 'worker':
+        stats = train_part(args.job_dir, args.part, args.threads)
+        print(f"🌲 Part {stats['part']}: {stats['n_trees']} arbres en {stats['fit_time_s']:.1f}s")
+
+    elif args.role == 'merge':
+        model = joblib.load(os.path.join(args.job_dir, COORDINATOR_FILE))
+        attach_forest(model, merge_parts(args.job_dir))
+        version = model.save_model(args.model_dir)
+        print(f"✅ Forêt fusionnée ({model.model.n_estimators} arbres), version {version}")
+
+
+if __name__ == "__main__":
+    main()
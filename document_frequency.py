@@ -0,0 +1,214 @@
+"""
+Module de store de fréquences de termes pour le projet PCA
+Conserve, pour chaque terme (n-gramme) vu à l'ingestion, le nombre de
+documents qui le contiennent et son nombre total d'occurrences, sans filtre
+min_df / max_df / max_features. Le vectoriseur TF-IDF (vocabulaire et IDF)
+se reconstruit à partir de ces compteurs en un temps proportionnel à la
+taille du vocabulaire, sans relire le corpus ; le résultat est identique à
+un TfidfVectorizer.fit sur l'ensemble des documents ingérés.
+Auteur: Assistant IA
+Date: 2025-07-26
+"""
+
+import time
+import argparse
+from collections import Counter
+from numbers import Integral
+from typing import Any, Dict, Iterable, Optional
+
+import numpy as np
+import scipy.sparse as sp
+from sklearn.feature_extraction.text import TfidfTransformer, TfidfVectorizer
+
+from model_bundle import ModelBundle
+
+
+# Paramètres qui ne changent que le filtrage du vocabulaire : modifiables à la reconstruction
+FILTER_PARAMS = ('max_features', 'min_df', 'max_df')
+
+
+class DocumentFrequencyStore:
+    """
+    Compteurs de fréquence document / corpus par terme, mis à jour par lots
+    """
+
+    def __init__(self, tfidf_params: Dict[str, Any]):
+        """
+        Initialise un store vide
+
+        Args:
+            tfidf_params (Dict[str, Any]): Paramètres du TfidfVectorizer (l'analyseur
+                n-grammes en est dérivé ; les filtres sont appliqués à la reconstruction)
+        """
+        self.tfidf_params = dict(tfidf_params)
+        self.n_documents = 0
+        self.document_frequency: Counter = Counter()
+        self.term_frequency: Counter = Counter()
+        self._analyzer = None
+
+    @classmethod
+    def from_texts(cls, texts: Iterable[str], tfidf_params: Dict[str, Any]) -> 'DocumentFrequencyStore':
+        """
+        Construit un store à partir d'un corpus
+
+        Args:
+            texts (Iterable[str]): Textes préprocessés
+            tfidf_params (Dict[str, Any]): Paramètres du TfidfVectorizer
+
+        Returns:
+            DocumentFrequencyStore: Store rempli
+        """
+        store = cls(tfidf_params)
+        store.update(texts)
+        return store
+
+    @property
+    def analyzer(self):
+        """Analyseur identique à celui du TfidfVectorizer (tokenisation + n-grammes)"""
+        if self._analyzer is None:
+            self._analyzer = TfidfVectorizer(**self.tfidf_params).build_analyzer()
+        return self._analyzer
+
+    def __getstate__(self):
+        # L'analyseur est une closure : reconstruit au chargement
+        state = self.__dict__.copy()
+        state['_analyzer'] = None
+        return state
+
+    @property
+    def n_terms(self) -> int:
+        """Nombre de termes distincts vus (avant filtrage)"""
+        return len(self.document_frequency)
+
+    def update(self, texts: Iterable[str]) -> int:
+        """
+        Ajoute un lot de documents aux compteurs
+
+        Args:
+            texts (Iterable[str]): Textes préprocessés des nouveaux documents
+
+        Returns:
+            int: Nombre de documents ajoutés
+        """
+        analyzer = self.analyzer
+        n_added = 0
+        for text in texts:
+            counts = Counter(analyzer(text))
+            self.term_frequency.update(counts)
+            self.document_frequency.update(counts.keys())
+            n_added += 1
+
+        self.n_documents += n_added
+        return n_added
+
+    def _check_params(self, tfidf_params: Dict[str, Any]) -> Dict[str, Any]:
+        """Fusionne les paramètres demandés ; seuls les filtres peuvent différer du store"""
+        params = dict(self.tfidf_params)
+        for name, value in (tfidf_params or {}).items():
+            if name not in FILTER_PARAMS and params.get(name) != value:
+                raise ValueError(f"Paramètre {name}={value!r} incompatible avec le store "
+                                 f"({params.get(name)!r}) : reconstruire le store depuis le corpus")
+            params[name] = value
+        return params
+
+    def select_vocabulary(self, tfidf_params: Optional[Dict[str, Any]] = None) -> Dict[str, int]:
+        """
+        Applique min_df, max_df et max_features aux compteurs
+
+        Reproduit CountVectorizer._limit_features : termes triés, filtre sur
+        la fréquence document, puis les max_features termes les plus fréquents
+        du corpus.
+
+        Args:
+            tfidf_params (Dict[str, Any]): Filtres à appliquer (défaut: ceux du store)
+
+        Returns:
+            Dict[str, int]: Vocabulaire terme -> index de colonne
+        """
+        params = self._check_params(tfidf_params)
+        if self.n_documents == 0:
+            raise ValueError("Store vide : aucun document ingéré")
+
+        terms = np.array(sorted(self.document_frequency), dtype=object)
+        dfs = np.array([self.document_frequency[t] for t in terms], dtype=np.int64)
+
+        max_df = params.get('max_df', 1.0)
+        min_df = params.get('min_df', 1)
+        high = max_df if isinstance(max_df, Integral) else max_df * self.n_documents
+        low = min_df if isinstance(min_df, Integral) else min_df * self.n_documents
+        if high < low:
+            raise ValueError("max_df corresponds to < documents than min_df")
+
+        mask = (dfs <= high) & (dfs >= low)
+        limit = params.get('max_features')
+        if limit is not None and mask.sum() > limit:
+            # Même tri (float64, argsort par défaut) que scikit-learn pour départager les égalités
+            tfs = np.array([self.term_frequency[t] for t in terms], dtype=np.float64)
+            mask_inds = (-tfs[mask]).argsort()[:limit]
+            new_mask = np.zeros(len(dfs), dtype=bool)
+            new_mask[np.where(mask)[0][mask_inds]] = True
+            mask = new_mask
+
+        if not mask.any():
+            raise ValueError("After pruning, no terms remain. Try a lower min_df or a higher max_df.")
+
+        return {term: index for index, term in enumerate(terms[mask])}
+
+    def build_vectorizer(self, tfidf_params: Optional[Dict[str, Any]] = None) -> TfidfVectorizer:
+        """
+        Reconstruit un TfidfVectorizer ajusté à partir des compteurs
+
+        Args:
+            tfidf_params (Dict[str, Any]): Filtres à appliquer (défaut: ceux du store)
+
+        Returns:
+            TfidfVectorizer: Vectoriseur prêt pour transform (utilisable par PCAPredictor)
+        """
+        params = self._check_params(tfidf_params)
+        vocabulary = self.select_vocabulary(params)
+
+        vectorizer = TfidfVectorizer(**params)
+        vectorizer.vocabulary_ = vocabulary
+        vectorizer.fixed_vocabulary_ = False
+
+        # Transformateur TF-IDF ajusté sur une matrice vide (fixe n_features_in_), IDF remplacé ensuite
+        vectorizer._tfidf = TfidfTransformer(
+            norm=vectorizer.norm, use_idf=vectorizer.use_idf,
+            smooth_idf=vectorizer.smooth_idf, sublinear_tf=vectorizer.sublinear_tf
+        ).fit(sp.csr_matrix((1, len(vocabulary))))
+
+        if vectorizer.use_idf:
+            terms = sorted(vocabulary, key=vocabulary.get)
+            df = np.array([self.document_frequency[t] for t in terms], dtype=np.float64)
+            n_samples = self.n_documents
+            if vectorizer.smooth_idf:
+                df += 1
+                n_samples += 1
+            vectorizer.idf_ = np.log(n_samples / df) + 1
+
+        return vectorizer
+
+
+def main():
+    """Reconstruit le vectoriseur d'un bundle depuis son store et compare avec l'existant"""
+    parser = argparse.ArgumentParser(description='Store de fréquences de termes TF-IDF')
+    parser.add_argument('--model-dir', default='models', help='Bundle contenant df_store.pkl')
+    args = parser.parse_args()
+
+    bundle = ModelBundle.open(args.model_dir)
+    store = bundle.load('df_store.pkl')
+    current = bundle.vectorizer
+
+    start = time.perf_counter()
+    rebuilt = store.build_vectorizer()
+    elapsed = time.perf_counter() - start
+
+    same_vocabulary = rebuilt.vocabulary_ == current.vocabulary_
+    print(f"📚 Store: {store.n_documents} documents, {store.n_terms} termes distincts")
+    print(f"Vocabulaire reconstruit: {len(rebuilt.vocabulary_)} termes en {elapsed * 1000:.1f} ms")
+    print(f"{'✅' if same_vocabulary else '⚠️'} Vocabulaire {'identique au' if same_vocabulary else 'différent du'} "
+          f"vectoriseur du bundle (version {bundle.version})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Module de routage par préfixe de code DTC pour le projet PCA
+Le code DTC porte une structure (système P/B/C/U, type générique ou
+constructeur, sous-système) : le routeur associe chaque code au plus long
+préfixe disposant de son propre modèle, ou à la route de repli '*'. Module
+volontairement léger (sans scikit-learn) pour être importé au service.
+Auteur: Assistant IA
+Date: 2025-07-26
+"""
+
+import re
+from collections import Counter
+from typing import Any, Sequence
+
+import numpy as np
+
+
+ROUTER_FILE = 'routes.json'
+ROUTES_DIR = 'routes'
+FALLBACK_ROUTE = '*'
+ROUTER_FORMAT_VERSION = 1
+
+
+def normalize_dtc(code: Any) -> str:
+    """Code DTC en majuscules, sans séparateurs ('p0-300' -> 'P0300')"""
+    if code is None or (isinstance(code, float) and np.isnan(code)):
+        return ''
+    return re.sub(r'[^0-9A-Z]', '', str(code).upper())
+
+
+def route_directory(route: str) -> str:
+    """Nom du sous-répertoire d'une route"""
+    return '_fallback' if route == FALLBACK_ROUTE else route
+
+
+class DTCRouter:
+    """
+    Routeur par plus long préfixe de code DTC
+    """
+
+    def __init__(self, routes: Sequence[str], depth: int):
+        """
+        Initialise le routeur
+
+        Args:
+            routes (Sequence[str]): Préfixes disposant d'un modèle (et '*')
+            depth (int): Longueur maximale des préfixes
+        """
+        self.routes = set(routes)
+        self.depth = depth
+
+    def route(self, code_dtc: Any) -> str:
+        """
+        Route d'un code DTC
+
+        Args:
+            code_dtc: Code DTC brut
+
+        Returns:
+            str: Plus long préfixe connu, '*' sinon
+        """
+        code = normalize_dtc(code_dtc)
+        for length in range(min(self.depth, len(code)), 0, -1):
+            if code[:length] in self.routes:
+                return code[:length]
+        return FALLBACK_ROUTE
+
+    @classmethod
+    def plan(cls, codes: Sequence[Any], depth: int = 3, min_samples: int = 200) -> 'DTCRouter':
+        """
+        Choisit les routes : un préfixe de longueur depth devient une route s'il
+        compte assez de tickets, sinon ses tickets remontent au préfixe plus court
+
+        Args:
+            codes (Sequence): Codes DTC d'entraînement
+            depth (int): Longueur maximale des préfixes (3 = système + type + sous-système)
+            min_samples (int): Nombre minimal de tickets par route
+
+        Returns:
+            DTCRouter: Routeur (la route '*' est toujours présente)
+        """
+        pending = [normalize_dtc(code) for code in codes]
+        routes = [FALLBACK_ROUTE]
+        for length in range(depth, 0, -1):
+            counts = Counter(code[:length] for code in pending if len(code) >= length)
+            kept = {prefix for prefix, n in counts.items() if n >= min_samples}
+            routes.extend(sorted(kept))
+            pending = [code for code in pending if code[:length] not in kept]
+        return cls(routes, depth)
+
+    def assign(self, codes: Sequence[Any]) -> np.ndarray:
+        """Route de chaque code (vectorisé sur un lot)"""
+        return np.array([self.route(code) for code in codes], dtype=object)
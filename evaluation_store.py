@@ -0,0 +1,154 @@
+"""
+Module de stockage binaire des sorties d'évaluation pour le projet PCA
+Les grands tableaux de PCAPredictionModel.evaluate (probabilités, prédictions,
+labels, matrice de confusion) sont écrits dans un répertoire annexe de
+fichiers .npy aux dtypes minimaux, projetables en mémoire : labels encodés
+en entiers, probabilités en matrice creuse float32 (les zéros ne sont pas
+stockés, index en int32 pour rester projetés au rechargement). Le JSON des
+résultats ne garde que les métriques résumées et une référence vers ce
+répertoire.
+Auteur: Assistant IA
+Date: 2025-07-26
+"""
+
+import os
+import json
+from typing import Any, Dict, Optional, Sequence
+
+import numpy as np
+import scipy.sparse as sp
+
+
+SIDECAR_MANIFEST = 'arrays.json'
+
+# Clés de evaluate() déplacées hors du JSON
+ARRAY_KEYS = ('predictions', 'true_labels', 'prediction_probabilities', 'confusion_matrix')
+
+
+def _smallest_uint_dtype(max_value: int) -> np.dtype:
+    """Plus petit entier non signé capable de contenir max_value"""
+    for dtype in (np.uint8, np.uint16, np.uint32):
+        if max_value <= np.iinfo(dtype).max:
+            return np.dtype(dtype)
+    return np.dtype(np.uint64)
+
+
+def _csr_index_dtype(matrix: sp.csr_matrix) -> np.dtype:
+    """Dtype d'index que scipy conserve sans copie (int32 sauf très grandes matrices)"""
+    if max(matrix.nnz, *matrix.shape) <= np.iinfo(np.int32).max:
+        return np.dtype(np.int32)
+    return np.dtype(np.int64)
+
+
+def _save_array(sidecar_dir: str, name: str, array: np.ndarray) -> Dict[str, Any]:
+    """Écrit un tableau .npy et retourne sa description"""
+    file_name = f"{name}.npy"
+    np.save(os.path.join(sidecar_dir, file_name), array)
+    return {'file': file_name, 'dtype': str(array.dtype), 'shape': list(array.shape)}
+
+
+def write_evaluation_sidecar(eval_metrics: Dict[str, Any], sidecar_dir: str,
+                             classes: Sequence[str]) -> Dict[str, Any]:
+    """
+    Écrit les tableaux d'une évaluation dans un répertoire annexe
+
+    Args:
+        eval_metrics (Dict[str, Any]): Sortie de PCAPredictionModel.evaluate
+        sidecar_dir (str): Répertoire de destination
+        classes (Sequence[str]): Classes de l'encodeur, dans l'ordre des colonnes de probabilités
+
+    Returns:
+        Dict[str, Any]: Description des tableaux écrits (à référencer dans le JSON)
+    """
+    os.makedirs(sidecar_dir, exist_ok=True)
+    classes = np.asarray(classes)
+    code_dtype = _smallest_uint_dtype(len(classes))
+    arrays = {}
+
+    for key in ('predictions', 'true_labels'):
+        labels = np.asarray(eval_metrics[key])
+        codes = np.searchsorted(classes, labels)
+        if not np.array_equal(classes[np.minimum(codes, len(classes) - 1)], labels):
+            raise ValueError(f"{key}: labels absents de la liste des classes")
+        arrays[key] = _save_array(sidecar_dir, key, codes.astype(code_dtype))
+
+    confusion = np.asarray(eval_metrics['confusion_matrix'])
+    arrays['confusion_matrix'] = _save_array(
+        sidecar_dir, 'confusion_matrix', confusion.astype(_smallest_uint_dtype(int(confusion.max(initial=0))))
+    )
+
+    probabilities = sp.csr_matrix(np.asarray(eval_metrics['prediction_probabilities'], dtype=np.float32))
+    # Index au dtype natif de scipy (int32) : un dtype plus petit serait converti
+    # (donc copié) au rechargement et la matrice ne serait plus projetée
+    index_dtype = _csr_index_dtype(probabilities)
+    arrays['prediction_probabilities'] = {
+        'format': 'csr',
+        'shape': list(probabilities.shape),
+        'nnz': int(probabilities.nnz),
+        'data': _save_array(sidecar_dir, 'probabilities_data', probabilities.data),
+        'indices': _save_array(sidecar_dir, 'probabilities_indices',
+                               probabilities.indices.astype(index_dtype)),
+        'indptr': _save_array(sidecar_dir, 'probabilities_indptr',
+                              probabilities.indptr.astype(index_dtype))
+    }
+
+    manifest = {'classes': [str(c) for c in classes], 'arrays': arrays}
+    with open(os.path.join(sidecar_dir, SIDECAR_MANIFEST), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+
+    return arrays
+
+
+def load_evaluation_sidecar(sidecar_dir: str, mmap_mode: Optional[str] = 'r',
+                            decode_labels: bool = True) -> Dict[str, Any]:
+    """
+    Recharge les tableaux d'une évaluation (projetés en mémoire)
+
+    Args:
+        sidecar_dir (str): Répertoire écrit par write_evaluation_sidecar
+        mmap_mode (str): Mode de projection ('r') ou None pour charger en mémoire
+        decode_labels (bool): Si True, retourne les labels texte ; sinon les codes entiers
+
+    Returns:
+        Dict[str, Any]: classes, predictions, true_labels, confusion_matrix et
+            prediction_probabilities (scipy.sparse.csr_matrix)
+    """
+    with open(os.path.join(sidecar_dir, SIDECAR_MANIFEST), 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+
+    def load(entry):
+        return np.load(os.path.join(sidecar_dir, entry['file']), mmap_mode=mmap_mode)
+
+    arrays = manifest['arrays']
+    classes = np.asarray(manifest['classes'])
+    result = {'classes': classes, 'confusion_matrix': load(arrays['confusion_matrix'])}
+
+    for key in ('predictions', 'true_labels'):
+        codes = load(arrays[key])
+        result[key] = classes[codes] if decode_labels else codes
+
+    proba = arrays['prediction_probabilities']
+    result['prediction_probabilities'] = sp.csr_matrix(
+        (load(proba['data']), load(proba['indices']), load(proba['indptr'])),
+        shape=tuple(proba['shape']), copy=False
+    )
+    return result
+
+
+def summarize_evaluation(eval_metrics: Dict[str, Any], sidecar_ref: Optional[str] = None,
+                         arrays: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Version JSON d'une évaluation : métriques résumées et référence vers les tableaux
+
+    Args:
+        eval_metrics (Dict[str, Any]): Sortie de PCAPredictionModel.evaluate
+        sidecar_ref (str): Chemin (relatif au JSON) du répertoire annexe
+        arrays (Dict[str, Any]): Description des tableaux écrits
+
+    Returns:
+        Dict[str, Any]: Métriques sans les grands tableaux
+    """
+    summary = {k: v for k, v in eval_metrics.items() if k not in ARRAY_KEYS}
+    summary['n_samples'] = int(len(eval_metrics['true_labels']))
+    summary['arrays'] = {'sidecar': sidecar_ref, 'files': arrays}
+    return summary
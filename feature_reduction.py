@@ -0,0 +1,148 @@
+"""
+Module de comparaison des réductions de dimension TF-IDF pour le projet PCA
+La réduction (PCAPredictionModel.reduction_params) s'insère entre le
+vectoriseur et la forêt : sélection supervisée des termes (chi2, la matrice
+reste creuse) ou projection SVD tronquée (matrice dense). Ce rapport
+entraîne un modèle par méthode et dimension cible et mesure temps
+d'entraînement, taille du modèle, latence par requête et accuracy.
+Auteur: Assistant IA
+Date: 2025-07-26
+"""
+
+import os
+import io
+import json
+import time
+import argparse
+from typing import Any, Dict, List, Optional, Sequence
+
+import joblib
+import numpy as np
+from sklearn.metrics import accuracy_score
+
+from preprocessing import TextPreprocessor
+from train_model import PCAPredictionModel, REDUCTION_METHODS
+
+
+DEFAULT_DIMENSIONS = (250, 500, 1000, 2000)
+
+
+def _serialized_size(obj) -> int:
+    """Taille (octets) d'un objet sérialisé avec joblib"""
+    buffer = io.BytesIO()
+    joblib.dump(obj, buffer)
+    return buffer.getbuffer().nbytes
+
+
+def _measure_latency(model, texts: Sequence[str], n_requests: int = 200) -> Dict[str, float]:
+    """Latence d'une requête unitaire (vectorisation + réduction + forêt), p50/p95 en ms"""
+    timings = []
+    for text in list(texts)[:n_requests]:
+        start = time.perf_counter()
+        model.model.predict_proba(model.transform([text]))
+        timings.append((time.perf_counter() - start) * 1000)
+    return {'p50_ms': float(np.percentile(timings, 50)), 'p95_ms': float(np.percentile(timings, 95))}
+
+
+def compare_reductions(X_train, X_test, y_train, y_test, label_encoder,
+                       dimensions: Sequence[int] = DEFAULT_DIMENSIONS,
+                       methods: Sequence[str] = REDUCTION_METHODS,
+                       rf_params: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    """
+    Entraîne un modèle sans réduction puis un par (méthode, dimension) et compare les coûts
+
+    Args:
+        X_train, X_test: Textes préprocessés
+        y_train, y_test (np.ndarray): Labels encodés
+        label_encoder: Encodeur partagé par tous les modèles
+        dimensions (Sequence[int]): Dimensions cibles
+        methods (Sequence[str]): Méthodes de réduction
+        rf_params (Dict): Paramètres RandomForest à substituer (optionnel)
+
+    Returns:
+        List[Dict[str, Any]]: Une ligne par configuration
+    """
+    configs = [(None, None)] + [(method, dim) for method in methods for dim in dimensions]
+    rows = []
+    for method, dim in configs:
+        model = PCAPredictionModel()
+        model.label_encoder = label_encoder
+        model.update_params(rf_params=rf_params,
+                            reduction_params={'method': method, 'n_components': dim})
+
+        start = time.perf_counter()
+        model.train(X_train, y_train, validation='none')
+        fit_time = time.perf_counter() - start
+
+        accuracy = accuracy_score(y_test, model.model.predict(model.transform(X_test)))
+        rows.append({
+            'method': method or 'aucune',
+            'n_components': dim or len(model.vectorizer.vocabulary_),
+            'fit_time_s': fit_time,
+            'model_size_mb': _serialized_size(model.model) / 1e6,
+            'reducer_size_mb': _serialized_size(model.reducer) / 1e6 if model.reducer is not None else 0.0,
+            'accuracy': accuracy,
+            **_measure_latency(model, X_test)
+        })
+    return rows
+
+
+def print_comparison(rows: List[Dict[str, Any]]) -> None:
+    """Affiche le tableau de comparaison des réductions"""
+    print("\n📉 COMPARAISON DES RÉDUCTIONS DE DIMENSION")
+    print("-" * 86)
+    print(f"{'Méthode':<9}{'Dim':>6}{'Fit (s)':>9}{'Modèle (Mo)':>13}{'Réducteur (Mo)':>16}"
+          f"{'p50 (ms)':>10}{'p95 (ms)':>10}{'Accuracy':>10}")
+    for row in rows:
+        print(f"{row['method']:<9}{row['n_components']:>6}{row['fit_time_s']:>9.2f}"
+              f"{row['model_size_mb']:>13.2f}{row['reducer_size_mb']:>16.2f}"
+              f"{row['p50_ms']:>10.2f}{row['p95_ms']:>10.2f}{row['accuracy']:>10.4f}")
+
+
+def run_comparison(data_path: str, dimensions: Sequence[int] = DEFAULT_DIMENSIONS,
+                   methods: Sequence[str] = REDUCTION_METHODS,
+                   output_path: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Charge un CSV, compare les réductions et sauvegarde le rapport JSON
+
+    Args:
+        data_path (str): CSV de tickets GIM
+        dimensions (Sequence[int]): Dimensions cibles
+        methods (Sequence[str]): Méthodes de réduction
+        output_path (str): Fichier JSON du rapport (optionnel)
+
+    Returns:
+        List[Dict[str, Any]]: Lignes du rapport
+    """
+    _, X, y = TextPreprocessor().load_and_preprocess_data(data_path)
+    splitter = PCAPredictionModel()
+    X_train, X_test, y_train, y_test = splitter.prepare_data(X, y)
+
+    rows = compare_reductions(X_train, X_test, y_train, y_test, splitter.label_encoder,
+                              dimensions=dimensions, methods=methods)
+    print_comparison(rows)
+
+    if output_path:
+        os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+        with open(output_path, 'w', encoding='utf-8') as f:
+            json.dump({'data_path': data_path, 'n_train': len(X_train), 'n_test': len(X_test),
+                       'results': rows}, f, indent=2, ensure_ascii=False)
+        print(f"📄 Rapport sauvegardé dans: {output_path}")
+    return rows
+
+
+def main():
+    """Rapport de comparaison des réductions de dimension"""
+    parser = argparse.ArgumentParser(description='Comparaison des réductions de dimension TF-IDF')
+    parser.add_argument('--data', default='data/gim_diagnostic_dataset.csv', help='CSV de tickets GIM')
+    parser.add_argument('--dimensions', type=int, nargs='+', default=list(DEFAULT_DIMENSIONS),
+                        help='Dimensions cibles')
+    parser.add_argument('--methods', nargs='+', choices=REDUCTION_METHODS, default=list(REDUCTION_METHODS))
+    parser.add_argument('--output', help='Fichier JSON du rapport')
+    args = parser.parse_args()
+
+    run_comparison(args.data, args.dimensions, args.methods, args.output)
+
+
+if __name__ == "__main__":
+    main()
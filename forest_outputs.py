@@ -0,0 +1,29 @@
+"""
+Module utilitaire des sorties de forêts pour le projet PCA
+Partagé entre l'entraînement (multi_task.py) et le service (predict.py),
+sans dépendance vers l'un ou l'autre
+Auteur: Assistant IA
+Date: 2025-07-26
+"""
+
+import numpy as np
+
+
+def full_probabilities(forest_classes: np.ndarray, proba: np.ndarray, n_classes: int) -> np.ndarray:
+    """
+    Replace les colonnes de predict_proba sur tous les codes de l'encodeur
+
+    Une sortie d'une forêt multi-sorties ne connaît que les classes vues à
+    l'entraînement ; les classes absentes reçoivent une probabilité nulle.
+
+    Args:
+        forest_classes (np.ndarray): classes_ de la sortie (codes entiers)
+        proba (np.ndarray): Probabilités (n x len(forest_classes))
+        n_classes (int): Nombre de classes de l'encodeur
+
+    Returns:
+        np.ndarray: Probabilités (n x n_classes)
+    """
+    full = np.zeros((proba.shape[0], n_classes), dtype=proba.dtype)
+    full[:, np.asarray(forest_classes, dtype=np.intp)] = proba
+    return full
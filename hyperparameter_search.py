@@ -0,0 +1,348 @@
+"""
+Recherche d'hyperparamètres par élimination successive (successive halving)
+Chaque tour évalue les candidats survivants avec plus d'arbres et plus de
+données ; seul le meilleur tiers (eta=3) passe au tour suivant. Les matrices
+TF-IDF sont mises en cache par configuration de vectoriseur (un seul fit par
+configuration). La recherche s'arrête au budget de temps et produit un
+classement accuracy / temps d'entraînement / latence d'inférence.
+Auteur: Assistant IA
+Date: 2025-07-26
+"""
+
+import os
+import json
+import math
+import time
+import argparse
+import itertools
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.metrics import accuracy_score
+from sklearn.model_selection import train_test_split
+
+from preprocessing import TextPreprocessor
+from train_model import PCAPredictionModel
+
+
+DEFAULT_TFIDF_GRID = {
+    'max_features': [2000, 5000],
+    'ngram_range': [(1, 1), (1, 2)],
+    'min_df': [1, 2]
+}
+
+DEFAULT_RF_GRID = {
+    'max_depth': [10, 20, None],
+    'min_samples_leaf': [1, 2],
+    'max_features': ['sqrt', 0.1]
+}
+
+
+def expand_grid(grid: Dict[str, List[Any]]) -> List[Dict[str, Any]]:
+    """
+    Produit toutes les combinaisons d'une grille de paramètres
+
+    Args:
+        grid (Dict[str, List[Any]]): Valeurs possibles par paramètre
+
+    Returns:
+        List[Dict[str, Any]]: Combinaisons
+    """
+    keys = sorted(grid)
+    return [dict(zip(keys, values)) for values in itertools.product(*(grid[k] for k in keys))]
+
+
+def _config_key(config: Dict[str, Any]) -> str:
+    """Clé stable d'une configuration (pour le cache)"""
+    return json.dumps(config, sort_keys=True, default=str)
+
+
+class FeatureCache:
+    """
+    Cache des matrices TF-IDF : un seul fit par configuration de vectoriseur
+    """
+
+    def __init__(self, X_train: pd.Series, X_val: pd.Series, base_params: Dict[str, Any]):
+        """
+        Initialise le cache
+
+        Args:
+            X_train (pd.Series): Textes d'entraînement de la recherche
+            X_val (pd.Series): Textes de validation
+            base_params (Dict[str, Any]): Paramètres TF-IDF par défaut, complétés par la grille
+        """
+        self.X_train = X_train
+        self.X_val = X_val
+        self.base_params = base_params
+        self._entries: Dict[str, Tuple[TfidfVectorizer, Any, Any, float]] = {}
+
+    def get(self, tfidf_config: Dict[str, Any]) -> Tuple[TfidfVectorizer, Any, Any, float]:
+        """
+        Retourne (vectoriseur, X_train, X_val, temps de fit) pour une configuration
+
+        Args:
+            tfidf_config (Dict[str, Any]): Paramètres TF-IDF du candidat
+
+        Returns:
+            Tuple: Vectoriseur, matrices d'entraînement et de validation, temps de vectorisation
+        """
+        key = _config_key(tfidf_config)
+        if key not in self._entries:
+            start = time.perf_counter()
+            vectorizer = TfidfVectorizer(**dict(self.base_params, **tfidf_config))
+            X_train = vectorizer.fit_transform(self.X_train)
+            X_val = vectorizer.transform(self.X_val)
+            self._entries[key] = (vectorizer, X_train, X_val, time.perf_counter() - start)
+        return self._entries[key]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def _single_record_latency(vectorizer, classifier, texts: pd.Series, n_samples: int = 30) -> float:
+    """Latence médiane (ms) d'une prédiction unitaire, vectorisation comprise"""
+    durations = []
+    for text in texts.iloc[:n_samples]:
+        start = time.perf_counter()
+        classifier.predict_proba(vectorizer.transform([text]))
+        durations.append(time.perf_counter() - start)
+    return float(np.median(durations) * 1000)
+
+
+class SuccessiveHalvingSearch:
+    """
+    Recherche par élimination successive sur les paramètres TF-IDF et RandomForest
+    """
+
+    def __init__(self, tfidf_grid: Optional[Dict[str, List[Any]]] = None,
+                 rf_grid: Optional[Dict[str, List[Any]]] = None,
+                 eta: int = 3, min_trees: int = 10, max_trees: int = 200,
+                 min_data_fraction: float = 0.25, time_budget_s: float = 600.0,
+                 random_state: int = 42):
+        """
+        Initialise la recherche
+
+        Args:
+            tfidf_grid (Dict): Grille TF-IDF (défaut: DEFAULT_TFIDF_GRID)
+            rf_grid (Dict): Grille RandomForest (défaut: DEFAULT_RF_GRID)
+            eta (int): Facteur d'élimination et de croissance des ressources
+            min_trees (int): Nombre d'arbres au premier tour
+            max_trees (int): Nombre d'arbres maximal
+            min_data_fraction (float): Fraction des données d'entraînement au premier tour
+            time_budget_s (float): Budget de temps total (secondes)
+            random_state (int): Graine
+        """
+        self.tfidf_grid = tfidf_grid or DEFAULT_TFIDF_GRID
+        self.rf_grid = rf_grid or DEFAULT_RF_GRID
+        self.eta = eta
+        self.min_trees = min_trees
+        self.max_trees = max_trees
+        self.min_data_fraction = min_data_fraction
+        self.time_budget_s = time_budget_s
+        self.random_state = random_state
+        self.leaderboard: List[Dict[str, Any]] = []
+
+    def _resources(self, rung: int) -> Tuple[int, float]:
+        """Nombre d'arbres et fraction de données allouées à un tour"""
+        n_trees = min(self.max_trees, self.min_trees * self.eta ** rung)
+        fraction = min(1.0, self.min_data_fraction * self.eta ** rung)
+        return n_trees, fraction
+
+    def run(self, X: pd.Series, y: np.ndarray) -> Dict[str, Any]:
+        """
+        Exécute la recherche
+
+        Args:
+            X (pd.Series): Textes préprocessés d'entraînement
+            y (np.ndarray): Labels encodés
+
+        Returns:
+            Dict[str, Any]: Meilleure configuration et classement complet
+        """
+        start = time.perf_counter()
+        base = PCAPredictionModel(random_state=self.random_state)
+        self._base_rf_params = base.rf_params
+
+        X_fit, X_val, y_fit, y_val = train_test_split(
+            X, y, test_size=0.2, random_state=self.random_state,
+            stratify=y if np.min(np.bincount(y)) >= 2 else None
+        )
+        cache = FeatureCache(X_fit, X_val, base.tfidf_params)
+        rng = np.random.RandomState(self.random_state)
+
+        candidates = [
+            {'id': i, 'tfidf_params': tfidf, 'rf_params': rf}
+            for i, (tfidf, rf) in enumerate(itertools.product(expand_grid(self.tfidf_grid),
+                                                             expand_grid(self.rf_grid)))
+        ]
+        print(f"🔎 {len(candidates)} candidats, budget {self.time_budget_s:.0f}s")
+
+        rung = 0
+        budget_exhausted = False
+        while candidates and not budget_exhausted:
+            n_trees, fraction = self._resources(rung)
+            print(f"\n— Tour {rung}: {len(candidates)} candidats, {n_trees} arbres, "
+                  f"{fraction:.0%} des données")
+
+            rung_results = []
+            for candidate in candidates:
+                if time.perf_counter() - start > self.time_budget_s:
+                    budget_exhausted = True
+                    print("⏱️ Budget de temps atteint")
+                    break
+                rung_results.append(self._evaluate(candidate, rung, n_trees, fraction, cache, y_fit, y_val, rng))
+
+            if not rung_results:
+                break
+
+            rung_results.sort(key=lambda r: r['accuracy'], reverse=True)
+            last_rung = n_trees >= self.max_trees and fraction >= 1.0
+            if len(rung_results) == 1 or last_rung:
+                break
+
+            n_keep = max(1, math.ceil(len(rung_results) / self.eta))
+            survivors = {r['candidate_id'] for r in rung_results[:n_keep]}
+            candidates = [c for c in candidates if c['id'] in survivors]
+            rung += 1
+
+        if not self.leaderboard:
+            raise RuntimeError("Budget de temps insuffisant: aucun candidat évalué")
+
+        best = max(self.leaderboard, key=lambda r: (r['rung'], r['accuracy']))
+        return {
+            'best': best,
+            'leaderboard': self.leaderboard,
+            'feature_configs_fitted': len(cache),
+            'elapsed_s': time.perf_counter() - start,
+            'budget_exhausted': budget_exhausted
+        }
+
+    def _evaluate(self, candidate: Dict[str, Any], rung: int, n_trees: int, fraction: float,
+                  cache: FeatureCache, y_fit: np.ndarray, y_val: np.ndarray,
+                  rng: np.random.RandomState) -> Dict[str, Any]:
+        """Entraîne et évalue un candidat avec les ressources d'un tour"""
+        vectorizer, X_fit_tfidf, X_val_tfidf, vectorize_time = cache.get(candidate['tfidf_params'])
+
+        n_rows = X_fit_tfidf.shape[0]
+        rows = np.arange(n_rows) if fraction >= 1.0 else np.sort(
+            rng.choice(n_rows, size=max(1, int(n_rows * fraction)), replace=False)
+        )
+
+        rf_params = dict(self._base_rf_params)
+        rf_params.update(candidate['rf_params'])
+        rf_params['n_estimators'] = n_trees
+        classifier = RandomForestClassifier(**rf_params)
+
+        fit_start = time.perf_counter()
+        classifier.fit(X_fit_tfidf[rows], y_fit[rows])
+        fit_time = time.perf_counter() - fit_start
+
+        accuracy = accuracy_score(y_val, classifier.predict(X_val_tfidf))
+        latency = _single_record_latency(vectorizer, classifier, cache.X_val)
+
+        result = {
+            'candidate_id': candidate['id'],
+            'rung': rung,
+            'n_estimators': n_trees,
+            'data_fraction': fraction,
+            'accuracy': accuracy,
+            'fit_time_s': fit_time,
+            'vectorize_time_s': vectorize_time,
+            'latency_ms': latency,
+            'tfidf_params': candidate['tfidf_params'],
+            'rf_params': candidate['rf_params']
+        }
+        self.leaderboard.append(result)
+        print(f"  #{candidate['id']:<3} acc {accuracy:.4f}  fit {fit_time:6.2f}s  "
+              f"latence {latency:6.2f}ms  {candidate['tfidf_params']} {candidate['rf_params']}")
+        return result
+
+
+def save_leaderboard(search_result: Dict[str, Any], output_dir: str) -> Dict[str, str]:
+    """
+    Écrit le classement (CSV + JSON) et la meilleure configuration
+
+    Args:
+        search_result (Dict[str, Any]): Résultat de SuccessiveHalvingSearch.run
+        output_dir (str): Répertoire de sortie
+
+    Returns:
+        Dict[str, str]: Chemins des fichiers écrits
+    """
+    os.makedirs(output_dir, exist_ok=True)
+
+    rows = sorted(search_result['leaderboard'], key=lambda r: (-r['rung'], -r['accuracy']))
+    csv_path = os.path.join(output_dir, 'search_leaderboard.csv')
+    pd.DataFrame([
+        dict({k: v for k, v in row.items() if k not in ('tfidf_params', 'rf_params')},
+             tfidf_params=json.dumps(row['tfidf_params'], default=str),
+             rf_params=json.dumps(row['rf_params'], default=str))
+        for row in rows
+    ]).to_csv(csv_path, index=False)
+
+    json_path = os.path.join(output_dir, 'search_results.json')
+    with open(json_path, 'w', encoding='utf-8') as f:
+        json.dump(dict(search_result, leaderboard=rows), f, indent=2, ensure_ascii=False, default=str)
+
+    best = search_result['best']
+    best_path = os.path.join(output_dir, 'best_params.json')
+    with open(best_path, 'w', encoding='utf-8') as f:
+        json.dump({'tfidf_params': best['tfidf_params'],
+                   'rf_params': dict(best['rf_params'], n_estimators=best['n_estimators'])},
+                  f, indent=2, default=str)
+
+    return {'csv': csv_path, 'json': json_path, 'best_params': best_path}
+
+
+def run_search(data_path: str, output_dir: str = 'models', time_budget_s: float = 600.0,
+               max_trees: int = 200) -> Dict[str, Any]:
+    """
+    Lance une recherche sur un dataset (split d'entraînement uniquement)
+
+    Args:
+        data_path (str): Chemin du CSV
+        output_dir (str): Répertoire du classement
+        time_budget_s (float): Budget de temps (secondes)
+        max_trees (int): Nombre d'arbres maximal
+
+    Returns:
+        Dict[str, Any]: Résultat de la recherche
+    """
+    _, X, y = TextPreprocessor().load_and_preprocess_data(data_path)
+
+    # Le split de test de l'entraînement reste hors de la recherche
+    model = PCAPredictionModel()
+    X_train, _, y_train, _ = model.prepare_data(X, y)
+
+    search = SuccessiveHalvingSearch(time_budget_s=time_budget_s, max_trees=max_trees)
+    result = search.run(X_train, y_train)
+    paths = save_leaderboard(result, output_dir)
+
+    best = result['best']
+    print("\n🏆 MEILLEURE CONFIGURATION")
+    print(f"Accuracy validation: {best['accuracy']:.4f} (tour {best['rung']}, {best['n_estimators']} arbres)")
+    print(f"TF-IDF: {best['tfidf_params']}")
+    print(f"RandomForest: {best['rf_params']}")
+    print(f"📄 Classement: {paths['csv']}")
+    print(f"📄 Paramètres: {paths['best_params']} (utilisable avec main.py --params)")
+
+    return result
+
+
+def main():
+    """Fonction principale"""
+    parser = argparse.ArgumentParser(description='Recherche d\'hyperparamètres par élimination successive')
+    parser.add_argument('--data', default='data/gim_diagnostic_dataset.csv', help='Dataset')
+    parser.add_argument('--output-dir', default='models', help='Répertoire du classement')
+    parser.add_argument('--budget', type=float, default=600.0, help='Budget de temps (secondes)')
+    parser.add_argument('--max-trees', type=int, default=200, help='Nombre d\'arbres maximal')
+    args = parser.parse_args()
+
+    run_search(args.data, args.output_dir, args.budget, args.max_trees)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,387 @@
+"""
+Module de mise à jour incrémentale du modèle RandomForest pour le projet PCA
+Les nouveaux tickets GIM résolus sont vectorisés avec le vocabulaire existant
+et servent à entraîner des arbres supplémentaires, ajoutés à la forêt
+existante ; les arbres les plus anciens peuvent être retirés pour borner la
+taille du modèle. Le coût d'une mise à jour dépend du volume de nouvelles
+données, pas de l'historique complet.
+Auteur: Assistant IA
+Date: 2025-07-26
+"""
+
+import time
+import argparse
+import hashlib
+from typing import Any, Dict, Optional
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import accuracy_score
+from sklearn.preprocessing import LabelEncoder
+from sklearn.tree._tree import Tree, TREE_LEAF, TREE_UNDEFINED
+
+from preprocessing import TextPreprocessor
+from train_model import PCAPredictionModel
+from model_compaction import CompactForest
+from model_bundle import texts_sha256
+
+
+def _rebuild_tree(estimator, state: Dict[str, Any], n_features: int) -> None:
+    """
+    Remplace l'arbre d'un estimateur par un Tree reconstruit depuis un état modifié
+
+    Args:
+        estimator (DecisionTreeClassifier): Estimateur à modifier (en place)
+        state (Dict[str, Any]): État (max_depth, node_count, nodes, values)
+        n_features (int): Nombre de features en entrée
+    """
+    n_classes = state['values'].shape[2]
+    tree = Tree(n_features, np.array([n_classes], dtype=np.intp), estimator.tree_.n_outputs)
+    tree.__setstate__({
+        'max_depth': state['max_depth'],
+        'node_count': state['node_count'],
+        'nodes': state['nodes'],
+        'values': state['values']
+    })
+
+    estimator.tree_ = tree
+    estimator.n_features_in_ = n_features
+    estimator.classes_ = np.arange(n_classes)
+    estimator.n_classes_ = n_classes
+
+
+def _expand_tree_classes(estimator, class_positions: np.ndarray, n_classes: int) -> None:
+    """
+    Réaligne les sorties d'un arbre sur un ensemble de classes plus large
+
+    Les distributions des feuilles sont recopiées dans les colonnes des
+    classes correspondantes ; les autres colonnes valent 0.
+
+    Args:
+        estimator (DecisionTreeClassifier): Arbre à modifier (en place)
+        class_positions (np.ndarray): Position de chaque classe de l'arbre dans le nouvel ensemble
+        n_classes (int): Nombre total de classes
+    """
+    state = estimator.tree_.__getstate__()
+    values = state['values']
+
+    expanded = np.zeros((values.shape[0], values.shape[1], n_classes), dtype=values.dtype)
+    expanded[:, :, class_positions] = values[:, :, :len(class_positions)]
+
+    _rebuild_tree(estimator, dict(state, values=expanded), estimator.tree_.n_features)
+
+
+def _remap_tree_features(estimator, feature_map: np.ndarray, threshold_scale: np.ndarray,
+                         n_features: int) -> int:
+    """
+    Réindexe les splits d'un arbre sur un nouveau vocabulaire
+
+    Un split sur un terme sorti du vocabulaire est court-circuité vers son
+    enfant gauche, la branche « terme absent » (TF-IDF nul <= seuil). Seul
+    un split racine reste en place, avec un seuil infini. Les seuils des
+    termes conservés sont mis à l'échelle du nouvel IDF.
+
+    Args:
+        estimator (DecisionTreeClassifier): Arbre à modifier (en place)
+        feature_map (np.ndarray): Ancien index de colonne -> nouvel index (-1 si supprimé)
+        threshold_scale (np.ndarray): Rapport nouvel IDF / ancien IDF par ancien index
+        n_features (int): Taille du nouveau vocabulaire
+
+    Returns:
+        int: Nombre de splits court-circuités
+    """
+    state = estimator.tree_.__getstate__()
+    nodes = state['nodes'].copy()
+    left, right = nodes['left_child'], nodes['right_child']
+    feature, threshold = nodes['feature'], nodes['threshold']
+
+    is_split = left != TREE_LEAF
+    dropped = np.zeros(len(nodes), dtype=bool)
+    dropped[is_split] = feature_map[feature[is_split]] < 0
+
+    kept = is_split & ~dropped
+    threshold[kept] *= threshold_scale[feature[kept]]
+    feature[kept] = feature_map[feature[kept]]
+
+    def resolve(node):
+        while dropped[node]:
+            node = left[node]
+        return node
+
+    for node in np.where(kept)[0]:
+        left[node] = resolve(left[node])
+        right[node] = resolve(right[node])
+
+    if dropped[0]:
+        left[0] = resolve(left[0])
+        feature[0], threshold[0] = 0, np.inf
+
+    # Les noeuds devenus inaccessibles deviennent des feuilles (ignorées par feature_importances_)
+    reachable = np.zeros(len(nodes), dtype=bool)
+    stack = [0]
+    while stack:
+        node = stack.pop()
+        reachable[node] = True
+        if left[node] != TREE_LEAF:
+            stack.extend((left[node], right[node]))
+    left[~reachable] = TREE_LEAF
+    right[~reachable] = TREE_LEAF
+    feature[~reachable] = TREE_UNDEFINED
+    threshold[~reachable] = TREE_UNDEFINED
+
+    _rebuild_tree(estimator, dict(state, nodes=nodes), n_features)
+    return int(dropped.sum())
+
+
+def refresh_vectorizer(model: PCAPredictionModel) -> Dict[str, Any]:
+    """
+    Reconstruit le vectoriseur depuis le store de fréquences et réaligne la forêt
+
+    Args:
+        model (PCAPredictionModel): Modèle chargé avec son store (df_store)
+
+    Returns:
+        Dict[str, Any]: Évolution du vocabulaire et splits court-circuités
+    """
+    if model.df_store is None:
+        raise ValueError("Aucun store de fréquences dans ce bundle : réentraîner le modèle complet une fois")
+
+    old_vectorizer = model.vectorizer
+    new_vectorizer = model.df_store.build_vectorizer()
+
+    old_vocabulary = old_vectorizer.vocabulary_
+    new_vocabulary = new_vectorizer.vocabulary_
+    feature_map = np.full(len(old_vocabulary), -1, dtype=np.intp)
+    threshold_scale = np.ones(len(old_vocabulary))
+    for term, old_index in old_vocabulary.items():
+        new_index = new_vocabulary.get(term)
+        if new_index is not None:
+            feature_map[old_index] = new_index
+            threshold_scale[old_index] = new_vectorizer.idf_[new_index] / old_vectorizer.idf_[old_index]
+
+    n_features = len(new_vocabulary)
+    n_dropped_splits = sum(
+        _remap_tree_features(estimator, feature_map, threshold_scale, n_features)
+        for estimator in model.model.estimators_
+    )
+    model.model.n_features_in_ = n_features
+    model.vectorizer = new_vectorizer
+
+    return {
+        'vocabulary_size_before': len(old_vocabulary),
+        'vocabulary_size_after': n_features,
+        'terms_added': len(new_vocabulary.keys() - old_vocabulary.keys()),
+        'terms_removed': int((feature_map < 0).sum()),
+        'dropped_splits': n_dropped_splits
+    }
+
+
+def _set_forest_classes(forest: RandomForestClassifier, n_classes: int) -> None:
+    """Met à jour les attributs de classes d'une forêt après réalignement de ses arbres"""
+    forest.classes_ = np.arange(n_classes)
+    forest.n_classes_ = n_classes
+
+
+def extend_label_encoder(label_encoder: LabelEncoder, new_labels) -> LabelEncoder:
+    """
+    Crée un encodeur couvrant les classes existantes et les nouvelles PCA
+
+    Args:
+        label_encoder (LabelEncoder): Encodeur existant
+        new_labels: Labels des nouvelles données
+
+    Returns:
+        LabelEncoder: Nouvel encodeur (classes triées, comme LabelEncoder.fit)
+    """
+    extended = LabelEncoder()
+    extended.classes_ = np.unique(np.concatenate([label_encoder.classes_, np.asarray(new_labels)]))
+    return extended
+
+
+def incremental_update(model: PCAPredictionModel, X_new, y_new,
+                       n_new_trees: int = 20, max_trees: Optional[int] = None,
+                       refresh_vocabulary: bool = False) -> Dict[str, Any]:
+    """
+    Ajoute à la forêt des arbres entraînés sur de nouvelles données
+
+    Par défaut le vectoriseur est conservé (vocabulaire et IDF inchangés) ;
+    le store de fréquences du bundle est toujours mis à jour avec le lot.
+    Avec refresh_vocabulary, vocabulaire et IDF sont recalculés depuis le
+    store et les arbres existants réindexés (refresh_vectorizer). Les nouvelles PCA sont ajoutées à l'encodeur et les arbres existants
+    réalignés sur l'ensemble de classes étendu.
+
+    Args:
+        model (PCAPredictionModel): Modèle chargé (forêt scikit-learn, pas CompactForest)
+        X_new: Textes préprocessés des nouveaux tickets
+        y_new: PCA des nouveaux tickets (labels texte)
+        n_new_trees (int): Nombre d'arbres entraînés sur les nouvelles données
+        max_trees (int): Taille maximale de la forêt ; les arbres les plus anciens sont retirés
+        refresh_vocabulary (bool): Si True, recalcule vocabulaire et IDF depuis le store
+
+    Returns:
+        Dict[str, Any]: Statistiques de la mise à jour
+    """
+    if not model.is_trained:
+        raise ValueError("Le modèle doit être chargé avant une mise à jour incrémentale")
+    if isinstance(model.model, CompactForest):
+        raise ValueError("Mise à jour impossible sur une forêt compacte : "
+                         "partir d'un bundle non compact (--compact au moment de la sauvegarde)")
+    if getattr(model.model, 'n_outputs_', 1) > 1:
+        raise ValueError("Mise à jour incrémentale non supportée pour une forêt multi-sorties (multi-tâches)")
+    if refresh_vocabulary and model.reducer is not None:
+        raise ValueError("Rafraîchissement du vocabulaire impossible avec une réduction de dimension : "
+                         "le réducteur est ajusté sur les colonnes TF-IDF actuelles")
+    if max_trees is not None and max_trees < n_new_trees:
+        raise ValueError(f"max_trees ({max_trees}) doit être >= n_new_trees ({n_new_trees})")
+
+    forest = model.model
+    old_encoder = model.label_encoder
+    n_trees_before = len(forest.estimators_)
+
+    # Accuracy du modèle actuel sur le nouveau lot (dérive avant mise à jour)
+    X_new_tfidf = model.transform(X_new)
+    known = np.isin(np.asarray(y_new), old_encoder.classes_)
+    accuracy_before = None
+    if known.any():
+        y_pred = old_encoder.inverse_transform(forest.predict(X_new_tfidf[known]))
+        accuracy_before = accuracy_score(np.asarray(y_new)[known], y_pred)
+
+    # Compteurs de fréquences, puis vocabulaire / IDF à jour si demandé
+    if model.df_store is not None:
+        model.df_store.update(X_new)
+    vocabulary_stats = None
+    if refresh_vocabulary:
+        vocabulary_stats = refresh_vectorizer(model)
+        X_new_tfidf = model.transform(X_new)
+
+    # 1. Classes : encodeur étendu et réalignement des arbres existants
+    new_encoder = extend_label_encoder(old_encoder, y_new)
+    n_classes = len(new_encoder.classes_)
+    old_labels = old_encoder.classes_[forest.classes_.astype(np.intp)]
+    old_positions = np.searchsorted(new_encoder.classes_, old_labels)
+    if not np.array_equal(old_positions, np.arange(n_classes)):
+        for estimator in forest.estimators_:
+            _expand_tree_classes(estimator, old_positions, n_classes)
+    _set_forest_classes(forest, n_classes)
+
+    # 2. Nouveaux arbres sur les nouvelles données uniquement
+    start = time.perf_counter()
+    y_new_encoded = new_encoder.transform(y_new)
+    params = dict(model.rf_params, n_estimators=n_new_trees)
+    params.pop('oob_score', None)
+    if isinstance(params.get('random_state'), int):
+        # Graine distincte de celle des arbres existants
+        params['random_state'] += n_trees_before
+    new_forest = RandomForestClassifier(**params).fit(X_new_tfidf, y_new_encoded)
+
+    new_positions = new_forest.classes_.astype(np.intp)
+    for estimator in new_forest.estimators_:
+        _expand_tree_classes(estimator, new_positions, n_classes)
+    fit_time = time.perf_counter() - start
+
+    # 3. Ajout, puis retrait des arbres les plus anciens
+    estimators = list(forest.estimators_) + list(new_forest.estimators_)
+    n_retired = 0
+    if max_trees is not None and len(estimators) > max_trees:
+        n_retired = len(estimators) - max_trees
+        estimators = estimators[n_retired:]
+
+    forest.estimators_ = estimators
+    forest.n_estimators = len(estimators)
+    model.label_encoder = new_encoder
+    model.rf_params = dict(model.rf_params, n_estimators=len(estimators))
+
+    # Hash chaîné : historique précédent + nouveau lot
+    new_data_hash = texts_sha256(X_new, y_new)
+    model.training_data_hash = hashlib.sha256(
+        f"{model.training_data_hash}:{new_data_hash}".encode('utf-8')
+    ).hexdigest()
+
+    return {
+        'n_new_records': len(y_new_encoded),
+        'new_data_hash': new_data_hash,
+        'n_new_classes': n_classes - len(old_encoder.classes_),
+        'n_trees_before': n_trees_before,
+        'n_trees_added': n_new_trees,
+        'n_trees_retired': n_retired,
+        'n_trees_after': len(estimators),
+        'accuracy_before_on_new_data': accuracy_before,
+        'vocabulary': vocabulary_stats,
+        'fit_time_s': fit_time
+    }
+
+
+def run_incremental_update(model_dir: str, data_path: str, output_dir: Optional[str] = None,
+                           n_new_trees: int = 20, max_trees: Optional[int] = None,
+                           compact: bool = False, refresh_vocabulary: bool = False) -> Dict[str, Any]:
+    """
+    Charge un bundle, le met à jour avec un fichier de nouveaux tickets et écrit une nouvelle version
+
+    Args:
+        model_dir (str): Bundle existant
+        data_path (str): CSV des nouveaux tickets (même format que le dataset GIM)
+        output_dir (str): Répertoire du nouveau bundle (défaut: model_dir, remplacé atomiquement fichier par fichier)
+        n_new_trees (int): Nombre d'arbres ajoutés
+        max_trees (int): Taille maximale de la forêt
+        compact (bool): Si True, écrit la forêt mise à jour au format compact
+        refresh_vocabulary (bool): Si True, recalcule vocabulaire et IDF depuis le store du bundle
+
+    Returns:
+        Dict[str, Any]: Statistiques de la mise à jour et nouvelle version
+    """
+    output_dir = output_dir or model_dir
+    start = time.perf_counter()
+
+    model = PCAPredictionModel()
+    model.load_model(model_dir)
+    parent_version = model.model_version
+
+    _, X_new, y_new = TextPreprocessor().load_and_preprocess_data(data_path)
+    stats = incremental_update(model, X_new, y_new, n_new_trees=n_new_trees, max_trees=max_trees,
+                               refresh_vocabulary=refresh_vocabulary)
+
+    stats['parent_version'] = parent_version
+    stats['model_version'] = model.save_model(output_dir, compact=compact, parent_version=parent_version)
+    stats['total_time_s'] = time.perf_counter() - start
+    return stats
+
+
+def print_update_report(stats: Dict[str, Any]) -> None:
+    """Affiche le résumé d'une mise à jour incrémentale"""
+    print("\n📊 MISE À JOUR INCRÉMENTALE")
+    print("-" * 40)
+    print(f"Nouveaux tickets: {stats['n_new_records']} ({stats['n_new_classes']} nouvelles PCA)")
+    if stats['accuracy_before_on_new_data'] is not None:
+        print(f"Accuracy du modèle précédent sur le lot: {stats['accuracy_before_on_new_data']:.4f}")
+    print(f"Arbres: {stats['n_trees_before']} + {stats['n_trees_added']} - {stats['n_trees_retired']} "
+          f"= {stats['n_trees_after']}")
+    if stats['vocabulary']:
+        vocabulary = stats['vocabulary']
+        print(f"Vocabulaire: {vocabulary['vocabulary_size_before']} -> {vocabulary['vocabulary_size_after']} termes "
+              f"(+{vocabulary['terms_added']} / -{vocabulary['terms_removed']}, "
+              f"{vocabulary['dropped_splits']} splits court-circuités)")
+    print(f"Entraînement des nouveaux arbres: {stats['fit_time_s']:.2f}s (total {stats['total_time_s']:.2f}s)")
+    print(f"Version: {stats['parent_version']} → {stats['model_version']}")
+
+
+def main():
+    """Mise à jour incrémentale en ligne de commande"""
+    parser = argparse.ArgumentParser(description='Mise à jour incrémentale du modèle PCA')
+    parser.add_argument('--data', required=True, help='CSV des nouveaux tickets GIM résolus')
+    parser.add_argument('--model-dir', default='models', help='Bundle existant')
+    parser.add_argument('--output-dir', help='Répertoire du nouveau bundle (défaut: --model-dir)')
+    parser.add_argument('--new-trees', type=int, default=20, help='Arbres ajoutés (default: 20)')
+    parser.add_argument('--max-trees', type=int, help='Taille maximale de la forêt (retire les plus anciens)')
+    parser.add_argument('--compact', action='store_true', help='Écrit la forêt au format compact')
+    parser.add_argument('--refresh-vocabulary', action='store_true',
+                        help='Recalcule vocabulaire et IDF depuis le store de fréquences du bundle')
+    args = parser.parse_args()
+
+    stats = run_incremental_update(args.model_dir, args.data, args.output_dir,
+                                   n_new_trees=args.new_trees, max_trees=args.max_trees,
+                                   compact=args.compact, refresh_vocabulary=args.refresh_vocabulary)
+    print_update_report(stats)
+
+
+if __name__ == "__main__":
+    main()
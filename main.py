@@ -9,12 +9,60 @@ import os
 import sys
 import argparse
 import json
+import time
+import threading
 from datetime import datetime
 from typing import Dict, Any
 
 from preprocessing import TextPreprocessor
 from train_model import PCAPredictionModel
 from predict import PCAPredictor
+from model_bundle import ModelBundle, file_sha256
+from pipeline_cache import StageCache, stage_key, code_fingerprint
+from pipeline_dag import StageGraph
+from profiling import StageProfiler, profile_stage
+from evaluation_store import write_evaluation_sidecar, summarize_evaluation
+from hyperparameter_search import run_search
+from incremental_training import run_incremental_update, print_update_report
+from streaming_evaluation import evaluate_streaming, iter_csv_chunks, print_streaming_summary
+from feature_reduction import run_comparison
+from routed_model import run_routed_training
+from multi_task import run_multi_task_training
+from distributed_training import run_distributed_training
+from distilbert_inference import run_quantization_comparison, calibrate_length_cap
+from onnx_backend import export_onnx
+from distilbert_pool import run_pool_calibration, DEFAULT_TARGET_P95_MS
+from distillation import run_distillation, DEFAULT_CORPUS
+
+
+# Actions qui écrivent un autre type de bundle : jamais dans models/ sans --model-dir explicite
+ACTION_MODEL_DIRS = {
+    'train-routed': 'models_routed',
+    'train-multitask': 'models_multitask',
+    'train-distilled': 'models_distilled'
+}
+
+
+def _config_differences(current: Dict[str, Any], stored: Dict[str, Any], prefix: str = '') -> Dict[str, Any]:
+    """
+    Valeurs d'une configuration de run qui diffèrent de la configuration enregistrée
+    
+    Args:
+        current (Dict[str, Any]): Configuration de la commande en cours
+        stored (Dict[str, Any]): Configuration enregistrée (JSON)
+        prefix (str): Préfixe des noms (paramètres imbriqués)
+        
+    Returns:
+        Dict[str, Any]: {nom: (valeur actuelle, valeur enregistrée)}
+    """
+    differences = {}
+    for name, restored in stored.items():
+        value = current.get(name)
+        if isinstance(restored, dict):
+            differences.update(_config_differences(value or {}, restored, f"{prefix}{name}."))
+        elif name in current and json.loads(json.dumps(value, default=str)) != restored:
+            differences[f"{prefix}{name}"] = (value, restored)
+    return differences
 
 
 class PCAMLPipeline:
@@ -35,17 +83,41 @@ class PCAMLPipeline:
         self.model_dir = model_dir
         self.preprocessor = TextPreprocessor()
         self.model = PCAPredictionModel()
-        self.predictor = PCAPredictor(model_dir)
+        self.predictor = PCAPredictor(model_dir=model_dir)
         
         # Création du répertoire de modèles
         os.makedirs(model_dir, exist_ok=True)
+        
+        # Cache des sorties d'étapes (relances et --resume)
+        self.cache = StageCache(os.path.join(model_dir, '.pipeline_cache'))
+        self._run_config = {}
+        self._stages = {}
+        self._stage_lock = threading.Lock()
+        
+        # Nombre maximal d'étapes indépendantes exécutées simultanément (None: toutes)
+        self.max_workers = None
+        
+        # Profil par étape (temps réel, CPU, pic RSS) ; profil détaillé si un répertoire est fourni
+        self.deep_profile_dir = None
+        self.profiler = None
     
-    def run_full_pipeline(self, save_results: bool = True) -> Dict[str, Any]:
+    def run_full_pipeline(self, save_results: bool = True, compact: bool = False,
+                          validation: str = 'oob', resume: bool = False,
+                          use_cache: bool = True) -> Dict[str, Any]:
         """
         Exécute le pipeline complet : préprocessing + entraînement + évaluation
         
+        Les sorties des étapes déterministes (préprocessing, split, entraînement,
+        évaluation, features) sont mises en cache sous une clé dérivée de leurs
+        entrées et paramètres : une relance saute les étapes inchangées.
+        
         Args:
             save_results (bool): Si True, sauvegarde les résultats
+            compact (bool): Si True, sauvegarde la forêt au format compact
+            validation (str): Estimation de l'accuracy d'entraînement ('oob', 'cv' ou 'none')
+            resume (bool): Si True, reprend la configuration du dernier run et continue
+                après sa dernière étape réussie
+            use_cache (bool): Si False, recalcule toutes les étapes
             
         Returns:
             Dict[str, Any]: Résultats complets du pipeline
@@ -54,6 +126,23 @@ class PCAMLPipeline:
         print("🚀 DÉMARRAGE DU PIPELINE COMPLET PCA ML")
         print("=" * 60)
         
+        self.cache.enabled = use_cache
+        if resume:
+            compact, validation = self._restore_last_run(compact, validation)
+        
+        self._run_config = {
+            'data_path': self.data_path,
+            'tfidf_params': self.model.tfidf_params,
+            'rf_params': self.model.rf_params,
+            'reduction_params': self.model.reduction_params,
+            'validation': validation,
+            'compact': compact
+        }
+        self._stages = {}
+        self.profiler = StageProfiler(self.deep_profile_dir)
+        self.preprocessor.profiler = self.profiler
+        self.model.profiler = self.profiler
+        
         results = {
             'timestamp': datetime.now().isoformat(),
             'data_path': self.data_path,
@@ -62,6 +151,8 @@ class PCAMLPipeline:
             'training': {},
             'evaluation': {},
             'feature_importance': {},
+            'stages': self._stages,
+            'profile': {},
             'status': 'started'
         }
         
@@ -70,12 +161,14 @@ class PCAMLPipeline:
             print("\n📊 ÉTAPE 1: PRÉPROCESSING DES DONNÉES")
             print("-" * 40)
             
-            df, X, y = self.preprocessor.load_and_preprocess_data(self.data_path)
-            stats = self.preprocessor.get_data_statistics(df, X, y)
+            preprocess_key = stage_key('preprocess', file_sha256(self.data_path),
+                                       code_fingerprint('preprocessing'))
+            data = self._run_stage('preprocess', preprocess_key, self._preprocess)
+            X, y = data['X'], data['y']
             
             results['preprocessing'] = {
                 'status': 'success',
-                'statistics': stats,
+                'statistics': data['statistics'],
                 'data_shape': (len(X), 1),
                 'target_classes': y.nunique()
             }
@@ -86,58 +179,80 @@ class PCAMLPipeline:
             print("\n🔄 ÉTAPE 2: PRÉPARATION DES DONNÉES")
             print("-" * 40)
             
-            X_train, X_test, y_train, y_test = self.model.prepare_data(X, y)
+            split_key = stage_key('split', preprocess_key, self.model.random_state,
+                                  code_fingerprint('train_model'))
+            split = self._run_stage('split', split_key, lambda: self._split(X, y))
+            self.model.label_encoder = split['label_encoder']
+            X_train, X_test, y_train, y_test = split['X_train'], split['X_test'], split['y_train'], split['y_test']
             
             # 3. Entraînement du modèle
             print("\n🧠 ÉTAPE 3: ENTRAÎNEMENT DU MODÈLE")
             print("-" * 40)
             
-            train_metrics = self.model.train(X_train, y_train)
+            train_key = stage_key('train', split_key, self.model.tfidf_params, self.model.rf_params,
+                                  self.model.reduction_params, validation, code_fingerprint('train_model'))
+            trained = self._run_stage('train', train_key,
+                                      lambda: self._train(X_train, y_train, validation))
+            self._restore_trained_model(trained)
+            train_metrics = trained['metrics']
             results['training'] = {
                 'status': 'success',
                 'metrics': train_metrics
             }
             
-            print(f"✅ Entraînement terminé avec accuracy CV: {train_metrics['cv_mean_accuracy']:.4f}")
+            if train_metrics['validation_accuracy'] is not None:
+                print(f"✅ Entraînement terminé avec accuracy {validation.upper()}: "
+                      f"{train_metrics['validation_accuracy']:.4f}")
+            else:
+                print("✅ Entraînement terminé (sans validation)")
             
-            # 4. Évaluation du modèle
-            print("\n📈 ÉTAPE 4: ÉVALUATION DU MODÈLE")
+            # 4-7. Étapes qui ne dépendent que du modèle entraîné : exécutées en parallèle
+            print("\n📈 ÉTAPES 4-7: ÉVALUATION, FEATURES, SAUVEGARDE ET TEST (en parallèle)")
             print("-" * 40)
             
-            eval_metrics = self.model.evaluate(X_test, y_test)
+            graph = StageGraph()
+            graph.add('evaluate', lambda: self._run_stage(
+                'evaluate', stage_key('evaluate', train_key),
+                lambda: self.model.evaluate(X_test, y_test)))
+            graph.add('feature_importance', lambda: self._run_stage(
+                'feature_importance', stage_key('feature_importance', train_key, 15),
+                lambda: self.model.get_feature_importance(top_n=15)))
+            # Sauvegarde et test de prédiction : effets de bord, jamais repris du cache
+            graph.add('save', lambda: self._run_stage(
+                'save', stage_key('save', train_key, compact),
+                lambda: self.model.save_model(self.model_dir, compact=compact), cacheable=False))
+            graph.add('prediction_test', lambda: self._run_stage(
+                'prediction_test', stage_key('prediction_test', self.model.model_version),
+                self._test_prediction, cacheable=False), deps=['save'])
+            
+            try:
+                outputs = graph.run(max_workers=self.max_workers)
+            finally:
+                for name, status in graph.status.items():
+                    if status == 'skipped':
+                        self._stages[name] = {'key': None, 'status': 'skipped', 'time_s': 0.0}
+            
+            eval_metrics = outputs['evaluate']
             results['evaluation'] = {
                 'status': 'success',
                 'metrics': eval_metrics
             }
-            
             print(f"✅ Évaluation terminée avec accuracy: {eval_metrics['accuracy']:.4f}")
             
-            # 5. Analyse des features importantes
-            print("\n🔍 ÉTAPE 5: ANALYSE DES FEATURES")
-            print("-" * 40)
-            
-            important_features = self.model.get_feature_importance(top_n=15)
+            important_features = outputs['feature_importance']
             results['feature_importance'] = important_features
-            
             print("Top 10 features les plus importantes:")
             for i, (feature, importance) in enumerate(list(important_features.items())[:10], 1):
                 print(f"  {i:2d}. {feature:<20} : {importance:.4f}")
             
-            # 6. Sauvegarde du modèle
-            print("\n💾 ÉTAPE 6: SAUVEGARDE DU MODÈLE")
-            print("-" * 40)
-            
-            self.model.save_model(self.model_dir)
             print("✅ Modèle sauvegardé avec succès")
-            
-            # 7. Test de prédiction
-            print("\n🎯 ÉTAPE 7: TEST DE PRÉDICTION")
-            print("-" * 40)
-            
-            test_result = self._test_prediction()
-            results['prediction_test'] = test_result
+            results['prediction_test'] = outputs['prediction_test']
             
             results['status'] = 'completed'
+            self.cache.write_run_state(self._run_config, self._stages, 'completed')
+            self._print_stage_timings()
+            results['profile'] = self.profiler.to_dict()
+            self.profiler.print_summary()
             
             # Sauvegarde des résultats
             if save_results:
@@ -155,8 +270,116 @@ class PCAMLPipeline:
         except Exception as e:
             results['status'] = 'failed'
             results['error'] = str(e)
+            results['profile'] = self.profiler.to_dict()
+            self.cache.write_run_state(self._run_config, self._stages, 'failed')
             print(f"\n❌ ERREUR DANS LE PIPELINE: {e}")
+            print("💡 Relancer avec --resume pour reprendre après la dernière étape réussie")
+            raise
+    
+    def _run_stage(self, name: str, key: str, compute, cacheable: bool = True) -> Any:
+        """
+        Exécute une étape ou la reprend du cache, et enregistre son temps
+        
+        Args:
+            name (str): Nom de l'étape
+            key (str): Clé dérivée des entrées et paramètres de l'étape
+            compute: Fonction sans argument qui calcule la sortie
+            cacheable (bool): Si False, l'étape est toujours exécutée (effets de bord)
+            
+        Returns:
+            Any: Sortie de l'étape
+        """
+        start = time.perf_counter()
+        try:
+            with profile_stage(self.profiler, name):
+                if cacheable and self.cache.has(name, key):
+                    output = self.cache.load(name, key)
+                    status = 'cached'
+                    print(f"♻️  Étape '{name}' reprise du cache (clé {key})")
+                else:
+                    output = compute()
+                    status = 'computed'
+                    if cacheable:
+                        self.cache.save(name, key, output)
+        except Exception as e:
+            with self._stage_lock:
+                self._stages[name] = {'key': key, 'status': 'failed', 'error': str(e),
+                                      'time_s': time.perf_counter() - start}
             raise
+        
+        with self._stage_lock:
+            self._stages[name] = {'key': key, 'status': status, 'time_s': time.perf_counter() - start}
+            self.cache.write_run_state(self._run_config, self._stages, 'running')
+        return output
+    
+    def _restore_last_run(self, compact: bool, validation: str):
+        """
+        Recharge la configuration du dernier run pour que ses étapes réussies soient reprises
+        
+        Returns:
+            Tuple[bool, str]: (compact, validation) du dernier run
+        """
+        state = self.cache.read_run_state()
+        if state is None:
+            print("⚠️  Aucun run précédent à reprendre : exécution complète")
+            return compact, validation
+        
+        config = state['config']
+        current = {'data_path': self.data_path, 'tfidf_params': self.model.tfidf_params,
+                   'rf_params': self.model.rf_params, 'reduction_params': self.model.reduction_params,
+                   'validation': validation, 'compact': compact}
+        overrides = _config_differences(current, config)
+        if overrides:
+            print("⚠️  Options de la commande remplacées par celles du run repris:")
+            for name, (ignored, restored) in overrides.items():
+                print(f"   - {name}: {ignored!r} -> {restored!r}")
+        
+        self.data_path = config['data_path']
+        self.model.update_params(config['tfidf_params'], config['rf_params'],
+                                 config.get('reduction_params'))
+        done = [name for name, stage in state['stages'].items() if stage['status'] != 'failed']
+        print(f"🔁 Reprise du run du {state['updated_at']} (statut: {state['status']})")
+        print(f"   Étapes réussies: {', '.join(done) if done else 'aucune'}")
+        return config['compact'], config['validation']
+    
+    def _preprocess(self) -> Dict[str, Any]:
+        """Étape de préprocessing : textes, labels et statistiques"""
+        df, X, y = self.preprocessor.load_and_preprocess_data(self.data_path)
+        return {'X': X, 'y': y, 'statistics': self.preprocessor.get_data_statistics(df, X, y)}
+    
+    def _split(self, X, y) -> Dict[str, Any]:
+        """Étape de split train/test (avec l'encodeur de labels ajusté)"""
+        X_train, X_test, y_train, y_test = self.model.prepare_data(X, y)
+        return {'X_train': X_train, 'X_test': X_test, 'y_train': y_train, 'y_test': y_test,
+                'label_encoder': self.model.label_encoder}
+    
+    def _train(self, X_train, y_train, validation: str) -> Dict[str, Any]:
+        """Étape d'entraînement : artefacts du modèle et métriques"""
+        metrics = self.model.train(X_train, y_train, validation=validation)
+        return {
+            'metrics': metrics,
+            'model': self.model.model,
+            'vectorizer': self.model.vectorizer,
+            'reducer': self.model.reducer,
+            'df_store': self.model.df_store,
+            'training_data_hash': self.model.training_data_hash
+        }
+    
+    def _restore_trained_model(self, trained: Dict[str, Any]) -> None:
+        """Réinstalle dans PCAPredictionModel les artefacts d'un entraînement (calculé ou en cache)"""
+        self.model.model = trained['model']
+        self.model.vectorizer = trained['vectorizer']
+        self.model.reducer = trained['reducer']
+        self.model.df_store = trained['df_store']
+        self.model.training_data_hash = trained['training_data_hash']
+        self.model.is_trained = True
+    
+    def _print_stage_timings(self) -> None:
+        """Affiche le temps de chaque étape"""
+        print("\n⏱️  TEMPS PAR ÉTAPE")
+        print("-" * 40)
+        for name, stage in self._stages.items():
+            print(f"  {name:<20} {stage['time_s']:>8.2f}s  ({stage['status']})")
     
     def _test_prediction(self) -> Dict[str, Any]:
         """
@@ -209,11 +432,16 @@ class PCAMLPipeline:
         """
         Sauvegarde les résultats du pipeline
         
+        Les tableaux de l'évaluation (probabilités, prédictions, labels, matrice
+        de confusion) sont écrits en binaire dans evaluation_arrays_<timestamp>/ ;
+        le JSON ne contient que les métriques résumées et la référence.
+        
         Args:
             results (Dict[str, Any]): Résultats à sauvegarder
         """
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         results_file = os.path.join(self.model_dir, f'pipeline_results_{timestamp}.json')
+        sidecar_name = f'evaluation_arrays_{timestamp}'
         
         # Conversion des numpy arrays en listes pour la sérialisation JSON
         def convert_numpy(obj):
@@ -222,9 +450,19 @@ class PCAMLPipeline:
             return obj
         
         try:
+            to_save = dict(results)
+            eval_metrics = results.get('evaluation', {}).get('metrics')
+            if eval_metrics:
+                arrays = write_evaluation_sidecar(eval_metrics, os.path.join(self.model_dir, sidecar_name),
+                                                  self.model.label_encoder.classes_)
+                to_save['evaluation'] = dict(results['evaluation'],
+                                             metrics=summarize_evaluation(eval_metrics, sidecar_name, arrays))
+            
             with open(results_file, 'w', encoding='utf-8') as f:
-                json.dump(results, f, indent=2, ensure_ascii=False, default=convert_numpy)
+                json.dump(to_save, f, indent=2, ensure_ascii=False, default=convert_numpy)
             print(f"📄 Résultats sauvegardés dans: {results_file}")
+            if eval_metrics:
+                print(f"📦 Tableaux d'évaluation dans: {os.path.join(self.model_dir, sidecar_name)}/")
         except Exception as e:
             print(f"⚠️  Erreur lors de la sauvegarde des résultats: {e}")
     
@@ -267,10 +505,15 @@ class PCAMLPipeline:
                           if os.path.exists(file_path) else None
             }
         
+        model_version = None
+        if ModelBundle.exists(self.model_dir):
+            model_version = ModelBundle.open(self.model_dir).version
+        
         return {
             'model_directory': self.model_dir,
             'data_path': self.data_path,
             'model_files': model_status,
+            'model_version': model_version,
             'is_trained': all(info['exists'] for info in model_status.values())
         }
 
@@ -278,24 +521,80 @@ class PCAMLPipeline:
 def main():
     """Fonction principale avec interface en ligne de commande"""
     parser = argparse.ArgumentParser(description='Pipeline ML pour prédiction de PCA')
-    parser.add_argument('--action', choices=['train', 'predict', 'info'], default='train',
+    parser.add_argument('--action', choices=['train', 'predict', 'info', 'search', 'update', 'evaluate',
+                                                'compare-reduction', 'train-routed', 'train-multitask',
+                                                'train-distributed', 'compare-quantization', 'export-onnx',
+                                                'calibrate-length', 'calibrate-pool', 'train-distilled'],
+                       default='train',
                        help='Action à effectuer (default: train)')
     parser.add_argument('--data', default='data/gim_diagnostic_dataset.csv',
                        help='Chemin vers le fichier de données')
-    parser.add_argument('--model-dir', default='models',
-                       help='Répertoire des modèles')
+    parser.add_argument('--model-dir',
+                       help='Répertoire des modèles (default: models ; ' +
+                            ', '.join(f'{d} pour {a}' for a, d in ACTION_MODEL_DIRS.items()) + ')')
     parser.add_argument('--code-dtc', help='Code DTC pour prédiction')
     parser.add_argument('--description', help='Description du problème')
     parser.add_argument('--root-cause', default='', help='Cause racine (optionnel)')
+    parser.add_argument('--validation', choices=['oob', 'cv', 'none'], default='oob',
+                       help="Estimation de l'accuracy: out-of-bag (défaut), validation croisée 5 plis ou aucune")
+    parser.add_argument('--params', help='Fichier JSON de paramètres (ex: best_params.json de la recherche)')
+    parser.add_argument('--budget', type=float, default=600.0,
+                       help='Budget de temps de la recherche d\'hyperparamètres (secondes)')
+    parser.add_argument('--new-trees', type=int, default=20,
+                       help='Arbres ajoutés par une mise à jour incrémentale (default: 20)')
+    parser.add_argument('--max-trees', type=int,
+                       help='Taille maximale de la forêt après mise à jour (retire les plus anciens)')
+    parser.add_argument('--refresh-vocabulary', action='store_true',
+                       help='Mise à jour: recalcule vocabulaire et IDF depuis le store de fréquences')
+    parser.add_argument('--chunk-size', type=int, default=10000,
+                       help='Évaluation: nombre de lignes lues par bloc (default: 10000)')
+    parser.add_argument('--reduction', choices=['chi2', 'svd'],
+                       help='Entraînement: réduction de dimension entre TF-IDF et forêt')
+    parser.add_argument('--n-components', type=int, nargs='+', default=[1000],
+                       help='Dimension(s) cible(s) de la réduction (plusieurs pour compare-reduction)')
+    parser.add_argument('--route-depth', type=int,
+                       help='Modèle routé: longueur maximale des préfixes DTC (default: 3)')
+    parser.add_argument('--min-route-samples', type=int,
+                       help='Modèle routé: tickets minimum par route (default: 200)')
+    parser.add_argument('--force', action='store_true',
+                       help='Modèle routé: réentraîne toutes les routes, même inchangées')
+    parser.add_argument('--compare-single-task', action='store_true',
+                       help='Multi-tâches: compare à deux modèles mono-tâche (PCA, composant)')
+    parser.add_argument('--workers', type=int, default=2,
+                       help='Entraînement distribué: nombre de workers / sous-forêts (default: 2)')
+    parser.add_argument('--checkpoint-dir', default='distilbert_pca_model',
+                       help='Checkpoint DistilBERT (default: distilbert_pca_model)')
+    parser.add_argument('--teacher-train-data', nargs='+',
+                       help="train-distilled: CSV d'entraînement de DistilBERT, exclus du holdout")
+    parser.add_argument('--target-p95', type=float, default=DEFAULT_TARGET_P95_MS,
+                       help='calibrate-pool: latence p95 cible en ms (default: 100)')
+    parser.add_argument('--resume', action='store_true',
+                       help='Reprend le dernier run (même configuration) après sa dernière étape réussie ; '
+                            'les options qui diffèrent du run repris sont signalées puis remplacées')
+    parser.add_argument('--no-cache', action='store_true',
+                       help='Recalcule toutes les étapes sans réutiliser le cache')
+    parser.add_argument('--deep-profile', metavar='DIR',
+                       help='Entraînement: écrit un profil détaillé par étape dans DIR (pyinstrument ou cProfile)')
+    parser.add_argument('--compact', action='store_true',
+                       help='Sauvegarde la forêt au format compact (model_compaction.py)')
     
     args = parser.parse_args()
+    args.model_dir = args.model_dir or ACTION_MODEL_DIRS.get(args.action, 'models')
     
     # Initialisation du pipeline
     pipeline = PCAMLPipeline(args.data, args.model_dir)
     
     if args.action == 'train':
         # Entraînement complet
-        results = pipeline.run_full_pipeline()
+        if args.params:
+            with open(args.params, 'r', encoding='utf-8') as f:
+                pipeline.model.update_params(**json.load(f))
+        if args.reduction:
+            pipeline.model.update_params(reduction_params={'method': args.reduction,
+                                                           'n_components': args.n_components[0]})
+        pipeline.deep_profile_dir = args.deep_profile
+        results = pipeline.run_full_pipeline(compact=args.compact, validation=args.validation,
+                                             resume=args.resume, use_cache=not args.no_cache)
         
     elif args.action == 'predict':
         # Prédiction sur un nouvel exemple
@@ -311,6 +610,67 @@ def main():
         else:
             print(f"❌ Erreur: {result['error']}")
     
+    elif args.action == 'search':
+        # Recherche d'hyperparamètres par élimination successive
+        run_search(args.data, args.model_dir, time_budget_s=args.budget)
+    
+    elif args.action == 'update':
+        # Mise à jour incrémentale avec les nouveaux tickets (--data)
+        stats = run_incremental_update(args.model_dir, args.data, n_new_trees=args.new_trees,
+                                       max_trees=args.max_trees, compact=args.compact,
+                                       refresh_vocabulary=args.refresh_vocabulary)
+        print_update_report(stats)
+    
+    elif args.action == 'evaluate':
+        # Évaluation en flux du modèle sauvegardé sur --data (mémoire constante)
+        pipeline.model.load_model(args.model_dir)
+        metrics = evaluate_streaming(pipeline.model, iter_csv_chunks(args.data, args.chunk_size))
+        print_streaming_summary(metrics)
+    
+    elif args.action == 'compare-reduction':
+        # Temps d'entraînement, taille, latence et accuracy par méthode et dimension
+        methods = [args.reduction] if args.reduction else ['chi2', 'svd']
+        run_comparison(args.data, args.n_components, methods,
+                       os.path.join(args.model_dir, 'reduction_comparison.json'))
+    
+    elif args.action == 'train-routed':
+        # Un petit modèle par préfixe DTC ; seules les routes dont les données changent sont réentraînées
+        run_routed_training(args.data, args.model_dir, args.route_depth, args.min_route_samples,
+                            force=args.force)
+    
+    elif args.action == 'train-multitask':
+        # Une TF-IDF et une forêt multi-sorties : PCA et composant concerné
+        run_multi_task_training(args.data, args.model_dir, compare=args.compare_single_task)
+    
+    elif args.action == 'train-distributed':
+        # Sous-forêts entraînées sur des workers séparés puis fusionnées en un seul bundle
+        run_distributed_training(args.data, args.model_dir, n_workers=args.workers)
+    
+    elif args.action == 'compare-quantization':
+        # DistilBERT pleine précision vs INT8 dynamique : accuracy et latence sur le holdout
+        run_quantization_comparison(args.data, args.checkpoint_dir,
+                                    output_path=os.path.join(args.model_dir, 'quantization_comparison.json'))
+    
+    elif args.action == 'export-onnx':
+        # Graphe ONNX (axes batch/séquence dynamiques) vérifié contre PyTorch, servi par backend='onnx'
+        manifest = export_onnx(args.checkpoint_dir)
+        print(f"📦 Export ONNX version {manifest['model_version']}")
+    
+    elif args.action == 'calibrate-length':
+        # Plafond de tokens tiré des données (inference_config.json), lu par les backends DistilBERT/ONNX
+        calibrate_length_cap(args.checkpoint_dir, args.data)
+    
+    elif args.action == 'calibrate-pool':
+        # Découpage processus x threads du pool DistilBERT : meilleur débit sous la cible de p95
+        run_pool_calibration(args.data, args.checkpoint_dir, target_p95_ms=args.target_p95)
+    
+    elif args.action == 'train-distilled':
+        # Forêt TF-IDF entraînée sur les probabilités de DistilBERT (corpus augmenté + historique)
+        corpus = list(dict.fromkeys(DEFAULT_CORPUS + (args.data,)))
+        run_distillation(corpus, args.checkpoint_dir, args.model_dir,
+                         output_path=os.path.join(args.model_dir, 'distillation_report.json'),
+                         teacher_train_paths=args.teacher_train_data)
+    
     elif args.action == 'info':
         # Informations sur le modèle
         info = pipeline.get_model_info()
@@ -319,6 +679,7 @@ def main():
         print(f"Répertoire: {info['model_directory']}")
         print(f"Données: {info['data_path']}")
         print(f"Modèle entraîné: {'✅ Oui' if info['is_trained'] else '❌ Non'}")
+        print(f"Version: {info['model_version'] or 'non versionné'}")
         
         for file, status in info['model_files'].items():
             status_icon = "✅" if status['exists'] else "❌"
@@ -0,0 +1,346 @@
+"""
+Module de bundle de modèle versionné pour le projet PCA
+Un bundle est un répertoire d'artefacts accompagné d'un manifest.json
+(version, hash des données d'entraînement, classes, configuration des
+features, hash SHA-256 de chaque fichier). Le manifest se lit et se valide
+sans désérialiser les artefacts, qui sont chargés à la demande.
+Auteur: Assistant IA
+Date: 2025-07-26
+"""
+
+import os
+import json
+import hashlib
+import argparse
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from model_storage import save_artifact, load_artifact
+
+
+MANIFEST_NAME = 'manifest.json'
+BUNDLE_FORMAT_VERSION = 1
+RANDOMFOREST_FILES = ('model.pkl', 'vectorizer.pkl', 'label_encoder.pkl')
+# Réduction de dimension optionnelle, appliquée entre le vectoriseur et la forêt
+REDUCER_FILE = 'reducer.pkl'
+# Encodeur de la seconde sortie (composant) d'une forêt multi-tâches
+COMPONENT_ENCODER_FILE = 'component_encoder.pkl'
+
+
+def file_sha256(path: str, chunk_size: int = 1 << 20) -> str:
+    """
+    Calcule le hash SHA-256 d'un fichier par blocs
+
+    Args:
+        path (str): Chemin du fichier
+        chunk_size (int): Taille des blocs lus
+
+    Returns:
+        str: Hash hexadécimal
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(chunk_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def texts_sha256(texts, labels) -> str:
+    """
+    Calcule un hash stable d'un jeu de données (textes + labels)
+
+    Args:
+        texts: Textes préprocessés
+        labels: Labels associés
+
+    Returns:
+        str: Hash hexadécimal
+    """
+    digest = hashlib.sha256()
+    for text, label in zip(texts, labels):
+        digest.update(str(text).encode('utf-8'))
+        digest.update(b'\x1f')
+        digest.update(str(label).encode('utf-8'))
+        digest.update(b'\x1e')
+    return digest.hexdigest()
+
+
+def _version_from_files(files: Dict[str, Dict[str, Any]]) -> str:
+    """Version dérivée du contenu : hash des hash de fichiers, tronqué"""
+    digest = hashlib.sha256()
+    for name in sorted(files):
+        digest.update(f"{name}:{files[name]['sha256']}".encode('utf-8'))
+    return digest.hexdigest()[:12]
+
+
+def write_manifest(bundle_dir: str, files: List[str], backend: str,
+                   classes: List[str], feature_config: Optional[Dict[str, Any]] = None,
+                   training_data_hash: Optional[str] = None,
+                   parent_version: Optional[str] = None,
+                   metadata: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Écrit le manifest d'un répertoire d'artefacts existant
+
+    Le manifest est écrit en dernier et de manière atomique : sa présence
+    marque un bundle complet.
+
+    Args:
+        bundle_dir (str): Répertoire du bundle
+        files (List[str]): Fichiers (relatifs) couverts par le manifest
+        backend (str): 'randomforest', 'distilbert' ou 'onnx'
+        classes (List[str]): Liste ordonnée des classes
+        feature_config (Dict): Paramètres de features / modèle
+        training_data_hash (str): Hash des données d'entraînement
+        parent_version (str): Version dont ce bundle est dérivé (optionnel)
+        metadata (Dict): Informations libres supplémentaires
+
+    Returns:
+        Dict[str, Any]: Manifest écrit
+    """
+    file_entries = {}
+    for name in files:
+        path = os.path.join(bundle_dir, name)
+        file_entries[name] = {'sha256': file_sha256(path), 'size': os.path.getsize(path)}
+
+    manifest = {
+        'format_version': BUNDLE_FORMAT_VERSION,
+        'model_version': _version_from_files(file_entries),
+        'backend': backend,
+        'created_at': datetime.now().isoformat(),
+        'training_data_hash': training_data_hash,
+        'classes': [str(c) for c in classes],
+        'feature_config': feature_config or {},
+        'parent_version': parent_version,
+        'files': file_entries,
+        'metadata': metadata or {}
+    }
+
+    manifest_path = os.path.join(bundle_dir, MANIFEST_NAME)
+    tmp_path = f"{manifest_path}.tmp.{os.getpid()}"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False, default=str)
+    os.replace(tmp_path, manifest_path)
+
+    return manifest
+
+
+class ModelBundle:
+    """
+    Bundle de modèle versionné, chargé paresseusement
+
+    Seul le manifest est lu à l'ouverture ; les artefacts sont chargés au
+    premier accès (model, vectorizer, label_encoder ou load()).
+    """
+
+    def __init__(self, bundle_dir: str, manifest: Dict[str, Any], mmap_mode: Optional[str] = 'r'):
+        """
+        Initialise le bundle
+
+        Args:
+            bundle_dir (str): Répertoire du bundle
+            manifest (Dict[str, Any]): Contenu du manifest
+            mmap_mode (str): Mode de projection mémoire des artefacts
+        """
+        self.bundle_dir = bundle_dir
+        self.manifest = manifest
+        self.mmap_mode = mmap_mode
+        self._loaded: Dict[str, Any] = {}
+
+    @staticmethod
+    def exists(bundle_dir: str) -> bool:
+        """Indique si un répertoire contient un manifest de bundle"""
+        return os.path.exists(os.path.join(bundle_dir, MANIFEST_NAME))
+
+    @classmethod
+    def open(cls, bundle_dir: str, mmap_mode: Optional[str] = 'r') -> 'ModelBundle':
+        """
+        Ouvre un bundle en ne lisant que son manifest
+
+        Args:
+            bundle_dir (str): Répertoire du bundle
+            mmap_mode (str): Mode de projection mémoire des artefacts
+
+        Returns:
+            ModelBundle: Bundle ouvert
+        """
+        manifest_path = os.path.join(bundle_dir, MANIFEST_NAME)
+        if not os.path.exists(manifest_path):
+            raise FileNotFoundError(f"Manifest {MANIFEST_NAME} manquant dans {bundle_dir}")
+
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+
+        if manifest.get('format_version', 0) > BUNDLE_FORMAT_VERSION:
+            raise ValueError(f"Format de bundle non supporté: {manifest.get('format_version')}")
+
+        return cls(bundle_dir, manifest, mmap_mode)
+
+    @classmethod
+    def create(cls, bundle_dir: str, model, vectorizer, label_encoder,
+               feature_config: Optional[Dict[str, Any]] = None,
+               training_data_hash: Optional[str] = None,
+               parent_version: Optional[str] = None,
+               metadata: Optional[Dict[str, Any]] = None,
+               extra_artifacts: Optional[Dict[str, Any]] = None) -> 'ModelBundle':
+        """
+        Écrit un bundle RandomForest complet (artefacts + manifest)
+
+        Args:
+            bundle_dir (str): Répertoire du bundle
+            model: Classificateur entraîné
+            vectorizer: Vectoriseur TF-IDF entraîné
+            label_encoder: Encodeur de labels
+            feature_config (Dict): Paramètres de features / modèle
+            training_data_hash (str): Hash des données d'entraînement
+            parent_version (str): Version dont ce bundle est dérivé
+            metadata (Dict): Informations libres supplémentaires
+            extra_artifacts (Dict[str, Any]): Artefacts additionnels {nom de fichier: objet}
+
+        Returns:
+            ModelBundle: Bundle écrit
+        """
+        os.makedirs(bundle_dir, exist_ok=True)
+
+        artifacts = {
+            'model.pkl': model,
+            'vectorizer.pkl': vectorizer,
+            'label_encoder.pkl': label_encoder
+        }
+        artifacts.update(extra_artifacts or {})
+
+        for name, obj in artifacts.items():
+            save_artifact(obj, os.path.join(bundle_dir, name))
+
+        manifest = write_manifest(
+            bundle_dir, list(artifacts), backend='randomforest',
+            classes=list(label_encoder.classes_), feature_config=feature_config,
+            training_data_hash=training_data_hash, parent_version=parent_version,
+            metadata=metadata
+        )
+        return cls(bundle_dir, manifest)
+
+    @property
+    def version(self) -> str:
+        """Version du modèle (dérivée du contenu des fichiers)"""
+        return self.manifest['model_version']
+
+    @property
+    def classes(self) -> List[str]:
+        """Classes du modèle, dans l'ordre des sorties"""
+        return self.manifest['classes']
+
+    def path(self, name: str) -> str:
+        """Chemin absolu d'un fichier du bundle"""
+        return os.path.join(self.bundle_dir, name)
+
+    def validate(self, check_hashes: bool = True, raise_on_error: bool = True) -> List[str]:
+        """
+        Vérifie la présence, la taille et le hash de chaque fichier, sans désérialiser
+
+        Args:
+            check_hashes (bool): Si False, ne vérifie que présence et taille (rapide)
+            raise_on_error (bool): Si True, lève ValueError en cas d'anomalie
+
+        Returns:
+            List[str]: Liste des anomalies (vide si le bundle est intègre)
+        """
+        problems = []
+        for name, entry in self.manifest['files'].items():
+            path = self.path(name)
+            if not os.path.exists(path):
+                problems.append(f"{name}: fichier manquant")
+            elif os.path.getsize(path) != entry['size']:
+                problems.append(f"{name}: taille {os.path.getsize(path)} != {entry['size']}")
+            elif check_hashes and file_sha256(path) != entry['sha256']:
+                problems.append(f"{name}: hash SHA-256 différent")
+
+        if problems and raise_on_error:
+            raise ValueError(f"Bundle {self.bundle_dir} corrompu: " + "; ".join(problems))
+
+        return problems
+
+    def load(self, name: str) -> Any:
+        """
+        Charge (une seule fois) un artefact du bundle
+
+        Args:
+            name (str): Nom du fichier dans le bundle
+
+        Returns:
+            Any: Artefact désérialisé
+        """
+        if name not in self.manifest['files']:
+            raise KeyError(f"{name} absent du manifest du bundle {self.bundle_dir}")
+        if name not in self._loaded:
+            self._loaded[name] = load_artifact(self.path(name), mmap_mode=self.mmap_mode)
+        return self._loaded[name]
+
+    @property
+    def model(self):
+        """Classificateur (chargé au premier accès)"""
+        return self.load('model.pkl')
+
+    @property
+    def vectorizer(self):
+        """Vectoriseur (chargé au premier accès)"""
+        return self.load('vectorizer.pkl')
+
+    @property
+    def label_encoder(self):
+        """Encodeur de labels (chargé au premier accès)"""
+        return self.load('label_encoder.pkl')
+
+
+def describe_distilbert_checkpoint(checkpoint_dir: str) -> Dict[str, Any]:
+    """
+    Écrit le manifest d'un checkpoint DistilBERT existant
+
+    Args:
+        checkpoint_dir (str): Répertoire du checkpoint (avec label_mapping.json)
+
+    Returns:
+        Dict[str, Any]: Manifest écrit
+    """
+    with open(os.path.join(checkpoint_dir, 'label_mapping.json'), 'r', encoding='utf-8') as f:
+        label_mapping = json.load(f)
+
+    classes = [label_mapping[k] for k in sorted(label_mapping, key=int)]
+    files = sorted(
+        name for name in os.listdir(checkpoint_dir)
+        if os.path.isfile(os.path.join(checkpoint_dir, name)) and name != MANIFEST_NAME
+    )
+
+    return write_manifest(checkpoint_dir, files, backend='distilbert', classes=classes)
+
+
+def main():
+    """Validation / description de bundles en ligne de commande"""
+    parser = argparse.ArgumentParser(description='Bundles de modèles PCA versionnés')
+    parser.add_argument('--action', choices=['info', 'validate', 'describe-distilbert'], default='info',
+                        help='Action à effectuer (default: info)')
+    parser.add_argument('--path', default='models', help='Répertoire du bundle')
+    args = parser.parse_args()
+
+    if args.action == 'describe-distilbert':
+        manifest = describe_distilbert_checkpoint(args.path)
+        print(f"✅ Manifest écrit pour {args.path} (version {manifest['model_version']})")
+        return
+
+    bundle = ModelBundle.open(args.path)
+    print(f"📦 Bundle {args.path}")
+    print(f"Version: {bundle.version}")
+    print(f"Backend: {bundle.manifest['backend']}")
+    print(f"Créé le: {bundle.manifest['created_at']}")
+    print(f"Classes: {len(bundle.classes)}")
+
+    if args.action == 'validate':
+        problems = bundle.validate(raise_on_error=False)
+        if problems:
+            for problem in problems:
+                print(f"❌ {problem}")
+        else:
+            print("✅ Tous les fichiers sont intègres")
+
+
+if __name__ == "__main__":
+    main()
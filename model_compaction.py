@@ -0,0 +1,443 @@
+"""
+Module de compaction du modèle RandomForest pour le projet PCA
+Convertit la forêt scikit-learn en tableaux numpy compacts (dtypes minimaux,
+champs inutiles à l'inférence supprimés, distributions de feuilles dédupliquées)
+avec élagage optionnel sous contrainte de perte d'accuracy
+Auteur: Assistant IA
+Date: 2025-07-26
+"""
+
+import os
+import time
+import argparse
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+import joblib
+from sklearn.metrics import accuracy_score
+
+from model_bundle import ModelBundle, REDUCER_FILE
+
+
+def _smallest_int_dtype(max_value: int) -> np.dtype:
+    """
+    Retourne le plus petit entier signé capable de contenir [-max_value-1, max_value]
+
+    Args:
+        max_value (int): Valeur absolue maximale à représenter
+
+    Returns:
+        np.dtype: Type entier signé minimal
+    """
+    for dtype in (np.int8, np.int16, np.int32):
+        if max_value < np.iinfo(dtype).max:
+            return np.dtype(dtype)
+    return np.dtype(np.int64)
+
+
+def _float32_floor(values: np.ndarray) -> np.ndarray:
+    """
+    Convertit des seuils float64 en float32 en arrondissant vers le bas
+
+    Les arbres comparent des features float32 à des seuils float64 : avec le
+    plus grand float32 <= seuil, le test `x <= seuil` reste strictement identique.
+
+    Args:
+        values (np.ndarray): Seuils float64
+
+    Returns:
+        np.ndarray: Seuils float32 équivalents
+    """
+    values32 = values.astype(np.float32)
+    too_high = values32.astype(np.float64) > values
+    values32[too_high] = np.nextafter(values32[too_high], np.float32(-np.inf))
+    return values32
+
+
+class CompactForest:
+    """
+    Forêt de décision compacte en lecture seule
+
+    Tous les arbres sont aplatis dans des tableaux communs :
+    - children_left : enfant gauche, ou ~index de distribution pour une feuille
+    - children_right : enfant droit
+    - feature / threshold : test de chaque nœud interne
+    - leaf_values : distributions de classes uniques (dédupliquées)
+
+    Expose predict, predict_proba, classes_ et feature_importances_ pour rester
+    interchangeable avec RandomForestClassifier côté PCAPredictor.
+    """
+
+    def __init__(self, children_left: np.ndarray, children_right: np.ndarray,
+                 feature: np.ndarray, threshold: np.ndarray, leaf_values: np.ndarray,
+                 roots: np.ndarray, classes: np.ndarray, n_features_in: int,
+                 feature_importances: np.ndarray, max_depth: int):
+        self.children_left = children_left
+        self.children_right = children_right
+        self.feature = feature
+        self.threshold = threshold
+        self.leaf_values = leaf_values
+        self.roots = roots
+        self.classes_ = classes
+        self.n_classes_ = len(classes)
+        self.n_features_in_ = n_features_in
+        self.feature_importances_ = feature_importances
+        self.max_depth = max_depth
+
+    @property
+    def n_estimators(self) -> int:
+        """Nombre d'arbres de la forêt"""
+        return len(self.roots)
+
+    @property
+    def node_count(self) -> int:
+        """Nombre total de nœuds, tous arbres confondus"""
+        return len(self.children_left)
+
+    @classmethod
+    def from_forest(cls, forest, max_depth: Optional[int] = None,
+                    n_trees: Optional[int] = None,
+                    value_dtype: str = 'float32') -> 'CompactForest':
+        """
+        Construit une forêt compacte depuis un RandomForestClassifier entraîné
+
+        Args:
+            forest: RandomForestClassifier entraîné (mono-sortie)
+            max_depth (int): Profondeur maximale conservée (élagage), None pour tout garder
+            n_trees (int): Nombre d'arbres conservés (les premiers), None pour tous
+            value_dtype (str): Type des distributions de feuilles ('float32' ou 'float16')
+
+        Returns:
+            CompactForest: Forêt compacte
+        """
+        if getattr(forest, 'n_outputs_', 1) != 1:
+            raise ValueError("La compaction ne supporte que les forêts mono-sortie")
+
+        estimators = forest.estimators_[:n_trees] if n_trees else forest.estimators_
+
+        lefts, rights, features, thresholds, leaf_rows = [], [], [], [], []
+        roots = []
+        offset = 0
+        n_leaves = 0
+        depth_reached = 0
+
+        for estimator in estimators:
+            tree = estimator.tree_
+            left = tree.children_left
+            right = tree.children_right
+            internal = left >= 0
+
+            # Profondeur de chaque nœud (parcours par niveaux)
+            depth = np.zeros(tree.node_count, dtype=np.int64)
+            frontier = np.array([0])
+            level = 0
+            while frontier.size:
+                depth[frontier] = level
+                frontier = frontier[internal[frontier]]
+                frontier = np.concatenate([left[frontier], right[frontier]])
+                level += 1
+
+            # Élagage : on garde les nœuds jusqu'à max_depth, ceux au bord deviennent feuilles
+            keep = np.ones(tree.node_count, dtype=bool) if max_depth is None else depth <= max_depth
+            is_leaf = ~internal | (depth == max_depth if max_depth is not None else False)
+            is_leaf = is_leaf[keep]
+            new_ids = np.cumsum(keep) - 1
+
+            kept_left = np.where(is_leaf, 0, new_ids[np.where(keep, left, 0)[keep]] + offset)
+            kept_right = np.where(is_leaf, 0, new_ids[np.where(keep, right, 0)[keep]] + offset)
+
+            # Distributions normalisées des feuilles conservées
+            values = tree.value[keep][:, 0, :]
+            values = values / values.sum(axis=1, keepdims=True)
+            leaf_rows.append(values[is_leaf])
+
+            leaf_ids = np.cumsum(is_leaf) - 1 + n_leaves
+            kept_left = np.where(is_leaf, ~leaf_ids, kept_left)
+
+            lefts.append(kept_left)
+            rights.append(kept_right)
+            features.append(np.where(is_leaf, 0, tree.feature[keep]))
+            thresholds.append(np.where(is_leaf, 0.0, tree.threshold[keep]))
+            roots.append(offset)
+
+            offset += int(keep.sum())
+            n_leaves += int(is_leaf.sum())
+            depth_reached = max(depth_reached, int(depth[keep].max()))
+
+        # Déduplication des distributions de feuilles
+        all_leaves = np.concatenate(leaf_rows).astype(value_dtype)
+        unique_values, inverse = np.unique(all_leaves, axis=0, return_inverse=True)
+        inverse = inverse.reshape(-1)
+
+        children_left = np.concatenate(lefts)
+        leaf_mask = children_left < 0
+        children_left[leaf_mask] = ~inverse[~children_left[leaf_mask]]
+
+        node_dtype = _smallest_int_dtype(max(offset, len(unique_values)))
+        feature_dtype = _smallest_int_dtype(forest.n_features_in_)
+
+        return cls(
+            children_left=children_left.astype(node_dtype),
+            children_right=np.concatenate(rights).astype(node_dtype),
+            feature=np.concatenate(features).astype(feature_dtype),
+            threshold=_float32_floor(np.concatenate(thresholds)),
+            leaf_values=unique_values,
+            roots=np.asarray(roots, dtype=node_dtype),
+            classes=np.asarray(forest.classes_),
+            n_features_in=int(forest.n_features_in_),
+            feature_importances=np.asarray(forest.feature_importances_, dtype=np.float32),
+            max_depth=depth_reached
+        )
+
+    def _leaf_indices(self, X_dense: np.ndarray) -> np.ndarray:
+        """
+        Descend tous les arbres pour un bloc d'exemples denses
+
+        Args:
+            X_dense (np.ndarray): Features float32 (n_samples, n_features)
+
+        Returns:
+            np.ndarray: Index des distributions de feuilles (n_samples, n_trees)
+        """
+        rows = np.arange(X_dense.shape[0])[:, None]
+        nodes = np.broadcast_to(self.roots.astype(np.int64), (X_dense.shape[0], self.n_estimators)).copy()
+
+        for _ in range(self.max_depth + 1):
+            left = self.children_left[nodes]
+            internal = left >= 0
+            if not internal.any():
+                break
+            go_left = X_dense[rows, self.feature[nodes]] <= self.threshold[nodes]
+            nodes = np.where(internal, np.where(go_left, left, self.children_right[nodes]), nodes)
+
+        return ~self.children_left[nodes].astype(np.int64)
+
+    def predict_proba(self, X, chunk_size: int = 256) -> np.ndarray:
+        """
+        Calcule les probabilités de classes (moyenne des arbres)
+
+        Args:
+            X: Matrice de features (creuse ou dense)
+            chunk_size (int): Nombre d'exemples densifiés à la fois
+
+        Returns:
+            np.ndarray: Probabilités (n_samples, n_classes)
+        """
+        n_samples = X.shape[0]
+        proba = np.empty((n_samples, self.n_classes_), dtype=np.float64)
+
+        for start in range(0, n_samples, chunk_size):
+            block = X[start:start + chunk_size]
+            block = block.toarray() if hasattr(block, 'toarray') else np.asarray(block)
+            leaves = self._leaf_indices(block.astype(np.float32, copy=False))
+            proba[start:start + chunk_size] = self.leaf_values[leaves].mean(axis=1, dtype=np.float64)
+
+        return proba
+
+    def predict(self, X) -> np.ndarray:
+        """
+        Prédit la classe la plus probable
+
+        Args:
+            X: Matrice de features (creuse ou dense)
+
+        Returns:
+            np.ndarray: Classes prédites
+        """
+        return self.classes_.take(np.argmax(self.predict_proba(X), axis=1))
+
+    def nbytes(self) -> int:
+        """Taille mémoire des tableaux de la forêt (octets)"""
+        return sum(getattr(self, name).nbytes for name in (
+            'children_left', 'children_right', 'feature', 'threshold', 'leaf_values', 'roots'
+        ))
+
+
+def prune_forest(forest, X_val, y_val, max_accuracy_drop: float = 0.01,
+                 depth_candidates: Optional[List[int]] = None,
+                 tree_fractions: Tuple[float, ...] = (1.0, 0.75, 0.5, 0.25),
+                 value_dtype: str = 'float32') -> Tuple[CompactForest, Dict[str, Any]]:
+    """
+    Cherche la plus petite forêt compacte dont l'accuracy reste dans la tolérance
+
+    Args:
+        forest: RandomForestClassifier entraîné
+        X_val: Features de validation
+        y_val (np.ndarray): Labels encodés de validation
+        max_accuracy_drop (float): Perte d'accuracy maximale tolérée (absolue)
+        depth_candidates (List[int]): Profondeurs à essayer (défaut: dérivées de la forêt)
+        tree_fractions (Tuple[float]): Fractions du nombre d'arbres à essayer
+        value_dtype (str): Type des distributions de feuilles ('float32' ou 'float16')
+
+    Returns:
+        Tuple[CompactForest, Dict]: Forêt retenue et détail des essais
+    """
+    full = CompactForest.from_forest(forest, value_dtype=value_dtype)
+    baseline = accuracy_score(y_val, full.predict(X_val))
+
+    if depth_candidates is None:
+        depth_candidates = sorted({d for d in (full.max_depth, 16, 12, 10, 8, 6) if d <= full.max_depth},
+                                  reverse=True)
+
+    best, best_info = full, {'max_depth': None, 'n_trees': full.n_estimators,
+                             'accuracy': baseline, 'node_count': full.node_count}
+    trials = []
+
+    for depth in depth_candidates:
+        for fraction in tree_fractions:
+            n_trees = max(1, int(round(len(forest.estimators_) * fraction)))
+            candidate = CompactForest.from_forest(forest, max_depth=depth, n_trees=n_trees,
+                                                  value_dtype=value_dtype)
+            accuracy = accuracy_score(y_val, candidate.predict(X_val))
+            trial = {'max_depth': depth, 'n_trees': n_trees,
+                     'accuracy': accuracy, 'node_count': candidate.node_count}
+            trials.append(trial)
+
+            if baseline - accuracy <= max_accuracy_drop and candidate.node_count < best.node_count:
+                best, best_info = candidate, trial
+
+    return best, {'baseline_accuracy': baseline, 'selected': best_info, 'trials': trials}
+
+
+def _timed_load(path: str, repeats: int = 3) -> float:
+    """Temps de chargement médian d'un artefact joblib (secondes)"""
+    durations = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        joblib.load(path)
+        durations.append(time.perf_counter() - start)
+    return float(np.median(durations))
+
+
+def compact_model_dir(model_dir: str, output_dir: str, X_test=None, y_test=None,
+                      max_accuracy_drop: Optional[float] = None,
+                      value_dtype: str = 'float32') -> Dict[str, Any]:
+    """
+    Compacte model.pkl d'un répertoire de modèles et produit un rapport avant/après
+
+    Le modèle est chargé comme par l'entraînement (réducteur de dimension
+    compris). La sortie est un bundle versionné dérivé de la source, où
+    vectoriseur, encodeur de labels, réducteur et store de fréquences sont
+    recopiés tels quels : il est directement chargeable par PCAPredictor.
+
+    Args:
+        model_dir (str): Répertoire contenant model.pkl, vectorizer.pkl, label_encoder.pkl
+        output_dir (str): Répertoire de sortie
+        X_test: Textes préprocessés de test (optionnel, pour l'accuracy)
+        y_test (np.ndarray): Labels encodés de test (optionnel)
+        max_accuracy_drop (float): Si défini, élague dans cette tolérance (nécessite X_test)
+        value_dtype (str): Type des distributions de feuilles
+
+    Returns:
+        Dict[str, Any]: Rapport taille / temps de chargement / accuracy
+    """
+    # Import local : train_model importe CompactForest depuis ce module
+    from train_model import PCAPredictionModel, DF_STORE_FILE
+
+    source = PCAPredictionModel()
+    source.load_model(model_dir)
+    forest = source.model
+    if not hasattr(forest, 'estimators_'):
+        raise ValueError(f"Le modèle de {model_dir}/ n'est pas une forêt scikit-learn (déjà compacté ?)")
+    if getattr(forest, 'n_outputs_', 1) != 1:
+        raise ValueError(f"Le modèle de {model_dir}/ est une forêt multi-sortie (multi-tâches), "
+                         f"non représentable par CompactForest")
+
+    model_path = os.path.join(model_dir, 'model.pkl')
+    X_test_features = source.transform(X_test) if X_test is not None else None
+
+    pruning = None
+    if max_accuracy_drop is not None:
+        if X_test_features is None:
+            raise ValueError("L'élagage nécessite des données de validation")
+        compact, pruning = prune_forest(forest, X_test_features, y_test, max_accuracy_drop,
+                                        value_dtype=value_dtype)
+    else:
+        compact = CompactForest.from_forest(forest, value_dtype=value_dtype)
+
+    # Bundle versionné dérivé de la source, comme save_model(compact=True)
+    extra_artifacts = {name: obj for name, obj in ((REDUCER_FILE, source.reducer),
+                                                    (DF_STORE_FILE, source.df_store)) if obj is not None}
+    bundle = ModelBundle.create(
+        output_dir, compact, source.vectorizer, source.label_encoder,
+        feature_config=source.get_feature_config(compact=True),
+        training_data_hash=source.training_data_hash,
+        parent_version=source.model_version,
+        metadata={'source': 'model_compaction.compact_model_dir', 'value_dtype': value_dtype,
+                  'pruning': pruning['selected'] if pruning else None},
+        extra_artifacts=extra_artifacts or None
+    )
+    compact_path = bundle.path('model.pkl')
+
+    report = {
+        'before': {
+            'size_bytes': os.path.getsize(model_path),
+            'load_time_s': _timed_load(model_path),
+            'n_trees': len(forest.estimators_),
+            'node_count': int(sum(e.tree_.node_count for e in forest.estimators_))
+        },
+        'after': {
+            'size_bytes': os.path.getsize(compact_path),
+            'load_time_s': _timed_load(compact_path),
+            'n_trees': compact.n_estimators,
+            'node_count': compact.node_count,
+            'unique_leaf_distributions': len(compact.leaf_values)
+        },
+        'pruning': pruning,
+        'version': bundle.version
+    }
+
+    if X_test_features is not None:
+        y_before = forest.predict(X_test_features)
+        y_after = compact.predict(X_test_features)
+        report['before']['accuracy'] = accuracy_score(y_test, y_before)
+        report['after']['accuracy'] = accuracy_score(y_test, y_after)
+        report['prediction_agreement'] = float(np.mean(y_before == y_after))
+
+    return report
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    """Affiche le rapport de compaction"""
+    before, after = report['before'], report['after']
+    print("📦 RAPPORT DE COMPACTION")
+    print("-" * 40)
+    print(f"{'':<22}{'avant':>12}{'après':>12}")
+    print(f"{'Taille (Mo)':<22}{before['size_bytes'] / 1e6:>12.2f}{after['size_bytes'] / 1e6:>12.2f}")
+    print(f"{'Chargement (ms)':<22}{before['load_time_s'] * 1000:>12.1f}{after['load_time_s'] * 1000:>12.1f}")
+    print(f"{'Arbres':<22}{before['n_trees']:>12}{after['n_trees']:>12}")
+    print(f"{'Nœuds':<22}{before['node_count']:>12}{after['node_count']:>12}")
+    if 'accuracy' in before:
+        print(f"{'Accuracy':<22}{before['accuracy']:>12.4f}{after['accuracy']:>12.4f}")
+        print(f"Accord des prédictions: {report['prediction_agreement']:.4f}")
+    print(f"Version du bundle compact: {report['version']}")
+
+
+def main():
+    """Compaction d'un répertoire de modèles en ligne de commande"""
+    parser = argparse.ArgumentParser(description='Compaction du modèle RandomForest PCA')
+    parser.add_argument('--model-dir', default='models', help='Répertoire du modèle à compacter')
+    parser.add_argument('--output-dir', default='models_compact', help='Répertoire de sortie')
+    parser.add_argument('--data', default='data/gim_diagnostic_dataset.csv',
+                        help='Données utilisées pour mesurer l\'accuracy (split de test)')
+    parser.add_argument('--max-accuracy-drop', type=float, default=None,
+                        help='Active l\'élagage avec cette perte d\'accuracy maximale')
+    parser.add_argument('--value-dtype', choices=['float32', 'float16'], default='float32',
+                        help='Type des distributions de feuilles')
+    args = parser.parse_args()
+
+    from preprocessing import TextPreprocessor
+    from train_model import PCAPredictionModel
+
+    # Même découpage train/test que l'entraînement
+    _, X, y = TextPreprocessor().load_and_preprocess_data(args.data)
+    _, X_test, _, y_test = PCAPredictionModel().prepare_data(X, y)
+
+    report = compact_model_dir(args.model_dir, args.output_dir, X_test, y_test,
+                               max_accuracy_drop=args.max_accuracy_drop,
+                               value_dtype=args.value_dtype)
+    print_report(report)
+
+
+if __name__ == "__main__":
+    main()
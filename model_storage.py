@@ -0,0 +1,132 @@
+"""
+Module de stockage des artefacts de modèle pour le projet PCA
+Sauvegarde atomique et chargement par memory mapping : les grands tableaux
+numpy (ex: CompactForest) sont projetés depuis le cache de pages de l'OS et
+partagés entre les processus d'un même hôte au lieu d'être copiés
+Auteur: Assistant IA
+Date: 2025-07-26
+"""
+
+import os
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+import joblib
+import numpy as np
+
+
+# Cache par processus : (chemin absolu, mtime, taille, mode) -> objet chargé
+_ARTIFACT_CACHE: Dict[Tuple, Any] = {}
+_CACHE_LOCK = threading.Lock()
+
+
+def save_artifact(obj: Any, path: str) -> None:
+    """
+    Sauvegarde un artefact joblib non compressé de manière atomique
+
+    Le fichier est écrit à côté puis renommé : les processus qui projettent
+    encore l'ancienne version gardent un mapping valide (l'ancien inode reste
+    vivant jusqu'à leur fermeture) au lieu de lire un fichier en cours d'écriture.
+    Pas de compression, sinon les tableaux ne sont plus projetables.
+
+    Args:
+        obj (Any): Objet à sauvegarder
+        path (str): Chemin de destination
+    """
+    tmp_path = f"{path}.tmp.{os.getpid()}"
+    try:
+        joblib.dump(obj, tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def load_artifact(path: str, mmap_mode: Optional[str] = 'r', use_cache: bool = True) -> Any:
+    """
+    Charge un artefact joblib, avec projection mémoire des tableaux numpy
+
+    Les objets Python (dictionnaires, paramètres) sont désérialisés normalement ;
+    seuls les tableaux numpy sont projetés. Avec use_cache, les chargements
+    répétés dans un même processus (ex: sessions Streamlit) réutilisent l'objet
+    tant que le fichier n'a pas changé.
+
+    Args:
+        path (str): Chemin de l'artefact
+        mmap_mode (str): Mode de projection ('r', 'c') ou None pour tout copier en mémoire
+        use_cache (bool): Si True, réutilise l'objet déjà chargé dans ce processus
+
+    Returns:
+        Any: Objet chargé
+    """
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size, mmap_mode)
+
+    if use_cache:
+        with _CACHE_LOCK:
+            if key in _ARTIFACT_CACHE:
+                return _ARTIFACT_CACHE[key]
+
+    obj = joblib.load(path, mmap_mode=mmap_mode)
+
+    if use_cache:
+        with _CACHE_LOCK:
+            # Les versions précédentes du même fichier ne servent plus
+            for old_key in [k for k in _ARTIFACT_CACHE if k[0] == key[0] and k[3] == mmap_mode]:
+                del _ARTIFACT_CACHE[old_key]
+            _ARTIFACT_CACHE[key] = obj
+
+    return obj
+
+
+def clear_artifact_cache() -> None:
+    """Vide le cache d'artefacts du processus"""
+    with _CACHE_LOCK:
+        _ARTIFACT_CACHE.clear()
+
+
+def mapped_bytes(obj: Any) -> int:
+    """
+    Compte les octets de tableaux projetés (np.memmap) portés par un objet
+
+    Utile pour vérifier qu'un artefact est bien partagé via le cache de pages
+    (une forêt scikit-learn recopie ses nœuds au chargement, CompactForest non).
+
+    Args:
+        obj (Any): Objet chargé par load_artifact
+
+    Returns:
+        int: Nombre d'octets projetés
+    """
+    total = 0
+    for value in getattr(obj, '__dict__', {}).values():
+        if isinstance(value, np.memmap):
+            total += value.nbytes
+    return total
+
+
+def main():
+    """Mesure le chargement projeté des artefacts d'un répertoire de modèles"""
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description='Chargement projeté des artefacts PCA')
+    parser.add_argument('--model-dir', default='models', help='Répertoire des modèles')
+    args = parser.parse_args()
+
+    # Import préalable des classes pour ne mesurer que la désérialisation
+    import sklearn.ensemble  # noqa: F401
+    import model_compaction  # noqa: F401
+
+    print("🗺️  CHARGEMENT DES ARTEFACTS")
+    print("-" * 40)
+    for name in ('model.pkl', 'vectorizer.pkl', 'label_encoder.pkl'):
+        path = os.path.join(args.model_dir, name)
+        start = time.perf_counter()
+        obj = load_artifact(path, mmap_mode='r', use_cache=False)
+        duration = time.perf_counter() - start
+        print(f"{name:<20} {duration * 1000:8.1f} ms   projeté: {mapped_bytes(obj) / 1e6:6.2f} Mo")
+
+
+if __name__ == "__main__":
+    main()
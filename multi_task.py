@@ -0,0 +1,338 @@
+"""
+Module du modèle multi-tâches pour le projet PCA
+Une seule vectorisation TF-IDF et une seule forêt multi-sorties prédisent à
+la fois la PCA attendue et le composant concerné : une requête fait une
+passe vectorisation + forêt au lieu de deux modèles complets. Les deux
+encodeurs de labels sont sauvegardés dans le bundle (label_encoder.pkl pour
+la PCA, component_encoder.pkl pour le composant) ; PCAPredictor détecte la
+seconde sortie et retourne les deux prédictions.
+Auteur: Assistant IA
+Date: 2025-07-26
+"""
+
+import io
+import time
+import argparse
+from typing import Any, Dict, Sequence, Tuple
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.metrics import accuracy_score, classification_report
+from sklearn.model_selection import train_test_split
+from sklearn.preprocessing import LabelEncoder
+
+from preprocessing import TextPreprocessor
+from train_model import PCAPredictionModel
+from model_bundle import ModelBundle, COMPONENT_ENCODER_FILE
+from forest_outputs import full_probabilities
+
+
+COMPONENT_COLUMN = 'Composant concerné'
+
+
+class MultiTaskPCAModel(PCAPredictionModel):
+    """
+    PCAPredictionModel à deux sorties : PCA attendue et composant concerné
+    """
+
+    def __init__(self, random_state: int = 42):
+        """
+        Initialise le modèle multi-tâches
+
+        Args:
+            random_state (int): Graine pour la reproductibilité
+        """
+        super().__init__(random_state)
+        self.component_encoder = None
+
+    def prepare_data(self, X: pd.Series, y: pd.Series, components: pd.Series = None,
+                     test_size: float = 0.2) -> Tuple:
+        """
+        Encode les deux cibles et sépare train/test (stratifié sur la PCA)
+
+        Args:
+            X (pd.Series): Textes d'entrée
+            y (pd.Series): PCA attendues
+            components (pd.Series): Composants concernés (alignés sur X)
+            test_size (float): Proportion des données de test
+
+        Returns:
+            Tuple: X_train, X_test, Y_train, Y_test (Y: n x 2, codes PCA puis composant)
+        """
+        if components is None:
+            raise ValueError(f"La colonne '{COMPONENT_COLUMN}' est requise pour le modèle multi-tâches")
+
+        self.label_encoder = LabelEncoder()
+        self.component_encoder = LabelEncoder()
+        Y = np.column_stack([self.label_encoder.fit_transform(y),
+                             self.component_encoder.fit_transform(components)])
+
+        X_train, X_test, Y_train, Y_test = train_test_split(
+            X, Y, test_size=test_size, random_state=self.random_state, stratify=Y[:, 0]
+        )
+
+        print(f"Données d'entraînement: {len(X_train)} exemples")
+        print(f"Données de test: {len(X_test)} exemples")
+        print(f"Cibles: {len(self.label_encoder.classes_)} PCA, "
+              f"{len(self.component_encoder.classes_)} composants")
+
+        return X_train, X_test, Y_train, Y_test
+
+    def train(self, X_train: pd.Series, y_train: np.ndarray,
+              validation: str = 'none') -> Dict[str, Any]:
+        """
+        Entraîne la vectorisation et la forêt multi-sorties
+
+        Args:
+            X_train (pd.Series): Textes d'entraînement
+            y_train (np.ndarray): Codes (n x 2)
+            validation (str): 'none' uniquement : scikit-learn ne calcule ni
+                score out-of-bag ni folds stratifiés sur des cibles multi-sorties
+                multi-classes (évaluer sur le holdout)
+
+        Returns:
+            Dict[str, Any]: Métriques d'entraînement
+        """
+        if validation != 'none':
+            raise ValueError("Validation OOB/CV non supportée pour une forêt multi-sorties : "
+                             "utiliser validation='none' et evaluate()")
+        return super().train(X_train, y_train, validation='none')
+
+    def predict_both(self, texts) -> Dict[str, np.ndarray]:
+        """
+        Prédit PCA et composant en une seule passe vectorisation + forêt
+
+        Args:
+            texts: Textes préprocessés
+
+        Returns:
+            Dict[str, np.ndarray]: Labels et probabilités (colonnes = classes des encodeurs)
+        """
+        probas = self.model.predict_proba(self.transform(texts))
+        pca_proba = full_probabilities(self.model.classes_[0], probas[0], len(self.label_encoder.classes_))
+        component_proba = full_probabilities(self.model.classes_[1], probas[1],
+                                             len(self.component_encoder.classes_))
+        return {
+            'pca': self.label_encoder.inverse_transform(pca_proba.argmax(axis=1)),
+            'pca_probabilities': pca_proba,
+            'component': self.component_encoder.inverse_transform(component_proba.argmax(axis=1)),
+            'component_probabilities': component_proba
+        }
+
+    def evaluate(self, X_test: pd.Series, y_test: np.ndarray) -> Dict[str, Any]:
+        """
+        Évalue les deux sorties sur le holdout
+
+        Args:
+            X_test (pd.Series): Textes de test
+            y_test (np.ndarray): Codes (n x 2)
+
+        Returns:
+            Dict[str, Any]: Accuracy et rapport par cible, accuracy conjointe
+        """
+        if not self.is_trained:
+            raise ValueError("Le modèle doit être entraîné avant l'évaluation")
+
+        print("=== ÉVALUATION DU MODÈLE MULTI-TÂCHES ===")
+        predicted = self.predict_both(X_test)
+        pca_true = self.label_encoder.inverse_transform(y_test[:, 0])
+        component_true = self.component_encoder.inverse_transform(y_test[:, 1])
+        pca_ok = predicted['pca'] == pca_true
+        component_ok = predicted['component'] == component_true
+
+        metrics = {
+            'pca': {
+                'accuracy': float(pca_ok.mean()),
+                'classification_report': classification_report(pca_true, predicted['pca'],
+                                                               output_dict=True, zero_division=0)
+            },
+            'component': {
+                'accuracy': float(component_ok.mean()),
+                'classification_report': classification_report(component_true, predicted['component'],
+                                                               output_dict=True, zero_division=0)
+            },
+            'joint_accuracy': float((pca_ok & component_ok).mean())
+        }
+        print(f"Accuracy PCA: {metrics['pca']['accuracy']:.4f}")
+        print(f"Accuracy composant: {metrics['component']['accuracy']:.4f}")
+        print(f"Accuracy conjointe: {metrics['joint_accuracy']:.4f}")
+        return metrics
+
+    def save_model(self, model_dir: str = 'models', compact: bool = False,
+                   parent_version: str = None) -> str:
+        """
+        Sauvegarde le bundle (avec l'encodeur des composants)
+
+        Args:
+            model_dir (str): Répertoire de sauvegarde
+            compact (bool): Non supporté (CompactForest est mono-sortie)
+            parent_version (str): Version dont ce modèle est dérivé (optionnel)
+
+        Returns:
+            str: Version du modèle sauvegardé
+        """
+        if compact:
+            raise ValueError("Format compact non supporté pour une forêt multi-sorties")
+        return super().save_model(model_dir, compact=False, parent_version=parent_version)
+
+    def _extra_artifacts(self) -> Dict[str, Any]:
+        """Artefacts optionnels du bundle, plus l'encodeur des composants"""
+        artifacts = super()._extra_artifacts() or {}
+        artifacts[COMPONENT_ENCODER_FILE] = self.component_encoder
+        return artifacts
+
+    def get_feature_config(self, compact: bool = False) -> Dict[str, Any]:
+        """Configuration du manifest, avec les cibles prédites"""
+        return dict(super().get_feature_config(compact), targets=['PCA attendue', COMPONENT_COLUMN])
+
+    def load_model(self, model_dir: str = 'models') -> None:
+        """
+        Charge un bundle multi-tâches
+
+        Args:
+            model_dir (str): Répertoire contenant le modèle
+        """
+        super().load_model(model_dir)
+        bundle = ModelBundle.open(model_dir)
+        if COMPONENT_ENCODER_FILE not in bundle.manifest['files']:
+            raise ValueError(f"{model_dir} n'est pas un bundle multi-tâches ({COMPONENT_ENCODER_FILE} absent)")
+        self.component_encoder = joblib.load(bundle.path(COMPONENT_ENCODER_FILE))
+
+
+def load_multi_task_data(data_path: str):
+    """
+    Charge un CSV GIM : textes, PCA et composants alignés
+
+    Returns:
+        Tuple[pd.Series, pd.Series, pd.Series]: textes, PCA, composants
+    """
+    df, X, y = TextPreprocessor().load_and_preprocess_data(data_path)
+    if COMPONENT_COLUMN not in df.columns:
+        raise ValueError(f"Colonne manquante: {COMPONENT_COLUMN}")
+    components = df.loc[X.index, COMPONENT_COLUMN].fillna('Inconnu').astype(str)
+    return X, y, components
+
+
+def _serialized_size(obj) -> int:
+    """Taille (octets) d'un objet sérialisé avec joblib"""
+    buffer = io.BytesIO()
+    joblib.dump(obj, buffer)
+    return buffer.getbuffer().nbytes
+
+
+def _request_latency(predict_one, texts: Sequence[str], n_requests: int = 200) -> float:
+    """Latence médiane (ms) d'une requête unitaire"""
+    timings = []
+    for text in list(texts)[:n_requests]:
+        start = time.perf_counter()
+        predict_one(text)
+        timings.append((time.perf_counter() - start) * 1000)
+    return float(np.median(timings))
+
+
+def compare_with_single_task(multi: MultiTaskPCAModel, multi_fit_time: float, multi_metrics: Dict[str, Any],
+                             X_train, X_test, Y_train: np.ndarray, Y_test: np.ndarray) -> Dict[str, Any]:
+    """
+    Compare le modèle multi-tâches entraîné à deux modèles mono-tâche (PCA, composant)
+    entraînés sur le même split avec les mêmes paramètres
+
+    Args:
+        multi (MultiTaskPCAModel): Modèle multi-tâches entraîné
+        multi_fit_time (float): Temps d'entraînement du modèle multi-tâches (s)
+        multi_metrics (Dict[str, Any]): Sortie de multi.evaluate
+        X_train, X_test: Textes préprocessés
+        Y_train, Y_test (np.ndarray): Codes (n x 2)
+
+    Returns:
+        Dict[str, Any]: Accuracy, temps d'entraînement, taille et latence par approche
+    """
+    # Deux modèles complets sur le même split
+    singles = {}
+    for target, encoder, column in (('pca', multi.label_encoder, 0), ('component', multi.component_encoder, 1)):
+        single = PCAPredictionModel()
+        single.update_params(rf_params=multi.rf_params)
+        single.label_encoder = encoder
+        start = time.perf_counter()
+        single.train(X_train, Y_train[:, column], validation='none')
+        fit_time = time.perf_counter() - start
+        accuracy = accuracy_score(Y_test[:, column], single.model.predict(single.transform(X_test)))
+        singles[target] = {'model': single, 'fit_time_s': fit_time, 'accuracy': float(accuracy)}
+
+    def predict_two_models(text):
+        for entry in singles.values():
+            entry['model'].model.predict_proba(entry['model'].transform([text]))
+
+    return {
+        'single_task': {
+            'pca_accuracy': singles['pca']['accuracy'],
+            'component_accuracy': singles['component']['accuracy'],
+            'fit_time_s': sum(entry['fit_time_s'] for entry in singles.values()),
+            'size_mb': sum(_serialized_size(entry['model'].model) + _serialized_size(entry['model'].vectorizer)
+                           for entry in singles.values()) / 1e6,
+            'latency_ms': _request_latency(predict_two_models, X_test)
+        },
+        'multi_task': {
+            'pca_accuracy': multi_metrics['pca']['accuracy'],
+            'component_accuracy': multi_metrics['component']['accuracy'],
+            'fit_time_s': multi_fit_time,
+            'size_mb': (_serialized_size(multi.model) + _serialized_size(multi.vectorizer)) / 1e6,
+            'latency_ms': _request_latency(lambda text: multi.predict_both([text]), X_test)
+        }
+    }
+
+
+def print_comparison(comparison: Dict[str, Any]) -> None:
+    """Affiche la comparaison mono-tâche / multi-tâches"""
+    print("\n🎯 DEUX MODÈLES vs MODÈLE MULTI-TÂCHES")
+    print("-" * 72)
+    print(f"{'Approche':<14}{'Acc. PCA':>10}{'Acc. comp.':>12}{'Fit (s)':>10}{'Taille (Mo)':>13}{'p50 (ms)':>10}")
+    for name, label in (('single_task', '2 modèles'), ('multi_task', 'multi-tâches')):
+        row = comparison[name]
+        print(f"{label:<14}{row['pca_accuracy']:>10.4f}{row['component_accuracy']:>12.4f}"
+              f"{row['fit_time_s']:>10.2f}{row['size_mb']:>13.2f}{row['latency_ms']:>10.2f}")
+
+
+def run_multi_task_training(data_path: str, model_dir: str = 'models_multitask',
+                            compare: bool = False) -> Dict[str, Any]:
+    """
+    Entraîne, évalue et sauvegarde le modèle multi-tâches
+
+    Args:
+        data_path (str): CSV de tickets GIM
+        model_dir (str): Répertoire du bundle
+        compare (bool): Si True, compare aussi à deux modèles mono-tâche
+
+    Returns:
+        Dict[str, Any]: Métriques (et comparaison)
+    """
+    X, y, components = load_multi_task_data(data_path)
+    model = MultiTaskPCAModel()
+    X_train, X_test, Y_train, Y_test = model.prepare_data(X, y, components)
+    start = time.perf_counter()
+    model.train(X_train, Y_train)
+    fit_time = time.perf_counter() - start
+    metrics = model.evaluate(X_test, Y_test)
+    model.save_model(model_dir)
+
+    results = {'evaluation': metrics, 'model_version': model.model_version, 'fit_time_s': fit_time}
+    if compare:
+        results['comparison'] = compare_with_single_task(model, fit_time, metrics,
+                                                         X_train, X_test, Y_train, Y_test)
+        print_comparison(results['comparison'])
+    return results
+
+
+def main():
+    """Entraînement du modèle multi-tâches PCA + composant"""
+    parser = argparse.ArgumentParser(description='Modèle multi-tâches PCA + composant')
+    parser.add_argument('--data', default='data/gim_diagnostic_dataset.csv', help='CSV de tickets GIM')
+    parser.add_argument('--model-dir', default='models_multitask', help='Répertoire du bundle')
+    parser.add_argument('--compare', action='store_true', help='Compare à deux modèles mono-tâche')
+    args = parser.parse_args()
+
+    run_multi_task_training(args.data, args.model_dir, compare=args.compare)
+
+
+if __name__ == "__main__":
+    main()
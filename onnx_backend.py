@@ -0,0 +1,280 @@
+"""
+Module d'export et d'inférence ONNX Runtime pour le modèle DistilBERT PCA
+Le checkpoint distilbert_pca_model est exporté en graphe ONNX (axes batch et
+séquence dynamiques) avec son tokenizer et son label_mapping.json : le
+répertoire exporté se sert sans torch. L'export vérifie que les logits ONNX
+Runtime correspondent à ceux de PyTorch dans une tolérance donnée, et la
+session est configurée (threads intra/inter-op, optimisations de graphe).
+Auteur: Assistant IA
+Date: 2025-07-26
+"""
+
+import os
+import json
+import time
+import shutil
+import argparse
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from model_bundle import write_manifest, MANIFEST_NAME
+
+# Import conditionnel pour ONNX Runtime
+try:
+    import onnxruntime as ort
+    ONNXRUNTIME_AVAILABLE = True
+except ImportError:
+    ONNXRUNTIME_AVAILABLE = False
+
+
+ONNX_MODEL_FILE = 'model.onnx'
+ONNX_INPUT_NAMES = ('input_ids', 'attention_mask')
+ONNX_OUTPUT_NAME = 'logits'
+GRAPH_OPTIMIZATION_LEVELS = ('disable', 'basic', 'extended', 'all')
+
+# Fichiers du checkpoint recopiés à côté du graphe (tokenizer + mapping des labels)
+TOKENIZER_FILES = ('vocab.txt', 'tokenizer.json', 'tokenizer_config.json',
+                   'special_tokens_map.json', 'config.json', 'label_mapping.json',
+                   'inference_config.json')
+
+VERIFICATION_TEXTS = (
+    'p0300 engine misfiring randomly faulty spark plugs',
+    'p0171 system too lean vacuum leak in intake manifold',
+    'b1234',
+)
+
+
+def default_onnx_dir(checkpoint_dir: str) -> str:
+    """Répertoire d'export ONNX, à côté du checkpoint"""
+    return checkpoint_dir.rstrip('/\\') + '_onnx'
+
+
+def create_session(onnx_dir: str, intra_op_threads: Optional[int] = None,
+                   inter_op_threads: Optional[int] = None,
+                   graph_optimization: str = 'all') -> 'ort.InferenceSession':
+    """
+    Ouvre une session ONNX Runtime CPU sur le graphe exporté
+
+    Args:
+        onnx_dir (str): Répertoire d'export
+        intra_op_threads (int): Threads par opérateur (défaut: choix d'ONNX Runtime)
+        inter_op_threads (int): Threads entre opérateurs (défaut: choix d'ONNX Runtime)
+        graph_optimization (str): Niveau d'optimisation du graphe (GRAPH_OPTIMIZATION_LEVELS)
+
+    Returns:
+        ort.InferenceSession: Session prête
+    """
+    if not ONNXRUNTIME_AVAILABLE:
+        raise ImportError("ONNX Runtime non disponible. Installez avec: pip install onnxruntime")
+    if graph_optimization not in GRAPH_OPTIMIZATION_LEVELS:
+        raise ValueError(f"Niveau d'optimisation non supporté: {graph_optimization} "
+                         f"(choix: {GRAPH_OPTIMIZATION_LEVELS})")
+
+    options = ort.SessionOptions()
+    options.graph_optimization_level = {
+        'disable': ort.GraphOptimizationLevel.ORT_DISABLE_ALL,
+        'basic': ort.GraphOptimizationLevel.ORT_ENABLE_BASIC,
+        'extended': ort.GraphOptimizationLevel.ORT_ENABLE_EXTENDED,
+        'all': ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    }[graph_optimization]
+    options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+    if intra_op_threads:
+        options.intra_op_num_threads = intra_op_threads
+    if inter_op_threads:
+        options.inter_op_num_threads = inter_op_threads
+
+    return ort.InferenceSession(os.path.join(onnx_dir, ONNX_MODEL_FILE), sess_options=options,
+                                providers=['CPUExecutionProvider'])
+
+
+def onnx_logits(session: 'ort.InferenceSession', encoded: Dict[str, Any]) -> np.ndarray:
+    """
+    Logits ONNX Runtime pour une entrée tokenisée (tableaux numpy ou listes)
+
+    Args:
+        session (ort.InferenceSession): Session ouverte par create_session
+        encoded (Dict[str, Any]): Sortie du tokenizer (input_ids, attention_mask)
+
+    Returns:
+        np.ndarray: Logits (batch x n_classes)
+    """
+    feeds = {name: np.asarray(encoded[name], dtype=np.int64) for name in ONNX_INPUT_NAMES}
+    return session.run([ONNX_OUTPUT_NAME], feeds)[0]
+
+
+def softmax(logits: np.ndarray) -> np.ndarray:
+    """Softmax numérique stable sur la dernière dimension"""
+    shifted = np.exp(logits - logits.max(axis=-1, keepdims=True))
+    return shifted / shifted.sum(axis=-1, keepdims=True)
+
+
+def verify_export(checkpoint_dir: str, onnx_dir: str, texts: Sequence[str] = VERIFICATION_TEXTS,
+                  atol: float = 1e-4) -> Dict[str, Any]:
+    """
+    Compare les logits ONNX Runtime et PyTorch (un par un, puis en batch paddé)
+
+    Args:
+        checkpoint_dir (str): Checkpoint DistilBERT source
+        onnx_dir (str): Répertoire d'export
+        texts (Sequence[str]): Textes préprocessés de contrôle
+        atol (float): Écart absolu maximal toléré sur les logits
+
+    Returns:
+        Dict[str, Any]: Écart maximal, tolérance et accord des classes prédites
+    """
+    import torch
+    from transformers import DistilBertForSequenceClassification, DistilBertTokenizerFast
+
+    tokenizer = DistilBertTokenizerFast.from_pretrained(checkpoint_dir)
+    model = DistilBertForSequenceClassification.from_pretrained(checkpoint_dir).eval()
+    session = create_session(onnx_dir)
+
+    # Textes seuls (batch 1, longueurs variées) puis batch paddé : axes dynamiques exercés
+    batches = [[text] for text in texts] + [list(texts)]
+    max_diff, same_class = 0.0, True
+    for batch in batches:
+        encoded = tokenizer(batch, return_tensors='pt', padding=True, truncation=True, max_length=512)
+        with torch.no_grad():
+            expected = model(input_ids=encoded['input_ids'],
+                             attention_mask=encoded['attention_mask']).logits.numpy()
+        actual = onnx_logits(session, {name: encoded[name].numpy() for name in ONNX_INPUT_NAMES})
+        max_diff = max(max_diff, float(np.abs(actual - expected).max()))
+        same_class = same_class and bool((actual.argmax(-1) == expected.argmax(-1)).all())
+
+    return {'max_abs_diff': max_diff, 'atol': atol, 'same_predictions': same_class,
+            'within_tolerance': max_diff <= atol}
+
+
+def export_onnx(checkpoint_dir: str = 'distilbert_pca_model', onnx_dir: Optional[str] = None,
+                opset: int = 17, atol: float = 1e-4) -> Dict[str, Any]:
+    """
+    Exporte le checkpoint DistilBERT en ONNX et vérifie l'équivalence avec PyTorch
+
+    Args:
+        checkpoint_dir (str): Checkpoint DistilBERT (save_pretrained + label_mapping.json)
+        onnx_dir (str): Répertoire d'export (défaut: <checkpoint_dir>_onnx)
+        opset (int): Version d'opset ONNX
+        atol (float): Écart absolu maximal toléré sur les logits
+
+    Returns:
+        Dict[str, Any]: Manifest du répertoire exporté (vérification incluse)
+    """
+    import torch
+    from transformers import DistilBertForSequenceClassification, DistilBertTokenizerFast
+
+    onnx_dir = onnx_dir or default_onnx_dir(checkpoint_dir)
+    os.makedirs(onnx_dir, exist_ok=True)
+
+    tokenizer = DistilBertTokenizerFast.from_pretrained(checkpoint_dir)
+    model = DistilBertForSequenceClassification.from_pretrained(checkpoint_dir).eval()
+    # Sortie tuple (logits,) : pas d'objet ModelOutput dans le graphe
+    model.config.return_dict = False
+
+    sample = tokenizer([VERIFICATION_TEXTS[0]], return_tensors='pt')
+    dynamic_axes = {name: {0: 'batch', 1: 'sequence'} for name in ONNX_INPUT_NAMES}
+    dynamic_axes[ONNX_OUTPUT_NAME] = {0: 'batch'}
+
+    print(f"Export ONNX de {checkpoint_dir} (opset {opset})...")
+    model_path = os.path.join(onnx_dir, ONNX_MODEL_FILE)
+    with torch.no_grad():
+        torch.onnx.export(model, (sample['input_ids'], sample['attention_mask']), model_path,
+                          input_names=list(ONNX_INPUT_NAMES), output_names=[ONNX_OUTPUT_NAME],
+                          dynamic_axes=dynamic_axes, opset_version=opset,
+                          do_constant_folding=True, dynamo=False)
+
+    for name in TOKENIZER_FILES:
+        source = os.path.join(checkpoint_dir, name)
+        if os.path.exists(source):
+            shutil.copy2(source, os.path.join(onnx_dir, name))
+
+    verification = verify_export(checkpoint_dir, onnx_dir, atol=atol)
+    if not verification['within_tolerance']:
+        raise ValueError(f"Export ONNX hors tolérance: écart {verification['max_abs_diff']:.2e} > {atol:.0e}")
+    print(f"✅ Logits ONNX conformes à PyTorch (écart max {verification['max_abs_diff']:.2e})")
+
+    with open(os.path.join(checkpoint_dir, 'label_mapping.json'), 'r', encoding='utf-8') as f:
+        label_mapping = json.load(f)
+    files = sorted(name for name in os.listdir(onnx_dir)
+                   if os.path.isfile(os.path.join(onnx_dir, name)) and name != MANIFEST_NAME)
+    return write_manifest(onnx_dir, files, backend='onnx',
+                          classes=[label_mapping[k] for k in sorted(label_mapping, key=int)],
+                          feature_config={'opset': opset, 'input_names': list(ONNX_INPUT_NAMES),
+                                          'dynamic_axes': ['batch', 'sequence']},
+                          metadata={'source_checkpoint': os.path.abspath(checkpoint_dir),
+                                    'verification': verification})
+
+
+def compare_backends(texts: List[str], checkpoint_dir: str = 'distilbert_pca_model',
+                     onnx_dir: Optional[str] = None, threads: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Latence par requête PyTorch eager vs ONNX Runtime (même tokenizer, même nombre de threads)
+
+    Args:
+        texts (List[str]): Textes préprocessés
+        checkpoint_dir (str): Checkpoint DistilBERT
+        onnx_dir (str): Répertoire d'export (défaut: <checkpoint_dir>_onnx)
+        threads (int): Threads intra-op des deux runtimes (défaut: choix de chaque runtime)
+
+    Returns:
+        Dict[str, Any]: p50/p95 (ms) par runtime et accord des classes prédites
+    """
+    import torch
+    from transformers import DistilBertForSequenceClassification, DistilBertTokenizerFast
+
+    onnx_dir = onnx_dir or default_onnx_dir(checkpoint_dir)
+    if threads:
+        torch.set_num_threads(threads)
+    tokenizer = DistilBertTokenizerFast.from_pretrained(checkpoint_dir)
+    model = DistilBertForSequenceClassification.from_pretrained(checkpoint_dir).eval()
+    session = create_session(onnx_dir, intra_op_threads=threads)
+
+    def run_torch(encoded):
+        with torch.no_grad():
+            return model(input_ids=torch.from_numpy(encoded['input_ids']),
+                         attention_mask=torch.from_numpy(encoded['attention_mask'])).logits.numpy()
+
+    runtimes = {'pytorch': run_torch, 'onnxruntime': lambda encoded: onnx_logits(session, encoded)}
+    results, predictions = {}, {}
+    for name, run in runtimes.items():
+        timings, predicted = [], []
+        for text in texts:
+            start = time.perf_counter()
+            encoded = tokenizer(text, return_tensors='np', truncation=True, max_length=512)
+            predicted.append(int(run(encoded).argmax(-1)[0]))
+            timings.append((time.perf_counter() - start) * 1000)
+        predictions[name] = predicted
+        results[name] = {'p50_ms': float(np.percentile(timings, 50)),
+                         'p95_ms': float(np.percentile(timings, 95))}
+
+    agreement = float(np.mean(np.array(predictions['pytorch']) == np.array(predictions['onnxruntime'])))
+    return {'n_samples': len(texts), 'runtimes': results, 'agreement': agreement}
+
+
+def main():
+    """Export ONNX du checkpoint DistilBERT"""
+    parser = argparse.ArgumentParser(description='Export ONNX du modèle DistilBERT PCA')
+    parser.add_argument('--checkpoint-dir', default='distilbert_pca_model', help='Checkpoint DistilBERT')
+    parser.add_argument('--onnx-dir', help='Répertoire d\'export (default: <checkpoint>_onnx)')
+    parser.add_argument('--opset', type=int, default=17, help='Version d\'opset ONNX (default: 17)')
+    parser.add_argument('--atol', type=float, default=1e-4, help='Tolérance sur les logits (default: 1e-4)')
+    parser.add_argument('--benchmark-data', help='CSV : compare ensuite la latence PyTorch / ONNX sur son holdout')
+    parser.add_argument('--limit', type=int, default=500, help='Tickets du holdout pour la comparaison (default: 500)')
+    parser.add_argument('--threads', type=int, help='Threads intra-op pour la comparaison')
+    args = parser.parse_args()
+
+    manifest = export_onnx(args.checkpoint_dir, args.onnx_dir, args.opset, args.atol)
+    print(f"📦 Export ONNX version {manifest['model_version']}")
+
+    if args.benchmark_data:
+        from distilbert_inference import load_holdout
+        texts, _ = load_holdout(args.benchmark_data)
+        comparison = compare_backends(texts[:args.limit], args.checkpoint_dir, args.onnx_dir, args.threads)
+        print(f"\n⚡ PYTORCH vs ONNX RUNTIME ({comparison['n_samples']} requêtes unitaires)")
+        for name, row in comparison['runtimes'].items():
+            print(f"{name:<12} p50 {row['p50_ms']:.2f} ms, p95 {row['p95_ms']:.2f} ms")
+        print(f"Accord des prédictions: {comparison['agreement']:.4f}")
+
+
+if __name__ == "__main__":
+    main()
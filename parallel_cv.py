@@ -0,0 +1,199 @@
+"""
+Module de validation croisée parallèle pour le projet PCA
+La matrice TF-IDF est écrite une seule fois sur disque (composants CSR
+projetables en mémoire) ; chaque worker la projette au lieu de recevoir une
+copie sérialisée. Plis et arbres se partagent un budget global de threads
+pour éviter la sur-souscription de cross_val_score(n_jobs=-1) sur une forêt
+elle-même en n_jobs=-1.
+Auteur: Assistant IA
+Date: 2025-07-26
+"""
+
+import os
+import shutil
+import tempfile
+import time
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+import scipy.sparse as sp
+from joblib import Parallel, delayed
+from sklearn.base import clone
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import accuracy_score
+from sklearn.model_selection import StratifiedKFold
+
+
+def dump_feature_store(X, y: np.ndarray, store_dir: str) -> str:
+    """
+    Écrit une matrice de features et ses labels dans un répertoire projetable
+
+    Args:
+        X: Matrice de features (creuse CSR ou dense)
+        y (np.ndarray): Labels encodés
+        store_dir (str): Répertoire de destination
+
+    Returns:
+        str: Répertoire du store
+    """
+    os.makedirs(store_dir, exist_ok=True)
+
+    if sp.issparse(X):
+        X = X.tocsr()
+        np.save(os.path.join(store_dir, 'data.npy'), X.data)
+        np.save(os.path.join(store_dir, 'indices.npy'), X.indices)
+        np.save(os.path.join(store_dir, 'indptr.npy'), X.indptr)
+        np.save(os.path.join(store_dir, 'shape.npy'), np.asarray(X.shape))
+    else:
+        np.save(os.path.join(store_dir, 'dense.npy'), np.asarray(X))
+
+    np.save(os.path.join(store_dir, 'y.npy'), np.asarray(y))
+    return store_dir
+
+
+def load_feature_store(store_dir: str, mmap_mode: Optional[str] = 'r') -> Tuple[Any, np.ndarray]:
+    """
+    Projette un store de features sans copie
+
+    Args:
+        store_dir (str): Répertoire écrit par dump_feature_store
+        mmap_mode (str): Mode de projection ('r') ou None pour charger en mémoire
+
+    Returns:
+        Tuple: (matrice de features, labels)
+    """
+    def load(name):
+        return np.load(os.path.join(store_dir, name), mmap_mode=mmap_mode)
+
+    y = load('y.npy')
+    if os.path.exists(os.path.join(store_dir, 'dense.npy')):
+        return load('dense.npy'), y
+
+    shape = tuple(np.load(os.path.join(store_dir, 'shape.npy')))
+    X = sp.csr_matrix((load('data.npy'), load('indices.npy'), load('indptr.npy')),
+                      shape=shape, copy=False)
+    return X, y
+
+
+def plan_thread_budget(n_folds: int, thread_budget: Optional[int] = None) -> Tuple[int, int]:
+    """
+    Répartit un budget de threads entre plis parallèles et arbres par pli
+
+    Args:
+        n_folds (int): Nombre de plis
+        thread_budget (int): Nombre total de threads (défaut: nombre de CPU)
+
+    Returns:
+        Tuple[int, int]: (plis en parallèle, threads par forêt)
+    """
+    budget = thread_budget if thread_budget and thread_budget > 0 else (os.cpu_count() or 1)
+    parallel_folds = max(1, min(n_folds, budget))
+    threads_per_fold = max(1, budget // parallel_folds)
+    return parallel_folds, threads_per_fold
+
+
+def _fit_fold(store_dir: str, fold: int, train_idx: np.ndarray, test_idx: np.ndarray,
+              rf_params: Dict[str, Any], n_threads: int, reducer=None) -> Dict[str, Any]:
+    """
+    Entraîne et évalue un pli depuis le store projeté (exécuté dans un worker)
+
+    Args:
+        store_dir (str): Store de features
+        fold (int): Numéro du pli
+        train_idx (np.ndarray): Index d'entraînement
+        test_idx (np.ndarray): Index de test
+        rf_params (Dict[str, Any]): Paramètres de la forêt
+        n_threads (int): Threads alloués à cette forêt
+        reducer: Réducteur non ajusté (ex: SelectKBest), ajusté sur le train du pli
+
+    Returns:
+        Dict[str, Any]: Score et temps du pli
+    """
+    start = time.perf_counter()
+    X, y = load_feature_store(store_dir)
+    X_fit, y_fit, X_test = X[train_idx], y[train_idx], X[test_idx]
+
+    params = dict(rf_params, n_jobs=n_threads)
+    classifier = RandomForestClassifier(**params)
+
+    fit_start = time.perf_counter()
+    if reducer is not None:
+        reducer = clone(reducer)
+        X_fit = reducer.fit_transform(X_fit, y_fit)
+        X_test = reducer.transform(X_test)
+    classifier.fit(X_fit, y_fit)
+    fit_time = time.perf_counter() - fit_start
+
+    predict_start = time.perf_counter()
+    accuracy = accuracy_score(y[test_idx], classifier.predict(X_test))
+    predict_time = time.perf_counter() - predict_start
+
+    return {
+        'fold': fold,
+        'accuracy': accuracy,
+        'n_train': len(train_idx),
+        'n_test': len(test_idx),
+        'fit_time_s': fit_time,
+        'predict_time_s': predict_time,
+        'total_time_s': time.perf_counter() - start,
+        'worker_pid': os.getpid()
+    }
+
+
+class SharedMemoryCV:
+    """
+    Validation croisée stratifiée sur un store de features partagé
+    """
+
+    def __init__(self, n_splits: int = 5, thread_budget: Optional[int] = None,
+                 temp_dir: Optional[str] = None):
+        """
+        Initialise la validation croisée
+
+        Args:
+            n_splits (int): Nombre de plis (StratifiedKFold, comme cross_val_score)
+            thread_budget (int): Budget global de threads (défaut: nombre de CPU)
+            temp_dir (str): Répertoire parent du store (défaut: répertoire temporaire système)
+        """
+        self.n_splits = n_splits
+        self.thread_budget = thread_budget
+        self.temp_dir = temp_dir
+
+    def run(self, rf_params: Dict[str, Any], X, y: np.ndarray, reducer=None) -> Dict[str, Any]:
+        """
+        Exécute la validation croisée
+
+        Args:
+            rf_params (Dict[str, Any]): Paramètres RandomForest (n_jobs est remplacé)
+            X: Matrice de features
+            y (np.ndarray): Labels encodés
+            reducer: Réduction de dimension non ajustée, réajustée dans chaque pli
+                (X doit alors être la matrice avant réduction, sinon le score est biaisé)
+
+        Returns:
+            Dict[str, Any]: Scores, temps par pli et planification utilisée
+        """
+        parallel_folds, threads_per_fold = plan_thread_budget(self.n_splits, self.thread_budget)
+        folds = list(StratifiedKFold(n_splits=self.n_splits).split(np.zeros(len(y)), y))
+
+        store_dir = tempfile.mkdtemp(prefix='pca_cv_store_', dir=self.temp_dir)
+        start = time.perf_counter()
+        try:
+            dump_feature_store(X, y, store_dir)
+            fold_results = Parallel(n_jobs=parallel_folds)(
+                delayed(_fit_fold)(store_dir, i, train_idx, test_idx, rf_params, threads_per_fold, reducer)
+                for i, (train_idx, test_idx) in enumerate(folds)
+            )
+        finally:
+            shutil.rmtree(store_dir, ignore_errors=True)
+
+        scores = np.array([r['accuracy'] for r in fold_results])
+        return {
+            'scores': scores,
+            'mean': float(scores.mean()),
+            'std': float(scores.std()),
+            'folds': fold_results,
+            'parallel_folds': parallel_folds,
+            'threads_per_fold': threads_per_fold,
+            'wall_time_s': time.perf_counter() - start
+        }
@@ -0,0 +1,199 @@
+"""
+Module de cache des étapes du pipeline PCA
+Chaque étape de PCAMLPipeline est identifiée par une clé dérivée de ses
+entrées (clés des étapes amont, hash du fichier de données), de ses
+paramètres et du code qui la calcule. Les sorties sont stockées sous cette
+clé : une relance saute les étapes inchangées et reprend à la première
+étape invalidée ou en échec.
+Auteur: Assistant IA
+Date: 2025-07-26
+"""
+
+import os
+import ast
+import sys
+import json
+import shutil
+import hashlib
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set
+
+from model_storage import save_artifact, load_artifact
+from model_bundle import file_sha256
+
+
+RUN_STATE_NAME = 'last_run.json'
+
+
+def stage_key(stage: str, *parts: Any) -> str:
+    """
+    Calcule la clé d'une étape à partir de ses entrées et paramètres
+
+    Args:
+        stage (str): Nom de l'étape
+        *parts: Éléments sérialisables en JSON (clés amont, paramètres, hash)
+
+    Returns:
+        str: Clé hexadécimale (16 caractères)
+    """
+    payload = json.dumps([stage, *parts], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+
+def _local_imports(path: str) -> Set[str]:
+    """
+    Modules du projet importés par un fichier source (y compris dans les fonctions)
+
+    Args:
+        path (str): Fichier Python
+
+    Returns:
+        Set[str]: Chemins des modules importés présents dans le même répertoire
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        tree = ast.parse(f.read(), filename=path)
+
+    names = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names.update(alias.name.split('.')[0] for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            names.add(node.module.split('.')[0])
+
+    project_dir = os.path.dirname(os.path.abspath(path))
+    candidates = (os.path.join(project_dir, f"{name}.py") for name in names)
+    return {candidate for candidate in candidates if os.path.exists(candidate)}
+
+
+def project_sources(*modules) -> List[str]:
+    """
+    Fichiers sources des modules et de tous les modules du projet qu'ils importent
+
+    Args:
+        *modules: Modules Python (ou noms de modules déjà importés)
+
+    Returns:
+        List[str]: Chemins absolus triés
+    """
+    pending = [os.path.abspath((sys.modules[m] if isinstance(m, str) else m).__file__)
+               for m in modules]
+    seen = set()
+    while pending:
+        path = pending.pop()
+        if path not in seen:
+            seen.add(path)
+            pending.extend(_local_imports(path) - seen)
+    return sorted(seen)
+
+
+def code_fingerprint(*modules) -> str:
+    """
+    Hash du code source des modules qui calculent une étape
+
+    Les modules du projet importés (directement ou non, y compris à
+    l'intérieur des fonctions) sont inclus : une modification du
+    préprocessing, de l'entraînement ou d'un module dont ils dépendent
+    invalide ainsi les sorties mises en cache.
+
+    Args:
+        *modules: Modules Python (ou noms de modules déjà importés)
+
+    Returns:
+        str: Hash hexadécimal combiné
+    """
+    digest = hashlib.sha256()
+    for path in project_sources(*modules):
+        digest.update(os.path.basename(path).encode('utf-8'))
+        digest.update(file_sha256(path).encode('utf-8'))
+    return digest.hexdigest()[:16]
+
+
+class StageCache:
+    """
+    Stockage des sorties d'étapes sur disque, indexé par (étape, clé)
+    """
+
+    def __init__(self, cache_dir: str, enabled: bool = True):
+        """
+        Initialise le cache
+
+        Args:
+            cache_dir (str): Répertoire du cache
+            enabled (bool): Si False, rien n'est lu (les sorties sont tout de même écrites)
+        """
+        self.cache_dir = cache_dir
+        self.enabled = enabled
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, stage: str, key: str) -> str:
+        """Chemin de la sortie d'une étape"""
+        return os.path.join(self.cache_dir, stage, f"{key}.pkl")
+
+    def has(self, stage: str, key: str) -> bool:
+        """Indique si la sortie d'une étape est disponible pour cette clé"""
+        return self.enabled and os.path.exists(self._path(stage, key))
+
+    def load(self, stage: str, key: str) -> Any:
+        """
+        Charge la sortie d'une étape (copie en mémoire, modifiable)
+
+        Args:
+            stage (str): Nom de l'étape
+            key (str): Clé de l'étape
+
+        Returns:
+            Any: Sortie de l'étape
+        """
+        return load_artifact(self._path(stage, key), mmap_mode=None, use_cache=False)
+
+    def save(self, stage: str, key: str, value: Any) -> None:
+        """
+        Enregistre la sortie d'une étape et supprime les anciennes versions de cette étape
+
+        Args:
+            stage (str): Nom de l'étape
+            key (str): Clé de l'étape
+            value (Any): Sortie à stocker
+        """
+        stage_dir = os.path.join(self.cache_dir, stage)
+        os.makedirs(stage_dir, exist_ok=True)
+        save_artifact(value, self._path(stage, key))
+
+        # Une seule version par étape : le cache ne grossit pas à chaque changement de paramètres
+        for name in os.listdir(stage_dir):
+            if name != f"{key}.pkl" and name.endswith('.pkl'):
+                os.remove(os.path.join(stage_dir, name))
+
+    def clear(self) -> None:
+        """Supprime toutes les sorties en cache"""
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def write_run_state(self, config: Dict[str, Any], stages: Dict[str, Any], status: str) -> None:
+        """
+        Enregistre la configuration et l'avancement du dernier run (pour --resume)
+
+        Args:
+            config (Dict[str, Any]): Configuration du run (données, paramètres)
+            stages (Dict[str, Any]): État de chaque étape (clé, statut, temps)
+            status (str): Statut global du run
+        """
+        state = {
+            'updated_at': datetime.now().isoformat(),
+            'status': status,
+            'config': config,
+            'stages': stages
+        }
+        path = os.path.join(self.cache_dir, RUN_STATE_NAME)
+        tmp_path = f"{path}.tmp.{os.getpid()}"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f, indent=2, ensure_ascii=False, default=str)
+        os.replace(tmp_path, path)
+
+    def read_run_state(self) -> Optional[Dict[str, Any]]:
+        """Retourne l'état du dernier run, ou None s'il n'y en a pas"""
+        path = os.path.join(self.cache_dir, RUN_STATE_NAME)
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
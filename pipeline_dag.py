@@ -0,0 +1,124 @@
+"""
+Module d'exécution en graphe (DAG) des étapes du pipeline PCA
+Chaque étape déclare les étapes dont elle dépend ; les étapes prêtes sont
+lancées en parallèle sur un pool de threads. L'échec d'une étape annule
+ses dépendantes (statut 'skipped') sans interrompre les étapes
+indépendantes déjà en cours, puis l'erreur d'origine est relevée.
+Auteur: Assistant IA
+Date: 2025-07-26
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+
+class StageFailedError(RuntimeError):
+    """Erreur levée quand une ou plusieurs étapes du graphe ont échoué"""
+
+    def __init__(self, failures: Dict[str, BaseException]):
+        self.failures = failures
+        names = ', '.join(failures)
+        super().__init__(f"Étape(s) en échec: {names} ({next(iter(failures.values()))})")
+
+
+class StageGraph:
+    """
+    Graphe d'étapes avec dépendances déclarées
+    """
+
+    def __init__(self):
+        """Initialise un graphe vide"""
+        self._stages: Dict[str, Callable[[], Any]] = {}
+        self._deps: Dict[str, List[str]] = {}
+        self.status: Dict[str, str] = {}
+        self.timings: Dict[str, float] = {}
+
+    def add(self, name: str, func: Callable[[], Any], deps: Sequence[str] = ()) -> None:
+        """
+        Ajoute une étape
+
+        Args:
+            name (str): Nom unique de l'étape
+            func (Callable): Fonction sans argument qui exécute l'étape
+            deps (Sequence[str]): Étapes qui doivent réussir avant celle-ci
+        """
+        if name in self._stages:
+            raise ValueError(f"Étape déjà déclarée: {name}")
+        self._stages[name] = func
+        self._deps[name] = list(deps)
+
+    def _check(self) -> List[str]:
+        """Vérifie les dépendances et retourne un ordre topologique (ordre de déclaration conservé)"""
+        for name, deps in self._deps.items():
+            for dep in deps:
+                if dep not in self._stages:
+                    raise ValueError(f"Étape '{name}' : dépendance inconnue '{dep}'")
+
+        order, done = [], set()
+        while len(order) < len(self._stages):
+            ready = [n for n in self._stages if n not in done and all(d in done for d in self._deps[n])]
+            if not ready:
+                cycle = [n for n in self._stages if n not in done]
+                raise ValueError(f"Cycle de dépendances entre: {cycle}")
+            order.extend(ready)
+            done.update(ready)
+        return order
+
+    def run(self, max_workers: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Exécute le graphe
+
+        Args:
+            max_workers (int): Nombre maximal d'étapes simultanées (défaut: nombre d'étapes)
+
+        Returns:
+            Dict[str, Any]: Sortie de chaque étape
+
+        Raises:
+            StageFailedError: Si au moins une étape a échoué (après la fin des étapes en cours)
+        """
+        order = self._check()
+        outputs: Dict[str, Any] = {}
+        failures: Dict[str, BaseException] = {}
+        self.status = {name: 'pending' for name in order}
+
+        def timed(name):
+            start = time.perf_counter()
+            try:
+                return self._stages[name]()
+            finally:
+                self.timings[name] = time.perf_counter() - start
+
+        with ThreadPoolExecutor(max_workers=max_workers or len(order) or 1,
+                                thread_name_prefix='pca-stage') as pool:
+            running = {}
+            while True:
+                # Étapes dont une dépendance a échoué ou été annulée
+                for name in order:
+                    if self.status[name] == 'pending' and any(
+                            self.status[d] in ('failed', 'skipped') for d in self._deps[name]):
+                        self.status[name] = 'skipped'
+
+                for name in order:
+                    if self.status[name] == 'pending' and all(
+                            self.status[d] == 'done' for d in self._deps[name]):
+                        self.status[name] = 'running'
+                        running[pool.submit(timed, name)] = name
+
+                if not running:
+                    break
+
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name = running.pop(future)
+                    try:
+                        outputs[name] = future.result()
+                        self.status[name] = 'done'
+                    except Exception as e:
+                        failures[name] = e
+                        self.status[name] = 'failed'
+
+        if failures:
+            raise StageFailedError(failures)
+        return outputs
@@ -10,13 +10,25 @@ import numpy as np
 import joblib
 import os
 import json
+import threading
+import time
 from typing import Dict, List, Tuple, Union, Optional
 from preprocessing import TextPreprocessor
+from model_storage import load_artifact
+from model_bundle import ModelBundle, REDUCER_FILE, COMPONENT_ENCODER_FILE
+from dtc_router import DTCRouter, ROUTER_FILE, ROUTES_DIR, route_directory
+from forest_outputs import full_probabilities
+from shadow_scoring import ShadowScorer
+from distilbert_inference import (load_quantized_model, default_quantized_dir, read_length_cap,
+                                  logits_runner, batch_logits, TokenCache, DEFAULT_MAX_LENGTH,
+                                  DEFAULT_TOKEN_CACHE_SIZE)
+from onnx_backend import (ONNXRUNTIME_AVAILABLE, ONNX_MODEL_FILE, create_session, onnx_logits,
+                          softmax, default_onnx_dir)
 
 # Import conditionnel pour transformers
 try:
     from transformers import (
-        DistilBertTokenizer,
+        DistilBertTokenizerFast,
         DistilBertForSequenceClassification,
         pipeline
     )
@@ -32,47 +44,295 @@ class PCAPredictor:
     Support pour RandomForest (local) et DistilBERT (local ou Hugging Face)
     """
 
+    # Attributs remplacés ensemble lors d'un (re)chargement
+    COMPONENT_NAMES = {
+        'randomforest': ('model', 'vectorizer', 'reducer', 'label_encoder', 'component_encoder',
+                         'model_version'),
+        'distilbert': ('tokenizer', 'distilbert_model', 'label_mapping', 'max_length', 'token_cache',
+                       'model_version'),
+        'onnx': ('tokenizer', 'onnx_session', 'label_mapping', 'max_length', 'token_cache', 'model_version'),
+        'routed': ('router', 'route_components', 'model_version')
+    }
+
+    # Exemple de contrôle joué sur un modèle candidat avant de l'activer
+    SMOKE_EXAMPLE = {
+        'code_dtc': 'P0300',
+        'description': 'Engine misfiring randomly',
+        'root_cause': 'Faulty spark plugs'
+    }
+
     def __init__(self, backend: str = "randomforest", model_dir: str = 'models',
-                 checkpoint_dir: str = 'distilbert_pca_model', hf_repo: Optional[str] = None):
+                 checkpoint_dir: str = 'distilbert_pca_model', hf_repo: Optional[str] = None,
+                 mmap_mode: Optional[str] = 'r', quantize: bool = False,
+                 quantized_dir: Optional[str] = None, onnx_dir: Optional[str] = None,
+                 onnx_threads: Optional[int] = None, onnx_inter_threads: Optional[int] = None,
+                 onnx_optimization: str = 'all', max_length: Optional[int] = None,
+                 batch_size: int = 32, token_cache_size: int = DEFAULT_TOKEN_CACHE_SIZE):
         """
         Initialise le prédicteur
 
         Args:
-            backend (str): Type de modèle ('randomforest' ou 'distilbert')
-            model_dir (str): Répertoire contenant les modèles RandomForest
+            backend (str): Type de modèle ('randomforest', 'distilbert', 'onnx' ou 'routed')
+            model_dir (str): Répertoire contenant les modèles RandomForest (ou le
+                modèle routé par préfixe DTC : routes.json + routes/)
             checkpoint_dir (str): Répertoire contenant le modèle DistilBERT local
             hf_repo (str): Repository Hugging Face pour DistilBERT (optionnel)
+            mmap_mode (str): Projection mémoire des artefacts RandomForest ('r'),
+                partagée entre processus ; None pour les copier en mémoire
+            quantize (bool): DistilBERT : quantification dynamique INT8 des couches
+                linéaires (inférence CPU), mise en cache sur disque
+            quantized_dir (str): Cache du modèle INT8 (défaut: <checkpoint_dir>_int8)
+            onnx_dir (str): Export ONNX de DistilBERT (défaut: <checkpoint_dir>_onnx)
+            onnx_threads (int): ONNX : threads intra-op (défaut: choix d'ONNX Runtime)
+            onnx_inter_threads (int): ONNX : threads inter-op (défaut: choix d'ONNX Runtime)
+            onnx_optimization (str): ONNX : optimisation du graphe ('disable', 'basic',
+                'extended' ou 'all')
+            max_length (int): DistilBERT/ONNX : longueur maximale en tokens (défaut:
+                inference_config.json du modèle, sinon 512)
+            batch_size (int): DistilBERT/ONNX : taille des lots de predict_batch
+            token_cache_size (int): DistilBERT/ONNX : textes dont les identifiants de
+                tokens sont gardés en cache (0 désactive le cache)
         """
         self.backend = backend.lower()
         self.model_dir = model_dir
         self.checkpoint_dir = checkpoint_dir
         self.hf_repo = hf_repo
+        self.mmap_mode = mmap_mode
+        self.quantize = quantize
+        self.quantized_dir = quantized_dir or default_quantized_dir(checkpoint_dir)
+        self.onnx_dir = onnx_dir or default_onnx_dir(checkpoint_dir)
+        self.onnx_session_options = {'intra_op_threads': onnx_threads,
+                                     'inter_op_threads': onnx_inter_threads,
+                                     'graph_optimization': onnx_optimization}
+        self.max_length_override = max_length
+        self.batch_size = batch_size
+        self.token_cache_size = token_cache_size
 
         # Modèles RandomForest
         self.model = None
         self.vectorizer = None
+        self.reducer = None  # Réduction de dimension optionnelle (reducer.pkl du bundle)
         self.label_encoder = None
+        self.component_encoder = None  # Forêt multi-tâches : seconde sortie (composant)
+
+        # Modèle routé : routeur DTC et composants RandomForest de chaque route
+        self.router = None
+        self.route_components = None
 
         # Modèles DistilBERT
         self.tokenizer = None
         self.distilbert_model = None
         self.label_mapping = None
+        self.onnx_session = None  # Backend ONNX : même tokenizer / mapping, graphe ONNX Runtime
+        self.max_length = None  # Plafond de longueur en tokens du modèle chargé
+        self.token_cache = None  # Identifiants de tokens par texte, recréé à chaque chargement
+
+        # Version du modèle chargé (manifest du bundle), None pour un modèle non versionné
+        self.model_version = None
 
         self.preprocessor = TextPreprocessor()
         self.is_loaded = False
+
+        # Rechargement à chaud
+        self._swap_lock = threading.RLock()
+        self._reload_lock = threading.Lock()
+        self._loaded_signature = None
+        self._previous_components = None
+        self._previous_signature = None
+        self._rejected_signatures = set()
+        self._watch_thread = None
+        self._watch_stop = threading.Event()
+        self.last_reload_error = None
+
+        # Scoring fantôme d'un modèle candidat (voir enable_shadow)
+        self.shadow = None
     
     def load_model(self) -> None:
         """
         Charge le modèle selon le backend choisi
         """
+        signature = self._source_signature()
+        self._activate(self._read_components())
+        self._loaded_signature = signature
+
+    def _read_components(self) -> Dict:
+        """
+        Lit et valide les composants du backend sans modifier le modèle actif
+
+        Returns:
+            Dict: Composants chargés (modèles, encodeurs, version)
+        """
         if self.backend == "randomforest":
-            self._load_randomforest_model()
+            return self._load_randomforest_model()
         elif self.backend == "distilbert":
-            self._load_distilbert_model()
+            return self._load_distilbert_model()
+        elif self.backend == "onnx":
+            return self._load_onnx_model()
+        elif self.backend == "routed":
+            return self._load_routed_model()
         else:
             raise ValueError(f"Backend non supporté: {self.backend}")
 
-    def _load_randomforest_model(self) -> None:
+    def _activate(self, components: Dict) -> None:
+        """
+        Remplace atomiquement les composants actifs
+
+        Les prédictions en cours gardent leur instantané (_components) et
+        terminent sur l'ancien modèle.
+
+        Args:
+            components (Dict): Composants retournés par _read_components
+        """
+        with self._swap_lock:
+            for name, value in components.items():
+                setattr(self, name, value)
+            self.is_loaded = True
+
+    def _components(self) -> Dict:
+        """
+        Instantané cohérent des composants actifs
+
+        Returns:
+            Dict: Composants du modèle actif
+        """
+        with self._swap_lock:
+            return {name: getattr(self, name) for name in self.COMPONENT_NAMES[self.backend]}
+
+    def _source_signature(self) -> Optional[str]:
+        """
+        Identifie la version présente sur disque sans charger les artefacts
+
+        Returns:
+            Optional[str]: Version du manifest, dates de modification pour un
+                modèle non versionné, None si rien à surveiller (ex: Hugging Face)
+        """
+        source_dir = {'distilbert': self.checkpoint_dir, 'onnx': self.onnx_dir}.get(self.backend, self.model_dir)
+        if not os.path.isdir(source_dir):
+            return None
+
+        router_path = os.path.join(source_dir, ROUTER_FILE)
+        if self.backend == "routed" and os.path.exists(router_path):
+            with open(router_path, 'r', encoding='utf-8') as f:
+                return json.load(f)['version']
+
+        if ModelBundle.exists(source_dir):
+            return ModelBundle.open(source_dir).version
+
+        files = sorted(os.listdir(source_dir))
+        stats = [(name, os.stat(os.path.join(source_dir, name))) for name in files]
+        return ';'.join(f"{name}:{st.st_mtime_ns}:{st.st_size}" for name, st in stats)
+
+    def reload_model(self, smoke_example: Optional[Dict] = None) -> bool:
+        """
+        Recharge le modèle depuis le disque sans interrompre les prédictions
+
+        Le nouveau modèle est chargé et validé (fichiers du bundle présents et de
+        la bonne taille + prédiction de contrôle) à côté du modèle actif, puis
+        activé atomiquement. En cas d'échec, le modèle actif est conservé.
+
+        Args:
+            smoke_example (Dict): Exemple de contrôle (défaut: SMOKE_EXAMPLE)
+
+        Returns:
+            bool: True si le nouveau modèle a été activé
+        """
+        with self._reload_lock:
+            signature = self._source_signature()
+            try:
+                candidate = self._read_components()
+                check = self._predict_with(candidate, **(smoke_example or self.SMOKE_EXAMPLE),
+                                           return_probabilities=True)
+                if 'error' in check:
+                    raise RuntimeError(f"Prédiction de contrôle en échec: {check['error']}")
+            except Exception as e:
+                self.last_reload_error = str(e)
+                print(f"⚠️ Rechargement refusé, version {self.model_version} conservée: {e}")
+                return False
+
+            with self._swap_lock:
+                if self.is_loaded:
+                    self._previous_components = self._components()
+                    self._previous_signature = self._loaded_signature
+                self._activate(candidate)
+                self._loaded_signature = signature
+
+            self.last_reload_error = None
+            print(f"🔄 Modèle rechargé: version {candidate['model_version']}")
+            return True
+
+    def rollback(self) -> bool:
+        """
+        Réactive le modèle précédent (après un rechargement)
+
+        La version écartée n'est plus rechargée automatiquement ; une version
+        plus récente sur disque le sera.
+
+        Returns:
+            bool: True si un modèle précédent était disponible
+        """
+        with self._swap_lock:
+            if self._previous_components is None:
+                return False
+
+            current, current_signature = self._components(), self._loaded_signature
+            self._activate(self._previous_components)
+            self._loaded_signature = self._previous_signature
+            self._previous_components, self._previous_signature = current, current_signature
+            self._rejected_signatures.add(current_signature)
+
+        print(f"↩️ Retour à la version {self.model_version}")
+        return True
+
+    def check_for_update(self) -> bool:
+        """
+        Recharge le modèle si une nouvelle version est disponible sur disque
+
+        Returns:
+            bool: True si une nouvelle version a été activée
+        """
+        signature = self._source_signature()
+        if signature is None or signature == self._loaded_signature or signature in self._rejected_signatures:
+            return False
+
+        if self.reload_model():
+            return True
+
+        # Version invalide : pas de nouvel essai tant qu'elle ne change pas
+        self._rejected_signatures.add(signature)
+        return False
+
+    def start_watching(self, poll_interval: float = 30.0) -> None:
+        """
+        Surveille le répertoire du modèle dans un thread d'arrière-plan
+
+        Args:
+            poll_interval (float): Intervalle entre deux vérifications (secondes)
+        """
+        if self._watch_thread is not None and self._watch_thread.is_alive():
+            return
+
+        if not self.is_loaded:
+            self.load_model()
+
+        def watch():
+            while not self._watch_stop.wait(poll_interval):
+                try:
+                    self.check_for_update()
+                except Exception as e:
+                    self.last_reload_error = str(e)
+
+        self._watch_stop.clear()
+        self._watch_thread = threading.Thread(target=watch, name='pca-model-watcher', daemon=True)
+        self._watch_thread.start()
+
+    def stop_watching(self) -> None:
+        """Arrête la surveillance du répertoire du modèle"""
+        self._watch_stop.set()
+        if self._watch_thread is not None:
+            self._watch_thread.join()
+            self._watch_thread = None
+
+    def _load_randomforest_model(self) -> Dict:
         """Charge le modèle RandomForest"""
         model_path = os.path.join(self.model_dir, 'model.pkl')
         vectorizer_path = os.path.join(self.model_dir, 'vectorizer.pkl')
@@ -92,67 +352,193 @@ class PCAPredictor:
                 f"Veuillez d'abord entraîner le modèle avec train_model.py"
             )
         
+        # Vérification rapide du bundle (présence + taille) avant toute désérialisation ;
+        # le hash complet est vérifié à la sauvegarde et par model_bundle.py --action validate
+        model_version = None
+        reducer = None
+        component_encoder = None
+        if ModelBundle.exists(self.model_dir):
+            bundle = ModelBundle.open(self.model_dir, mmap_mode=self.mmap_mode)
+            bundle.validate(check_hashes=False)
+            model_version = bundle.version
+            if REDUCER_FILE in bundle.manifest['files']:
+                reducer = bundle.load(REDUCER_FILE)
+            if COMPONENT_ENCODER_FILE in bundle.manifest['files']:
+                component_encoder = bundle.load(COMPONENT_ENCODER_FILE)
+        else:
+            print(f"⚠️ Aucun manifest dans {self.model_dir}: modèle non versionné")
+
         # Chargement des composants
         try:
-            self.model = joblib.load(model_path)
-            self.vectorizer = joblib.load(vectorizer_path)
-            self.label_encoder = joblib.load(label_encoder_path)
-            self.is_loaded = True
-            print(f"Modèle chargé avec succès depuis {self.model_dir}")
-            print(f"Classes disponibles: {list(self.label_encoder.classes_)}")
+            components = {
+                'model': load_artifact(model_path, mmap_mode=self.mmap_mode),
+                'vectorizer': load_artifact(vectorizer_path, mmap_mode=self.mmap_mode),
+                'reducer': reducer,
+                'label_encoder': load_artifact(label_encoder_path, mmap_mode=self.mmap_mode),
+                'component_encoder': component_encoder,
+                'model_version': model_version
+            }
+            print(f"Modèle chargé avec succès depuis {self.model_dir} (version {model_version})")
+            print(f"Classes disponibles: {list(components['label_encoder'].classes_)}")
+            return components
         except Exception as e:
             raise RuntimeError(f"Erreur lors du chargement du modèle: {e}")
 
-    def _load_distilbert_model(self) -> None:
+    def _load_routed_model(self) -> Dict:
+        """Charge le routeur DTC et le bundle RandomForest de chaque route"""
+        router_path = os.path.join(self.model_dir, ROUTER_FILE)
+        if not os.path.exists(router_path):
+            raise FileNotFoundError(
+                f"{ROUTER_FILE} manquant dans {self.model_dir}\n"
+                f"Veuillez d'abord entraîner le modèle routé avec routed_model.py"
+            )
+        with open(router_path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+
+        route_components = {}
+        for route in state['routes']:
+            bundle = ModelBundle.open(os.path.join(self.model_dir, ROUTES_DIR, route_directory(route)),
+                                      mmap_mode=self.mmap_mode)
+            bundle.validate(check_hashes=False)
+            route_components[route] = {
+                'model': bundle.model,
+                'vectorizer': bundle.vectorizer,
+                'reducer': bundle.load(REDUCER_FILE) if REDUCER_FILE in bundle.manifest['files'] else None,
+                'label_encoder': bundle.label_encoder,
+                'component_encoder': None,
+                'model_version': bundle.version
+            }
+
+        print(f"Modèle routé chargé depuis {self.model_dir} (version {state['version']}, "
+              f"{len(route_components)} routes)")
+        return {
+            'router': DTCRouter(state['routes'], state['route_depth']),
+            'route_components': route_components,
+            'model_version': state['version']
+        }
+
+    def _load_distilbert_model(self) -> Dict:
         """Charge le modèle DistilBERT"""
         if not TRANSFORMERS_AVAILABLE:
             raise ImportError("Transformers non disponible. Installez avec: pip install transformers torch")
 
+        model_version = None
+
         try:
             # Essayer d'abord le modèle local
             if os.path.exists(self.checkpoint_dir):
                 print(f"Chargement du modèle DistilBERT local depuis {self.checkpoint_dir}")
-                self.tokenizer = DistilBertTokenizer.from_pretrained(self.checkpoint_dir)
-                self.distilbert_model = DistilBertForSequenceClassification.from_pretrained(self.checkpoint_dir)
+                if ModelBundle.exists(self.checkpoint_dir):
+                    bundle = ModelBundle.open(self.checkpoint_dir)
+                    bundle.validate(check_hashes=False)
+                    model_version = bundle.version
+                tokenizer = DistilBertTokenizerFast.from_pretrained(self.checkpoint_dir)
+                distilbert_model = self._load_distilbert_weights(self.checkpoint_dir,
+                                                                 self._source_signature())
 
                 # Charger le mapping des labels
                 label_mapping_path = os.path.join(self.checkpoint_dir, 'label_mapping.json')
                 if os.path.exists(label_mapping_path):
                     with open(label_mapping_path, 'r', encoding='utf-8') as f:
-                        self.label_mapping = json.load(f)
+                        label_mapping = json.load(f)
                 else:
                     raise FileNotFoundError(f"Fichier label_mapping.json manquant dans {self.checkpoint_dir}")
 
             # Sinon essayer Hugging Face Hub
             elif self.hf_repo:
                 print(f"Chargement du modèle DistilBERT depuis Hugging Face: {self.hf_repo}")
-                self.tokenizer = DistilBertTokenizer.from_pretrained(self.hf_repo)
-                self.distilbert_model = DistilBertForSequenceClassification.from_pretrained(self.hf_repo)
+                tokenizer = DistilBertTokenizerFast.from_pretrained(self.hf_repo)
+                distilbert_model = self._load_distilbert_weights(self.hf_repo, f"hf:{self.hf_repo}")
 
                 # Essayer de récupérer le label mapping depuis le repo
                 try:
                     import requests
                     response = requests.get(f"https://huggingface.co/{self.hf_repo}/raw/main/label_mapping.json")
                     if response.status_code == 200:
-                        self.label_mapping = response.json()
+                        label_mapping = response.json()
                     else:
                         raise Exception("Label mapping non trouvé sur HF Hub")
                 except:
                     # Fallback avec mapping par défaut
                     print("⚠️ Utilisation du mapping de labels par défaut")
-                    self.label_mapping = self._get_default_label_mapping()
+                    label_mapping = self._get_default_label_mapping()
 
             else:
                 raise FileNotFoundError(f"Modèle DistilBERT non trouvé dans {self.checkpoint_dir} et aucun repo HF spécifié")
 
-            self.distilbert_model.eval()
-            self.is_loaded = True
-            print(f"Modèle DistilBERT chargé avec succès")
-            print(f"Classes disponibles: {len(self.label_mapping)} classes")
+            distilbert_model.eval()
+            print(f"Modèle DistilBERT{' INT8' if self.quantize else ''} chargé avec succès")
+            print(f"Classes disponibles: {len(label_mapping)} classes")
+
+            local_cap = read_length_cap(self.checkpoint_dir) if os.path.exists(self.checkpoint_dir) else None
+            max_length = self.max_length_override or local_cap or DEFAULT_MAX_LENGTH
+            return {
+                'tokenizer': tokenizer,
+                'distilbert_model': distilbert_model,
+                'label_mapping': label_mapping,
+                'max_length': max_length,
+                'token_cache': TokenCache(tokenizer, max_length, self.token_cache_size),
+                'model_version': model_version
+            }
 
         except Exception as e:
             raise RuntimeError(f"Erreur lors du chargement du modèle DistilBERT: {e}")
 
+    def _load_distilbert_weights(self, source: str, source_signature: Optional[str]):
+        """
+        Charge DistilBERT en pleine précision, ou sa version INT8 (cache disque)
+
+        Args:
+            source (str): Checkpoint local ou repo Hugging Face
+            source_signature (str): Version de la source, invalide le cache INT8
+
+        Returns:
+            DistilBertForSequenceClassification: Modèle (quantifié si self.quantize)
+        """
+        def load_float():
+            return DistilBertForSequenceClassification.from_pretrained(source)
+
+        if not self.quantize:
+            return load_float()
+        distilbert_model, cached = load_quantized_model(load_float, self.quantized_dir,
+                                                        source_signature or source)
+        if cached:
+            print(f"Modèle INT8 lu depuis le cache {self.quantized_dir}")
+        return distilbert_model
+
+    def _load_onnx_model(self) -> Dict:
+        """Charge l'export ONNX de DistilBERT (tokenizer + session ONNX Runtime, sans torch)"""
+        if not ONNXRUNTIME_AVAILABLE:
+            raise ImportError("ONNX Runtime non disponible. Installez avec: pip install onnxruntime")
+        from transformers import DistilBertTokenizerFast
+
+        if not os.path.exists(os.path.join(self.onnx_dir, ONNX_MODEL_FILE)):
+            raise FileNotFoundError(f"Export ONNX non trouvé dans {self.onnx_dir} "
+                                    f"(python main.py --action export-onnx)")
+
+        model_version = None
+        if ModelBundle.exists(self.onnx_dir):
+            bundle = ModelBundle.open(self.onnx_dir)
+            bundle.validate(check_hashes=False)
+            model_version = bundle.version
+
+        print(f"Chargement du modèle ONNX depuis {self.onnx_dir}")
+        tokenizer = DistilBertTokenizerFast.from_pretrained(self.onnx_dir)
+        with open(os.path.join(self.onnx_dir, 'label_mapping.json'), 'r', encoding='utf-8') as f:
+            label_mapping = json.load(f)
+        onnx_session = create_session(self.onnx_dir, **self.onnx_session_options)
+        print(f"Modèle ONNX chargé avec succès ({len(label_mapping)} classes)")
+
+        max_length = self.max_length_override or read_length_cap(self.onnx_dir) or DEFAULT_MAX_LENGTH
+        return {
+            'tokenizer': tokenizer,
+            'onnx_session': onnx_session,
+            'label_mapping': label_mapping,
+            'max_length': max_length,
+            'token_cache': TokenCache(tokenizer, max_length, self.token_cache_size),
+            'model_version': model_version
+        }
+
     def _get_default_label_mapping(self) -> Dict:
         """Retourne un mapping de labels par défaut"""
         return {
@@ -204,16 +590,91 @@ class PCAPredictor:
         if not self.is_loaded:
             self.load_model()
 
+        start = time.perf_counter()
+        result = self._predict_with(self._components(), code_dtc, description, root_cause,
+                                    return_probabilities)
+
+        # Rejeu éventuel sur le modèle candidat, hors du chemin de la requête
+        if self.shadow is not None and 'error' not in result:
+            self.shadow.submit(
+                {'code_dtc': code_dtc, 'description': description, 'root_cause': root_cause},
+                result, time.perf_counter() - start
+            )
+
+        return result
+
+    def enable_shadow(self, shadow_predictor: 'PCAPredictor', sample_rate: float = 0.1,
+                      queue_size: int = 100,
+                      metrics_path: str = 'models/shadow_metrics.jsonl') -> ShadowScorer:
+        """
+        Active le scoring fantôme d'un modèle candidat sur une fraction des requêtes
+
+        Args:
+            shadow_predictor (PCAPredictor): Prédicteur candidat (ex: DistilBERT, forêt réentraînée)
+            sample_rate (float): Fraction des requêtes rejouées
+            queue_size (int): Taille de la file ; les requêtes en surplus sont abandonnées
+            metrics_path (str): Fichier JSONL des métriques (résumé écrit à côté)
+
+        Returns:
+            ShadowScorer: Scoring fantôme actif
+        """
+        self.disable_shadow()
+        self.shadow = ShadowScorer(shadow_predictor, sample_rate=sample_rate,
+                                   queue_size=queue_size, metrics_path=metrics_path)
+        return self.shadow
+
+    def disable_shadow(self, drain: bool = True) -> Optional[Dict]:
+        """
+        Désactive le scoring fantôme et retourne son résumé final
+
+        Args:
+            drain (bool): Si True, traite les requêtes encore en file
+
+        Returns:
+            Optional[Dict]: Résumé final, None si le scoring fantôme n'était pas actif
+        """
+        shadow, self.shadow = self.shadow, None
+        return shadow.close(drain=drain) if shadow is not None else None
+
+    def _predict_with(self, components: Dict, code_dtc: str, description: str,
+                      root_cause: str = "", return_probabilities: bool = True) -> Dict:
+        """
+        Prédiction avec un jeu de composants donné (actif ou candidat au rechargement)
+
+        Args:
+            components (Dict): Composants du modèle (voir _components)
+            code_dtc (str): Code DTC
+            description (str): Description du problème
+            root_cause (str): Description de la cause racine (optionnel)
+            return_probabilities (bool): Si True, retourne les probabilités
+
+        Returns:
+            Dict: Résultat de la prédiction
+        """
         if self.backend == "randomforest":
-            return self._predict_single_randomforest(code_dtc, description, root_cause, return_probabilities)
+            return self._predict_single_randomforest(code_dtc, description, root_cause,
+                                                     return_probabilities, components)
         elif self.backend == "distilbert":
-            return self._predict_single_distilbert(code_dtc, description, root_cause, return_probabilities)
+            return self._predict_single_distilbert(code_dtc, description, root_cause,
+                                                   return_probabilities, components)
+        elif self.backend == "onnx":
+            return self._predict_single_onnx(code_dtc, description, root_cause,
+                                             return_probabilities, components)
+        elif self.backend == "routed":
+            return self._predict_single_routed(code_dtc, description, root_cause,
+                                               return_probabilities, components)
         else:
             return {'error': f'Backend non supporté: {self.backend}'}
 
     def _predict_single_randomforest(self, code_dtc: str, description: str,
-                                   root_cause: str = "", return_probabilities: bool = True) -> Dict:
+                                   root_cause: str = "", return_probabilities: bool = True,
+                                   components: Optional[Dict] = None) -> Dict:
         """Prédiction avec RandomForest"""
+        components = components or self._components()
+        model = components['model']
+        vectorizer = components['vectorizer']
+        label_encoder = components['label_encoder']
+
         # Préprocessing de l'entrée
         processed_text = self.preprocess_input(code_dtc, description, root_cause)
 
@@ -224,11 +685,22 @@ class PCAPredictor:
             }
 
         # Vectorisation
-        text_tfidf = self.vectorizer.transform([processed_text])
+        text_tfidf = vectorizer.transform([processed_text])
+        if components['reducer'] is not None:
+            text_tfidf = components['reducer'].transform(text_tfidf)
 
-        # Prédiction
-        prediction_encoded = self.model.predict(text_tfidf)[0]
-        predicted_pca = self.label_encoder.inverse_transform([prediction_encoded])[0]
+        # Prédiction (forêt multi-tâches : PCA et composant dans la même passe)
+        component_encoder = components.get('component_encoder')
+        if component_encoder is not None:
+            pca_proba, component_proba = (
+                full_probabilities(classes, proba, len(encoder.classes_))[0]
+                for classes, proba, encoder in zip(model.classes_, model.predict_proba(text_tfidf),
+                                                   (label_encoder, component_encoder))
+            )
+            prediction_encoded = int(np.argmax(pca_proba))
+        else:
+            prediction_encoded = model.predict(text_tfidf)[0]
+        predicted_pca = label_encoder.inverse_transform([prediction_encoded])[0]
         
         result = {
             'input': {
@@ -239,13 +711,22 @@ class PCAPredictor:
             'processed_text': processed_text,
             'predicted_pca': predicted_pca,
             'confidence': None,
-            'all_probabilities': None
+            'all_probabilities': None,
+            'model_version': components['model_version']
         }
         
+        if component_encoder is not None:
+            component_encoded = int(np.argmax(component_proba))
+            result['predicted_component'] = component_encoder.inverse_transform([component_encoded])[0]
+            result['component_confidence'] = float(component_proba[component_encoded])
+        
         # Ajout des probabilités si demandé
         if return_probabilities:
-            probabilities = self.model.predict_proba(text_tfidf)[0]
-            classes = self.label_encoder.classes_
+            if component_encoder is not None:
+                probabilities = pca_proba
+            else:
+                probabilities = model.predict_proba(text_tfidf)[0]
+            classes = label_encoder.classes_
             
             # Probabilité de la classe prédite
             result['confidence'] = float(probabilities[prediction_encoded])
@@ -262,9 +743,29 @@ class PCAPredictor:
         
         return result
 
+    def _predict_single_routed(self, code_dtc: str, description: str,
+                               root_cause: str = "", return_probabilities: bool = True,
+                               components: Optional[Dict] = None) -> Dict:
+        """Prédiction avec le seul modèle de la route du code DTC"""
+        components = components or self._components()
+        route = components['router'].route(code_dtc)
+        route_components = components['route_components'][route]
+
+        result = self._predict_single_randomforest(code_dtc, description, root_cause,
+                                                   return_probabilities, route_components)
+        result['route'] = route
+        result['route_version'] = route_components['model_version']
+        result['model_version'] = components['model_version']
+        return result
+
     def _predict_single_distilbert(self, code_dtc: str, description: str,
-                                 root_cause: str = "", return_probabilities: bool = True) -> Dict:
+                                 root_cause: str = "", return_probabilities: bool = True,
+                                 components: Optional[Dict] = None) -> Dict:
         """Prédiction avec DistilBERT"""
+        components = components or self._components()
+        distilbert_model = components['distilbert_model']
+        label_mapping = components['label_mapping']
+
         # Préprocessing de l'entrée
         processed_text = self.preprocess_input(code_dtc, description, root_cause)
 
@@ -275,57 +776,95 @@ class PCAPredictor:
             }
 
         try:
-            # Tokenisation
-            inputs = self.tokenizer(
-                processed_text,
-                return_tensors="pt",
-                truncation=True,
-                padding=True,
-                max_length=512
-            )
+            # Tokenisation (identifiants en cache pour les textes déjà vus)
+            input_ids = torch.tensor(components['token_cache'].encode([processed_text]))
 
             # Prédiction
             with torch.no_grad():
-                outputs = self.distilbert_model(**inputs)
-                logits = outputs.logits
-                probabilities = torch.nn.functional.softmax(logits, dim=-1)
-                predicted_class_id = torch.argmax(logits, dim=-1).item()
-
-            # Récupération du label prédit
-            predicted_pca = self.label_mapping.get(str(predicted_class_id), f"Classe_{predicted_class_id}")
-
-            result = {
-                'input': {
-                    'code_dtc': code_dtc,
-                    'description': description,
-                    'root_cause': root_cause
-                },
-                'processed_text': processed_text,
-                'predicted_pca': predicted_pca,
-                'confidence': float(probabilities[0][predicted_class_id]),
-                'all_probabilities': None
+                logits = distilbert_model(input_ids=input_ids,
+                                          attention_mask=torch.ones_like(input_ids)).logits
+                probabilities = torch.nn.functional.softmax(logits, dim=-1)[0].numpy()
+
+            return self._transformer_result(code_dtc, description, root_cause, processed_text,
+                                            probabilities, label_mapping, components['model_version'],
+                                            return_probabilities)
+
+        except Exception as e:
+            return {
+                'error': f'Erreur lors de la prédiction DistilBERT: {str(e)}',
+                'processed_text': processed_text
             }
 
-            # Ajout des probabilités si demandé
-            if return_probabilities:
-                prob_dict = {}
-                for i, prob in enumerate(probabilities[0]):
-                    label = self.label_mapping.get(str(i), f"Classe_{i}")
-                    prob_dict[label] = float(prob)
+    def _predict_single_onnx(self, code_dtc: str, description: str,
+                             root_cause: str = "", return_probabilities: bool = True,
+                             components: Optional[Dict] = None) -> Dict:
+        """Prédiction avec l'export ONNX de DistilBERT"""
+        components = components or self._components()
 
-                # Tri par probabilité décroissante
-                result['all_probabilities'] = dict(
-                    sorted(prob_dict.items(), key=lambda x: x[1], reverse=True)
-                )
+        processed_text = self.preprocess_input(code_dtc, description, root_cause)
+        if not processed_text.strip():
+            return {
+                'error': 'Texte vide après préprocessing',
+                'processed_text': processed_text
+            }
 
-            return result
+        try:
+            input_ids = np.array(components['token_cache'].encode([processed_text]), dtype=np.int64)
+            inputs = {'input_ids': input_ids, 'attention_mask': np.ones_like(input_ids)}
+            probabilities = softmax(onnx_logits(components['onnx_session'], inputs))[0]
+            return self._transformer_result(code_dtc, description, root_cause, processed_text,
+                                            probabilities, components['label_mapping'],
+                                            components['model_version'], return_probabilities)
 
         except Exception as e:
             return {
-                'error': f'Erreur lors de la prédiction DistilBERT: {str(e)}',
+                'error': f'Erreur lors de la prédiction ONNX: {str(e)}',
                 'processed_text': processed_text
             }
 
+    def _transformer_result(self, code_dtc: str, description: str, root_cause: str,
+                            processed_text: str, probabilities: np.ndarray, label_mapping: Dict,
+                            model_version: Optional[str], return_probabilities: bool) -> Dict:
+        """
+        Construit le résultat d'une prédiction DistilBERT (PyTorch ou ONNX)
+
+        Args:
+            probabilities (np.ndarray): Probabilités par identifiant de classe
+            label_mapping (Dict): Identifiant (str) -> PCA
+
+        Returns:
+            Dict: Résultat de la prédiction
+        """
+        predicted_class_id = int(np.argmax(probabilities))
+        predicted_pca = label_mapping.get(str(predicted_class_id), f"Classe_{predicted_class_id}")
+
+        result = {
+            'input': {
+                'code_dtc': code_dtc,
+                'description': description,
+                'root_cause': root_cause
+            },
+            'processed_text': processed_text,
+            'predicted_pca': predicted_pca,
+            'confidence': float(probabilities[predicted_class_id]),
+            'all_probabilities': None,
+            'model_version': model_version
+        }
+
+        # Ajout des probabilités si demandé
+        if return_probabilities:
+            prob_dict = {}
+            for i, prob in enumerate(probabilities):
+                label = label_mapping.get(str(i), f"Classe_{i}")
+                prob_dict[label] = float(prob)
+
+            # Tri par probabilité décroissante
+            result['all_probabilities'] = dict(
+                sorted(prob_dict.items(), key=lambda x: x[1], reverse=True)
+            )
+
+        return result
+
     def predict_batch(self, examples: List[Dict], return_probabilities: bool = False) -> List[Dict]:
         """
         Fait des prédictions sur plusieurs exemples
@@ -340,6 +879,9 @@ class PCAPredictor:
         if not self.is_loaded:
             self.load_model()
         
+        if self.backend in ("distilbert", "onnx"):
+            return self._predict_batch_transformer(examples, return_probabilities)
+        
         results = []
         for example in examples:
             try:
@@ -358,6 +900,56 @@ class PCAPredictor:
         
         return results
     
+    def _predict_batch_transformer(self, examples: List[Dict], return_probabilities: bool = False) -> List[Dict]:
+        """
+        Prédictions DistilBERT (PyTorch ou ONNX) par lots triés par longueur
+
+        Chaque lot n'est paddé qu'à sa plus longue séquence ; les résultats
+        sont rendus dans l'ordre des exemples. Avec le scoring fantôme actif,
+        chaque exemple est proposé au candidat avec la latence du lot répartie
+        entre ses exemples.
+
+        Args:
+            examples (List[Dict]): Exemples ('code_dtc', 'description', 'root_cause')
+            return_probabilities (bool): Si True, retourne les probabilités
+
+        Returns:
+            List[Dict]: Résultats dans l'ordre des exemples
+        """
+        components = self._components()
+        inputs = [(example.get('code_dtc', ''), example.get('description', ''), example.get('root_cause', ''))
+                  for example in examples]
+        texts = [self.preprocess_input(*args) for args in inputs]
+
+        results = [None] * len(examples)
+        valid = [i for i, text in enumerate(texts) if text.strip()]
+        for i in set(range(len(examples))) - set(valid):
+            results[i] = {'error': 'Texte vide après préprocessing', 'processed_text': texts[i]}
+
+        start = time.perf_counter()
+        try:
+            logits = batch_logits(components['tokenizer'], logits_runner(components),
+                                  [texts[i] for i in valid], self.batch_size, components['max_length'],
+                                  token_cache=components['token_cache'])
+        except Exception as e:
+            for i in valid:
+                results[i] = {'error': f'Erreur lors de la prédiction par lots: {str(e)}', 'input': examples[i]}
+            return results
+
+        for i, probabilities in zip(valid, softmax(logits) if valid else []):
+            results[i] = self._transformer_result(*inputs[i], texts[i], probabilities,
+                                                  components['label_mapping'], components['model_version'],
+                                                  return_probabilities)
+
+        # Rejeu éventuel sur le modèle candidat, comme pour predict_single
+        shadow = self.shadow
+        if shadow is not None and valid:
+            latency = (time.perf_counter() - start) / len(valid)
+            for i in valid:
+                shadow.submit(dict(zip(('code_dtc', 'description', 'root_cause'), inputs[i])),
+                              results[i], latency)
+        return results
+    
     def get_top_predictions(self, code_dtc: str, description: str, 
                            root_cause: str = "", top_n: int = 3) -> List[Dict]:
         """
@@ -9,6 +9,7 @@ import re
 import string
 from typing import Tuple, List
 import numpy as np
+from profiling import profile_stage
 
 
 class TextPreprocessor:
@@ -25,6 +26,8 @@ class TextPreprocessor:
             'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for',
             'of', 'with', 'by', 'from', 'up', 'about', 'into', 'through', 'during'
         }
+        # StageProfiler optionnel (lecture CSV / nettoyage mesurés séparément)
+        self.profiler = None
     
     def clean_text(self, text: str) -> str:
         """
@@ -121,7 +124,8 @@ class TextPreprocessor:
         """
         # Chargement des données
         print(f"Chargement des données depuis {file_path}...")
-        df = pd.read_csv(file_path)
+        with profile_stage(self.profiler, 'parse'):
+            df = pd.read_csv(file_path)
         
         print(f"Données chargées: {len(df)} lignes, {len(df.columns)} colonnes")
         print(f"Colonnes disponibles: {list(df.columns)}")
@@ -139,7 +143,8 @@ class TextPreprocessor:
         
         # Préprocessing du texte
         print("Préprocessing des colonnes textuelles...")
-        df_processed = self.concatenate_text_columns(df_clean)
+        with profile_stage(self.profiler, 'clean'):
+            df_processed = self.concatenate_text_columns(df_clean)
         
         # Extraction des features et labels
         X = df_processed['texte_concatene']
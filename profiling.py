@@ -0,0 +1,257 @@
+"""
+Module de profilage des étapes d'entraînement pour le projet PCA
+Chaque étape (parsing, nettoyage, TF-IDF, forêt, validation, évaluation...)
+enregistre son temps réel, son temps CPU (tous threads du processus) et le
+pic de mémoire résidente atteint pendant l'étape, par rapport à la mémoire
+au démarrage de l'étape. Sous Linux le pic est remis à zéro au début de
+chaque étape (/proc/self/clear_refs) ; ailleurs seul le dépassement du pic
+global du processus est visible. Un profil détaillé par étape est
+optionnel : échantillonnage avec pyinstrument s'il est installé, sinon
+cProfile.
+Auteur: Assistant IA
+Date: 2025-07-26
+"""
+
+import os
+import re
+import time
+import cProfile
+import threading
+from contextlib import contextmanager, nullcontext
+from typing import Any, Dict, List, Optional
+
+try:
+    import resource
+    RESOURCE_AVAILABLE = True
+except ImportError:  # Windows
+    RESOURCE_AVAILABLE = False
+
+try:
+    from pyinstrument import Profiler as SamplingProfiler
+    PYINSTRUMENT_AVAILABLE = True
+except ImportError:
+    PYINSTRUMENT_AVAILABLE = False
+
+
+_STATUS_PATH = '/proc/self/status'
+_CLEAR_REFS_PATH = '/proc/self/clear_refs'
+
+
+def _read_status_kb(field: str) -> Optional[int]:
+    """Lit un champ mémoire (en kB) de /proc/self/status"""
+    try:
+        with open(_STATUS_PATH, 'r') as f:
+            match = re.search(rf'^{field}:\s+(\d+)', f.read(), flags=re.M)
+        return int(match.group(1)) if match else None
+    except OSError:
+        return None
+
+
+def _reset_peak() -> bool:
+    """Remet le pic de RSS du processus à la valeur courante (Linux)"""
+    try:
+        with open(_CLEAR_REFS_PATH, 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def current_rss_mb() -> Optional[float]:
+    """Mémoire résidente courante du processus (Mo)"""
+    rss = _read_status_kb('VmRSS')
+    return rss / 1024 if rss is not None else None
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Pic de mémoire résidente du processus (Mo), depuis le démarrage ou la dernière remise à zéro"""
+    peak = _read_status_kb('VmHWM')
+    if peak is not None:
+        return peak / 1024
+    if RESOURCE_AVAILABLE:
+        # ru_maxrss en kB sous Linux, en octets sous macOS
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return maxrss / (1024 * 1024) if os.uname().sysname == 'Darwin' else maxrss / 1024
+    return None
+
+
+class StageProfiler:
+    """
+    Collecte des mesures par étape, imbriquables (ex: train/tfidf)
+    """
+
+    def __init__(self, deep_profile_dir: Optional[str] = None):
+        """
+        Initialise le profileur
+
+        Args:
+            deep_profile_dir (str): Si fourni, un profil détaillé de chaque étape de
+                premier niveau y est écrit (.html pyinstrument ou .prof cProfile)
+        """
+        self.deep_profile_dir = deep_profile_dir
+        self.records: List[Dict[str, Any]] = []
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._open: List[Dict[str, Any]] = []
+        self._peak_resettable = _reset_peak()
+
+        if deep_profile_dir:
+            os.makedirs(deep_profile_dir, exist_ok=True)
+
+    def _stack(self) -> List[Dict[str, Any]]:
+        """Étapes ouvertes dans le thread courant"""
+        if not hasattr(self._local, 'stack'):
+            self._local.stack = []
+        return self._local.stack
+
+    @contextmanager
+    def stage(self, name: str):
+        """
+        Mesure une étape
+
+        Args:
+            name (str): Nom de l'étape (préfixé par l'étape parente du même thread)
+        """
+        stack = self._stack()
+        full_name = f"{stack[-1]['stage']}/{name}" if stack else name
+        record = {'stage': full_name, 'depth': len(stack), 'thread': threading.current_thread().name}
+
+        with self._lock:
+            # Le pic atteint jusqu'ici appartient aux étapes ouvertes (parentes ou
+            # simultanées dans d'autres threads) avant sa remise à zéro
+            self._propagate_peak(peak_rss_mb() or 0.0)
+            record['concurrent'] = len(self._open) > len(stack)
+            for other in self._open:
+                if other['thread'] != record['thread']:
+                    other['concurrent'] = True
+            self._open.append(record)
+            if self._peak_resettable:
+                _reset_peak()
+            record['rss_start_mb'] = current_rss_mb()
+            record['_peak'] = 0.0
+            # Ajouté au démarrage : le tableau suit l'ordre d'ouverture des étapes
+            self.records.append(record)
+
+        stack.append(record)
+
+        deep = self._start_deep_profile() if self.deep_profile_dir and not record['depth'] else None
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        try:
+            yield record
+        finally:
+            record['wall_time_s'] = time.perf_counter() - wall_start
+            record['cpu_time_s'] = time.process_time() - cpu_start
+            if deep is not None:
+                record['deep_profile'] = self._stop_deep_profile(deep, full_name)
+
+            stack.pop()
+            with self._lock:
+                self._propagate_peak(peak_rss_mb() or 0.0)
+                self._open.remove(record)
+                peak = record.pop('_peak')
+                if record['rss_start_mb'] is not None:
+                    record['peak_rss_delta_mb'] = max(0.0, peak - record['rss_start_mb'])
+                else:
+                    record['peak_rss_delta_mb'] = None
+                record['peak_rss_mb'] = peak
+
+    def _propagate_peak(self, peak: float) -> None:
+        """Reporte un pic de RSS sur toutes les étapes ouvertes (appel sous verrou)"""
+        for record in self._open:
+            record['_peak'] = max(record['_peak'], peak)
+
+    def _start_deep_profile(self):
+        """Démarre le profil détaillé d'une étape"""
+        if PYINSTRUMENT_AVAILABLE:
+            profiler = SamplingProfiler(interval=0.001)
+        else:
+            profiler = cProfile.Profile()
+        try:
+            if PYINSTRUMENT_AVAILABLE:
+                profiler.start()
+            else:
+                profiler.enable()
+        except (RuntimeError, ValueError) as e:
+            # Un autre profileur est déjà actif dans ce thread
+            print(f"⚠️  Profil détaillé indisponible: {e}")
+            return None
+        return profiler
+
+    def _stop_deep_profile(self, profiler, stage: str) -> str:
+        """Arrête le profil détaillé et l'écrit sur disque"""
+        safe_name = re.sub(r'[^A-Za-z0-9_.-]+', '_', stage)
+        if PYINSTRUMENT_AVAILABLE:
+            profiler.stop()
+            path = os.path.join(self.deep_profile_dir, f"{safe_name}.html")
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(profiler.output_html())
+        else:
+            profiler.disable()
+            path = os.path.join(self.deep_profile_dir, f"{safe_name}.prof")
+            profiler.dump_stats(path)
+        return path
+
+    def _ordered(self) -> List[Dict[str, Any]]:
+        """Étapes terminées, chaque sous-étape placée sous son parent (même avec des threads)"""
+        done = [r for r in self.records if 'wall_time_s' in r]
+        children: Dict[tuple, List[Dict[str, Any]]] = {}
+        for record in done:
+            if record['depth']:
+                parent = record['stage'].rsplit('/', 1)[0]
+                children.setdefault((parent, record['thread']), []).append(record)
+
+        ordered = []
+
+        def visit(record):
+            ordered.append(record)
+            for child in children.pop((record['stage'], record['thread']), []):
+                visit(child)
+
+        for record in done:
+            if not record['depth']:
+                visit(record)
+        return ordered
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Mesures sérialisables (étapes dans l'ordre de démarrage, sous-étapes sous leur parent)
+
+        Returns:
+            Dict[str, Any]: Méthode de mesure du pic mémoire et liste des étapes
+        """
+        return {
+            'peak_rss_method': 'per_stage_reset' if self._peak_resettable else 'process_high_water_mark',
+            'deep_profiler': ('pyinstrument' if PYINSTRUMENT_AVAILABLE else 'cProfile') if self.deep_profile_dir else None,
+            'stages': [dict(r) for r in self._ordered()]
+        }
+
+    def print_summary(self) -> None:
+        """Affiche le tableau récapitulatif des étapes"""
+        print("\n⏱️  PROFIL PAR ÉTAPE")
+        print("-" * 78)
+        print(f"{'Étape':<34}{'Réel (s)':>10}{'CPU (s)':>10}{'CPU/réel':>10}{'Pic RSS (Mo)':>14}")
+        for record in self._ordered():
+            ratio = record['cpu_time_s'] / record['wall_time_s'] if record['wall_time_s'] > 0 else 0.0
+            peak = record['peak_rss_delta_mb']
+            marker = '*' if record['concurrent'] else ''
+            print(f"{'  ' * record['depth'] + record['stage'].split('/')[-1] + marker:<34}"
+                  f"{record['wall_time_s']:>10.2f}{record['cpu_time_s']:>10.2f}{ratio:>10.1f}"
+                  f"{'+' + format(peak, '.1f') if peak is not None else 'n/a':>14}")
+        if any(r['concurrent'] for r in self.records):
+            print("* étape exécutée en parallèle : CPU et mémoire partagés avec les étapes simultanées")
+        if not self._peak_resettable:
+            print("Pic RSS : dépassement du pic global du processus uniquement (remise à zéro indisponible)")
+
+
+def profile_stage(profiler: Optional[StageProfiler], name: str):
+    """
+    Contexte de mesure d'une étape, neutre si aucun profileur n'est attaché
+
+    Args:
+        profiler (StageProfiler): Profileur ou None
+        name (str): Nom de l'étape
+
+    Returns:
+        Gestionnaire de contexte
+    """
+    return profiler.stage(name) if profiler is not None else nullcontext()
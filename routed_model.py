@@ -0,0 +1,349 @@
+"""
+Module de modèles routés par préfixe de code DTC pour le projet PCA
+Un routeur minuscule (dtc_router.py) associe le préfixe du code DTC à une
+route ; chaque route possède son propre bundle RandomForest (vectoriseur,
+forêt, encodeur) entraîné sur ses seuls tickets. Une requête n'évalue donc
+qu'un petit modèle. Les préfixes trop rares sont regroupés sur le préfixe
+plus court, et une route de repli ('*', tout le corpus) couvre les codes
+inconnus. Les routes s'entraînent en parallèle et chacune n'est
+réentraînée que si ses données ont changé.
+Auteur: Assistant IA
+Date: 2025-07-26
+"""
+
+import os
+import json
+import zlib
+import hashlib
+import time
+import argparse
+from datetime import datetime
+from typing import Any, Dict, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.metrics import accuracy_score
+from sklearn.preprocessing import LabelEncoder
+
+from preprocessing import TextPreprocessor
+from train_model import PCAPredictionModel
+from model_bundle import texts_sha256
+from parallel_cv import plan_thread_budget
+from dtc_router import (DTCRouter, normalize_dtc, route_directory, ROUTER_FILE, ROUTES_DIR,
+                        FALLBACK_ROUTE, ROUTER_FORMAT_VERSION)
+
+
+def _train_route(route: str, X: pd.Series, y: pd.Series, route_dir: str,
+                 tfidf_params: Dict[str, Any], rf_params: Dict[str, Any],
+                 n_threads: int, random_state: int) -> Dict[str, Any]:
+    """
+    Entraîne et sauvegarde le bundle d'une route (exécuté dans un worker)
+
+    Returns:
+        Dict[str, Any]: Statistiques de la route
+    """
+    model = PCAPredictionModel(random_state=random_state)
+    model.update_params(tfidf_params, dict(rf_params, n_jobs=n_threads, random_state=random_state))
+    model.label_encoder = LabelEncoder().fit(y)
+
+    start = time.perf_counter()
+    # Pas de split par route (classes à un seul exemple) : estimation out-of-bag
+    metrics = model.train(X, model.label_encoder.transform(y), validation='oob')
+    fit_time = time.perf_counter() - start
+    version = model.save_model(route_dir)
+
+    return {
+        'n_samples': int(len(X)),
+        'n_classes': int(len(model.label_encoder.classes_)),
+        'oob_accuracy': float(metrics['validation_accuracy']),
+        'fit_time_s': fit_time,
+        'model_version': version,
+        'model_size_bytes': os.path.getsize(os.path.join(route_dir, 'model.pkl')),
+        'trained_at': datetime.now().isoformat()
+    }
+
+
+class RoutedPCAModel:
+    """
+    Ensemble de modèles RandomForest par route DTC, sauvegardé dans model_dir
+    (routes.json + routes/<préfixe>/ bundles)
+    """
+
+    def __init__(self, model_dir: str = 'models_routed', route_depth: Optional[int] = None,
+                 min_route_samples: Optional[int] = None, random_state: int = 42):
+        """
+        Initialise le modèle routé (reprend routes.json s'il existe)
+
+        Args:
+            model_dir (str): Répertoire du routeur et des bundles de routes
+            route_depth (int): Longueur maximale des préfixes DTC (défaut: celle
+                du routeur existant, sinon 3)
+            min_route_samples (int): Nombre minimal de tickets par route (défaut:
+                celui du routeur existant, sinon 200)
+            random_state (int): Graine pour la reproductibilité
+        """
+        self.model_dir = model_dir
+        self.route_depth = 3
+        self.min_route_samples = 200
+        self.random_state = random_state
+        self.router = None
+        self.routes = {}
+
+        # Paramètres partagés par les routes (forêts plus petites que le modèle global)
+        defaults = PCAPredictionModel(random_state=random_state)
+        self.tfidf_params = dict(defaults.tfidf_params)
+        self.rf_params = dict(defaults.rf_params, n_estimators=50)
+
+        if os.path.exists(os.path.join(model_dir, ROUTER_FILE)):
+            self._read_router()
+        # Valeurs explicites prioritaires (prises en compte au prochain replan)
+        self.route_depth = route_depth or self.route_depth
+        self.min_route_samples = min_route_samples or self.min_route_samples
+
+    def _read_router(self) -> None:
+        """Recharge le routeur et l'état des routes depuis routes.json"""
+        with open(os.path.join(self.model_dir, ROUTER_FILE), 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        self.route_depth = state['route_depth']
+        self.min_route_samples = state['min_route_samples']
+        self.routes = state['routes']
+        self.router = DTCRouter(self.routes, self.route_depth)
+
+    def _write_router(self) -> None:
+        """
+        Écrit routes.json (version dérivée des versions des routes)
+
+        Écriture à côté puis renommage : un PCAPredictor qui surveille le
+        fichier ne lit jamais un routes.json tronqué pendant un réentraînement.
+        """
+        state = {
+            'format_version': ROUTER_FORMAT_VERSION,
+            'version': self.version,
+            'route_depth': self.router.depth,
+            'min_route_samples': self.min_route_samples,
+            'updated_at': datetime.now().isoformat(),
+            'routes': self.routes
+        }
+        router_path = os.path.join(self.model_dir, ROUTER_FILE)
+        tmp_path = f"{router_path}.tmp.{os.getpid()}"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, router_path)
+
+    @property
+    def version(self) -> Optional[str]:
+        """Version de l'ensemble (hash des versions des routes)"""
+        if not self.routes:
+            return None
+        versions = ';'.join(f"{route}:{info['model_version']}" for route, info in sorted(self.routes.items()))
+        return hashlib.sha256(versions.encode('utf-8')).hexdigest()[:12]
+
+    def train(self, codes: Sequence[Any], X: pd.Series, y: pd.Series, replan: bool = False,
+              force: bool = False, thread_budget: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Entraîne les routes dont les données ont changé
+
+        Args:
+            codes (Sequence): Codes DTC bruts (alignés sur X)
+            X (pd.Series): Textes préprocessés
+            y (pd.Series): PCA (labels texte)
+            replan (bool): Si True, recalcule les routes même si un routeur existe
+            force (bool): Si True, réentraîne toutes les routes
+            thread_budget (int): Budget global de threads (défaut: nombre de CPU)
+
+        Returns:
+            Dict[str, Any]: Routes entraînées, inchangées et temps total
+        """
+        os.makedirs(os.path.join(self.model_dir, ROUTES_DIR), exist_ok=True)
+        X, y = pd.Series(X).reset_index(drop=True), pd.Series(y).reset_index(drop=True)
+
+        if self.router is None or replan:
+            self.router = DTCRouter.plan(codes, self.route_depth, self.min_route_samples)
+            self.routes = {route: info for route, info in self.routes.items() if route in self.router.routes}
+        assignment = self.router.assign(codes)
+
+        # Sous-ensemble de chaque route ; la route de repli voit tout le corpus
+        subsets, to_train = {}, []
+        for route in sorted(self.router.routes):
+            mask = np.ones(len(X), dtype=bool) if route == FALLBACK_ROUTE else assignment == route
+            subsets[route] = mask
+            data_hash = texts_sha256(X[mask], y[mask])
+            previous = self.routes.get(route)
+            if force or previous is None or previous.get('data_hash') != data_hash:
+                to_train.append((route, data_hash))
+
+        parallel_routes, threads_per_route = plan_thread_budget(max(1, len(to_train)), thread_budget)
+        print(f"🧭 {len(self.router.routes)} routes, {len(to_train)} à entraîner "
+              f"({parallel_routes} en parallèle x {threads_per_route} threads)")
+
+        start = time.perf_counter()
+        stats = Parallel(n_jobs=parallel_routes)(
+            delayed(_train_route)(
+                route, X[subsets[route]], y[subsets[route]],
+                os.path.join(self.model_dir, ROUTES_DIR, route_directory(route)),
+                self.tfidf_params, self.rf_params, threads_per_route, self.random_state
+            )
+            for route, _ in to_train
+        )
+        for (route, data_hash), route_stats in zip(to_train, stats):
+            self.routes[route] = dict(route_stats, data_hash=data_hash)
+        self._write_router()
+
+        trained = [route for route, _ in to_train]
+        return {
+            'trained_routes': trained,
+            'unchanged_routes': sorted(set(self.router.routes) - set(trained)),
+            'wall_time_s': time.perf_counter() - start,
+            'version': self.version
+        }
+
+    def load(self) -> Dict[str, PCAPredictionModel]:
+        """
+        Charge les bundles de toutes les routes
+
+        Returns:
+            Dict[str, PCAPredictionModel]: Modèle de chaque route
+        """
+        models = {}
+        for route in self.routes:
+            model = PCAPredictionModel(random_state=self.random_state)
+            model.load_model(os.path.join(self.model_dir, ROUTES_DIR, route_directory(route)))
+            models[route] = model
+        return models
+
+    def evaluate(self, codes: Sequence[Any], X: pd.Series, y: pd.Series,
+                 models: Optional[Dict[str, PCAPredictionModel]] = None) -> Dict[str, Any]:
+        """
+        Accuracy globale et par route sur un jeu de test
+
+        Args:
+            codes (Sequence): Codes DTC bruts
+            X (pd.Series): Textes préprocessés
+            y (pd.Series): PCA attendues (labels texte)
+            models (Dict): Modèles déjà chargés (optionnel)
+
+        Returns:
+            Dict[str, Any]: accuracy, latence par requête et détail par route
+        """
+        models = models or self.load()
+        X, y = pd.Series(X).reset_index(drop=True), np.asarray(y)
+        assignment = self.router.assign(codes)
+        predictions = np.empty(len(X), dtype=object)
+        per_route = {}
+
+        for route in np.unique(assignment):
+            mask = assignment == route
+            model = models[route]
+            predicted = model.model.predict(model.transform(X[mask]))
+            predictions[mask] = model.label_encoder.inverse_transform(predicted)
+            per_route[route] = {'n_test': int(mask.sum()),
+                                'accuracy': float(accuracy_score(y[mask], predictions[mask]))}
+
+        # Latence d'une requête unitaire : routage + vectorisation + petite forêt
+        timings = []
+        for code, text in list(zip(codes, X))[:200]:
+            request_start = time.perf_counter()
+            model = models[self.router.route(code)]
+            model.model.predict_proba(model.transform([text]))
+            timings.append((time.perf_counter() - request_start) * 1000)
+
+        return {
+            'accuracy': float(accuracy_score(y, predictions)),
+            'latency_p50_ms': float(np.percentile(timings, 50)),
+            'latency_p95_ms': float(np.percentile(timings, 95)),
+            'routes': per_route
+        }
+
+
+def holdout_mask(codes: Sequence[Any], X: pd.Series, test_size: float = 0.2) -> np.ndarray:
+    """
+    Holdout déterministe par ticket (CRC32 du code et du texte) : un ticket
+    garde son côté quand le CSV grossit, donc seules les routes qui reçoivent
+    de nouveaux tickets voient leurs données d'entraînement changer
+
+    Returns:
+        np.ndarray: True pour les tickets de test
+    """
+    buckets = np.array([zlib.crc32(f"{normalize_dtc(code)}\x1f{text}".encode('utf-8')) % 1000
+                        for code, text in zip(codes, X)])
+    return buckets < int(round(test_size * 1000))
+
+
+def load_routed_data(data_path: str):
+    """
+    Charge un CSV GIM : codes DTC bruts alignés sur les textes préprocessés
+
+    Returns:
+        Tuple[pd.Series, pd.Series, pd.Series]: codes, textes, PCA
+    """
+    df, X, y = TextPreprocessor().load_and_preprocess_data(data_path)
+    return df.loc[X.index, 'Code DTC'], X, y
+
+
+def print_routes(routed: RoutedPCAModel, evaluation: Optional[Dict[str, Any]] = None) -> None:
+    """Affiche la table des routes (taille, classes, accuracy)"""
+    print("\n🧭 ROUTES DTC")
+    print("-" * 76)
+    print(f"{'Route':<8}{'Tickets':>9}{'Classes':>9}{'Modèle (Mo)':>13}{'Fit (s)':>9}{'OOB':>8}{'Test':>8}")
+    for route, info in sorted(routed.routes.items()):
+        test = evaluation['routes'].get(route, {}).get('accuracy') if evaluation else None
+        print(f"{route:<8}{info['n_samples']:>9}{info['n_classes']:>9}"
+              f"{info['model_size_bytes'] / 1e6:>13.2f}{info['fit_time_s']:>9.2f}"
+              f"{info['oob_accuracy']:>8.3f}{(f'{test:.3f}' if test is not None else '-'):>8}")
+
+
+def run_routed_training(data_path: str, model_dir: str = 'models_routed', route_depth: Optional[int] = None,
+                        min_route_samples: Optional[int] = None, replan: bool = False, force: bool = False,
+                        test_size: float = 0.2) -> Dict[str, Any]:
+    """
+    Entraîne (ou met à jour) les routes sur un CSV et les évalue sur un holdout
+
+    Args:
+        data_path (str): CSV de tickets GIM
+        model_dir (str): Répertoire du modèle routé
+        route_depth (int): Longueur maximale des préfixes
+        min_route_samples (int): Nombre minimal de tickets par route
+        replan (bool): Recalcule les routes
+        force (bool): Réentraîne toutes les routes
+        test_size (float): Part du holdout (0 pour entraîner sur tout le CSV)
+
+    Returns:
+        Dict[str, Any]: Statistiques d'entraînement et d'évaluation
+    """
+    codes, X, y = load_routed_data(data_path)
+    routed = RoutedPCAModel(model_dir, route_depth, min_route_samples)
+
+    test = holdout_mask(codes, X, test_size)
+    codes_train, X_train, y_train = codes[~test], X[~test], y[~test]
+    codes_test, X_test, y_test = codes[test], X[test], y[test]
+
+    training = routed.train(codes_train, X_train, y_train, replan=replan, force=force)
+    print(f"✅ {len(training['trained_routes'])} routes entraînées en {training['wall_time_s']:.1f}s "
+          f"({len(training['unchanged_routes'])} inchangées), version {training['version']}")
+
+    evaluation = routed.evaluate(codes_test, X_test, y_test) if test_size else None
+    print_routes(routed, evaluation)
+    if evaluation:
+        print(f"\n📊 Accuracy routée: {evaluation['accuracy']:.4f} "
+              f"(latence p50 {evaluation['latency_p50_ms']:.2f} ms, p95 {evaluation['latency_p95_ms']:.2f} ms)")
+    return {'training': training, 'evaluation': evaluation}
+
+
+def main():
+    """Entraînement et évaluation du modèle routé par préfixe DTC"""
+    parser = argparse.ArgumentParser(description='Modèles PCA routés par préfixe de code DTC')
+    parser.add_argument('--data', default='data/gim_diagnostic_dataset.csv', help='CSV de tickets GIM')
+    parser.add_argument('--model-dir', default='models_routed', help='Répertoire du modèle routé')
+    parser.add_argument('--route-depth', type=int, help='Longueur maximale des préfixes (default: 3)')
+    parser.add_argument('--min-route-samples', type=int, help='Tickets minimum par route (default: 200)')
+    parser.add_argument('--replan', action='store_true', help='Recalcule les routes')
+    parser.add_argument('--force', action='store_true', help='Réentraîne toutes les routes')
+    args = parser.parse_args()
+
+    run_routed_training(args.data, args.model_dir, args.route_depth, args.min_route_samples,
+                        replan=args.replan, force=args.force)
+
+
+if __name__ == "__main__":
+    main()
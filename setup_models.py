@@ -6,12 +6,13 @@ Support pour RandomForest et DistilBERT depuis Hugging Face
 """
 
 import os
-import pickle
 import json
 import pandas as pd
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.preprocessing import LabelEncoder
+from model_bundle import ModelBundle
+from train_model import PCAPredictionModel
 
 # Import conditionnel pour transformers
 try:
@@ -20,11 +21,42 @@ try:
 except ImportError:
     TRANSFORMERS_AVAILABLE = False
 
-def create_basic_models():
-    """Crée des modèles de base pour le déploiement"""
-
-    # Créer le dossier models s'il n'existe pas
-    os.makedirs("models", exist_ok=True)
+def feature_config(vectorizer: TfidfVectorizer, model: RandomForestClassifier) -> dict:
+    """
+    Configuration des features pour le manifest, limitée aux clés de PCAPredictionModel
+
+    get_params() contient des valeurs non sérialisables en JSON (dtype) qui
+    casseraient un réentraînement depuis ce bundle.
+
+    Args:
+        vectorizer (TfidfVectorizer): Vectoriseur entraîné
+        model (RandomForestClassifier): Classificateur entraîné
+
+    Returns:
+        dict: tfidf_params et rf_params sérialisables
+    """
+    defaults = PCAPredictionModel()
+    tfidf_params = vectorizer.get_params()
+    rf_params = model.get_params()
+    return {
+        'tfidf_params': {k: tfidf_params[k] for k in defaults.tfidf_params},
+        'rf_params': {k: rf_params[k] for k in defaults.rf_params}
+    }
+
+def create_basic_models(model_dir: str = "models", overwrite: bool = False):
+    """
+    Crée des modèles de base pour le déploiement
+
+    Args:
+        model_dir (str): Répertoire du bundle RandomForest
+        overwrite (bool): Si True, remplace un modèle déjà présent
+    """
+    # Ne jamais écraser silencieusement un modèle entraîné
+    existing = ModelBundle.exists(model_dir) or os.path.exists(os.path.join(model_dir, "model.pkl"))
+    if existing and not overwrite:
+        version = ModelBundle.open(model_dir).version if ModelBundle.exists(model_dir) else "non versionné"
+        print(f"ℹ️ Modèle existant conservé dans {model_dir} ({version})")
+        return
 
     # Données d'exemple pour créer les modèles
     sample_data = [
@@ -47,24 +79,22 @@ def create_basic_models():
     vectorizer = TfidfVectorizer(max_features=1000, stop_words='english')
     X = vectorizer.fit_transform(sample_data)
 
-    with open("models/vectorizer.pkl", "wb") as f:
-        pickle.dump(vectorizer, f)
-
-    # Créer et sauvegarder le label encoder
+    # Créer le label encoder
     label_encoder = LabelEncoder()
     y = label_encoder.fit_transform(sample_labels)
 
-    with open("models/label_encoder.pkl", "wb") as f:
-        pickle.dump(label_encoder, f)
-
-    # Créer et sauvegarder le modèle
+    # Créer le modèle
     model = RandomForestClassifier(n_estimators=100, random_state=42)
     model.fit(X, y)
 
-    with open("models/model.pkl", "wb") as f:
-        pickle.dump(model, f)
+    # Sauvegarder le tout sous forme de bundle versionné
+    bundle = ModelBundle.create(
+        model_dir, model, vectorizer, label_encoder,
+        feature_config=feature_config(vectorizer, model),
+        metadata={'source': 'setup_models.create_basic_models'}
+    )
 
-    print("✅ Modèles RandomForest de base créés avec succès")
+    print(f"✅ Modèles RandomForest de base créés avec succès (version {bundle.version})")
 
 def check_distilbert_model():
     """Vérifie si le modèle DistilBERT est disponible et fonctionnel"""
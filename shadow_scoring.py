@@ -0,0 +1,229 @@
+"""
+Module de scoring fantôme (shadow) pour le projet PCA
+Rejoue une fraction échantillonnée des requêtes sur un modèle candidat dans
+un thread d'arrière-plan, sans ajouter de latence au chemin de la requête :
+file bornée, requêtes abandonnées en cas de surcharge, métriques d'accord,
+de latence et d'écart de confiance écrites dans un fichier local
+Auteur: Assistant IA
+Date: 2025-07-26
+"""
+
+import os
+import json
+import queue
+import random
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+
+class ShadowScorer:
+    """
+    Compare un prédicteur candidat au prédicteur principal sur le trafic réel
+    """
+
+    def __init__(self, shadow_predictor, sample_rate: float = 0.1, queue_size: int = 100,
+                 metrics_path: str = 'models/shadow_metrics.jsonl',
+                 summary_every: int = 100, latency_window: int = 10000,
+                 seed: Optional[int] = None):
+        """
+        Initialise le scoring fantôme et démarre le thread de travail
+
+        Args:
+            shadow_predictor: PCAPredictor candidat (chargé à la demande dans le thread)
+            sample_rate (float): Fraction des requêtes rejouées (0 à 1)
+            queue_size (int): Taille maximale de la file ; au-delà les requêtes sont abandonnées
+            metrics_path (str): Fichier JSONL des résultats par requête
+            summary_every (int): Réécrit le résumé toutes les N requêtes rejouées
+            latency_window (int): Nombre de latences conservées pour les percentiles
+            seed (int): Graine de l'échantillonnage (optionnel)
+        """
+        if not 0.0 <= sample_rate <= 1.0:
+            raise ValueError(f"sample_rate doit être entre 0 et 1: {sample_rate}")
+
+        self.shadow_predictor = shadow_predictor
+        self.sample_rate = sample_rate
+        self.metrics_path = metrics_path
+        self.summary_path = os.path.splitext(metrics_path)[0] + '_summary.json'
+        self.summary_every = summary_every
+
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+        # Compteurs et fenêtres glissantes
+        self.n_sampled = 0
+        self.n_dropped = 0
+        self.n_scored = 0
+        self.n_failed = 0
+        self.n_agree = 0
+        self._shadow_latencies = deque(maxlen=latency_window)
+        self._primary_latencies = deque(maxlen=latency_window)
+        self._confidence_deltas = deque(maxlen=latency_window)
+
+        metrics_dir = os.path.dirname(metrics_path)
+        if metrics_dir:
+            os.makedirs(metrics_dir, exist_ok=True)
+
+        self._thread = threading.Thread(target=self._worker, name='pca-shadow-scorer', daemon=True)
+        self._thread.start()
+
+    def submit(self, example: Dict[str, str], primary_result: Dict[str, Any],
+               primary_latency: float) -> bool:
+        """
+        Propose une requête au scoring fantôme (non bloquant)
+
+        Args:
+            example (Dict[str, str]): Entrée (code_dtc, description, root_cause)
+            primary_result (Dict[str, Any]): Résultat du prédicteur principal
+            primary_latency (float): Latence du prédicteur principal (secondes)
+
+        Returns:
+            bool: True si la requête a été mise en file
+        """
+        if self._random.random() >= self.sample_rate:
+            return False
+
+        with self._lock:
+            self.n_sampled += 1
+        try:
+            self._queue.put_nowait((example, primary_result, primary_latency))
+            return True
+        except queue.Full:
+            with self._lock:
+                self.n_dropped += 1
+            return False
+
+    def _worker(self) -> None:
+        """Boucle du thread : rejoue les requêtes sur le modèle candidat"""
+        while True:
+            item = self._queue.get()
+            if item is None:
+                self._queue.task_done()
+                break
+            try:
+                self._score(*item)
+            except Exception as e:
+                with self._lock:
+                    self.n_failed += 1
+                print(f"⚠️ Erreur du scoring fantôme: {e}")
+            finally:
+                self._queue.task_done()
+
+    def _score(self, example: Dict[str, str], primary_result: Dict[str, Any],
+               primary_latency: float) -> None:
+        """Rejoue une requête et enregistre la comparaison"""
+        if not self.shadow_predictor.is_loaded:
+            self.shadow_predictor.load_model()
+
+        start = time.perf_counter()
+        shadow_result = self.shadow_predictor.predict_single(**example, return_probabilities=True)
+        shadow_latency = time.perf_counter() - start
+
+        if 'error' in shadow_result:
+            with self._lock:
+                self.n_failed += 1
+            return
+
+        agree = shadow_result['predicted_pca'] == primary_result['predicted_pca']
+        primary_confidence = primary_result.get('confidence')
+        confidence_delta = None
+        if primary_confidence is not None:
+            confidence_delta = shadow_result['confidence'] - primary_confidence
+
+        record = {
+            'timestamp': datetime.now().isoformat(),
+            'input': example,
+            'primary_version': primary_result.get('model_version'),
+            'shadow_version': shadow_result.get('model_version'),
+            'primary_pca': primary_result['predicted_pca'],
+            'shadow_pca': shadow_result['predicted_pca'],
+            'agree': agree,
+            'primary_confidence': primary_confidence,
+            'shadow_confidence': shadow_result['confidence'],
+            'confidence_delta': confidence_delta,
+            'primary_latency_ms': primary_latency * 1000,
+            'shadow_latency_ms': shadow_latency * 1000
+        }
+
+        with self._lock:
+            self.n_scored += 1
+            self.n_agree += int(agree)
+            self._shadow_latencies.append(shadow_latency)
+            self._primary_latencies.append(primary_latency)
+            if confidence_delta is not None:
+                self._confidence_deltas.append(confidence_delta)
+            write_summary = self.n_scored % self.summary_every == 0
+
+        with open(self.metrics_path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+        if write_summary:
+            self.write_summary()
+
+    @staticmethod
+    def _percentiles(values) -> Optional[Dict[str, float]]:
+        """Percentiles de latence en millisecondes"""
+        if not values:
+            return None
+        p50, p95, p99 = np.percentile(np.asarray(values) * 1000, [50, 95, 99])
+        return {'p50_ms': float(p50), 'p95_ms': float(p95), 'p99_ms': float(p99)}
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Résumé agrégé du scoring fantôme
+
+        Returns:
+            Dict[str, Any]: Taux d'accord, distribution des latences, écarts de confiance
+        """
+        with self._lock:
+            deltas = np.asarray(self._confidence_deltas)
+            return {
+                'timestamp': datetime.now().isoformat(),
+                'sample_rate': self.sample_rate,
+                'sampled': self.n_sampled,
+                'scored': self.n_scored,
+                'dropped': self.n_dropped,
+                'failed': self.n_failed,
+                'agreement_rate': self.n_agree / self.n_scored if self.n_scored else None,
+                'shadow_latency': self._percentiles(self._shadow_latencies),
+                'primary_latency': self._percentiles(self._primary_latencies),
+                'confidence_delta': {
+                    'mean': float(deltas.mean()),
+                    'mean_abs': float(np.abs(deltas).mean()),
+                    'std': float(deltas.std())
+                } if deltas.size else None
+            }
+
+    def write_summary(self) -> Dict[str, Any]:
+        """Écrit le résumé agrégé à côté du fichier de métriques"""
+        summary = self.summary()
+        with open(self.summary_path, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2, ensure_ascii=False)
+        return summary
+
+    def close(self, drain: bool = True) -> Dict[str, Any]:
+        """
+        Arrête le thread et écrit le résumé final
+
+        Args:
+            drain (bool): Si True, traite les requêtes encore en file avant l'arrêt
+
+        Returns:
+            Dict[str, Any]: Résumé final
+        """
+        if not drain:
+            try:
+                while True:
+                    self._queue.get_nowait()
+                    self._queue.task_done()
+            except queue.Empty:
+                pass
+
+        self._queue.put(None)
+        self._thread.join()
+        return self.write_summary()
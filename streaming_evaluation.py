@@ -0,0 +1,216 @@
+"""
+Module d'évaluation en flux pour le projet PCA
+Les données de test sont consommées par blocs : chaque bloc est vectorisé,
+prédit puis oublié ; seuls la matrice de confusion (n_classes x n_classes)
+et les compteurs top-k sont conservés. La mémoire ne dépend donc pas du
+nombre de tickets évalués. Le rapport final est identique à celui de
+PCAPredictionModel.evaluate : classification_report est recalculé sur les
+cellules non nulles de la matrice de confusion, pondérées par leurs effectifs.
+Auteur: Assistant IA
+Date: 2025-07-26
+"""
+
+import re
+import time
+import argparse
+from typing import Any, Dict, Iterable, Iterator, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from sklearn.metrics import classification_report
+
+from preprocessing import TextPreprocessor
+from train_model import PCAPredictionModel
+
+
+DEFAULT_TOP_K = (1, 3, 5)
+
+
+def iter_csv_chunks(data_path: str, chunk_size: int = 10000,
+                    preprocessor: TextPreprocessor = None) -> Iterator[Tuple[pd.Series, pd.Series]]:
+    """
+    Lit et préprocesse un CSV GIM par blocs (mêmes étapes que load_and_preprocess_data)
+
+    Args:
+        data_path (str): Chemin du CSV
+        chunk_size (int): Nombre de lignes par bloc
+        preprocessor (TextPreprocessor): Préprocesseur (défaut: nouveau TextPreprocessor)
+
+    Yields:
+        Tuple[pd.Series, pd.Series]: Textes préprocessés et PCA du bloc
+    """
+    preprocessor = preprocessor or TextPreprocessor()
+    for chunk in pd.read_csv(data_path, chunksize=chunk_size):
+        chunk = chunk.dropna(subset=['PCA attendue'])
+        if chunk.empty:
+            continue
+        processed = preprocessor.concatenate_text_columns(chunk)
+        X, y = processed['texte_concatene'], processed['PCA attendue']
+        mask = X.str.len() > 0
+        yield X[mask], y[mask]
+
+
+def _integer_support(report: str) -> str:
+    """Affiche les supports pondérés (float) comme des entiers, à largeur constante"""
+    return re.sub(r' +(\d+)\.0$', lambda m: f"{m.group(1):>{len(m.group(0))}}", report, flags=re.M)
+
+
+class StreamingEvaluator:
+    """
+    Accumulateur de métriques de classification bloc par bloc
+    """
+
+    def __init__(self, classes: Sequence[str], top_k: Sequence[int] = DEFAULT_TOP_K):
+        """
+        Initialise les compteurs
+
+        Args:
+            classes (Sequence[str]): Classes de l'encodeur de labels (ordre des codes)
+            top_k (Sequence[int]): Valeurs de k pour l'accuracy top-k
+        """
+        self.classes = np.asarray(classes)
+        self.top_k = tuple(sorted(k for k in top_k if k <= len(self.classes)))
+        n_classes = len(self.classes)
+        self.confusion = np.zeros((n_classes, n_classes), dtype=np.int64)
+        self.top_k_hits = {k: 0 for k in self.top_k}
+        self.n_samples = 0
+        self.n_unknown_labels = 0
+        self.n_chunks = 0
+
+    def update(self, y_true: np.ndarray, probabilities: np.ndarray) -> None:
+        """
+        Ajoute un bloc de prédictions
+
+        Args:
+            y_true (np.ndarray): Codes des vraies classes (-1 pour une classe inconnue du modèle)
+            probabilities (np.ndarray): Probabilités (n_bloc x n_classes, colonnes dans l'ordre des codes)
+        """
+        known = y_true >= 0
+        self.n_unknown_labels += int((~known).sum())
+        y_true, probabilities = y_true[known], probabilities[known]
+
+        y_pred = probabilities.argmax(axis=1)
+        np.add.at(self.confusion, (y_true, y_pred), 1)
+
+        if self.top_k:
+            # Rang de la vraie classe ; à égalité, l'indice le plus petit passe devant (comme argmax)
+            true_proba = probabilities[np.arange(len(y_true)), y_true][:, None]
+            before = np.arange(probabilities.shape[1])[None, :] < y_true[:, None]
+            rank = ((probabilities > true_proba) | ((probabilities == true_proba) & before)).sum(axis=1)
+            for k in self.top_k:
+                self.top_k_hits[k] += int((rank < k).sum())
+
+        self.n_samples += len(y_true)
+        self.n_chunks += 1
+
+    def _weighted_pairs(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Cellules non nulles de la matrice de confusion : (vrais labels, prédits, effectifs)"""
+        rows, cols = np.nonzero(self.confusion)
+        return self.classes[rows], self.classes[cols], self.confusion[rows, cols]
+
+    def report(self, print_report: bool = True) -> Dict[str, Any]:
+        """
+        Métriques finales (mêmes clés résumées que PCAPredictionModel.evaluate)
+
+        Args:
+            print_report (bool): Si True, affiche le rapport de classification
+
+        Returns:
+            Dict[str, Any]: accuracy, classification_report, confusion_matrix,
+                top_k_accuracy et compteurs
+        """
+        if self.n_samples == 0:
+            raise ValueError("Aucun exemple évalué")
+
+        y_true, y_pred, weights = self._weighted_pairs()
+        class_report = classification_report(y_true, y_pred, sample_weight=weights,
+                                             output_dict=True, zero_division=0)
+
+        # Même restriction que confusion_matrix(y_true, y_pred) : labels vus ou prédits
+        present = (self.confusion.sum(axis=0) + self.confusion.sum(axis=1)) > 0
+        accuracy = np.trace(self.confusion) / self.n_samples
+
+        if print_report:
+            print(f"Accuracy sur le test: {accuracy:.4f}")
+            print("\nRapport de classification:")
+            print(_integer_support(classification_report(y_true, y_pred, sample_weight=weights,
+                                                         zero_division=0)))
+
+        return {
+            'accuracy': accuracy,
+            'classification_report': class_report,
+            'confusion_matrix': self.confusion[np.ix_(present, present)],
+            'top_k_accuracy': {k: hits / self.n_samples for k, hits in self.top_k_hits.items()},
+            'n_samples': self.n_samples,
+            'n_unknown_labels': self.n_unknown_labels,
+            'n_chunks': self.n_chunks
+        }
+
+
+def evaluate_streaming(model: PCAPredictionModel, chunks: Iterable[Tuple[Any, Any]],
+                       top_k: Sequence[int] = DEFAULT_TOP_K,
+                       print_report: bool = True) -> Dict[str, Any]:
+    """
+    Évalue un modèle entraîné sur un flux de blocs (textes, labels texte)
+
+    Args:
+        model (PCAPredictionModel): Modèle entraîné ou chargé
+        chunks (Iterable): Blocs (textes préprocessés, PCA)
+        top_k (Sequence[int]): Valeurs de k pour l'accuracy top-k
+        print_report (bool): Si True, affiche le rapport de classification
+
+    Returns:
+        Dict[str, Any]: Métriques (voir StreamingEvaluator.report)
+    """
+    if not model.is_trained:
+        raise ValueError("Le modèle doit être entraîné avant l'évaluation")
+
+    classes = model.label_encoder.classes_
+    evaluator = StreamingEvaluator(classes, top_k)
+    # Colonnes de predict_proba -> codes de l'encodeur
+    columns = np.asarray(model.model.classes_, dtype=np.intp)
+
+    print("=== ÉVALUATION DU MODÈLE (PAR BLOCS) ===")
+    start = time.perf_counter()
+    for X_chunk, y_chunk in chunks:
+        labels = np.asarray(y_chunk)
+        codes = np.searchsorted(classes, labels)
+        codes[(codes >= len(classes)) | (classes[np.minimum(codes, len(classes) - 1)] != labels)] = -1
+
+        proba = model.model.predict_proba(model.transform(X_chunk))
+        full = np.zeros((len(labels), len(classes)), dtype=proba.dtype)
+        full[:, columns] = proba
+        evaluator.update(codes, full)
+
+    metrics = evaluator.report(print_report=print_report)
+    metrics['time_s'] = time.perf_counter() - start
+    return metrics
+
+
+def print_streaming_summary(metrics: Dict[str, Any]) -> None:
+    """Affiche volumes, temps et accuracy top-k d'une évaluation en flux"""
+    print(f"📊 {metrics['n_samples']} tickets en {metrics['n_chunks']} blocs ({metrics['time_s']:.1f}s)")
+    for k, accuracy in metrics['top_k_accuracy'].items():
+        print(f"   Top-{k}: {accuracy:.4f}")
+    if metrics['n_unknown_labels']:
+        print(f"⚠️  {metrics['n_unknown_labels']} tickets ignorés (PCA inconnue du modèle)")
+
+
+def main():
+    """Évaluation en flux d'un bundle sur un CSV de tickets"""
+    parser = argparse.ArgumentParser(description='Évaluation en flux du modèle PCA')
+    parser.add_argument('--data', required=True, help='CSV de tickets GIM à évaluer')
+    parser.add_argument('--model-dir', default='models', help='Bundle du modèle')
+    parser.add_argument('--chunk-size', type=int, default=10000, help='Lignes par bloc (default: 10000)')
+    parser.add_argument('--top-k', type=int, nargs='+', default=list(DEFAULT_TOP_K), help='Valeurs de k')
+    args = parser.parse_args()
+
+    model = PCAPredictionModel()
+    model.load_model(args.model_dir)
+
+    metrics = evaluate_streaming(model, iter_csv_chunks(args.data, args.chunk_size), top_k=args.top_k)
+    print_streaming_summary(metrics)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Test de l'inférence DistilBERT optimisée sur un petit checkpoint aléatoire
+(aucun téléchargement : vocabulaire et configuration minimaux)
+"""
+
+import os
+import json
+import tempfile
+
+from predict import PCAPredictor, TRANSFORMERS_AVAILABLE
+from distilbert_inference import (QUANTIZED_MODEL_FILE, QUANTIZED_META_FILE, INFERENCE_CONFIG_FILE,
+                                  derive_length_cap, batch_logits, logits_runner, TokenCache)
+
+if TRANSFORMERS_AVAILABLE:
+    import torch
+    from transformers import DistilBertConfig, DistilBertForSequenceClassification, DistilBertTokenizer
+
+
+TINY_VOCAB = ['[PAD]', '[UNK]', '[CLS]', '[SEP]', '[MASK]', 'p0300', 'p0171', 'engine', 'misfiring',
+              'randomly', 'faulty', 'spark', 'plugs', 'system', 'too', 'lean', 'vacuum', 'leak']
+TINY_LABELS = ['Replace Spark Plugs', 'Check EVAP System', 'Replace Thermostat']
+
+
+def make_tiny_checkpoint(checkpoint_dir: str) -> None:
+    """Écrit un checkpoint DistilBERT minuscule (1 couche, poids aléatoires) avec label_mapping.json"""
+    os.makedirs(checkpoint_dir, exist_ok=True)
+    vocab_path = os.path.join(checkpoint_dir, 'vocab.txt')
+    with open(vocab_path, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(TINY_VOCAB) + '\n')
+
+    torch.manual_seed(0)
+    config = DistilBertConfig(vocab_size=len(TINY_VOCAB), dim=32, hidden_dim=64, n_layers=1,
+                              n_heads=2, max_position_embeddings=64, num_labels=len(TINY_LABELS))
+    DistilBertForSequenceClassification(config).save_pretrained(checkpoint_dir)
+    # from_pretrained sur vocab.txt seul : même chargement quelle que soit la version de transformers
+    DistilBertTokenizer.from_pretrained(checkpoint_dir, model_max_length=64).save_pretrained(checkpoint_dir)
+    with open(os.path.join(checkpoint_dir, 'label_mapping.json'), 'w', encoding='utf-8') as f:
+        json.dump({str(i): label for i, label in enumerate(TINY_LABELS)}, f)
+
+
+def test_quantized_distilbert():
+    """Quantifie au premier chargement, relit le cache ensuite, prédit des labels connus"""
+    print("🧮 Test de DistilBERT quantifié INT8...")
+
+    if not TRANSFORMERS_AVAILABLE:
+        print("⚠️ transformers/torch non installés - test ignoré")
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        checkpoint = os.path.join(tmp, 'distilbert_pca_model')
+        make_tiny_checkpoint(checkpoint)
+        quantized_dir = os.path.join(tmp, 'int8')
+
+        predictor = PCAPredictor(backend='distilbert', checkpoint_dir=checkpoint,
+                                 quantize=True, quantized_dir=quantized_dir)
+        predictor.load_model()
+        assert os.path.exists(os.path.join(quantized_dir, QUANTIZED_MODEL_FILE))
+        assert os.path.exists(os.path.join(quantized_dir, QUANTIZED_META_FILE))
+        modules = list(predictor.distilbert_model.modules())
+        assert any(isinstance(m, torch.ao.nn.quantized.dynamic.Linear) for m in modules)
+        assert not any(type(m) is torch.nn.Linear for m in modules)
+
+        # Second chargement : lu depuis le cache, mêmes sorties
+        reloaded = PCAPredictor(backend='distilbert', checkpoint_dir=checkpoint,
+                                quantize=True, quantized_dir=quantized_dir)
+        reloaded.load_model()
+        inputs = predictor.tokenizer('p0300 engine misfiring', return_tensors='pt')
+        with torch.no_grad():
+            first = predictor.distilbert_model(**inputs).logits
+            second = reloaded.distilbert_model(**inputs).logits
+        assert torch.allclose(first, second)
+
+        result = reloaded.predict_single('P0300', 'Engine misfiring randomly', 'Faulty spark plugs')
+        assert 'error' not in result and result['predicted_pca'] in TINY_LABELS
+
+        full = PCAPredictor(backend='distilbert', checkpoint_dir=checkpoint)
+        full.load_model()
+        assert full.predict_single('P0300', 'Engine misfiring randomly')['predicted_pca'] in TINY_LABELS
+
+    print("✅ DistilBERT INT8 OK")
+
+
+BATCH_EXAMPLES = [
+    {'code_dtc': 'P0300', 'description': 'Engine misfiring randomly', 'root_cause': 'Faulty spark plugs'},
+    {'code_dtc': 'P0171', 'description': 'System too lean', 'root_cause': ''},
+    {'code_dtc': 'P0300', 'description': 'Engine engine misfiring misfiring randomly randomly spark plugs '
+                                         'vacuum leak system too lean', 'root_cause': 'Faulty spark plugs leak'},
+    {'code_dtc': '', 'description': '', 'root_cause': ''},
+    {'code_dtc': 'P0171', 'description': 'Vacuum leak', 'root_cause': 'Vacuum leak'},
+]
+
+
+def test_batch_inference():
+    """Lots triés par longueur : mêmes sorties qu'une requête à la fois, dans l'ordre d'entrée"""
+    print("📦 Test de l'inférence DistilBERT par lots...")
+
+    if not TRANSFORMERS_AVAILABLE:
+        print("⚠️ transformers/torch non installés - test ignoré")
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        checkpoint = os.path.join(tmp, 'distilbert_pca_model')
+        make_tiny_checkpoint(checkpoint)
+
+        predictor = PCAPredictor(backend='distilbert', checkpoint_dir=checkpoint, batch_size=2)
+        predictor.load_model()
+        assert predictor.max_length == 512
+
+        batch = predictor.predict_batch(BATCH_EXAMPLES, return_probabilities=True)
+        assert len(batch) == len(BATCH_EXAMPLES) and 'error' in batch[3]
+        for example, result in zip(BATCH_EXAMPLES, batch):
+            if 'error' in result:
+                continue
+            single = predictor.predict_single(example['code_dtc'], example['description'], example['root_cause'])
+            assert result['predicted_pca'] == single['predicted_pca']
+            assert result['input'] == single['input']
+            for label, prob in single['all_probabilities'].items():
+                assert abs(result['all_probabilities'][label] - prob) < 1e-5
+
+        # Tri par longueur ou padding fixe : mêmes logits (positions masquées ignorées)
+        components = predictor._components()
+        texts = [predictor.preprocess_input(**e) for e in BATCH_EXAMPLES if e['description']]
+        run = logits_runner(components)
+        sorted_logits = batch_logits(components['tokenizer'], run, texts, batch_size=2)
+        padded_logits = batch_logits(components['tokenizer'], run, texts, batch_size=3, max_length=32,
+                                     sort_by_length=False, pad_to_max_length=True)
+        assert abs(sorted_logits - padded_logits).max() < 1e-4
+
+        # Plafond tiré des données, lu au chargement
+        cap = derive_length_cap(components['tokenizer'], texts, percentile=50, multiple=4)
+        assert cap % 4 == 0 and cap <= 512
+        with open(os.path.join(checkpoint, INFERENCE_CONFIG_FILE), 'w', encoding='utf-8') as f:
+            json.dump({'max_length': cap}, f)
+        capped = PCAPredictor(backend='distilbert', checkpoint_dir=checkpoint)
+        capped.load_model()
+        assert capped.max_length == cap
+        assert len(capped.predict_batch(BATCH_EXAMPLES)) == len(BATCH_EXAMPLES)
+
+    print("✅ Inférence par lots OK")
+
+
+def test_token_cache():
+    """Cache LRU des identifiants : mêmes identifiants que le tokenizer, borné, recréé au rechargement"""
+    print("🔤 Test du cache de tokenisation...")
+
+    if not TRANSFORMERS_AVAILABLE:
+        print("⚠️ transformers/torch non installés - test ignoré")
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        checkpoint = os.path.join(tmp, 'distilbert_pca_model')
+        make_tiny_checkpoint(checkpoint)
+
+        predictor = PCAPredictor(backend='distilbert', checkpoint_dir=checkpoint, token_cache_size=2)
+        predictor.load_model()
+        tokenizer = predictor.tokenizer
+        assert tokenizer.is_fast
+
+        texts = ['p0300 engine misfiring', 'system too lean', 'p0300 engine misfiring',
+                 'vacuum leak ' * 20]
+        for max_length in (512, 8):
+            cache = TokenCache(tokenizer, max_length, max_size=2)
+            expected = [tokenizer(text, truncation=True, max_length=max_length)['input_ids'] for text in texts]
+            assert cache.encode(texts) == expected
+            assert cache.encode(texts[3:]) == expected[3:]  # Succès du cache
+            assert len(cache) == 2 and cache.stats()['hits'] == 1
+
+        # Éviction LRU : le texte le plus ancien est ré-encodé
+        cache = TokenCache(tokenizer, 512, max_size=2)
+        cache.encode(texts[:2])
+        cache.encode(texts[3:])
+        cache.encode(texts[:1])
+        assert cache.stats()['misses'] == 4
+
+        # Prédicteur : requêtes répétées servies par le cache, cache neuf après rechargement
+        first = predictor.predict_single('P0300', 'Engine misfiring randomly')
+        second = predictor.predict_single('P0300', 'Engine misfiring randomly')
+        assert first['all_probabilities'] == second['all_probabilities']
+        assert predictor.token_cache.stats()['hits'] == 1
+        old_cache = predictor.token_cache
+        predictor.reload_model()
+        assert predictor.token_cache is not old_cache and predictor.token_cache.stats()['hits'] == 0
+
+    print("✅ Cache de tokenisation OK")
+
+
+if __name__ == "__main__":
+    test_quantized_distilbert()
+    test_batch_inference()
+    test_token_cache()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Test du pool de processus DistilBERT : répliques, répartition, processus morts et calibration
+"""
+
+import os
+import json
+import tempfile
+import threading
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+from predict import PCAPredictor, TRANSFORMERS_AVAILABLE
+from distilbert_pool import DistilBertPool, candidate_layouts, calibrate_pool, core_budget, POOL_CONFIG_FILE
+
+if TRANSFORMERS_AVAILABLE:
+    from test_distilbert_inference import make_tiny_checkpoint, BATCH_EXAMPLES
+
+
+def test_distilbert_pool():
+    """Le pool rend les mêmes prédictions que le prédicteur local, sous requêtes concurrentes"""
+    print("🧵 Test du pool DistilBERT...")
+
+    if not TRANSFORMERS_AVAILABLE:
+        print("⚠️ transformers/torch non installés - test ignoré")
+        return
+
+    assert candidate_layouts(4) == [(1, 4), (2, 2), (4, 1)]
+    assert candidate_layouts(1) == [(1, 1)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        checkpoint = os.path.join(tmp, 'distilbert_pca_model')
+        make_tiny_checkpoint(checkpoint)
+        local = PCAPredictor(backend='distilbert', checkpoint_dir=checkpoint)
+        local.load_model()
+        expected = local.predict_batch(BATCH_EXAMPLES, return_probabilities=True)
+
+        with DistilBertPool(2, 1, checkpoint_dir=checkpoint) as pool:
+            results = pool.predict_batch(BATCH_EXAMPLES, return_probabilities=True)
+            assert [r.get('predicted_pca') for r in results] == [r.get('predicted_pca') for r in expected]
+            assert 'error' in results[3]
+
+            # Requêtes unitaires depuis plusieurs threads (Streamlit) : chacune reçoit sa réponse
+            answers = {}
+
+            def client(i):
+                example = BATCH_EXAMPLES[i % 3]
+                answers[i] = pool.predict_single(example['code_dtc'], example['description'],
+                                                 example['root_cause'])
+
+            threads = [threading.Thread(target=client, args=(i,)) for i in range(9)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            for i, answer in answers.items():
+                assert answer['predicted_pca'] == expected[i % 3]['predicted_pca']
+                assert answer['input'] == expected[i % 3]['input']
+
+        # Calibration : découpage retenu enregistré puis relu par le pool
+        calibration = calibrate_pool(BATCH_EXAMPLES[:3], target_p95_ms=1e6, layouts=[(1, 1), (2, 1)],
+                                     n_requests=12, concurrency=2, checkpoint_dir=checkpoint)
+        assert len(calibration['layouts']) == 2 and calibration['config']['meets_target']
+        with open(os.path.join(checkpoint, POOL_CONFIG_FILE), 'r', encoding='utf-8') as f:
+            saved = json.load(f)
+        pool = DistilBertPool(checkpoint_dir=checkpoint)
+        assert (pool.n_workers, pool.threads_per_worker) == (saved['n_workers'], saved['threads_per_worker'])
+
+        # N imposé : threads tirés du budget de cœurs, pas d'une calibration faite pour un autre N
+        with open(os.path.join(checkpoint, POOL_CONFIG_FILE), 'w', encoding='utf-8') as f:
+            json.dump(dict(saved, n_workers=1, threads_per_worker=8 * core_budget()), f)
+        pool = DistilBertPool(4, checkpoint_dir=checkpoint)
+        assert (pool.n_workers, pool.threads_per_worker) == (4, max(1, core_budget() // 4))
+        assert DistilBertPool(checkpoint_dir=checkpoint).threads_per_worker == 8 * core_budget()
+        assert DistilBertPool(4, 3, checkpoint_dir=checkpoint).threads_per_worker == 3
+
+        # Cible impossible : p95 le plus bas, signalé comme hors cible
+        unreachable = calibrate_pool(BATCH_EXAMPLES[:3], target_p95_ms=0.0, layouts=[(1, 1)],
+                                     n_requests=4, concurrency=1, save=False, checkpoint_dir=checkpoint)
+        assert not unreachable['config']['meets_target']
+
+    print("✅ Pool DistilBERT OK")
+
+
+def test_pool_worker_failure():
+    """Processus tué : le pool continue avec les autres, puis échoue sans bloquer"""
+    print("🧵 Test de la surveillance des processus du pool...")
+
+    if not TRANSFORMERS_AVAILABLE:
+        print("⚠️ transformers/torch non installés - test ignoré")
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        checkpoint = os.path.join(tmp, 'distilbert_pca_model')
+        make_tiny_checkpoint(checkpoint)
+        example = BATCH_EXAMPLES[0]
+
+        with DistilBertPool(2, 1, checkpoint_dir=checkpoint) as pool:
+            # Délai dépassé : TimeoutError, la requête est abandonnée
+            try:
+                pool.predict_single(example['code_dtc'], example['description'], timeout=0)
+                raise AssertionError("Un délai nul doit expirer")
+            except FutureTimeoutError:
+                pass
+            try:
+                pool.predict_batch(BATCH_EXAMPLES, timeout=0)
+                raise AssertionError("Un délai nul doit expirer")
+            except FutureTimeoutError:
+                pass
+
+            # Un processus tué : l'autre sert toujours les requêtes
+            pool._processes[0].kill()
+            pool._processes[0].join()
+            result = pool.predict_single(example['code_dtc'], example['description'], timeout=60)
+            assert 'error' not in result
+            assert pool.predict_batch(BATCH_EXAMPLES[:3], timeout=60)[0]['predicted_pca'] == \
+                result['predicted_pca']
+            assert pool.alive_workers == 1
+
+            # Plus aucun processus : les requêtes en attente échouent au lieu de bloquer
+            pool._processes[1].kill()
+            future = pool.submit([example])
+            try:
+                future.result(timeout=30)
+                raise AssertionError("Une requête sans processus vivant doit échouer")
+            except RuntimeError as e:
+                assert 'arrêté' in str(e)
+            try:
+                pool.submit([example])
+                raise AssertionError("Un pool sans processus doit refuser les requêtes")
+            except RuntimeError:
+                pass
+
+    print("✅ Surveillance des processus du pool OK")
+
+
+if __name__ == "__main__":
+    test_distilbert_pool()
+    test_pool_worker_failure()
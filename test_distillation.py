@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Test de la distillation DistilBERT -> forêt TF-IDF
+"""
+
+import os
+import json
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from predict import PCAPredictor, TRANSFORMERS_AVAILABLE
+from distillation import expand_soft_targets, teacher_soft_targets, compare_distillation, load_corpus
+
+if TRANSFORMERS_AVAILABLE:
+    from test_distilbert_inference import make_tiny_checkpoint
+
+
+HISTORICAL_DATA = 'data/gim_diagnostic_dataset.csv'
+
+
+def test_distillation():
+    """Cibles souples du professeur, forêt distillée sauvegardée comme un bundle standard"""
+    print("🎓 Test de la distillation...")
+
+    # Top-k du mélange cible souple / label vrai, poids normalisés par ticket
+    targets = np.array([[0.7, 0.2, 0.1, 0.0],
+                        [0.0, 0.0, 0.0, 1.0]])
+    rows, labels, weights = expand_soft_targets(targets, np.array([1, 3]), alpha=0.5, top_k=2)
+    assert rows.tolist() == [0, 0, 1] and labels.tolist() == [1, 0, 3]
+    assert np.allclose(weights, [0.6 / 0.95, 0.35 / 0.95, 1.0])
+    rows, labels, weights = expand_soft_targets(targets, top_k=3)
+    assert np.allclose(np.bincount(rows, weights=weights), 1.0)
+    # Ticket sans cible souple ni label vrai : aucune ligne
+    rows, _, weights = expand_soft_targets(np.vstack([targets, np.zeros(4)]), top_k=3)
+    assert 2 not in rows and np.all(np.isfinite(weights))
+
+    # Doublons (texte, PCA) retirés : le dataset historique deux fois = une fois
+    X_once, y_once = load_corpus([HISTORICAL_DATA])
+    X_twice, y_twice = load_corpus([HISTORICAL_DATA, HISTORICAL_DATA])
+    assert len(X_twice) == len(X_once) and list(X_twice.index) == list(range(len(X_once)))
+    assert not pd.DataFrame({'text': X_once, 'pca': y_once}).duplicated().any()
+
+    if not TRANSFORMERS_AVAILABLE:
+        print("⚠️ transformers/torch non installés - test ignoré")
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Professeur minuscule dont les labels sont des PCA du corpus
+        checkpoint = os.path.join(tmp, 'distilbert_pca_model')
+        make_tiny_checkpoint(checkpoint)
+        teacher_labels = ['Replace thermostat', 'Replace wiper fuse', 'Classe inconnue']
+        with open(os.path.join(checkpoint, 'label_mapping.json'), 'w', encoding='utf-8') as f:
+            json.dump({str(i): label for i, label in enumerate(teacher_labels)}, f)
+        teacher = PCAPredictor(backend='distilbert', checkpoint_dir=checkpoint)
+        teacher.load_model()
+
+        classes = ['Adjust tire pressure', 'Replace thermostat', 'Replace wiper fuse']
+        soft = teacher_soft_targets(teacher, ['p0300 engine misfiring', 'system too lean'], classes)
+        assert soft.shape == (2, 3) and np.allclose(soft.sum(axis=1), 1.0) and not soft[:, 0].any()
+        try:
+            teacher_soft_targets(teacher, ['system too lean'], ['Adjust tire pressure'])
+            raise AssertionError("Aucune classe commune : erreur attendue")
+        except ValueError:
+            pass
+
+        # Split du professeur inconnu : pas d'écart comblé
+        model_dir = os.path.join(tmp, 'models_distilled')
+        comparison = compare_distillation(teacher, [HISTORICAL_DATA], top_k=2, model_dir=model_dir)
+        assert comparison['training']['n_rows'] <= 2 * comparison['training']['n_texts']
+        for name in ('forest', 'teacher', 'distilled'):
+            assert 0.0 <= comparison[name]['accuracy'] <= 1.0
+        assert comparison['teacher_holdout'] is None and comparison['gap_closed'] is None
+
+        # Textes d'entraînement du professeur exclus du holdout
+        seen = list(X_once[:300])
+        clean = compare_distillation(teacher, [HISTORICAL_DATA], top_k=2, teacher_train_texts=seen)
+        assert clean['teacher_holdout']['excluded'] > 0
+        assert clean['n_test'] == clean['teacher_holdout']['n_test'] == \
+            comparison['n_test'] - clean['teacher_holdout']['excluded']
+        if clean['teacher']['accuracy'] <= clean['forest']['accuracy']:
+            assert clean['gap_closed'] is None
+        else:
+            assert clean['gap_closed'] is not None
+
+        predictor = PCAPredictor(model_dir=model_dir)
+        predictor.load_model()
+        assert predictor.model_version == comparison['model_version']
+        result = predictor.predict_single('P0300', 'Engine misfiring randomly', 'Faulty spark plugs')
+        assert 'error' not in result and result['predicted_pca'] in predictor.label_encoder.classes_
+
+    print("✅ Distillation OK")
+
+
+if __name__ == "__main__":
+    test_distillation()
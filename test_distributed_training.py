@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Test de l'entraînement distribué : parts, fusion des estimateurs et prédiction
+"""
+
+import os
+import tempfile
+
+import numpy as np
+
+from preprocessing import TextPreprocessor
+from train_model import PCAPredictionModel
+from predict import PCAPredictor
+from distributed_training import (split_estimators, distributed_train, prepare_job, train_part,
+                                  merge_parts, LocalCluster)
+
+
+def test_distributed_training():
+    """Entraîne sur un cluster local, vérifie la fusion et le bundle sauvegardé"""
+    print("🌲 Test de l'entraînement distribué...")
+
+    assert split_estimators(10, 3) == [4, 3, 3]
+
+    _, X, y = TextPreprocessor().load_and_preprocess_data('data/gim_diagnostic_dataset.csv')
+    model = PCAPredictionModel()
+    model.update_params(rf_params={'n_estimators': 12})
+    X_train, X_test, y_train, y_test = model.prepare_data(X, y)
+
+    metrics = distributed_train(model, X_train, y_train, cluster=LocalCluster(n_workers=2), n_workers=3)
+    assert metrics['n_parts'] == 3 and [p['n_trees'] for p in metrics['parts']] == [4, 4, 4]
+    assert model.model.n_estimators == len(model.model.estimators_) == 12
+    assert model.model.n_classes_ == len(model.label_encoder.classes_)
+
+    # Même job rejoué part par part (rôle worker d'un nœud) : forêt identique
+    with tempfile.TemporaryDirectory() as job_dir:
+        replay = PCAPredictionModel()
+        replay.update_params(rf_params={'n_estimators': 12})
+        replay.label_encoder = model.label_encoder
+        prepare_job(replay, X_train, y_train, job_dir, n_parts=3)
+        for part in range(3):
+            train_part(job_dir, part)
+        forest = merge_parts(job_dir)
+        features = model.transform(X_test)
+        assert np.allclose(forest.predict_proba(features), model.model.predict_proba(features))
+
+        os.remove(os.path.join(job_dir, 'parts', 'part_001.pkl'))
+        try:
+            merge_parts(job_dir)
+            raise AssertionError("Part manquante non détectée")
+        except ValueError:
+            pass
+
+    with tempfile.TemporaryDirectory() as tmp:
+        model.save_model(tmp)
+        predictor = PCAPredictor(model_dir=tmp)
+        predictor.load_model()
+        args = ('P0300', 'Engine misfiring randomly', 'Faulty spark plugs')
+        result = predictor.predict_single(*args)
+        processed = predictor.preprocess_input(*args)
+        expected = model.label_encoder.inverse_transform(model.model.predict(model.transform([processed])))[0]
+        assert result['predicted_pca'] == expected
+
+    print("✅ Entraînement distribué OK")
+
+
+if __name__ == "__main__":
+    test_distributed_training()
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Test du store de fréquences : vectoriseur reconstruit identique à un fit complet
+"""
+
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from preprocessing import TextPreprocessor
+from train_model import PCAPredictionModel
+from document_frequency import DocumentFrequencyStore
+from incremental_training import refresh_vectorizer
+
+
+def test_document_frequency_store():
+    """Compare le vectoriseur reconstruit par lots et un TfidfVectorizer.fit sur tout le corpus"""
+    print("📚 Test du store de fréquences de termes...")
+
+    _, X, y = TextPreprocessor().load_and_preprocess_data('data/gim_diagnostic_dataset.csv')
+    params = {'max_features': 300, 'ngram_range': (1, 2), 'min_df': 2, 'max_df': 0.5}
+
+    store = DocumentFrequencyStore.from_texts(X[:600], params)
+    store.update(X[600:])
+    rebuilt = store.build_vectorizer()
+    reference = TfidfVectorizer(**params).fit(X)
+
+    assert store.n_documents == len(X)
+    assert rebuilt.vocabulary_ == reference.vocabulary_
+    assert np.allclose(rebuilt.idf_, reference.idf_)
+    assert abs(rebuilt.transform(X) - reference.transform(X)).max() < 1e-12
+
+    # Filtres modifiables à la reconstruction, pas l'analyseur
+    assert len(store.build_vectorizer({'max_features': 100}).vocabulary_) == 100
+    try:
+        store.build_vectorizer({'ngram_range': (1, 3)})
+        raise AssertionError("ngram_range incompatible accepté")
+    except ValueError:
+        pass
+
+    # Forêt réindexée sur le vocabulaire rafraîchi
+    model = PCAPredictionModel()
+    model.rf_params['n_estimators'] = 10
+    model.tfidf_params.update(params)
+    X_train, _, y_train, _ = model.prepare_data(X, y)
+    model.train(X_train[:500], y_train[:500], validation='none')
+    model.df_store.update(X_train[500:])
+    stats = refresh_vectorizer(model)
+    print(f"Vocabulaire: +{stats['terms_added']} / -{stats['terms_removed']}, "
+          f"splits court-circuités: {stats['dropped_splits']}")
+
+    proba = model.model.predict_proba(model.vectorizer.transform(X))
+    assert proba.shape[1] == len(model.label_encoder.classes_)
+    assert np.allclose(proba.sum(axis=1), 1.0)
+
+    print("✅ Store de fréquences OK")
+
+
+if __name__ == "__main__":
+    test_document_frequency_store()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Test du stockage binaire des sorties d'évaluation : aller-retour sans perte
+"""
+
+import os
+import json
+import tempfile
+
+import numpy as np
+
+from preprocessing import TextPreprocessor
+from train_model import PCAPredictionModel
+from evaluation_store import write_evaluation_sidecar, load_evaluation_sidecar, summarize_evaluation
+
+
+def is_mapped(array: np.ndarray) -> bool:
+    """Indique si un tableau est (une vue d')un fichier projeté en mémoire"""
+    while array is not None:
+        if isinstance(array, np.memmap):
+            return True
+        array = array.base
+    return False
+
+
+def test_evaluation_sidecar():
+    """Écrit puis relit les tableaux d'une évaluation"""
+    print("📦 Test du stockage binaire de l'évaluation...")
+
+    _, X, y = TextPreprocessor().load_and_preprocess_data('data/gim_diagnostic_dataset.csv')
+    model = PCAPredictionModel()
+    model.rf_params['n_estimators'] = 20
+    X_train, X_test, y_train, y_test = model.prepare_data(X, y)
+    model.train(X_train, y_train, validation='none')
+    metrics = model.evaluate(X_test, y_test)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        sidecar = os.path.join(tmp, 'evaluation_arrays')
+        arrays = write_evaluation_sidecar(metrics, sidecar, model.label_encoder.classes_)
+        summary = summarize_evaluation(metrics, 'evaluation_arrays', arrays)
+        json.dumps(summary)  # sérialisable sans convertisseur
+
+        loaded = load_evaluation_sidecar(sidecar)
+        assert np.array_equal(loaded['predictions'], metrics['predictions'])
+        assert np.array_equal(loaded['true_labels'], metrics['true_labels'])
+        assert np.array_equal(loaded['confusion_matrix'], metrics['confusion_matrix'])
+        max_diff = np.abs(loaded['prediction_probabilities'].toarray() - metrics['prediction_probabilities']).max()
+        assert max_diff < 1e-6
+        assert isinstance(loaded['confusion_matrix'], np.memmap)
+
+        # Matrice de probabilités projetée : scipy garde les tableaux sans les copier
+        proba = loaded['prediction_probabilities']
+        assert proba.indices.dtype == proba.indptr.dtype == np.int32
+        assert all(is_mapped(array) for array in (proba.data, proba.indices, proba.indptr))
+        print(f"Écart max des probabilités (float32): {max_diff:.1e}")
+
+    print("✅ Stockage binaire de l'évaluation OK")
+
+
+if __name__ == "__main__":
+    test_evaluation_sidecar()
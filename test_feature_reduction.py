@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Test de la réduction de dimension : entraînement, sauvegarde et prédiction
+"""
+
+import tempfile
+
+import numpy as np
+import scipy.sparse as sp
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.feature_selection import SelectKBest, chi2
+from sklearn.model_selection import cross_val_score
+from sklearn.pipeline import make_pipeline
+
+from preprocessing import TextPreprocessor
+from train_model import PCAPredictionModel
+from predict import PCAPredictor
+
+
+def test_feature_reduction():
+    """Entraîne avec chi2 puis SVD et vérifie que PCAPredictor applique le réducteur"""
+    print("📉 Test de la réduction de dimension...")
+
+    _, X, y = TextPreprocessor().load_and_preprocess_data('data/gim_diagnostic_dataset.csv')
+
+    for method in ('chi2', 'svd'):
+        model = PCAPredictionModel()
+        model.update_params(rf_params={'n_estimators': 20},
+                            reduction_params={'method': method, 'n_components': 100})
+        X_train, X_test, y_train, y_test = model.prepare_data(X, y)
+        metrics = model.train(X_train, y_train, validation='none')
+        assert metrics['tfidf_shape'][1] == 100
+        assert model.model.n_features_in_ == 100
+        assert len(model.get_feature_importance(top_n=5)) == 5
+
+        with tempfile.TemporaryDirectory() as tmp:
+            model.save_model(tmp)
+
+            reloaded = PCAPredictionModel()
+            reloaded.load_model(tmp)
+            assert reloaded.reduction_params['method'] == method
+            before, after = model.transform(X_test[:10]), reloaded.transform(X_test[:10])
+            if sp.issparse(before):
+                before, after = before.toarray(), after.toarray()
+            assert np.allclose(before, after)
+
+            predictor = PCAPredictor(model_dir=tmp)
+            predictor.load_model()
+            assert predictor.reducer is not None
+            result = predictor.predict_single('P0300', 'Engine misfiring randomly', 'Faulty spark plugs')
+            processed = predictor.preprocess_input('P0300', 'Engine misfiring randomly', 'Faulty spark plugs')
+            expected = model.label_encoder.inverse_transform(model.model.predict(model.transform([processed])))[0]
+            assert result['predicted_pca'] == expected, (result['predicted_pca'], expected)
+        print(f"  {method}: OK")
+
+    # Validation croisée : chi2 réajusté dans chaque pli (pas de fuite du pli de test)
+    model = PCAPredictionModel()
+    model.update_params(rf_params={'n_estimators': 10},
+                        reduction_params={'method': 'chi2', 'n_components': 100})
+    X_train, _, y_train, _ = model.prepare_data(X, y)
+    metrics = model.train(X_train, y_train, validation='cv')
+    pipeline = make_pipeline(SelectKBest(chi2, k=100), RandomForestClassifier(**model.rf_params))
+    expected = cross_val_score(pipeline, model.vectorizer.transform(X_train), y_train, cv=5)
+    assert np.allclose(metrics['cv_scores'], expected)
+
+    print("✅ Réduction de dimension OK")
+
+
+if __name__ == "__main__":
+    test_feature_reduction()
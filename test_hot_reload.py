@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Test du rechargement à chaud du prédicteur : bascule, retour arrière et bundle altéré
+"""
+
+import os
+import time
+import tempfile
+
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.preprocessing import LabelEncoder
+
+from model_bundle import ModelBundle
+from predict import PCAPredictor
+
+
+EXAMPLES = [
+    ("P0300 engine misfiring randomly faulty spark plugs", "Replace spark plugs"),
+    ("P0128 coolant temperature low thermostat stuck open", "Replace thermostat"),
+    ("P0171 system too lean vacuum leak intake", "Check vacuum lines"),
+]
+
+
+def write_bundle(model_dir: str, n_classes: int, seed: int = 0) -> str:
+    """Écrit un bundle RandomForest sur les n_classes premiers exemples"""
+    texts = [text for text, _ in EXAMPLES[:n_classes]] * 4
+    labels = [label for _, label in EXAMPLES[:n_classes]] * 4
+    vectorizer = TfidfVectorizer()
+    X = vectorizer.fit_transform(texts)
+    label_encoder = LabelEncoder()
+    y = label_encoder.fit_transform(labels)
+    model = RandomForestClassifier(n_estimators=5, random_state=seed).fit(X, y)
+    return ModelBundle.create(model_dir, model, vectorizer, label_encoder).version
+
+
+def test_hot_reload():
+    """Bascule vers un nouveau bundle, retour arrière, refus d'un bundle altéré"""
+    print("🔄 Test du rechargement à chaud...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        model_dir = os.path.join(tmp, 'models')
+        v1 = write_bundle(model_dir, 2)
+
+        predictor = PCAPredictor(model_dir=model_dir)
+        predictor.load_model()
+        assert predictor.model_version == v1
+        assert not predictor.check_for_update()
+        assert not predictor.rollback()
+
+        # Nouvelle version : activée, l'ancienne est gardée pour le retour arrière
+        v2 = write_bundle(model_dir, 3)
+        assert v2 != v1
+        assert predictor.check_for_update()
+        assert predictor.model_version == v2
+        assert len(predictor.label_encoder.classes_) == 3
+        result = predictor.predict_single('P0171', 'System too lean', 'Vacuum leak')
+        assert result['predicted_pca'] == 'Check vacuum lines'
+
+        # Retour arrière : v1 réactivée, v2 (toujours sur disque) écartée
+        assert predictor.rollback()
+        assert predictor.model_version == v1
+        assert len(predictor.label_encoder.classes_) == 2
+        assert not predictor.check_for_update()
+        assert predictor.model_version == v1
+
+        # Bundle altéré (taille d'un artefact modifiée) : refusé, v1 continue de servir
+        write_bundle(model_dir, 3, seed=1)
+        with open(os.path.join(model_dir, 'model.pkl'), 'ab') as f:
+            f.write(b'\0')
+        assert not predictor.reload_model()
+        assert 'model.pkl' in predictor.last_reload_error
+        assert not predictor.check_for_update()
+        assert predictor.model_version == v1
+        result = predictor.predict_single('P0300', 'Engine misfiring randomly', 'Faulty spark plugs')
+        assert 'error' not in result and result['predicted_pca'] == 'Replace spark plugs'
+
+        # Artefact illisible à la même taille : refusé au chargement
+        write_bundle(model_dir, 3, seed=2)
+        path = os.path.join(model_dir, 'vectorizer.pkl')
+        size = os.path.getsize(path)
+        with open(path, 'wb') as f:
+            f.write(b'\0' * size)
+        assert not predictor.check_for_update()
+        assert predictor.model_version == v1
+
+        # Surveillance en arrière-plan : une version valide est activée sans appel explicite
+        v5 = write_bundle(model_dir, 3, seed=3)
+        predictor.start_watching(poll_interval=0.05)
+        try:
+            deadline = time.time() + 10
+            while predictor.model_version != v5 and time.time() < deadline:
+                time.sleep(0.05)
+        finally:
+            predictor.stop_watching()
+        assert predictor.model_version == v5
+        assert predictor.last_reload_error is None
+
+    print("✅ Rechargement à chaud OK")
+
+
+if __name__ == "__main__":
+    test_hot_reload()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Test de la recherche d'hyperparamètres par élimination successive
+"""
+
+import os
+import json
+import time
+import tempfile
+
+import pandas as pd
+
+from preprocessing import TextPreprocessor
+from train_model import PCAPredictionModel
+from hyperparameter_search import SuccessiveHalvingSearch, save_leaderboard, expand_grid
+
+
+TFIDF_GRID = {'min_df': [1, 2]}
+RF_GRID = {'max_depth': [5, 10, None], 'min_samples_leaf': [1, 2]}
+
+
+def load_training_split():
+    """Split d'entraînement du dataset historique (comme run_search)"""
+    _, X, y = TextPreprocessor().load_and_preprocess_data('data/gim_diagnostic_dataset.csv')
+    X_train, _, y_train, _ = PCAPredictionModel().prepare_data(X, y)
+    return X_train, y_train
+
+
+class SlowSearch(SuccessiveHalvingSearch):
+    """Recherche dont chaque évaluation prend au moins 0.2 s (test du budget)"""
+
+    def _evaluate(self, *args, **kwargs):
+        result = super()._evaluate(*args, **kwargs)
+        time.sleep(0.2)
+        return result
+
+
+def test_successive_halving():
+    """Tours eta=3 : ressources croissantes, promotion du meilleur tiers, classement écrit"""
+    print("🔎 Test de la recherche par élimination successive...")
+
+    assert len(expand_grid(RF_GRID)) == 6
+    X_train, y_train = load_training_split()
+
+    search = SuccessiveHalvingSearch(TFIDF_GRID, RF_GRID, eta=3, min_trees=2, max_trees=18,
+                                     min_data_fraction=1 / 9, time_budget_s=600)
+    result = search.run(X_train, y_train)
+    leaderboard = result['leaderboard']
+
+    # 12 candidats -> 4 -> 2, avec 2/6/18 arbres et 1/9, 1/3, 100 % des données
+    rungs = [[r for r in leaderboard if r['rung'] == rung] for rung in range(3)]
+    assert [len(r) for r in rungs] == [12, 4, 2] and len(leaderboard) == 18
+    assert [r[0]['n_estimators'] for r in rungs] == [2, 6, 18]
+    assert abs(rungs[0][0]['data_fraction'] - 1 / 9) < 1e-12 and rungs[2][0]['data_fraction'] == 1.0
+    assert result['feature_configs_fitted'] == 2 and not result['budget_exhausted']
+
+    # Promotion : les survivants sont les meilleurs du tour précédent
+    for previous, current in zip(rungs, rungs[1:]):
+        ranked = sorted(previous, key=lambda r: r['accuracy'], reverse=True)
+        assert {r['candidate_id'] for r in current} == {r['candidate_id'] for r in ranked[:len(current)]}
+    assert result['best'] == max(rungs[2], key=lambda r: r['accuracy'])
+    assert all(r['latency_ms'] > 0 and r['fit_time_s'] > 0 for r in leaderboard)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = save_leaderboard(result, tmp)
+        table = pd.read_csv(paths['csv'])
+        assert len(table) == 18 and list(table['rung'])[:2] == [2, 2]
+        assert table['accuracy'].iloc[0] == result['best']['accuracy']
+        with open(paths['json'], 'r', encoding='utf-8') as f:
+            assert len(json.load(f)['leaderboard']) == 18
+        with open(paths['best_params'], 'r', encoding='utf-8') as f:
+            best_params = json.load(f)
+        assert best_params['rf_params']['n_estimators'] == 18
+        assert best_params['tfidf_params'] == result['best']['tfidf_params']
+
+    # Budget de temps : la recherche s'arrête en cours de premier tour
+    slow = SlowSearch(TFIDF_GRID, RF_GRID, eta=3, min_trees=2, max_trees=18,
+                      min_data_fraction=1 / 9, time_budget_s=0.5)
+    partial = slow.run(X_train, y_train)
+    assert partial['budget_exhausted']
+    assert 1 <= len(partial['leaderboard']) < 12
+    assert all(r['rung'] == 0 for r in partial['leaderboard'])
+
+    try:
+        SuccessiveHalvingSearch(TFIDF_GRID, RF_GRID, time_budget_s=0).run(X_train, y_train)
+        raise AssertionError("Un budget nul doit être signalé")
+    except RuntimeError:
+        pass
+
+    print("✅ Recherche par élimination successive OK")
+
+
+if __name__ == "__main__":
+    test_successive_halving()
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Test de la mise à jour incrémentale : nouvelles PCA, arbres ajoutés et retirés
+"""
+
+import numpy as np
+
+from preprocessing import TextPreprocessor
+from train_model import PCAPredictionModel
+from incremental_training import incremental_update
+
+
+def test_incremental_update():
+    """Ajoute des arbres entraînés sur un lot contenant des PCA inconnues du modèle"""
+    print("🔁 Test de la mise à jour incrémentale...")
+
+    _, X, y = TextPreprocessor().load_and_preprocess_data('data/gim_diagnostic_dataset.csv')
+    X, y = X.reset_index(drop=True), y.reset_index(drop=True)
+
+    # Historique sans les 3 dernières PCA, nouveau lot avec toutes les PCA
+    held_out = sorted(y.unique())[-3:]
+    history = ~y.isin(held_out) & (np.arange(len(y)) < 800)
+    batch = np.arange(len(y)) >= 800
+
+    model = PCAPredictionModel()
+    model.rf_params['n_estimators'] = 20
+    model.prepare_data(X[history], y[history])
+    model.train(X[history], model.label_encoder.transform(y[history]), validation='none')
+    vocabulary = dict(model.vectorizer.vocabulary_)
+
+    stats = incremental_update(model, X[batch], y[batch], n_new_trees=10, max_trees=25)
+    print(f"Arbres: {stats['n_trees_before']} -> {stats['n_trees_after']}, "
+          f"nouvelles PCA: {stats['n_new_classes']}")
+
+    assert stats['n_new_classes'] == 3
+    assert stats['n_trees_after'] == 25 and stats['n_trees_retired'] == 5
+    assert model.vectorizer.vocabulary_ == vocabulary
+    assert list(model.label_encoder.classes_) == sorted(y.unique())
+
+    X_tfidf = model.vectorizer.transform(X)
+    proba = model.model.predict_proba(X_tfidf)
+    assert proba.shape == (len(X), len(model.label_encoder.classes_))
+    assert np.allclose(proba.sum(axis=1), 1.0)
+
+    # Les nouvelles PCA sont prédictibles sur le lot qui les contient
+    predicted = set(model.label_encoder.inverse_transform(model.model.predict(X_tfidf[batch])))
+    assert predicted & set(held_out)
+
+    print("✅ Mise à jour incrémentale OK")
+
+
+if __name__ == "__main__":
+    test_incremental_update()
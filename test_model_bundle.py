@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Test du stockage des artefacts et des bundles de modèle versionnés
+"""
+
+import os
+import json
+import tempfile
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.preprocessing import LabelEncoder
+
+from model_storage import save_artifact, load_artifact, clear_artifact_cache
+from model_bundle import ModelBundle, MANIFEST_NAME, texts_sha256
+from setup_models import create_basic_models
+from train_model import PCAPredictionModel
+
+
+TEXTS = ["P0420 catalyst efficiency", "P0171 system too lean", "P0128 coolant thermostat"]
+LABELS = ["Replace catalyst", "Check MAF", "Replace thermostat"]
+
+
+def _tamper(path: str, append: bool = False) -> None:
+    """Modifie un octet du fichier (taille conservée) ou ajoute un octet"""
+    with open(path, 'r+b') as f:
+        if append:
+            f.seek(0, os.SEEK_END)
+            f.write(b'\0')
+        else:
+            f.seek(-1, os.SEEK_END)
+            last = f.read(1)
+            f.seek(-1, os.SEEK_END)
+            f.write(bytes([last[0] ^ 0xFF]))
+
+
+def test_artifact_round_trip():
+    """save_artifact/load_artifact : aller-retour, projection mémoire et cache"""
+    print("🗺️ Test du stockage des artefacts...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'artifact.pkl')
+        obj = {'weights': np.arange(1000, dtype=np.float32), 'name': 'forest'}
+        save_artifact(obj, path)
+        assert os.listdir(tmp) == ['artifact.pkl']
+
+        clear_artifact_cache()
+        loaded = load_artifact(path)
+        assert loaded['name'] == 'forest'
+        assert isinstance(loaded['weights'], np.memmap)
+        assert np.array_equal(loaded['weights'], obj['weights'])
+        assert load_artifact(path) is loaded
+
+        copied = load_artifact(path, mmap_mode=None, use_cache=False)
+        assert not isinstance(copied['weights'], np.memmap)
+
+        # Nouvelle version du fichier : le cache ne resert pas l'ancienne
+        save_artifact({'weights': np.zeros(3, dtype=np.float32), 'name': 'compact'}, path)
+        reloaded = load_artifact(path)
+        assert reloaded is not loaded and reloaded['name'] == 'compact'
+        assert np.array_equal(loaded['weights'], obj['weights'])
+        clear_artifact_cache()
+
+    print("✅ Stockage des artefacts OK")
+
+
+def test_bundle_create_validate():
+    """ModelBundle.create/open/validate : manifest, hash rapide et complet"""
+    print("📦 Test des bundles de modèle...")
+
+    vectorizer = TfidfVectorizer()
+    X = vectorizer.fit_transform(TEXTS)
+    label_encoder = LabelEncoder()
+    y = label_encoder.fit_transform(LABELS)
+    model = RandomForestClassifier(n_estimators=5, random_state=0).fit(X, y)
+    data_hash = texts_sha256(TEXTS, LABELS)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        bundle_dir = os.path.join(tmp, 'bundle')
+        created = ModelBundle.create(bundle_dir, model, vectorizer, label_encoder,
+                                     feature_config={'tfidf_params': {}}, training_data_hash=data_hash,
+                                     parent_version='v0', extra_artifacts={'extra.pkl': [1, 2, 3]})
+
+        bundle = ModelBundle.open(bundle_dir)
+        assert bundle.version == created.version
+        assert bundle.classes == list(label_encoder.classes_)
+        assert bundle.manifest['training_data_hash'] == data_hash
+        assert bundle.manifest['parent_version'] == 'v0'
+        assert set(bundle.manifest['files']) == {'model.pkl', 'vectorizer.pkl', 'label_encoder.pkl', 'extra.pkl'}
+        assert bundle.validate() == []
+        assert bundle.load('extra.pkl') == [1, 2, 3]
+        assert np.array_equal(bundle.model.predict(bundle.vectorizer.transform(TEXTS)), model.predict(X))
+
+        # Même contenu : même version ; contenu différent : autre version
+        same = ModelBundle.create(os.path.join(tmp, 'same'), model, vectorizer, label_encoder,
+                                  feature_config={'tfidf_params': {}}, training_data_hash=data_hash,
+                                  parent_version='v0', extra_artifacts={'extra.pkl': [1, 2, 3]})
+        assert same.version == bundle.version
+        other = ModelBundle.create(os.path.join(tmp, 'other'), model, vectorizer, label_encoder,
+                                   extra_artifacts={'extra.pkl': [4]})
+        assert other.version != bundle.version
+
+        # Octet modifié : seul le hash complet le détecte
+        _tamper(os.path.join(bundle_dir, 'extra.pkl'))
+        assert ModelBundle.open(bundle_dir).validate(check_hashes=False) == []
+        problems = ModelBundle.open(bundle_dir).validate(raise_on_error=False)
+        assert problems == ["extra.pkl: hash SHA-256 différent"]
+        try:
+            ModelBundle.open(bundle_dir).validate()
+            raise AssertionError("Un bundle altéré doit être refusé")
+        except ValueError:
+            pass
+
+        # Taille modifiée ou fichier manquant : détectés aussi par la validation rapide
+        _tamper(os.path.join(bundle_dir, 'vectorizer.pkl'), append=True)
+        os.remove(os.path.join(bundle_dir, 'label_encoder.pkl'))
+        problems = ModelBundle.open(bundle_dir).validate(check_hashes=False, raise_on_error=False)
+        assert len(problems) == 2
+        assert any(p.startswith('vectorizer.pkl: taille') for p in problems)
+        assert "label_encoder.pkl: fichier manquant" in problems
+
+        # Format futur : refusé à l'ouverture
+        manifest_path = os.path.join(tmp, 'same', MANIFEST_NAME)
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        manifest['format_version'] = 99
+        with open(manifest_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f)
+        try:
+            ModelBundle.open(os.path.join(tmp, 'same'))
+            raise AssertionError("Un format de bundle inconnu doit être refusé")
+        except ValueError:
+            pass
+
+    print("✅ Bundles de modèle OK")
+
+
+def test_setup_models_keeps_existing():
+    """create_basic_models n'écrase pas un modèle existant sans overwrite=True"""
+    print("🛡️ Test de la protection des modèles existants...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        model_dir = os.path.join(tmp, 'models')
+        create_basic_models(model_dir)
+        version = ModelBundle.open(model_dir).version
+        mtime = os.stat(os.path.join(model_dir, 'model.pkl')).st_mtime_ns
+
+        # Bundle existant : conservé tel quel
+        create_basic_models(model_dir)
+        assert ModelBundle.open(model_dir).version == version
+        assert os.stat(os.path.join(model_dir, 'model.pkl')).st_mtime_ns == mtime
+
+        # Modèle non versionné (model.pkl sans manifest) : conservé aussi
+        os.remove(os.path.join(model_dir, MANIFEST_NAME))
+        create_basic_models(model_dir)
+        assert not ModelBundle.exists(model_dir)
+        assert os.stat(os.path.join(model_dir, 'model.pkl')).st_mtime_ns == mtime
+
+        # overwrite=True : remplacé par un nouveau bundle
+        create_basic_models(model_dir, overwrite=True)
+        assert ModelBundle.exists(model_dir)
+        assert ModelBundle.open(model_dir).validate() == []
+
+        # Configuration JSON-compatible : le bundle se recharge et se réentraîne
+        model = PCAPredictionModel()
+        tfidf_keys = set(model.tfidf_params)
+        assert set(ModelBundle.open(model_dir).manifest['feature_config']['tfidf_params']) == tfidf_keys
+        model.load_model(model_dir)
+        assert set(model.tfidf_params) == tfidf_keys
+        assert model.create_vectorizer().fit_transform(TEXTS).shape[0] == len(TEXTS)
+
+        # Clés étrangères aux paramètres du modèle : ignorées
+        model.update_params({'dtype': "<class 'numpy.float64'>", 'min_df': 1}, {'unknown': 1},
+                            {'method': 'chi2', 'extra': True})
+        assert 'dtype' not in model.tfidf_params and model.tfidf_params['min_df'] == 1
+        assert 'unknown' not in model.rf_params and 'extra' not in model.reduction_params
+
+    print("✅ Protection des modèles existants OK")
+
+
+if __name__ == "__main__":
+    test_artifact_round_trip()
+    test_bundle_create_validate()
+    test_setup_models_keeps_existing()
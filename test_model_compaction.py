@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Test de la compaction du modèle RandomForest : mêmes prédictions, artefact plus petit
+"""
+
+import os
+import tempfile
+
+import joblib
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+
+from preprocessing import TextPreprocessor
+from train_model import PCAPredictionModel, DF_STORE_FILE
+from model_bundle import ModelBundle, REDUCER_FILE
+from predict import PCAPredictor
+from model_compaction import CompactForest, compact_model_dir
+
+
+def test_compaction():
+    """Compare la forêt scikit-learn et sa version compacte"""
+    print("📦 Test de la compaction du modèle...")
+
+    _, X, y = TextPreprocessor().load_and_preprocess_data('data/gim_diagnostic_dataset.csv')
+    model = PCAPredictionModel()
+    model.rf_params['n_estimators'] = 20
+    X_train, X_test, y_train, y_test = model.prepare_data(X, y)
+    model.train(X_train, y_train)
+
+    X_test_tfidf = model.vectorizer.transform(X_test)
+    compact = CompactForest.from_forest(model.model)
+
+    proba_forest = model.model.predict_proba(X_test_tfidf)
+    proba_compact = compact.predict_proba(X_test_tfidf)
+    max_diff = float(np.abs(proba_forest - proba_compact).max())
+    print(f"Écart max des probabilités: {max_diff:.2e}")
+    assert max_diff < 1e-5
+    assert np.array_equal(model.model.predict(X_test_tfidf), compact.predict(X_test_tfidf))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        model.save_model(os.path.join(tmp, 'full'))
+        report = compact_model_dir(os.path.join(tmp, 'full'), os.path.join(tmp, 'compact'),
+                                   X_test, y_test)
+        print(f"Taille: {report['before']['size_bytes']} -> {report['after']['size_bytes']} octets")
+        assert report['after']['size_bytes'] < report['before']['size_bytes']
+        assert report['prediction_agreement'] == 1.0
+        assert isinstance(joblib.load(os.path.join(tmp, 'compact', 'model.pkl')), CompactForest)
+
+        # Sortie versionnée : manifest valide, dérivée de la version source
+        bundle = ModelBundle.open(os.path.join(tmp, 'compact'))
+        assert bundle.validate() == [] and bundle.version == report['version']
+        assert bundle.manifest['parent_version'] == model.model_version
+        assert bundle.manifest['feature_config']['compact']
+
+        # Élagage : le type des distributions demandé est conservé
+        report = compact_model_dir(os.path.join(tmp, 'full'), os.path.join(tmp, 'pruned'), X_test, y_test,
+                                   max_accuracy_drop=0.05, value_dtype='float16')
+        pruned = joblib.load(os.path.join(tmp, 'pruned', 'model.pkl'))
+        assert pruned.leaf_values.dtype == np.float16
+        assert report['pruning']['baseline_accuracy'] - report['after']['accuracy'] <= 0.05 + 1e-9
+
+    print("✅ Compaction OK")
+
+
+def test_compaction_with_reducer():
+    """Bundle avec réducteur chi2 : forêt évaluée et servie sur les features réduites"""
+    print("📦 Test de la compaction d'un modèle réduit...")
+
+    _, X, y = TextPreprocessor().load_and_preprocess_data('data/gim_diagnostic_dataset.csv')
+    model = PCAPredictionModel()
+    model.update_params(rf_params={'n_estimators': 10},
+                        reduction_params={'method': 'chi2', 'n_components': 100})
+    X_train, X_test, y_train, y_test = model.prepare_data(X, y)
+    model.train(X_train, y_train)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        model.save_model(os.path.join(tmp, 'full'))
+        output_dir = os.path.join(tmp, 'compact')
+        report = compact_model_dir(os.path.join(tmp, 'full'), output_dir, X_test, y_test)
+        assert report['prediction_agreement'] == 1.0
+        assert os.path.exists(os.path.join(output_dir, REDUCER_FILE))
+        assert os.path.exists(os.path.join(output_dir, DF_STORE_FILE))
+        assert {REDUCER_FILE, DF_STORE_FILE} <= set(ModelBundle.open(output_dir).manifest['files'])
+        predictor = PCAPredictor(model_dir=output_dir)
+        predictor.load_model()
+        assert predictor.model_version == report['version']
+        assert 'error' not in predictor.predict_single('P0300', 'Engine misfiring randomly', 'Faulty spark plugs')
+
+        # Forêt multi-sortie : refusée avant toute écriture
+        multi = RandomForestClassifier(n_estimators=2, random_state=0).fit(
+            model.transform(X_train[:20]), np.stack([y_train[:20], y_train[:20]], axis=1))
+        ModelBundle.create(os.path.join(tmp, 'multi'), multi, model.vectorizer, model.label_encoder,
+                           extra_artifacts={REDUCER_FILE: model.reducer})
+        try:
+            compact_model_dir(os.path.join(tmp, 'multi'), os.path.join(tmp, 'multi_compact'))
+            raise AssertionError("Une forêt multi-sortie doit être refusée")
+        except ValueError:
+            pass
+        assert not os.path.exists(os.path.join(tmp, 'multi_compact'))
+
+    print("✅ Compaction d'un modèle réduit OK")
+
+
+if __name__ == "__main__":
+    test_compaction()
+    test_compaction_with_reducer()
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Test du modèle multi-tâches : PCA et composant prédits en une seule passe
+"""
+
+import tempfile
+
+from multi_task import MultiTaskPCAModel, load_multi_task_data
+from predict import PCAPredictor
+
+
+def test_multi_task():
+    """Entraîne, sauvegarde et vérifie que PCAPredictor renvoie PCA et composant"""
+    print("🎯 Test du modèle multi-tâches...")
+
+    X, y, components = load_multi_task_data('data/gim_diagnostic_dataset.csv')
+    model = MultiTaskPCAModel()
+    model.update_params(rf_params={'n_estimators': 10})
+    X_train, X_test, Y_train, Y_test = model.prepare_data(X, y, components)
+    assert Y_train.shape[1] == 2
+    model.train(X_train, Y_train)
+    assert model.model.n_outputs_ == 2
+
+    metrics = model.evaluate(X_test, Y_test)
+    assert 0.0 <= metrics['joint_accuracy'] <= min(metrics['pca']['accuracy'],
+                                                   metrics['component']['accuracy'])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        model.save_model(tmp)
+
+        reloaded = MultiTaskPCAModel()
+        reloaded.load_model(tmp)
+        assert list(reloaded.component_encoder.classes_) == list(model.component_encoder.classes_)
+
+        predictor = PCAPredictor(model_dir=tmp)
+        predictor.load_model()
+        args = ('P0300', 'Engine misfiring randomly', 'Faulty spark plugs')
+        result = predictor.predict_single(*args)
+        expected = model.predict_both([predictor.preprocess_input(*args)])
+        assert result['predicted_pca'] == expected['pca'][0]
+        assert result['predicted_component'] == expected['component'][0]
+        assert abs(sum(result['all_probabilities'].values()) - 1.0) < 1e-6
+
+    print("✅ Modèle multi-tâches OK")
+
+
+if __name__ == "__main__":
+    test_multi_task()
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Test de l'export ONNX de DistilBERT et du backend 'onnx' de PCAPredictor
+"""
+
+import os
+import tempfile
+
+from predict import PCAPredictor, TRANSFORMERS_AVAILABLE
+from onnx_backend import ONNXRUNTIME_AVAILABLE, export_onnx
+from test_distilbert_inference import make_tiny_checkpoint, TINY_LABELS
+
+
+def test_onnx_backend():
+    """Exporte un petit checkpoint et compare les prédictions ONNX et PyTorch"""
+    print("📦 Test du backend ONNX...")
+
+    if not (TRANSFORMERS_AVAILABLE and ONNXRUNTIME_AVAILABLE):
+        print("⚠️ transformers/torch/onnxruntime non installés - test ignoré")
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        checkpoint = os.path.join(tmp, 'distilbert_pca_model')
+        make_tiny_checkpoint(checkpoint)
+        onnx_dir = os.path.join(tmp, 'onnx')
+
+        manifest = export_onnx(checkpoint, onnx_dir)
+        verification = manifest['metadata']['verification']
+        assert verification['within_tolerance'] and verification['same_predictions']
+        assert manifest['classes'] == TINY_LABELS
+
+        onnx = PCAPredictor(backend='onnx', onnx_dir=onnx_dir, onnx_threads=1, onnx_optimization='all')
+        onnx.load_model()
+        assert onnx.model_version == manifest['model_version']
+        torch_predictor = PCAPredictor(backend='distilbert', checkpoint_dir=checkpoint)
+        torch_predictor.load_model()
+
+        for args in (('P0300', 'Engine misfiring randomly', 'Faulty spark plugs'),
+                     ('P0171', 'System too lean', '')):
+            expected = torch_predictor.predict_single(*args)
+            result = onnx.predict_single(*args)
+            assert result['predicted_pca'] == expected['predicted_pca']
+            for label, prob in expected['all_probabilities'].items():
+                assert abs(result['all_probabilities'][label] - prob) < 1e-5
+
+        # Lots ONNX (axes dynamiques) : mêmes sorties que PyTorch, dans l'ordre d'entrée
+        examples = [{'code_dtc': 'P0300', 'description': 'Engine misfiring randomly spark plugs vacuum leak'},
+                    {'code_dtc': 'P0171', 'description': 'System too lean'}]
+        onnx_batch = onnx.predict_batch(examples, return_probabilities=True)
+        torch_batch = torch_predictor.predict_batch(examples, return_probabilities=True)
+        assert [r['predicted_pca'] for r in onnx_batch] == [r['predicted_pca'] for r in torch_batch]
+
+    print("✅ Backend ONNX OK")
+
+
+if __name__ == "__main__":
+    test_onnx_backend()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Test de la validation croisée sur store de features partagé
+"""
+
+import os
+import tempfile
+
+import numpy as np
+from sklearn.datasets import make_classification
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.feature_selection import SelectKBest, chi2
+from sklearn.model_selection import cross_val_score
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import LabelEncoder
+
+from preprocessing import TextPreprocessor
+from parallel_cv import SharedMemoryCV, plan_thread_budget
+
+
+RF_PARAMS = {'n_estimators': 15, 'max_depth': 10, 'random_state': 42, 'n_jobs': 1}
+
+
+def test_plan_thread_budget():
+    """Répartition du budget de threads entre plis et arbres"""
+    print("🧮 Test de la répartition des threads...")
+
+    assert plan_thread_budget(5, 1) == (1, 1)
+    assert plan_thread_budget(5, 2) == (2, 1)
+    assert plan_thread_budget(5, 8) == (5, 1)
+    assert plan_thread_budget(3, 12) == (3, 4)
+    assert plan_thread_budget(3, 10) == (3, 3)
+    assert plan_thread_budget(1, 4) == (1, 4)
+
+    # Budget absent ou invalide : nombre de CPU
+    cpus = os.cpu_count() or 1
+    expected = (min(5, cpus), max(1, cpus // min(5, cpus)))
+    assert plan_thread_budget(5) == expected
+    assert plan_thread_budget(5, 0) == expected
+
+    print("✅ Répartition des threads OK")
+
+
+def test_shared_memory_cv():
+    """Mêmes scores par pli que cross_val_score, en creux, en dense et avec réduction"""
+    print("🔀 Test de la validation croisée partagée...")
+
+    _, texts, labels = TextPreprocessor().load_and_preprocess_data('data/gim_diagnostic_dataset.csv')
+    X_sparse = TfidfVectorizer(max_features=2000).fit_transform(texts)
+    y_sparse = LabelEncoder().fit_transform(labels)
+    X_dense, y_dense = make_classification(n_samples=300, n_features=20, n_informative=8,
+                                           n_classes=3, random_state=0)
+
+    for X, y in ((X_sparse, y_sparse), (X_dense, y_dense)):
+        expected = cross_val_score(RandomForestClassifier(**RF_PARAMS), X, y, cv=5)
+        for thread_budget in (1, 2):
+            result = SharedMemoryCV(n_splits=5, thread_budget=thread_budget).run(RF_PARAMS, X, y)
+            assert np.allclose(result['scores'], expected)
+            assert abs(result['mean'] - expected.mean()) < 1e-12
+            assert [f['fold'] for f in result['folds']] == list(range(5))
+            assert sum(f['n_test'] for f in result['folds']) == len(y)
+            assert (result['parallel_folds'], result['threads_per_fold']) == plan_thread_budget(5, thread_budget)
+
+    # Réduction chi2 réajustée dans chaque pli : mêmes scores qu'un pipeline scikit-learn
+    reducer = SelectKBest(chi2, k=200)
+    result = SharedMemoryCV(n_splits=5, thread_budget=1).run(RF_PARAMS, X_sparse, y_sparse, reducer=reducer)
+    pipeline = make_pipeline(SelectKBest(chi2, k=200), RandomForestClassifier(**RF_PARAMS))
+    assert np.allclose(result['scores'], cross_val_score(pipeline, X_sparse, y_sparse, cv=5))
+    assert not hasattr(reducer, 'scores_')
+
+    # Le store projeté est supprimé après la validation
+    with tempfile.TemporaryDirectory() as tmp:
+        SharedMemoryCV(n_splits=3, thread_budget=1, temp_dir=tmp).run(RF_PARAMS, X_dense, y_dense)
+        assert os.listdir(tmp) == []
+
+    print("✅ Validation croisée partagée OK")
+
+
+if __name__ == "__main__":
+    test_plan_thread_budget()
+    test_shared_memory_cv()
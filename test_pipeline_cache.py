@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Test du cache des étapes du pipeline : clés, empreinte du code et reprise (--resume)
+"""
+
+import io
+import os
+import sys
+import contextlib
+import importlib
+import tempfile
+
+from pipeline_cache import StageCache, stage_key, code_fingerprint, project_sources
+from main import PCAMLPipeline
+
+
+CACHED_STAGES = ('preprocess', 'split', 'train', 'evaluate', 'feature_importance')
+
+
+def _write(path: str, source: str) -> None:
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(source)
+
+
+def test_code_fingerprint():
+    """L'empreinte suit les modules du projet importés, même dans une fonction"""
+    print("🧬 Test de l'empreinte du code...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        _write(os.path.join(tmp, 'fp_stage.py'),
+               "import os\nfrom fp_helper import VALUE\n\n\ndef run():\n    import fp_lazy\n    return fp_lazy\n")
+        _write(os.path.join(tmp, 'fp_helper.py'), "import fp_deep\nVALUE = 1\n")
+        _write(os.path.join(tmp, 'fp_deep.py'), "DEPTH = 2\n")
+        _write(os.path.join(tmp, 'fp_lazy.py'), "LAZY = 3\n")
+        _write(os.path.join(tmp, 'fp_other.py'), "OTHER = 4\n")
+
+        sys.path.insert(0, tmp)
+        try:
+            module = importlib.import_module('fp_stage')
+            names = [os.path.basename(p) for p in project_sources(module)]
+            assert names == ['fp_deep.py', 'fp_helper.py', 'fp_lazy.py', 'fp_stage.py']
+            assert code_fingerprint('fp_stage') == code_fingerprint(module)
+
+            reference = code_fingerprint(module)
+            _write(os.path.join(tmp, 'fp_other.py'), "OTHER = 5\n")
+            assert code_fingerprint(module) == reference
+            for name in ('fp_deep.py', 'fp_lazy.py'):
+                _write(os.path.join(tmp, name), "CHANGED = True\n")
+                assert code_fingerprint(module) != reference
+                reference = code_fingerprint(module)
+        finally:
+            sys.path.remove(tmp)
+            for name in ('fp_stage', 'fp_helper', 'fp_deep'):
+                sys.modules.pop(name, None)
+
+    # Modules réels : l'entraînement dépend des modules qu'il importe
+    names = {os.path.basename(p) for p in project_sources('train_model')}
+    assert {'train_model.py', 'preprocessing.py', 'parallel_cv.py', 'document_frequency.py',
+            'model_bundle.py', 'model_compaction.py'} <= names
+
+    print("✅ Empreinte du code OK")
+
+
+def test_stage_cache():
+    """Clés sensibles aux entrées, une version par étape, état du dernier run"""
+    print("🗄️ Test du cache des étapes...")
+
+    assert stage_key('train', 'abc', {'n_estimators': 10}) == stage_key('train', 'abc', {'n_estimators': 10})
+    assert stage_key('train', 'abc', {'n_estimators': 10}) != stage_key('train', 'abc', {'n_estimators': 20})
+    assert stage_key('train', 'abc') != stage_key('evaluate', 'abc')
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = StageCache(os.path.join(tmp, 'cache'))
+        assert not cache.has('train', 'k1')
+        cache.save('train', 'k1', {'accuracy': 0.5})
+        assert cache.has('train', 'k1') and cache.load('train', 'k1') == {'accuracy': 0.5}
+
+        # Nouvelle clé : l'ancienne sortie est supprimée
+        cache.save('train', 'k2', {'accuracy': 0.6})
+        assert not cache.has('train', 'k1') and cache.has('train', 'k2')
+
+        # Cache désactivé : rien n'est relu
+        cache.enabled = False
+        assert not cache.has('train', 'k2')
+        cache.enabled = True
+
+        assert cache.read_run_state() is None
+        cache.write_run_state({'validation': 'none'}, {'train': {'status': 'computed'}}, 'failed')
+        state = cache.read_run_state()
+        assert state['status'] == 'failed' and state['config'] == {'validation': 'none'}
+
+        cache.clear()
+        assert not cache.has('train', 'k2') and cache.read_run_state() is None
+
+    print("✅ Cache des étapes OK")
+
+
+def _statuses(pipeline: PCAMLPipeline):
+    return {name: stage['status'] for name, stage in pipeline._stages.items()}
+
+
+def test_pipeline_resume():
+    """Relance : étapes inchangées reprises ; --resume reprend la configuration du run en échec"""
+    print("🔁 Test de la reprise du pipeline...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        model_dir = os.path.join(tmp, 'models')
+
+        def pipeline(n_estimators=None):
+            run = PCAMLPipeline('data/gim_diagnostic_dataset.csv', model_dir)
+            if n_estimators:
+                run.model.update_params(rf_params={'n_estimators': n_estimators})
+            return run
+
+        first = pipeline(10)
+        first.run_full_pipeline(save_results=False, validation='none')
+        assert all(_statuses(first)[name] == 'computed' for name in CACHED_STAGES)
+
+        # Même configuration : tout est repris sauf les étapes à effets de bord
+        second = pipeline(10)
+        second.run_full_pipeline(save_results=False, validation='none')
+        statuses = _statuses(second)
+        assert all(statuses[name] == 'cached' for name in CACHED_STAGES)
+        assert statuses['save'] == statuses['prediction_test'] == 'computed'
+
+        # Paramètres de la forêt modifiés : entraînement et aval recalculés, amont repris
+        third = pipeline(12)
+        def failing_save(*args, **kwargs):
+            raise RuntimeError("disque plein")
+        third.model.save_model = failing_save
+        try:
+            third.run_full_pipeline(save_results=False, validation='none')
+            raise AssertionError("L'échec de la sauvegarde doit être propagé")
+        except Exception as e:
+            assert 'disque plein' in str(e)
+        statuses = _statuses(third)
+        assert statuses['preprocess'] == statuses['split'] == 'cached'
+        assert statuses['train'] == statuses['evaluate'] == 'computed'
+        assert statuses['save'] == 'failed' and statuses['prediction_test'] == 'skipped'
+        assert third.cache.read_run_state()['status'] == 'failed'
+
+        # --resume : configuration du run en échec (12 arbres, sans validation), reprise après l'échec
+        resumed = pipeline()
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            results = resumed.run_full_pipeline(save_results=False, resume=True)
+        # Options de la commande remplacées : signalées, pas ignorées en silence
+        assert "rf_params.n_estimators: 100 -> 12" in output.getvalue()
+        assert "validation: 'oob' -> 'none'" in output.getvalue()
+        assert 'tfidf_params' not in output.getvalue()
+        assert resumed.model.rf_params['n_estimators'] == 12
+        assert resumed._run_config['validation'] == 'none'
+        statuses = _statuses(resumed)
+        assert all(statuses[name] == 'cached' for name in CACHED_STAGES)
+        assert results['status'] == 'completed'
+        assert resumed.cache.read_run_state()['status'] == 'completed'
+        assert len(resumed.model.model.estimators_) == 12
+
+    print("✅ Reprise du pipeline OK")
+
+
+if __name__ == "__main__":
+    test_code_fingerprint()
+    test_stage_cache()
+    test_pipeline_resume()
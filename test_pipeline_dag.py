@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Test de l'exécuteur en graphe : parallélisme, dépendances et propagation des échecs
+"""
+
+import time
+
+from pipeline_dag import StageGraph, StageFailedError
+
+
+def test_stage_graph():
+    """Étapes indépendantes simultanées, dépendantes annulées après un échec"""
+    print("🕸️ Test de l'exécuteur d'étapes...")
+
+    # Trois étapes de 0.2s indépendantes + une dépendante : ~0.4s au lieu de 0.8s
+    graph = StageGraph()
+    for name in ('evaluate', 'features', 'save'):
+        graph.add(name, lambda name=name: time.sleep(0.2) or name)
+    graph.add('smoke', lambda: 'ok', deps=['save'])
+
+    start = time.perf_counter()
+    outputs = graph.run()
+    elapsed = time.perf_counter() - start
+    print(f"Durée: {elapsed:.2f}s")
+    assert outputs == {'evaluate': 'evaluate', 'features': 'features', 'save': 'save', 'smoke': 'ok'}
+    assert elapsed < 0.6
+
+    # Échec : les dépendantes sont annulées, les indépendantes terminent
+    graph = StageGraph()
+    graph.add('save', lambda: 1 / 0)
+    graph.add('smoke', lambda: 'ok', deps=['save'])
+    graph.add('evaluate', lambda: 'done')
+    try:
+        graph.run()
+        raise AssertionError("échec non propagé")
+    except StageFailedError as e:
+        assert list(e.failures) == ['save']
+    assert graph.status == {'save': 'failed', 'evaluate': 'done', 'smoke': 'skipped'}
+
+    print("✅ Exécuteur d'étapes OK")
+
+
+if __name__ == "__main__":
+    test_stage_graph()
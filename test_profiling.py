@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Test du profilage par étape : temps, pic mémoire, imbrication et profil détaillé
+"""
+
+import os
+import tempfile
+import threading
+
+import numpy as np
+
+from profiling import StageProfiler
+
+
+def test_stage_profiler():
+    """Mesure des étapes imbriquées et simultanées"""
+    print("⏱️  Test du profilage par étape...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        profiler = StageProfiler(deep_profile_dir=tmp)
+
+        with profiler.stage('train'):
+            with profiler.stage('alloc'):
+                block = np.ones(64 * 1024 * 1024 // 8)  # 64 Mo écrits
+                del block
+            with profiler.stage('compute'):
+                sum(i * i for i in range(200000))
+
+        barrier = threading.Barrier(2)
+
+        def worker(name):
+            with profiler.stage(name):
+                barrier.wait()
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in ('evaluate', 'save')]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        report = profiler.to_dict()
+        stages = {r['stage']: r for r in report['stages']}
+        assert [r['stage'] for r in report['stages']][:3] == ['train', 'train/alloc', 'train/compute']
+        assert stages['train']['wall_time_s'] >= stages['train/compute']['wall_time_s'] > 0
+        assert stages['train/compute']['cpu_time_s'] > 0
+        if stages['train/alloc']['peak_rss_delta_mb'] is not None:
+            assert stages['train/alloc']['peak_rss_delta_mb'] > 50
+            assert stages['train']['peak_rss_delta_mb'] > 50
+            # Remise à zéro du pic : l'allocation n'est pas imputée à l'étape suivante
+            if report['peak_rss_method'] == 'per_stage_reset':
+                assert stages['train/compute']['peak_rss_delta_mb'] < 50
+        assert stages['evaluate']['concurrent'] and stages['save']['concurrent']
+        assert not stages['train']['concurrent']
+
+        # Profil détaillé pour les étapes de premier niveau uniquement
+        assert os.path.exists(stages['train']['deep_profile'])
+        assert 'deep_profile' not in stages['train/alloc']
+        profiler.print_summary()
+
+    print("✅ Profilage par étape OK")
+
+
+if __name__ == "__main__":
+    test_stage_profiler()
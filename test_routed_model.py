@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Test du modèle routé par préfixe DTC : routage, réentraînement sélectif et prédiction
+"""
+
+import os
+import tempfile
+
+from dtc_router import DTCRouter, FALLBACK_ROUTE
+from routed_model import RoutedPCAModel, load_routed_data
+from predict import PCAPredictor
+
+
+def test_routed_model():
+    """Planifie les routes, entraîne, réentraîne sans changement puis prédit"""
+    print("🧭 Test du modèle routé...")
+
+    codes = ['P0300'] * 3 + ['P0301'] * 2 + ['P1234', 'P2000', 'P1999', 'B0001']
+    router = DTCRouter.plan(codes, depth=3, min_samples=3)
+    assert router.routes == {FALLBACK_ROUTE, 'P03', 'P'}
+    assert router.route('p0-310') == 'P03'
+    assert router.route('P1999') == 'P'
+    assert router.route('U0100') == FALLBACK_ROUTE
+
+    codes, X, y = load_routed_data('data/gim_diagnostic_dataset.csv')
+    with tempfile.TemporaryDirectory() as tmp:
+        routed = RoutedPCAModel(tmp, route_depth=3, min_route_samples=100)
+        routed.rf_params['n_estimators'] = 10
+        first = routed.train(codes, X, y)
+        assert FALLBACK_ROUTE in first['trained_routes'] and len(first['trained_routes']) > 2
+        # routes.json remplacé d'un bloc : aucun fichier temporaire laissé
+        assert not [name for name in os.listdir(tmp) if '.tmp' in name]
+
+        # Données inchangées : aucune route réentraînée, même version
+        reopened = RoutedPCAModel(tmp)
+        second = reopened.train(codes, X, y)
+        assert second['trained_routes'] == [] and second['version'] == first['version']
+
+        predictor = PCAPredictor(backend='routed', model_dir=tmp)
+        predictor.load_model()
+        models = reopened.load()
+        code = codes.iloc[0]
+        result = predictor.predict_single(code, 'Engine misfiring randomly', 'Faulty spark plugs')
+        route = reopened.router.route(code)
+        assert result['route'] == route and result['model_version'] == first['version']
+        model = models[route]
+        processed = predictor.preprocess_input(code, 'Engine misfiring randomly', 'Faulty spark plugs')
+        expected = model.label_encoder.inverse_transform(model.model.predict(model.transform([processed])))[0]
+        assert result['predicted_pca'] == expected
+
+    print("✅ Modèle routé OK")
+
+
+if __name__ == "__main__":
+    test_routed_model()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Test du scoring fantôme : file bornée, abandons, résumé et rejeu des lots
+"""
+
+import os
+import json
+import tempfile
+import threading
+
+from predict import PCAPredictor, TRANSFORMERS_AVAILABLE
+from shadow_scoring import ShadowScorer
+
+if TRANSFORMERS_AVAILABLE:
+    from test_distilbert_inference import make_tiny_checkpoint, BATCH_EXAMPLES
+
+
+class BlockingPredictor:
+    """Prédicteur candidat minimal qui attend un signal avant de répondre"""
+
+    def __init__(self, answer: str = 'Replace spark plugs', fail: bool = False):
+        self.is_loaded = True
+        self.answer = answer
+        self.fail = fail
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def predict_single(self, code_dtc, description, root_cause='', return_probabilities=True):
+        self.started.set()
+        self.release.wait()
+        if self.fail:
+            return {'error': 'modèle candidat indisponible'}
+        return {'predicted_pca': self.answer, 'confidence': 0.5, 'model_version': 'candidate'}
+
+
+EXAMPLE = {'code_dtc': 'P0300', 'description': 'Engine misfiring randomly', 'root_cause': 'Faulty spark plugs'}
+PRIMARY = {'predicted_pca': 'Replace spark plugs', 'confidence': 0.75, 'model_version': 'primary'}
+
+
+def test_shadow_scorer():
+    """File bornée : surplus abandonné et compté, métriques et résumé écrits"""
+    print("👥 Test du scoring fantôme...")
+
+    try:
+        ShadowScorer(BlockingPredictor(), sample_rate=1.5)
+        raise AssertionError("Un taux d'échantillonnage hors [0, 1] doit être refusé")
+    except ValueError:
+        pass
+
+    with tempfile.TemporaryDirectory() as tmp:
+        metrics_path = os.path.join(tmp, 'shadow', 'metrics.jsonl')
+        candidate = BlockingPredictor()
+        scorer = ShadowScorer(candidate, sample_rate=1.0, queue_size=2,
+                              metrics_path=metrics_path, summary_every=2)
+
+        # Le thread bloque sur la première requête : deux autres remplissent la file
+        assert scorer.submit(EXAMPLE, PRIMARY, 0.010)
+        assert candidate.started.wait(5)
+        assert scorer.submit(EXAMPLE, PRIMARY, 0.020)
+        assert scorer.submit(EXAMPLE, PRIMARY, 0.030)
+        assert not scorer.submit(EXAMPLE, PRIMARY, 0.040)
+        assert not scorer.submit(EXAMPLE, dict(PRIMARY, predicted_pca='Other'), 0.050)
+        assert (scorer.n_sampled, scorer.n_dropped) == (5, 2)
+
+        candidate.release.set()
+        summary = scorer.close()
+        assert summary['sampled'] == 5 and summary['dropped'] == 2
+        assert summary['scored'] == 3 and summary['failed'] == 0
+        assert summary['agreement_rate'] == 1.0
+        assert abs(summary['confidence_delta']['mean'] + 0.25) < 1e-9
+        assert abs(summary['primary_latency']['p50_ms'] - 20.0) < 1e-6
+
+        with open(metrics_path, 'r', encoding='utf-8') as f:
+            records = [json.loads(line) for line in f]
+        assert len(records) == 3
+        assert records[0]['primary_version'] == 'primary' and records[0]['shadow_version'] == 'candidate'
+        with open(scorer.summary_path, 'r', encoding='utf-8') as f:
+            assert json.load(f)['dropped'] == 2
+
+        # Échantillonnage nul : rien n'est rejoué
+        idle = ShadowScorer(candidate, sample_rate=0.0, metrics_path=os.path.join(tmp, 'idle.jsonl'))
+        assert not idle.submit(EXAMPLE, PRIMARY, 0.010)
+        assert idle.close()['sampled'] == 0
+
+        # Candidat en erreur : compté comme échec, sans arrêter le thread
+        failing = BlockingPredictor(fail=True)
+        failing.release.set()
+        scorer = ShadowScorer(failing, sample_rate=1.0, metrics_path=os.path.join(tmp, 'failing.jsonl'))
+        scorer.submit(EXAMPLE, PRIMARY, 0.010)
+        scorer.submit(EXAMPLE, PRIMARY, 0.010)
+        summary = scorer.close()
+        assert summary['failed'] == 2 and summary['scored'] == 0 and summary['agreement_rate'] is None
+
+        # Arrêt sans vidage : les requêtes en file sont abandonnées
+        blocked = BlockingPredictor()
+        scorer = ShadowScorer(blocked, sample_rate=1.0, metrics_path=os.path.join(tmp, 'nodrain.jsonl'))
+        scorer.submit(EXAMPLE, PRIMARY, 0.010)
+        assert blocked.started.wait(5)
+        scorer.submit(EXAMPLE, PRIMARY, 0.010)
+        threading.Timer(0.1, blocked.release.set).start()
+        assert scorer.close(drain=False)['scored'] == 1
+
+    print("✅ Scoring fantôme OK")
+
+
+def test_shadow_batch_mirroring():
+    """predict_batch DistilBERT rejoue chaque exemple valide sur le candidat"""
+    print("👥 Test du rejeu fantôme des lots...")
+
+    if not TRANSFORMERS_AVAILABLE:
+        print("⚠️ transformers/torch non installés - test ignoré")
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        checkpoint = os.path.join(tmp, 'distilbert_pca_model')
+        make_tiny_checkpoint(checkpoint)
+        primary = PCAPredictor(backend='distilbert', checkpoint_dir=checkpoint)
+        primary.load_model()
+        scorer = primary.enable_shadow(PCAPredictor(backend='distilbert', checkpoint_dir=checkpoint),
+                                       sample_rate=1.0, metrics_path=os.path.join(tmp, 'shadow.jsonl'))
+
+        results = primary.predict_batch(BATCH_EXAMPLES)
+        n_valid = sum('error' not in r for r in results)
+        summary = primary.disable_shadow()
+        assert primary.shadow is None
+        assert summary['sampled'] == n_valid == len(BATCH_EXAMPLES) - 1
+        assert summary['scored'] == n_valid and summary['agreement_rate'] == 1.0
+        assert abs(summary['confidence_delta']['mean_abs']) < 1e-5
+        with open(scorer.metrics_path, 'r', encoding='utf-8') as f:
+            shadowed = [json.loads(line)['input'] for line in f]
+        assert sorted(e['description'] for e in shadowed) == sorted(
+            e['description'] for e, r in zip(BATCH_EXAMPLES, results) if 'error' not in r)
+
+    print("✅ Rejeu fantôme des lots OK")
+
+
+if __name__ == "__main__":
+    test_shadow_scorer()
+    test_shadow_batch_mirroring()
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Test de l'évaluation en flux : même rapport que l'évaluation en mémoire
+"""
+
+import numpy as np
+
+from preprocessing import TextPreprocessor
+from train_model import PCAPredictionModel
+from streaming_evaluation import evaluate_streaming
+
+
+def test_streaming_evaluation():
+    """Compare evaluate() et evaluate_streaming() par blocs de 37 exemples"""
+    print("🌊 Test de l'évaluation en flux...")
+
+    _, X, y = TextPreprocessor().load_and_preprocess_data('data/gim_diagnostic_dataset.csv')
+    model = PCAPredictionModel()
+    model.rf_params['n_estimators'] = 20
+    X_train, X_test, y_train, y_test = model.prepare_data(X, y)
+    model.train(X_train, y_train, validation='none')
+
+    reference = model.evaluate(X_test, y_test)
+
+    labels = model.label_encoder.inverse_transform(y_test)
+    chunks = ((X_test[i:i + 37], labels[i:i + 37]) for i in range(0, len(X_test), 37))
+    streamed = evaluate_streaming(model, chunks, top_k=(1, 5))
+
+    assert streamed['accuracy'] == reference['accuracy']
+    assert streamed['classification_report'] == reference['classification_report']
+    assert np.array_equal(streamed['confusion_matrix'], reference['confusion_matrix'])
+    assert streamed['top_k_accuracy'][1] == reference['accuracy']
+    assert streamed['top_k_accuracy'][5] >= streamed['top_k_accuracy'][1]
+    assert streamed['n_chunks'] == -(-len(X_test) // 37)
+    print(f"Top-5: {streamed['top_k_accuracy'][5]:.4f}")
+
+    print("✅ Évaluation en flux OK")
+
+
+if __name__ == "__main__":
+    test_streaming_evaluation()
@@ -9,7 +9,9 @@ import pandas as pd
 import numpy as np
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.ensemble import RandomForestClassifier
-from sklearn.model_selection import train_test_split, cross_val_score, GridSearchCV
+from sklearn.decomposition import TruncatedSVD
+from sklearn.feature_selection import SelectKBest, chi2
+from sklearn.model_selection import train_test_split
 from sklearn.metrics import classification_report, confusion_matrix, accuracy_score
 from sklearn.preprocessing import LabelEncoder
 import joblib
@@ -18,6 +20,21 @@ from typing import Tuple, Dict, Any
 import matplotlib.pyplot as plt
 import seaborn as sns
 from preprocessing import TextPreprocessor
+from model_compaction import CompactForest
+from model_bundle import ModelBundle, texts_sha256, REDUCER_FILE
+from parallel_cv import SharedMemoryCV
+from document_frequency import DocumentFrequencyStore
+from profiling import profile_stage
+
+
+# Artefact du store de fréquences de termes dans le bundle
+DF_STORE_FILE = 'df_store.pkl'
+
+# Réductions de dimension entre TF-IDF et forêt : sélection chi2 ou projection SVD
+REDUCTION_METHODS = ('chi2', 'svd')
+
+# Modes d'estimation de l'accuracy pendant l'entraînement
+VALIDATION_METHODS = ('oob', 'cv', 'none')
 
 
 class PCAPredictionModel:
@@ -37,6 +54,12 @@ class PCAPredictionModel:
         self.model = None
         self.label_encoder = None
         self.is_trained = False
+        self.training_data_hash = None
+        self.model_version = None
+        self.df_store = None
+        self.reducer = None
+        # StageProfiler optionnel : temps réel/CPU et pic mémoire des sous-étapes
+        self.profiler = None
         
         # Paramètres TF-IDF
         self.tfidf_params = {
@@ -56,6 +79,43 @@ class PCAPredictionModel:
             'random_state': self.random_state,
             'n_jobs': -1
         }
+        
+        # Réduction de dimension optionnelle ('chi2', 'svd' ou None)
+        self.reduction_params = {
+            'method': None,
+            'n_components': 1000
+        }
+    
+    def update_params(self, tfidf_params: Dict[str, Any] = None,
+                      rf_params: Dict[str, Any] = None,
+                      reduction_params: Dict[str, Any] = None) -> None:
+        """
+        Met à jour les paramètres TF-IDF / RandomForest (ex: best_params.json de la recherche)
+        
+        Les clés inconnues sont ignorées : seules celles définies dans
+        tfidf_params / reduction_params et les paramètres du RandomForest
+        sont reprises (un manifest peut en contenir d'autres).
+        
+        Args:
+            tfidf_params (Dict[str, Any]): Paramètres TF-IDF à remplacer
+            rf_params (Dict[str, Any]): Paramètres RandomForest à remplacer
+            reduction_params (Dict[str, Any]): Paramètres de réduction de dimension à remplacer
+        """
+        if tfidf_params:
+            tfidf_params = {k: v for k, v in tfidf_params.items() if k in self.tfidf_params}
+            # JSON ne connaît pas les tuples
+            if 'ngram_range' in tfidf_params:
+                tfidf_params['ngram_range'] = tuple(tfidf_params['ngram_range'])
+            self.tfidf_params.update(tfidf_params)
+        if rf_params:
+            rf_keys = RandomForestClassifier().get_params()
+            self.rf_params.update({k: v for k, v in rf_params.items() if k in rf_keys})
+        if reduction_params:
+            reduction_params = {k: v for k, v in reduction_params.items() if k in self.reduction_params}
+            if reduction_params.get('method') not in (None,) + REDUCTION_METHODS:
+                raise ValueError(f"Méthode de réduction non supportée: {reduction_params['method']} "
+                                 f"(choix: {REDUCTION_METHODS})")
+            self.reduction_params.update(reduction_params)
     
     def create_vectorizer(self) -> TfidfVectorizer:
         """
@@ -75,6 +135,37 @@ class PCAPredictionModel:
         """
         return RandomForestClassifier(**self.rf_params)
     
+    def create_reducer(self, n_features: int):
+        """
+        Crée le réducteur de dimension configuré
+        
+        Args:
+            n_features (int): Nombre de colonnes TF-IDF
+            
+        Returns:
+            SelectKBest, TruncatedSVD ou None si aucune réduction n'est demandée
+        """
+        method = self.reduction_params['method']
+        n_components = self.reduction_params['n_components']
+        if method is None or n_components >= n_features:
+            return None
+        if method == 'chi2':
+            return SelectKBest(chi2, k=n_components)
+        return TruncatedSVD(n_components=n_components, random_state=self.random_state)
+    
+    def transform(self, texts) -> Any:
+        """
+        Vectorise des textes préprocessés et applique la réduction éventuelle
+        
+        Args:
+            texts: Textes préprocessés
+            
+        Returns:
+            Matrice de features attendue par la forêt
+        """
+        X_tfidf = self.vectorizer.transform(texts)
+        return self.reducer.transform(X_tfidf) if self.reducer is not None else X_tfidf
+    
     def prepare_data(self, X: pd.Series, y: pd.Series, test_size: float = 0.2) -> Tuple:
         """
         Prépare les données pour l'entraînement
@@ -104,51 +195,123 @@ class PCAPredictionModel:
         
         return X_train, X_test, y_train, y_test
     
-    def train(self, X_train: pd.Series, y_train: np.ndarray) -> Dict[str, Any]:
+    def _fit_features(self, X_train, y_train: np.ndarray) -> Tuple[Any, Any]:
+        """
+        Ajuste la chaîne de features sur le corpus d'entraînement
+
+        Enregistre le hash des données et ajuste vectoriseur, réducteur
+        éventuel (sur le train uniquement) et store de fréquences ; partagé
+        par l'entraînement normal, distribué et distillé.
+
+        Args:
+            X_train: Textes d'entraînement
+            y_train (np.ndarray): Labels encodés (utilisés par la réduction chi2)
+
+        Returns:
+            Tuple: (matrice TF-IDF, matrice de features après réduction éventuelle)
+        """
+        self.training_data_hash = texts_sha256(X_train, y_train)
+
+        self.vectorizer = self.create_vectorizer()
+        with profile_stage(self.profiler, 'tfidf'):
+            X_tfidf = self.vectorizer.fit_transform(X_train)
+
+        X_features = X_tfidf
+        self.reducer = self.create_reducer(X_tfidf.shape[1])
+        if self.reducer is not None:
+            print(f"Réduction {self.reduction_params['method']}: "
+                  f"{X_tfidf.shape[1]} -> {self.reduction_params['n_components']} dimensions")
+            with profile_stage(self.profiler, 'reduction'):
+                X_features = self.reducer.fit_transform(X_tfidf, y_train)
+
+        # Compteurs bruts par terme : IDF et vocabulaire recalculables sans relire le corpus
+        with profile_stage(self.profiler, 'df_store'):
+            self.df_store = DocumentFrequencyStore.from_texts(X_train, self.tfidf_params)
+
+        return X_tfidf, X_features
+    
+    def train(self, X_train: pd.Series, y_train: np.ndarray,
+              validation: str = 'oob') -> Dict[str, Any]:
         """
         Entraîne le modèle complet (vectorisation + classification)
         
         Args:
             X_train (pd.Series): Textes d'entraînement
             y_train (np.ndarray): Labels d'entraînement
+            validation (str): Estimation de l'accuracy : 'oob' (out-of-bag, sans
+                réentraînement), 'cv' (validation croisée 5 plis, 5 forêts de plus)
+                ou 'none'
             
         Returns:
             Dict[str, Any]: Métriques d'entraînement
         """
+        if validation not in VALIDATION_METHODS:
+            raise ValueError(f"Mode de validation non supporté: {validation} (choix: {VALIDATION_METHODS})")
+        
         print("=== DÉBUT DE L'ENTRAÎNEMENT ===")
         
-        # 1. Vectorisation TF-IDF
+        # 1. Vectorisation TF-IDF et réduction de dimension optionnelle
         print("Vectorisation TF-IDF...")
-        self.vectorizer = self.create_vectorizer()
-        X_train_tfidf = self.vectorizer.fit_transform(X_train)
+        X_train_unreduced, X_train_tfidf = self._fit_features(X_train, y_train)
         
-        print(f"Matrice TF-IDF: {X_train_tfidf.shape}")
+        print(f"Matrice TF-IDF: {X_train_unreduced.shape}")
         print(f"Vocabulaire: {len(self.vectorizer.vocabulary_)} mots")
         
         # 2. Entraînement du classificateur
         print("Entraînement du RandomForestClassifier...")
         self.model = self.create_classifier()
-        self.model.fit(X_train_tfidf, y_train)
-        
-        # 3. Validation croisée
-        print("Validation croisée...")
-        cv_scores = cross_val_score(
-            self.model, X_train_tfidf, y_train, 
-            cv=5, scoring='accuracy', n_jobs=-1
-        )
-        
-        self.is_trained = True
+        if validation == 'oob':
+            self.model.set_params(oob_score=True)
+        with profile_stage(self.profiler, 'forest_fit'):
+            self.model.fit(X_train_tfidf, y_train)
         
         # Métriques d'entraînement
         train_metrics = {
-            'cv_mean_accuracy': cv_scores.mean(),
-            'cv_std_accuracy': cv_scores.std(),
-            'cv_scores': cv_scores.tolist(),
+            'validation_method': validation,
+            'validation_accuracy': None,
             'vocabulary_size': len(self.vectorizer.vocabulary_),
-            'tfidf_shape': X_train_tfidf.shape
+            'tfidf_shape': X_train_tfidf.shape,
+            'reduction': dict(self.reduction_params) if self.reducer is not None else None
         }
         
-        print(f"Accuracy moyenne (CV): {train_metrics['cv_mean_accuracy']:.4f} (+/- {train_metrics['cv_std_accuracy']*2:.4f})")
+        # 3. Validation
+        if validation == 'oob':
+            # Chaque exemple est évalué par les arbres qui ne l'ont pas vu (bootstrap)
+            train_metrics['oob_accuracy'] = self.model.oob_score_
+            train_metrics['validation_accuracy'] = self.model.oob_score_
+            # Matrice n_samples x n_classes inutile à l'inférence : ne pas l'embarquer dans model.pkl
+            del self.model.oob_decision_function_
+            print(f"Accuracy out-of-bag: {train_metrics['oob_accuracy']:.4f}")
+        
+        elif validation == 'cv':
+            print("Validation croisée...")
+            # Matrice écrite une fois et projetée par les workers, threads plis x arbres bornés ;
+            # la réduction (chi2 supervisée) est réajustée dans chaque pli, sans voir le pli de test
+            thread_budget = self.rf_params.get('n_jobs')
+            with profile_stage(self.profiler, 'cross_validation'):
+                cv_result = SharedMemoryCV(n_splits=5, thread_budget=thread_budget).run(
+                    self.rf_params, X_train_unreduced, y_train,
+                    reducer=self.create_reducer(X_train_unreduced.shape[1])
+                )
+            cv_scores = cv_result['scores']
+            train_metrics.update({
+                'cv_mean_accuracy': cv_scores.mean(),
+                'cv_std_accuracy': cv_scores.std(),
+                'cv_scores': cv_scores.tolist(),
+                'cv_folds': cv_result['folds'],
+                'cv_schedule': {
+                    'parallel_folds': cv_result['parallel_folds'],
+                    'threads_per_fold': cv_result['threads_per_fold'],
+                    'wall_time_s': cv_result['wall_time_s']
+                },
+                'validation_accuracy': cv_scores.mean()
+            })
+            for fold in cv_result['folds']:
+                print(f"  Pli {fold['fold'] + 1}: accuracy {fold['accuracy']:.4f}, "
+                      f"fit {fold['fit_time_s']:.1f}s, prédiction {fold['predict_time_s']:.2f}s")
+            print(f"Accuracy moyenne (CV): {train_metrics['cv_mean_accuracy']:.4f} (+/- {train_metrics['cv_std_accuracy']*2:.4f})")
+        
+        self.is_trained = True
         
         return train_metrics
     
@@ -169,11 +332,13 @@ class PCAPredictionModel:
         print("=== ÉVALUATION DU MODÈLE ===")
         
         # Vectorisation des données de test
-        X_test_tfidf = self.vectorizer.transform(X_test)
+        with profile_stage(self.profiler, 'tfidf_transform'):
+            X_test_tfidf = self.transform(X_test)
         
         # Prédictions
-        y_pred = self.model.predict(X_test_tfidf)
-        y_pred_proba = self.model.predict_proba(X_test_tfidf)
+        with profile_stage(self.profiler, 'predict'):
+            y_pred = self.model.predict(X_test_tfidf)
+            y_pred_proba = self.model.predict_proba(X_test_tfidf)
         
         # Métriques
         accuracy = accuracy_score(y_test, y_pred)
@@ -198,10 +363,11 @@ class PCAPredictionModel:
         evaluation_metrics = {
             'accuracy': accuracy,
             'classification_report': class_report,
-            'confusion_matrix': conf_matrix.tolist(),
-            'predictions': y_pred_labels.tolist(),
-            'true_labels': y_test_labels.tolist(),
-            'prediction_probabilities': y_pred_proba.tolist()
+            # Tableaux numpy : sauvegardés à part (evaluation_store), pas en listes JSON
+            'confusion_matrix': conf_matrix,
+            'predictions': y_pred_labels,
+            'true_labels': y_test_labels,
+            'prediction_probabilities': y_pred_proba
         }
         
         return evaluation_metrics
@@ -221,6 +387,11 @@ class PCAPredictionModel:
         
         # Récupération des noms des features
         feature_names = self.vectorizer.get_feature_names_out()
+        if isinstance(self.reducer, SelectKBest):
+            feature_names = feature_names[self.reducer.get_support()]
+        elif self.reducer is not None:
+            # Composantes SVD : combinaisons de termes, nommées par leur indice
+            feature_names = np.array([f"svd_{i}" for i in range(self.reducer.n_components)])
         
         # Importance des features
         importances = self.model.feature_importances_
@@ -233,34 +404,61 @@ class PCAPredictionModel:
         
         return dict(sorted_features[:top_n])
     
-    def save_model(self, model_dir: str = 'models') -> None:
+    def save_model(self, model_dir: str = 'models', compact: bool = False,
+                   parent_version: str = None) -> str:
         """
-        Sauvegarde le modèle et le vectoriseur
+        Sauvegarde le modèle, le vectoriseur et l'encodeur sous forme de bundle versionné
         
         Args:
             model_dir (str): Répertoire de sauvegarde
+            compact (bool): Si True, sauvegarde la forêt au format compact (CompactForest)
+            parent_version (str): Version dont ce modèle est dérivé (optionnel)
+            
+        Returns:
+            str: Version du modèle sauvegardé
         """
         if not self.is_trained:
             raise ValueError("Le modèle doit être entraîné avant la sauvegarde")
         
-        os.makedirs(model_dir, exist_ok=True)
+        model_to_save = CompactForest.from_forest(self.model) if compact else self.model
         
-        # Sauvegarde du modèle
-        model_path = os.path.join(model_dir, 'model.pkl')
-        joblib.dump(self.model, model_path)
+        # Artefacts + manifest (version, hash des données, hash des fichiers)
+        bundle = ModelBundle.create(
+            model_dir, model_to_save, self.vectorizer, self.label_encoder,
+            feature_config=self.get_feature_config(compact),
+            training_data_hash=self.training_data_hash,
+            parent_version=parent_version,
+            extra_artifacts=self._extra_artifacts()
+        )
+        self.model_version = bundle.version
         
-        # Sauvegarde du vectoriseur
-        vectorizer_path = os.path.join(model_dir, 'vectorizer.pkl')
-        joblib.dump(self.vectorizer, vectorizer_path)
+        print(f"Modèle sauvegardé dans {model_dir}/ (version {bundle.version})")
+        for name in bundle.manifest['files']:
+            print(f"- {bundle.path(name)}")
         
-        # Sauvegarde de l'encodeur de labels
-        label_encoder_path = os.path.join(model_dir, 'label_encoder.pkl')
-        joblib.dump(self.label_encoder, label_encoder_path)
+        return bundle.version
+    
+    def _extra_artifacts(self) -> Dict[str, Any]:
+        """Artefacts optionnels du bundle (store de fréquences, réducteur)"""
+        artifacts = {DF_STORE_FILE: self.df_store, REDUCER_FILE: self.reducer}
+        return {name: obj for name, obj in artifacts.items() if obj is not None} or None
+    
+    def get_feature_config(self, compact: bool = False) -> Dict[str, Any]:
+        """
+        Retourne la configuration des features et du modèle pour le manifest
         
-        print(f"Modèle sauvegardé dans {model_dir}/")
-        print(f"- {model_path}")
-        print(f"- {vectorizer_path}")
-        print(f"- {label_encoder_path}")
+        Args:
+            compact (bool): Si la forêt est sauvegardée au format compact
+            
+        Returns:
+            Dict[str, Any]: Configuration sérialisable
+        """
+        return {
+            'tfidf_params': self.tfidf_params,
+            'rf_params': self.rf_params,
+            'reduction_params': self.reduction_params if self.reducer is not None else None,
+            'compact': compact
+        }
     
     def load_model(self, model_dir: str = 'models') -> None:
         """
@@ -276,6 +474,21 @@ class PCAPredictionModel:
         if not all(os.path.exists(path) for path in [model_path, vectorizer_path, label_encoder_path]):
             raise FileNotFoundError("Fichiers du modèle manquants")
         
+        # Vérification d'intégrité avant désérialisation (bundles versionnés)
+        self.reducer = None
+        if ModelBundle.exists(model_dir):
+            bundle = ModelBundle.open(model_dir)
+            bundle.validate()
+            self.model_version = bundle.version
+            self.training_data_hash = bundle.manifest.get('training_data_hash')
+            feature_config = bundle.manifest.get('feature_config') or {}
+            self.update_params(feature_config.get('tfidf_params'), feature_config.get('rf_params'),
+                               feature_config.get('reduction_params'))
+            if DF_STORE_FILE in bundle.manifest['files']:
+                self.df_store = joblib.load(bundle.path(DF_STORE_FILE))
+            if REDUCER_FILE in bundle.manifest['files']:
+                self.reducer = joblib.load(bundle.path(REDUCER_FILE))
+        
         self.model = joblib.load(model_path)
         self.vectorizer = joblib.load(vectorizer_path)
         self.label_encoder = joblib.load(label_encoder_path)